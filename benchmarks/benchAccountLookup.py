@@ -0,0 +1,50 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: accountService.getAccountAuthInfo() latency vs number of provisioned accounts
+#    the credential cache is left enabled so the time measured is the account lookup, not sha512_crypt
+#    the linear UserName scan that getAccountAuthInfo used before the username index is timed for comparison
+#
+# usage:   python3 benchmarks/benchAccountLookup.py [-n <callsPerPoint>]
+
+import sys
+import getopt
+from benchUtils import rdBenchRootData, rdBenchTimeit
+
+def main(argv):
+    calls=2000
+    opts, args = getopt.getopt(argv[1:], "n:")
+    for opt, arg in opts:
+        if opt == "-n":
+            calls=int(arg)
+
+    from reddrum_frontend.accountService import RfAccountService
+    rdr=rdBenchRootData()
+    acctSvc=RfAccountService(rdr)
+
+    print("{:>10} {:>18} {:>18}".format("accounts", "indexed usec/auth", "scan usec/lookup"))
+    for numAccounts in (10, 100, 1000, 10000, 50000):
+        # provision accounts directly in the db, then rebuild the volatile dicts and username index
+        for i in range(len(acctSvc.accountsDb), numAccounts):
+            accountid="benchuser{}".format(i)
+            acctSvc.accountsDb[accountid]={"UserName": accountid, "Password": "benchpasswd", "RoleId": "Operator",
+                                           "Enabled": True, "Deletable": True}
+        acctSvc.initializeAccountsDict(rdr)
+
+        # authenticate as the most recently added user--the worst case for the linear scan
+        username="benchuser{}".format(numAccounts-1)
+        acctSvc.getAccountAuthInfo(username, "benchpasswd")   # prime the credential cache
+        indexedUsec=rdBenchTimeit(lambda: acctSvc.getAccountAuthInfo(username, "benchpasswd"), calls)
+
+        def scanLookup():
+            for acctid in acctSvc.accountsDb:
+                if username == acctSvc.accountsDb[acctid]["UserName"]:
+                    return(acctid)
+        scanUsec=rdBenchTimeit(scanLookup, max(1, calls//10))
+        print("{:>10} {:>18.2f} {:>18.2f}".format(numAccounts, indexedUsec, scanUsec))
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,257 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark suite: cost of the authentication paths of the real RedDrum Flask app
+#    the app is created the same way rdStart_RedDrum_Flask_app does (rdCreate_RedDrum_Flask_app), without backend discovery,
+#    and driven two ways:
+#       inproc -- the Flask test client in this process (no HTTP server or socket)
+#       socket -- the RedDrum server (1 worker) in a forked process, over one keep-alive connection on 127.0.0.1
+#    the client sends one request at a time, so requests/sec is 1/latency for a single client
+#
+#    cases:
+#       unauth-root   -- GET /redfish/v1, no auth
+#       basic-get     -- GET /redfish/v1/SessionService with Basic auth (verified credential cache hits)
+#       token-get     -- GET /redfish/v1/SessionService with X-Auth-Token
+#       login-logout  -- POST a session, then DELETE it with its token.  (one op is both requests)
+#       basic-badpass -- Basic auth with a wrong password: full password verify, then 401.  (lockout threshold=0)
+#       basic-locked  -- Basic auth to an account locked by the service: 401 before the password verify
+#
+#    the suite sweeps the number of provisioned accounts and open sessions.  the user sending requests is always the
+#    last account added, and its session the last session added
+#
+# usage:   python3 benchmarks/benchAuthSuite.py [-s <secsPerCase>] [-a <accounts,...>] [-n <sessions,...>]
+#                                               [-t inproc|socket|both] [-o <results.json>]
+#    the results are printed as a table, and written as json to the -o file if given:
+#       { "Config": {...}, "Results": [ {"Transport", "Case", "Accounts", "Sessions", "Ops", "OpsPerSec",
+#                                        "P50Ms", "P99Ms", "Errors"}, ... ] }
+
+import sys
+import os
+import time
+import json
+import signal
+import getopt
+import platform
+import contextlib
+import http.client
+import multiprocessing
+from benchUtils import rdBenchApp, rdBenchBasicAuthHdr
+
+benchPassword="Bench-passw0rd"
+benchRoot="/redfish/v1/SessionService"
+sessionsUri="/redfish/v1/SessionService/Sessions"
+caseNames=("unauth-root", "basic-get", "token-get", "login-logout", "basic-badpass", "basic-locked")
+
+
+# create the app and provision numAccounts accounts and numSessions sessions
+#   returns: rdr, app, username, authtoken
+def setupApp(numAccounts, numSessions, port):
+    from reddrum_frontend.generateId import rfGenerateId
+    rdr,app=rdBenchApp({"passwordHashWorkers": 0, "serverWorkers": 1, "serverThreads": 4, "serverKeepAliveTimeout": 30})
+    rdr.rdPort=port
+    rdr.printLogMsgs=False
+    root=rdr.root
+
+    # accounts: all get the same real sha512_crypt hash so a password verify does the full work
+    acctSvc=root.accountService
+    rc,passwdHash=acctSvc.passwordHasher.hash(benchPassword)
+    for i in range(numAccounts):
+        accountid="benchuser{}".format(i)
+        acctSvc.accountsDb[accountid]={"UserName": accountid, "Password": passwdHash, "RoleId": "Administrator",
+                                       "Enabled": True, "Deletable": True}
+    for accountid in ("benchbadpass", "benchlocked"):
+        acctSvc.accountsDb[accountid]={"UserName": accountid, "Password": passwdHash, "RoleId": "Administrator",
+                                       "Enabled": True, "Deletable": True}
+    acctSvc.initializeAccountsDict(rdr)
+    # a bad password never locks the account, and the locked account stays locked for the run
+    acctSvc.accountServiceDb["AccountLockoutThreshold"]=0
+    acctSvc.accountServiceDb["AccountLockoutDuration"]=86400
+    acctSvc.accountsDict["benchlocked"]["Locked"]=True
+    acctSvc.accountsDict["benchlocked"]["LockedTime"]=time.time()
+    username="benchuser{}".format(numAccounts-1)
+
+    # sessions
+    sessSvc=root.sessionService
+    sessSvc.sessionServiceDb["SessionTimeout"]=86400
+    for i in range(numSessions):
+        sessionid=rfGenerateId(leading="S",size=8)
+        authtoken=rfGenerateId(leading="A",size=16)
+        sessSvc.addSession(sessionid, {"UserName": username, "UserPrivileges": ["Login","ConfigureManager"],
+                   "AccountId": username, "X-Auth-Token": authtoken, "LocationUri": sessionsUri + "/" + sessionid,
+                   "LastAccessTime": int(time.time()), "UserPrivilegeMask": acctSvc.getRolePrivilegeMask("Administrator")})
+    return(rdr, app, username, authtoken)
+
+
+# the Flask test client, with the same request interface as the socket client
+class InprocClient():
+    def __init__(self, app):
+        self.client=app.test_client()
+
+    def request(self, method, uri, hdrs=None, body=None):
+        rsp=self.client.open(uri, method=method, headers=hdrs, json=body)
+        return(rsp.status_code, rsp.headers)
+
+    def close(self):
+        return(0)
+
+
+# one HTTP/1.1 keep-alive connection to the RedDrum server
+class SocketClient():
+    def __init__(self, port):
+        self.port=port
+        self.conn=http.client.HTTPConnection("127.0.0.1", port)
+
+    def request(self, method, uri, hdrs=None, body=None):
+        reqHdrs=dict(hdrs) if hdrs is not None else {}
+        if body is not None:
+            body=json.dumps(body)
+            reqHdrs["Content-Type"]="application/json"
+        self.conn.request(method, uri, body=body, headers=reqHdrs)
+        rsp=self.conn.getresponse()
+        rsp.read()
+        return(rsp.status, rsp.headers)
+
+    def close(self):
+        self.conn.close()
+        return(0)
+
+
+# returns the function that runs one op of a case.  the function returns True if the op got the expected status
+def caseOp(case, client, username, authtoken):
+    basicHdr=rdBenchBasicAuthHdr(username, benchPassword)
+    tokenHdr={"X-Auth-Token": authtoken}
+    if case == "unauth-root":
+        return(lambda: client.request("GET", "/redfish/v1")[0] == 200)
+    elif case == "basic-get":
+        return(lambda: client.request("GET", benchRoot, hdrs=basicHdr)[0] == 200)
+    elif case == "token-get":
+        return(lambda: client.request("GET", benchRoot, hdrs=tokenHdr)[0] == 200)
+    elif case == "login-logout":
+        def loginLogout():
+            status,hdrs=client.request("POST", sessionsUri, body={"UserName": username, "Password": benchPassword})
+            if status != 201:
+                return(False)
+            status,hdrs=client.request("DELETE", hdrs["Location"], hdrs={"X-Auth-Token": hdrs["X-Auth-Token"]})
+            return(status == 204)
+        return(loginLogout)
+    elif case == "basic-badpass":
+        badpassHdr=rdBenchBasicAuthHdr("benchbadpass", "wrong-" + benchPassword)
+        return(lambda: client.request("GET", benchRoot, hdrs=badpassHdr)[0] == 401)
+    elif case == "basic-locked":
+        lockedHdr=rdBenchBasicAuthHdr("benchlocked", benchPassword)
+        return(lambda: client.request("GET", benchRoot, hdrs=lockedHdr)[0] == 401)
+
+
+# run an op for secs.  returns a result dict
+#   the app prints a message for each auth failure, so stdout is discarded while the case runs
+def runCase(op, secs):
+    with open(os.devnull, "w") as devNull, contextlib.redirect_stdout(devNull):
+        return(runCaseLoop(op, secs))
+
+def runCaseLoop(op, secs):
+    op()    # warm up: fill the credential cache, first-request setup
+    latencies=[]
+    errors=0
+    startTime=time.perf_counter()
+    endTime=startTime + secs
+    while True:
+        opStartTime=time.perf_counter()
+        if op() is not True:
+            errors+=1
+        opEndTime=time.perf_counter()
+        latencies.append(opEndTime - opStartTime)
+        if opEndTime > endTime:
+            break
+    elapsed=time.perf_counter() - startTime
+    latencies.sort()
+    return({ "Ops": len(latencies), "OpsPerSec": round(len(latencies)/elapsed, 1),
+             "P50Ms": round(1000.0*latencies[len(latencies)//2], 3),
+             "P99Ms": round(1000.0*latencies[min(len(latencies)-1, int(len(latencies)*0.99))], 3),
+             "Errors": errors })
+
+
+def runServer(rdr, app):
+    from reddrum_frontend.redDrumServer import rdRunServer
+    sys.stdout=open(os.devnull, "w")
+    rdRunServer(rdr, app)
+
+def waitForServer(port):
+    for _ in range(100):
+        try:
+            conn=http.client.HTTPConnection("127.0.0.1", port)
+            conn.request("GET", "/redfish/v1")
+            conn.getresponse().read()
+            conn.close()
+            return(0)
+        except OSError:
+            time.sleep(0.1)
+    return(1)
+
+
+def runPoint(numAccounts, numSessions, transports, secs, port, results):
+    rdr,app,username,authtoken=setupApp(numAccounts, numSessions, port)
+    for transport in transports:
+        serverProcess=None
+        if transport == "inproc":
+            client=InprocClient(app)
+        else:
+            # fork the server after the accounts and sessions are provisioned
+            serverProcess=multiprocessing.get_context("fork").Process(target=runServer, args=(rdr, app))
+            serverProcess.start()
+            waitForServer(port)
+            client=SocketClient(port)
+        for case in caseNames:
+            result={"Transport": transport, "Case": case, "Accounts": numAccounts, "Sessions": numSessions}
+            result.update(runCase(caseOp(case, client, username, authtoken), secs))
+            results.append(result)
+            print("{:>7} {:>14} {:>9} {:>9} {:>10} {:>10} {:>10} {:>7}".format(transport, case, numAccounts, numSessions,
+                  result["OpsPerSec"], result["P50Ms"], result["P99Ms"], result["Errors"]))
+            sys.stdout.flush()
+        client.close()
+        if serverProcess is not None:
+            os.kill(serverProcess.pid, signal.SIGTERM)
+            serverProcess.join()
+    return(0)
+
+
+def main(argv):
+    secs=2
+    accountCounts=[1, 1000]
+    sessionCounts=[1, 1000]
+    transports=["inproc", "socket"]
+    outFile=None
+    port=5321
+    opts, args = getopt.getopt(argv[1:], "s:a:n:t:o:p:")
+    for opt, arg in opts:
+        if opt == "-s":
+            secs=float(arg)
+        elif opt == "-a":
+            accountCounts=[int(n) for n in arg.split(",")]
+        elif opt == "-n":
+            sessionCounts=[int(n) for n in arg.split(",")]
+        elif opt == "-t":
+            transports=["inproc", "socket"] if arg == "both" else [arg]
+        elif opt == "-o":
+            outFile=arg
+        elif opt == "-p":
+            port=int(arg)
+
+    print("{:>7} {:>14} {:>9} {:>9} {:>10} {:>10} {:>10} {:>7}".format("client", "case", "accounts", "sessions",
+          "ops/sec", "p50 ms", "p99 ms", "errors"))
+    results=[]
+    for numAccounts in accountCounts:
+        for numSessions in sessionCounts:
+            runPoint(max(1, numAccounts), max(1, numSessions), transports, secs, port, results)
+
+    if outFile is not None:
+        benchConfig={ "SecsPerCase": secs, "Python": platform.python_version(), "Platform": platform.platform(),
+                      "Cpus": os.cpu_count(), "Time": time.strftime("%Y-%m-%dT%H:%M:%S%z") }
+        with open(outFile, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"Config": benchConfig, "Results": results}, indent=4))
+        print("results written to {}".format(outFile))
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,88 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: the cold start budget of the Frontend, eg for a rack manager failover
+#    starts <count> new python processes.  each one times its startup phases, like redDrumMain.py --ProfileStartup,
+#    then the first and second GETs with Basic auth.  the first auth imports passlib (deferred from startup)
+#    the median of each phase is printed, with the process wall time:  python startup to the second GET and exit
+#    the first process has no base data snapshot, so it is reported on its own (cold) and not in the medians
+#
+# usage:   python3 benchmarks/benchColdStart.py [-c <count>]
+
+import sys
+import os
+import time
+import json
+import getopt
+import subprocess
+import statistics
+
+benchPhases=("import reddrum_frontend", "read RedDrum.conf", "RfServiceRoot", "route registration",
+             "first auth GET", "second auth GET")
+
+# run in the child process:  time the phases and print them as json
+def runChild(varDataPath):
+    phaseTimes=dict()
+    startTime=time.perf_counter()
+    def phaseEnd(phaseName):
+        nonlocal startTime
+        now=time.perf_counter()
+        phaseTimes[phaseName]=1000.0*(now-startTime)
+        startTime=now
+
+    from benchUtils import rdBenchRootData, rdBenchBasicAuthHdr
+    import contextlib
+    import io
+    from reddrum_frontend import RfServiceRoot, rdCreate_RedDrum_Flask_app
+    phaseEnd("import reddrum_frontend")
+    rdr=rdBenchRootData({"varDataPath": varDataPath, "passwordHashWorkers": 0, "credentialCacheTimeout": 0})
+    phaseEnd("read RedDrum.conf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        rdr.root=RfServiceRoot(rdr)
+        phaseEnd("RfServiceRoot")
+        app=rdCreate_RedDrum_Flask_app(rdr)
+        phaseEnd("route registration")
+    passlibAtReady="passlib" in sys.modules
+    client=app.test_client()
+    authHdr=rdBenchBasicAuthHdr("root", "password")
+    client.get("/redfish/v1/Systems", headers=authHdr)
+    phaseEnd("first auth GET")
+    client.get("/redfish/v1/Systems", headers=authHdr)
+    phaseEnd("second auth GET")
+    print(json.dumps({"Phases": phaseTimes, "PasslibAtReady": passlibAtReady}))
+    return(0)
+
+def main(argv):
+    count=5
+    opts, args = getopt.getopt(argv[1:], "c:", ["child="])
+    for opt, arg in opts:
+        if opt == "-c":
+            count=int(arg)
+        elif opt == "--child":
+            return(runChild(arg))
+
+    import tempfile
+    varDataPath=tempfile.mkdtemp(prefix="rdbench")
+    os.makedirs(os.path.join(varDataPath, "db"))
+    runs=list()
+    for run in range(count+1):
+        startTime=time.perf_counter()
+        output=subprocess.run([sys.executable, os.path.abspath(__file__), "--child=" + varDataPath],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout
+        wallMs=1000.0*(time.perf_counter()-startTime)
+        result=json.loads(output.decode("utf-8").strip().splitlines()[-1])
+        result["WallMs"]=wallMs
+        runs.append(result)
+
+    print("processes: {} (+1 cold),  passlib imported before ready: {}".format(count, runs[-1]["PasslibAtReady"]))
+    print("{:>26} {:>10} {:>10}".format("phase", "cold ms", "median ms"))
+    for phaseName in benchPhases:
+        print("{:>26} {:>10.1f} {:>10.1f}".format(phaseName, runs[0]["Phases"][phaseName],
+              statistics.median(r["Phases"][phaseName] for r in runs[1:])))
+    print("{:>26} {:>10.1f} {:>10.1f}".format("process wall", runs[0]["WallMs"], statistics.median(r["WallMs"] for r in runs[1:])))
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,85 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: Sessions and Subscriptions collection GET latency as the number of members grows
+#    the collections keep their Members array and json response in an RfCollectionView (collectionView.py)
+#    for each collection size:
+#       old build   -- usecs to build the Members array the way the collection GETs used to:
+#                      Members = Members + [newMember] for each member (a copy of the list per member)
+#       GET changed -- usecs per GET through the Flask test client after a member was added:  the response is
+#                      re-serialized once.  (the add is included)
+#       GET cached  -- usecs per GET with no change since the last GET:  the cached response is sent
+#
+# usage:   python3 benchmarks/benchCollectionViews.py [-n <members,...>] [-c <callsPerPoint>]
+
+import sys
+import time
+import getopt
+from benchUtils import rdBenchApp, rdBenchTimeit, rdBenchBasicAuthHdr
+
+sessionsUri="/redfish/v1/SessionService/Sessions"
+subscriptionsUri="/redfish/v1/EventService/Subscriptions"
+
+# the Members build the collection GETs used before the RfCollectionView
+def oldMembersBuild(memberUris):
+    members=[]
+    for memberUri in memberUris:
+        members = members + [{"@odata.id": memberUri}]
+    return(members)
+
+def addSessions(rdr, count):
+    from reddrum_frontend.generateId import rfGenerateId
+    sessSvc=rdr.root.sessionService
+    for i in range(count):
+        sessionid=rfGenerateId(leading="S",size=8)
+        sessSvc.addSession(sessionid, {"UserName": "root", "UserPrivileges": ["Login"], "AccountId": "root",
+                   "X-Auth-Token": rfGenerateId(leading="A",size=16), "LocationUri": sessionsUri + "/" + sessionid,
+                   "LastAccessTime": int(time.time()), "UserPrivilegeMask": 1})
+    return(0)
+
+# subscriptions are added directly to the subscriptionsDb, since each POST rewrites the subscriptions database file
+def addSubscriptions(rdr, count):
+    from reddrum_frontend.generateId import rfGenerateId
+    eventSvc=rdr.root.eventService
+    for i in range(count):
+        subscriptionId=rfGenerateId(leading="E",size=8)
+        eventSvc.subscriptionsDb[subscriptionId]={"Context": "bench", "Destination": "http://127.0.0.1/events",
+                                                  "Protocol": "Redfish", "EventTypes": ["Alert"]}
+        eventSvc.subscriptionsView.add(subscriptionId)
+    return(0)
+
+def main(argv):
+    memberCounts=[100, 1000, 10000]
+    calls=200
+    opts, args = getopt.getopt(argv[1:], "n:c:")
+    for opt, arg in opts:
+        if opt == "-n":
+            memberCounts=[int(n) for n in arg.split(",")]
+        elif opt == "-c":
+            calls=int(arg)
+
+    authHdr=rdBenchBasicAuthHdr("root", "password")
+    print("{:>14} {:>8} {:>12} {:>12} {:>12} {:>10}".format("collection", "members", "old build", "GET changed",
+          "GET cached", "bytes"))
+    for memberCount in memberCounts:
+        rdr,app=rdBenchApp({"passwordHashWorkers": 0})
+        rdr.root.sessionService.sessionServiceDb["SessionTimeout"]=86400
+        client=app.test_client()
+        for name,uri,addMembers in (("Sessions", sessionsUri, addSessions), ("Subscriptions", subscriptionsUri, addSubscriptions)):
+            addMembers(rdr, memberCount)
+            memberUris=[uri + "/M{}".format(i) for i in range(memberCount)]
+            oldBuildUsecs=rdBenchTimeit(lambda: oldMembersBuild(memberUris), max(1, min(calls, 1000000//(memberCount*memberCount)+1)))
+            def changedGet():
+                addMembers(rdr, 1)
+                return(client.get(uri, headers=authHdr))
+            changedUsecs=rdBenchTimeit(changedGet, max(1, calls//10))
+            rsp=client.get(uri, headers=authHdr)
+            cachedUsecs=rdBenchTimeit(lambda: client.get(uri, headers=authHdr), calls)
+            print("{:>14} {:>8} {:>12.1f} {:>12.1f} {:>12.1f} {:>10}".format(name, memberCount, oldBuildUsecs, changedUsecs,
+                  cachedUsecs, len(rsp.data)))
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
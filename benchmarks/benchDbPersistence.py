@@ -0,0 +1,65 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: latency of an account PATCH as the Accounts database grows
+#    before the database journal, every account PATCH rewrote the whole AccountsDb.json file
+#    for each database size, through the Flask test client with Basic auth:
+#       rewrite ms   -- msecs for the json dump and write of the whole database (what each PATCH used to add)
+#       journal ms   -- msecs per PATCH of an account with JournalFlushInterval=100 (written by the writer thread)
+#       sync ms      -- msecs per PATCH with JournalFlushInterval=0 (the record is written and fsync'ed in the request)
+#       sqlite ms    -- msecs per PATCH with DatabaseEngine=sqlite (the account row is written in the request)
+#
+# usage:   python3 benchmarks/benchDbPersistence.py [-n <accounts,...>] [-c <callsPerPoint>]
+
+import sys
+import json
+import getopt
+from benchUtils import rdBenchApp, rdBenchTimeit, rdBenchBasicAuthHdr
+
+def rewriteDb(db):
+    with open(db.dbFilePath + ".bench", 'w', encoding='utf-8') as f:
+        f.write(json.dumps(db, indent=4))
+    return(0)
+
+# create the app with accountCount accounts in the Accounts database.   returns rdr, app, and a function that PATCHes
+#   one of the accounts
+def benchDb(accountCount, databaseEngine):
+    rdr,app=rdBenchApp({"passwordHashWorkers": 0, "journalCompactRecords": 1000000, "databaseEngine": databaseEngine})
+    accountSvc=rdr.root.accountService
+    # add accounts directly to the database.  they are not used to log in, so they need no password hash
+    for i in range(accountCount):
+        accountSvc.accountsDb["bench" + str(i)]={"UserName": "bench" + str(i), "RoleId": "ReadOnly",
+                                                 "Enabled": True, "Locked": False, "Password": ""}
+    accountSvc.accountsDb.persist(*["bench" + str(i) for i in range(accountCount)])
+    rdr.dbEngine.flush()
+    client=app.test_client()
+    uri="/redfish/v1/AccountService/Accounts/bench0"
+    authHdr=rdBenchBasicAuthHdr("root", "password")
+    return(rdr, app, lambda: client.patch(uri, json={"Enabled": True}, headers=authHdr))
+
+def main(argv):
+    accountCounts=[10, 1000, 10000]
+    calls=200
+    opts, args = getopt.getopt(argv[1:], "n:c:")
+    for opt, arg in opts:
+        if opt == "-n":
+            accountCounts=[int(n) for n in arg.split(",")]
+        elif opt == "-c":
+            calls=int(arg)
+
+    print("{:>9} {:>12} {:>12} {:>12} {:>12}".format("accounts", "rewrite ms", "journal ms", "sync ms", "sqlite ms"))
+    for accountCount in accountCounts:
+        rdr,app,patch=benchDb(accountCount, "json")
+        rewriteMs=rdBenchTimeit(lambda: rewriteDb(rdr.root.accountService.accountsDb), calls)/1000.0
+        journalMs=rdBenchTimeit(patch, calls)/1000.0
+        rdr.journalFlushInterval=0
+        syncMs=rdBenchTimeit(patch, calls)/1000.0
+        rdr,app,patch=benchDb(accountCount, "sqlite")
+        sqliteMs=rdBenchTimeit(patch, calls)/1000.0
+        print("{:>9} {:>12.3f} {:>12.3f} {:>12.3f} {:>12.3f}".format(accountCount, rewriteMs, journalMs, syncMs, sqliteMs))
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,85 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: one $expand collection GET vs a collection GET plus one GET per member
+#    the benchmarks do not run a backend, so a simulated backend serves /redfish/v1/Systems with <members> systems
+#    and sleeps <latencyMs> in each system GET (the time a real backend spends reading the system data)
+#    for each collection size, through the Flask test client with Basic auth:
+#       N+1 GETs     -- msecs for GET /redfish/v1/Systems and a GET of each member
+#       $expand      -- msecs for GET /redfish/v1/Systems?$expand=.   the member GETs run on ExpandWorkers threads
+#    and the same for the Frontend Accounts collection (in memory, no latency)
+#
+# usage:   python3 benchmarks/benchExpand.py [-n <members,...>] [-l <latencyMs>] [-w <expandWorkers>]
+
+import sys
+import json
+import time
+import getopt
+from benchUtils import rdBenchApp, rdBenchTimeit, rdBenchBasicAuthHdr
+
+# a backend with only the Systems collection and system GETs
+class BenchSystems():
+    def __init__(self, memberCount, latency):
+        self.memberCount=memberCount
+        self.latency=latency
+
+    def getSystemsCollection(self, request):
+        members=[{"@odata.id": "/redfish/v1/Systems/" + str(i)} for i in range(self.memberCount)]
+        resData={"@odata.id": "/redfish/v1/Systems", "Name": "Systems Collection", "Members@odata.count": len(members),
+                 "Members": members}
+        return(0, 200, "", json.dumps(resData), {"Content-Type": "application/json"})
+
+    def processSystemsResource(self, request, urlSubPath):
+        time.sleep(self.latency)
+        resData={"@odata.id": "/redfish/v1/Systems/" + urlSubPath, "Id": urlSubPath, "Name": "System", "PowerState": "On",
+                 "Status": {"State": "Enabled", "Health": "OK"}}
+        return(0, 200, "", json.dumps(resData), {"Content-Type": "application/json"})
+
+class BenchBackend():
+    def __init__(self, memberCount, latency):
+        self.systems=BenchSystems(memberCount, latency)
+
+def nPlusOneGets(client, uri, authHdr):
+    rsp=client.get(uri, headers=authHdr)
+    for member in json.loads(rsp.data)["Members"]:
+        client.get(member["@odata.id"], headers=authHdr)
+    return(0)
+
+def main(argv):
+    memberCounts=[10, 100, 500]
+    latencyMs=5.0
+    expandWorkers=8
+    opts, args = getopt.getopt(argv[1:], "n:l:w:")
+    for opt, arg in opts:
+        if opt == "-n":
+            memberCounts=[int(n) for n in arg.split(",")]
+        elif opt == "-l":
+            latencyMs=float(arg)
+        elif opt == "-w":
+            expandWorkers=int(arg)
+
+    authHdr=rdBenchBasicAuthHdr("root", "password")
+    print("simulated backend latency per system GET: {} ms,  ExpandWorkers={}".format(latencyMs, expandWorkers))
+    print("{:>10} {:>8} {:>14} {:>14} {:>9}".format("collection", "members", "N+1 GETs ms", "$expand ms", "speedup"))
+    for memberCount in memberCounts:
+        rdr,app=rdBenchApp({"passwordHashWorkers": 0, "expandWorkers": expandWorkers, "collectionPageSize": 0})
+        rdr.backend=BenchBackend(memberCount, latencyMs/1000.0)
+        client=app.test_client()
+        uri="/redfish/v1/Systems"
+        nPlusOneMs=rdBenchTimeit(lambda: nPlusOneGets(client, uri, authHdr), 1)/1000.0
+        expandMs=rdBenchTimeit(lambda: client.get(uri + "?$expand=.", headers=authHdr).data, 1)/1000.0
+        print("{:>10} {:>8} {:>14.1f} {:>14.1f} {:>8.1f}x".format("Systems", memberCount, nPlusOneMs, expandMs,
+              nPlusOneMs/expandMs))
+
+    uri="/redfish/v1/AccountService/Accounts"
+    memberCount=len(json.loads(client.get(uri, headers=authHdr).data)["Members"])
+    nPlusOneMs=rdBenchTimeit(lambda: nPlusOneGets(client, uri, authHdr), 20)/1000.0
+    expandMs=rdBenchTimeit(lambda: client.get(uri + "?$expand=.", headers=authHdr).data, 20)/1000.0
+    print("{:>10} {:>8} {:>14.1f} {:>14.1f} {:>8.1f}x".format("Accounts", memberCount, nPlusOneMs, expandMs,
+          nPlusOneMs/expandMs))
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
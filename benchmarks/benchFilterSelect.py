@@ -0,0 +1,59 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: a fleet dashboard GET of PowerState and Status of every system:  $expand vs $select vs $filter
+#    uses the simulated backend of benchExpand.py (no latency by default) with <members> systems
+#    for each query, through the Flask test client with Basic auth:
+#       bytes    -- response body size
+#       GET ms   -- msecs per GET
+#       parse ms -- msecs for the client to parse the response json
+#    and the usecs to compile a $filter string vs getting it from the compiled filter cache
+#
+# usage:   python3 benchmarks/benchFilterSelect.py [-n <members>] [-l <latencyMs>] [-c <callsPerPoint>]
+
+import sys
+import json
+import getopt
+from benchUtils import rdBenchApp, rdBenchTimeit, rdBenchBasicAuthHdr
+from benchExpand import BenchBackend
+
+benchQueries=("$expand=.", "$select=PowerState,Status", "$filter=PowerState eq 'On'&$select=PowerState,Status",
+              "$filter=Status/Health ne 'OK' or PowerState eq 'Off'")
+
+def main(argv):
+    memberCount=1000
+    latencyMs=0.0
+    calls=10
+    opts, args = getopt.getopt(argv[1:], "n:l:c:")
+    for opt, arg in opts:
+        if opt == "-n":
+            memberCount=int(arg)
+        elif opt == "-l":
+            latencyMs=float(arg)
+        elif opt == "-c":
+            calls=int(arg)
+
+    rdr,app=rdBenchApp({"passwordHashWorkers": 0, "collectionPageSize": 0, "jsonOutputFormat": "compact"})
+    rdr.backend=BenchBackend(memberCount, latencyMs/1000.0)
+    client=app.test_client()
+    authHdr=rdBenchBasicAuthHdr("root", "password")
+    print("systems: {},  simulated backend latency per system GET: {} ms".format(memberCount, latencyMs))
+    print("{:>58} {:>10} {:>9} {:>9}".format("query", "bytes", "GET ms", "parse ms"))
+    for query in benchQueries:
+        uri="/redfish/v1/Systems?" + query
+        data=client.get(uri, headers=authHdr).data
+        getMs=rdBenchTimeit(lambda: client.get(uri, headers=authHdr).data, calls)/1000.0
+        parseMs=rdBenchTimeit(lambda: json.loads(data), calls)/1000.0
+        print("{:>58} {:>10} {:>9.2f} {:>9.3f}".format(query, len(data), getMs, parseMs))
+
+    from reddrum_frontend.queryFilter import rfCompileFilter
+    filterString="PowerState eq 'On' and (Status/Health eq 'OK' or Status/State ne 'Enabled')"
+    compileUsecs=rdBenchTimeit(lambda: rfCompileFilter.__wrapped__(filterString), 10000)
+    cachedUsecs=rdBenchTimeit(lambda: rfCompileFilter(filterString), 10000)
+    print("compile $filter: {:.2f} usecs,  cached: {:.2f} usecs".format(compileUsecs, cachedUsecs))
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,77 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: response bytes and latency with JsonOutputFormat=pretty vs compact
+#    for each Frontend GET URI:
+#       bytes     -- response body size in each format
+#       encode    -- usecs to serialize the resource data with rdr.jsonSerializer.dumps()
+#                    (compact is timed with the json module and with orjson, if it is installed)
+#       GET       -- usecs per GET through the Flask test client, Basic auth, in each format
+#
+# usage:   python3 benchmarks/benchJsonOutputFormat.py [-n <callsPerPoint>]
+
+import sys
+import json
+import getopt
+from benchUtils import rdBenchApp, rdBenchTimeit, rdBenchBasicAuthHdr
+
+benchUris=("/redfish/v1", "/redfish/v1/odata", "/redfish/v1/SessionService", "/redfish/v1/AccountService",
+           "/redfish/v1/AccountService/Accounts", "/redfish/v1/AccountService/Accounts/root",
+           "/redfish/v1/AccountService/Roles", "/redfish/v1/AccountService/Roles/Administrator",
+           "/redfish/v1/EventService", "/redfish/v1/JsonSchemas", "/redfish/v1/Registries")
+
+def main(argv):
+    calls=1000
+    opts, args = getopt.getopt(argv[1:], "n:")
+    for opt, arg in opts:
+        if opt == "-n":
+            calls=int(arg)
+
+    apps=dict()
+    for outputFormat in ("pretty", "compact"):
+        rdr,app=rdBenchApp({"passwordHashWorkers": 0, "jsonOutputFormat": outputFormat})
+        apps[outputFormat]=(rdr, app.test_client())
+    from reddrum_frontend.jsonSerializer import orjson    # None if orjson is not installed
+    serializer=apps["compact"][0].jsonSerializer
+    authHdr=rdBenchBasicAuthHdr("root", "password")
+
+    print("{:>42} {:>8} {:>8} {:>9} {:>9} {:>9} {:>9} {:>9}".format("", "bytes", "bytes", "encode", "encode",
+          "encode", "GET", "GET"))
+    print("{:>42} {:>8} {:>8} {:>9} {:>9} {:>9} {:>9} {:>9}".format("uri", "pretty", "compact", "pretty", "compact",
+          "orjson", "pretty", "compact"))
+    totals=[0, 0]
+    for uri in benchUris:
+        sizes=[]
+        getUsecs=[]
+        for outputFormat in ("pretty", "compact"):
+            rdr,client=apps[outputFormat]
+            rsp=client.get(uri, headers=authHdr)
+            sizes.append(len(rsp.data))
+            getUsecs.append(rdBenchTimeit(lambda: client.get(uri, headers=authHdr), calls))
+        totals[0]+=sizes[0]
+        totals[1]+=sizes[1]
+
+        # time the serializer alone on the resource data
+        resData=json.loads(rsp.data)
+        encodeUsecs=[]
+        for outputFormat,useOrjson in (("pretty", False), ("compact", False), ("compact", True)):
+            if (useOrjson is True) and (orjson is None):
+                encodeUsecs.append(None)
+                continue
+            serializer.rdr.jsonOutputFormat=outputFormat
+            serializer.useOrjson=useOrjson
+            encodeUsecs.append(rdBenchTimeit(lambda: serializer.dumps(resData), calls))
+        serializer.rdr.jsonOutputFormat="compact"
+        serializer.useOrjson = (orjson is not None)
+
+        print("{:>42} {:>8} {:>8} {:>9} {:>9} {:>9} {:>9.1f} {:>9.1f}".format(uri, sizes[0], sizes[1],
+              "{:.2f}".format(encodeUsecs[0]), "{:.2f}".format(encodeUsecs[1]),
+              "{:.2f}".format(encodeUsecs[2]) if encodeUsecs[2] is not None else "-", getUsecs[0], getUsecs[1]))
+    print("total bytes: pretty {}, compact {}  ({:.0f}% smaller)".format(totals[0], totals[1],
+          100.0*(totals[0]-totals[1])/totals[0]))
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
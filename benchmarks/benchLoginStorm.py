@@ -0,0 +1,86 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: latency of a cheap request-like operation while other threads run a Basic auth login storm
+#    run once with password hashing inline (PasswordHashWorkers=0) and once on the hashing process pool
+#    the credential cache is disabled so every login does a sha512_crypt verify
+#
+# usage:   python3 benchmarks/benchLoginStorm.py [-t <loginThreads>] [-s <secs>] [-w <hashWorkers>] [-q <maxQueueDepth>]
+
+import sys
+import time
+import json
+import getopt
+import threading
+from benchUtils import rdBenchRootData
+
+def runStorm(loginThreads, secs, hashWorkers, maxQueueDepth):
+    from reddrum_frontend.accountService import RfAccountService
+    rdr=rdBenchRootData({"credentialCacheTimeout": 0, "passwordHashWorkers": hashWorkers,
+                         "passwordHashMaxQueueDepth": maxQueueDepth})
+    acctSvc=RfAccountService(rdr)
+    # store a real sha512_crypt hash for root so the verify does the full work
+    rc,acctSvc.accountsDb["root"]["Password"]=acctSvc.passwordHasher.hash("password")
+    acctSvc.getAccountAuthInfo("root","password")   # start the worker processes before timing
+
+    stop=threading.Event()
+    logins={"ok": 0, "503": 0}
+    def loginLoop():
+        while not stop.is_set():
+            rc,errMsg,accountid,roleId,privileges=acctSvc.getAccountAuthInfo("root","password")
+            if rc == 0:
+                logins["ok"]+=1
+            elif rc == 503:
+                logins["503"]+=1
+                time.sleep(0.001)
+    threads=[threading.Thread(target=loginLoop) for _ in range(loginThreads)]
+    for t in threads:
+        t.start()
+
+    # the "cheap GET": serialize the AccountService template
+    latencies=[]
+    endTime=time.time() + secs
+    while time.time() < endTime:
+        startTime=time.perf_counter()
+        json.dumps(acctSvc.accountServiceTemplate, indent=4)
+        latencies.append(1000000.0*(time.perf_counter()-startTime))
+        time.sleep(0.001)
+    stop.set()
+    for t in threads:
+        t.join()
+    stats=acctSvc.passwordHasher.getStats()
+    acctSvc.passwordHasher.shutdown()
+
+    latencies.sort()
+    p50=latencies[len(latencies)//2]
+    p99=latencies[int(len(latencies)*0.99)]
+    print("{:>8} {:>12} {:>12} {:>10} {:>8} {:>14} {:>10}".format(hashWorkers, "{:.1f}".format(p50), "{:.1f}".format(p99),
+          logins["ok"], logins["503"], "{:.2f}".format(stats["AvgQueueWaitMs"]), "{:.2f}".format(stats["AvgHashMs"])))
+    return(0)
+
+def main(argv):
+    loginThreads=8
+    secs=3
+    hashWorkers=2
+    maxQueueDepth=32
+    opts, args = getopt.getopt(argv[1:], "t:s:w:q:")
+    for opt, arg in opts:
+        if opt == "-t":
+            loginThreads=int(arg)
+        elif opt == "-s":
+            secs=int(arg)
+        elif opt == "-w":
+            hashWorkers=int(arg)
+        elif opt == "-q":
+            maxQueueDepth=int(arg)
+
+    print("{:>8} {:>12} {:>12} {:>10} {:>8} {:>14} {:>10}".format("workers", "p50 usec", "p99 usec",
+          "logins", "503s", "queueWait ms", "hash ms"))
+    runStorm(loginThreads, secs, 0, maxQueueDepth)
+    runStorm(loginThreads, secs, hashWorkers, maxQueueDepth)
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
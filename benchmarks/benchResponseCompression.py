@@ -0,0 +1,62 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: response bytes and GET latency with and without response compression
+#    for each Frontend GET URI, through the Flask test client with Basic auth:
+#       bytes     -- response body size: uncompressed, gzip, and br (if brotli is installed)
+#       GET       -- usecs per GET in each encoding
+#    cached responses (service root, $metadata, odata) are compressed once, other responses on every GET,
+#    so the GET usecs show the cost of per-request compression vs the reuse of precompressed bytes
+#
+# usage:   python3 benchmarks/benchResponseCompression.py [-n <callsPerPoint>] [-f pretty|compact]
+
+import sys
+import getopt
+from benchUtils import rdBenchApp, rdBenchTimeit, rdBenchBasicAuthHdr
+
+benchUris=("/redfish/v1", "/redfish/v1/$metadata", "/redfish/v1/odata", "/redfish/v1/AccountService",
+           "/redfish/v1/AccountService/Accounts", "/redfish/v1/AccountService/Roles", "/redfish/v1/JsonSchemas",
+           "/redfish/v1/Registries")
+
+def main(argv):
+    calls=1000
+    outputFormat="pretty"
+    opts, args = getopt.getopt(argv[1:], "n:f:")
+    for opt, arg in opts:
+        if opt == "-n":
+            calls=int(arg)
+        elif opt == "-f":
+            outputFormat=arg
+
+    rdr,app=rdBenchApp({"passwordHashWorkers": 0, "jsonOutputFormat": outputFormat})
+    client=app.test_client()
+    authHdr=rdBenchBasicAuthHdr("root", "password")
+    encodings=["identity", "gzip"]
+    if rdr.responseCompressor.brotliAvailable is True:
+        encodings.append("br")
+
+    print("JsonOutputFormat={}  ResponseCompressionMinSize={}  ResponseCompressionLevel={}".format(outputFormat,
+          rdr.responseCompressionMinSize, rdr.responseCompressionLevel))
+    print("{:>38} ".format("uri") + " ".join(["{:>9}".format("bytes " + e[0:4]) for e in encodings]) + " " +
+          " ".join(["{:>9}".format("GET " + e[0:4]) for e in encodings]))
+    totals=[0 for e in encodings]
+    for uri in benchUris:
+        sizes=[]
+        getUsecs=[]
+        for i,encoding in enumerate(encodings):
+            hdrs=dict(authHdr)
+            hdrs["Accept-Encoding"]=encoding
+            rsp=client.get(uri, headers=hdrs)
+            sizes.append(len(rsp.data))
+            totals[i]+=len(rsp.data)
+            getUsecs.append(rdBenchTimeit(lambda: client.get(uri, headers=hdrs), calls))
+        print("{:>38} ".format(uri) + " ".join(["{:>9}".format(s) for s in sizes]) + " " +
+              " ".join(["{:>9.1f}".format(u) for u in getUsecs]))
+    print("total bytes: " + ", ".join(["{} {}".format(e, t) for e,t in zip(encodings, totals)]) +
+          "  (gzip {:.0f}% smaller)".format(100.0*(totals[0]-totals[1])/totals[0]))
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
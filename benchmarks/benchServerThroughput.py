@@ -0,0 +1,125 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: requests/sec of the Flask development server vs the RedDrum server (redDrumServer.py)
+#    each server runs in a child process on 127.0.0.1.  the load is generated by client processes that each
+#    keep one HTTP/1.1 connection open (they reconnect if the server closes it) and alternate between an
+#    unauthenticated GET /redfish/v1 and a Basic auth GET /redfish/v1/SessionService
+#
+# usage:   python3 benchmarks/benchServerThroughput.py [-c <clients>] [-s <secsPerServer>] [-p <port>]
+
+import sys
+import os
+import time
+import signal
+import getopt
+import http.client
+import multiprocessing
+from benchUtils import rdBenchApp, rdBenchBasicAuthHdr
+
+# the servers compared:  (name, useDevServer, devServerThreaded, serverWorkers, serverThreads)
+benchServers=[
+    ("flask dev server",            True,  False, 1, 1),
+    ("flask dev server threaded",   True,  True,  1, 1),
+    ("reddrum server 1x16",         False, False, 1, 16),
+    ("reddrum server 4x16",         False, False, 4, 16) ]
+
+def runServer(port, useDevServer, devServerThreaded, workers, threads):
+    # more than one worker requires the sqlite database engine
+    rdr,app=rdBenchApp({"passwordHashWorkers": 0, "serverWorkers": workers, "serverThreads": threads,
+                        "serverKeepAliveTimeout": 5, "databaseEngine": "sqlite" if workers > 1 else "json"})
+    rdr.rdPort=port
+    rdr.printLogMsgs=False
+    if useDevServer is True:
+        import logging
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        app.run(host=rdr.rdHost, port=port, threaded=devServerThreaded)
+    else:
+        from reddrum_frontend.redDrumServer import rdRunServer
+        rdRunServer(rdr, app)
+
+def runClient(port, secs, results):
+    authHdr=rdBenchBasicAuthHdr("root", "password")
+    conn=http.client.HTTPConnection("127.0.0.1", port)
+    count=0
+    errors=0
+    endTime=time.time() + secs
+    while time.time() < endTime:
+        try:
+            if count % 2 == 0:
+                conn.request("GET", "/redfish/v1")
+            else:
+                conn.request("GET", "/redfish/v1/SessionService", headers=authHdr)
+            rsp=conn.getresponse()
+            rsp.read()
+            if rsp.status != 200:
+                errors+=1
+            count+=1
+        except (http.client.HTTPException, OSError):
+            errors+=1
+            conn.close()
+            conn=http.client.HTTPConnection("127.0.0.1", port)
+    conn.close()
+    results.put((count, errors))
+
+def waitForServer(port):
+    for _ in range(100):
+        try:
+            conn=http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/redfish/v1")
+            conn.getresponse().read()
+            conn.close()
+            return(True)
+        except OSError:
+            time.sleep(0.1)
+    return(False)
+
+def main(argv):
+    clients=8
+    secs=5
+    port=5091
+    opts, args = getopt.getopt(argv[1:], "c:s:p:")
+    for opt, arg in opts:
+        if opt == "-c":
+            clients=int(arg)
+        elif opt == "-s":
+            secs=int(arg)
+        elif opt == "-p":
+            port=int(arg)
+
+    mpContext=multiprocessing.get_context("fork")
+    print("clients: {}, secs per server: {}".format(clients, secs))
+    print("{:<30} {:>12} {:>8}".format("server", "requests/sec", "errors"))
+    for name, useDevServer, devServerThreaded, workers, threads in benchServers:
+        server=mpContext.Process(target=runServer, args=(port, useDevServer, devServerThreaded, workers, threads))
+        server.start()
+        if waitForServer(port) is not True:
+            print("{:<30} server did not start".format(name))
+            server.terminate()
+            server.join()
+            continue
+
+        results=mpContext.Queue()
+        clientProcs=[mpContext.Process(target=runClient, args=(port, secs, results)) for _ in range(clients)]
+        for p in clientProcs:
+            p.start()
+        total=0
+        errors=0
+        for _ in clientProcs:
+            count,errCount=results.get()
+            total+=count
+            errors+=errCount
+        for p in clientProcs:
+            p.join()
+
+        # SIGTERM is a graceful shutdown for the reddrum server.  the dev server just exits
+        os.kill(server.pid, signal.SIGTERM)
+        server.join(30)
+        print("{:<30} {:>12.0f} {:>8}".format(name, total/secs, errors))
+        port+=1   # don't wait for the old listening socket to leave TIME_WAIT
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
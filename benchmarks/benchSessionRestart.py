@@ -0,0 +1,79 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: the login storm after a service restart, without and with session persistence (SessionCheckpointInterval)
+#    <sessions> agents, each with its own account, log in with a session.  the service is restarted (a new service
+#    object on the same varDataPath), then every agent sends a GET with its X-Auth-Token and logs in again if it gets 401
+#       startup ms    -- msecs to create the service after the restart (includes restoring the checkpointed sessions)
+#       valid         -- sessions still valid after the restart
+#       re-logins     -- agents that had to log in again:  the size of the login spike (one sha512_crypt verify each)
+#       recovery ms   -- msecs until every agent has a working session again
+#
+# usage:   python3 benchmarks/benchSessionRestart.py [-n <sessions>] [-s <sessionStore>]
+
+import sys
+import time
+import getopt
+from benchUtils import rdBenchApp
+
+def main(argv):
+    sessionCount=200
+    sessionStore="memory"
+    opts, args = getopt.getopt(argv[1:], "n:s:")
+    for opt, arg in opts:
+        if opt == "-n":
+            sessionCount=int(arg)
+        elif opt == "-s":
+            sessionStore=arg
+
+    print("sessions: {},  SessionStore={}".format(sessionCount, sessionStore))
+    print("{:>26} {:>11} {:>7} {:>10} {:>12}".format("", "startup ms", "valid", "re-logins", "recovery ms"))
+    for checkpointInterval in (0, 30):
+        confOverrides={"passwordHashWorkers": 0, "credentialCacheTimeout": 0, "sessionStore": sessionStore,
+                       "sessionCheckpointInterval": checkpointInterval, "RedfishAllowSessionLoginOverHttp": True}
+        rdr,app=rdBenchApp(confOverrides)
+        # an account per agent.  they share one real sha512_crypt hash so the setup hashes once
+        accountSvc=rdr.root.accountService
+        rc,passwordHash=accountSvc.passwordHasher.hash("agentpass")
+        for i in range(sessionCount):
+            accountSvc.accountsDb["agent" + str(i)]={"UserName": "agent" + str(i), "RoleId": "Operator", "Enabled": True,
+                                                    "Locked": False, "Password": passwordHash}
+        accountSvc.accountsDb.persist(*["agent" + str(i) for i in range(sessionCount)])
+        accountSvc.initializeAccountsDict(rdr)
+        client=app.test_client()
+        tokens=dict()
+        def login(i):
+            rsp=client.post("/redfish/v1/SessionService/Sessions", json={"UserName": "agent" + str(i), "Password": "agentpass"})
+            tokens[i]=rsp.headers["X-Auth-Token"]
+        for i in range(sessionCount):
+            login(i)
+
+        # stop:  the server writes the database journal and the session checkpoint when it stops
+        rdr.dbEngine.flush()
+        rdr.root.sessionService.checkpointSessions()
+
+        confOverrides["varDataPath"]=rdr.varDataPath
+        startTime=time.perf_counter()
+        rdr,app=rdBenchApp(confOverrides)
+        startupMs=1000.0*(time.perf_counter()-startTime)
+        client=app.test_client()
+
+        valid=0
+        reLogins=0
+        startTime=time.perf_counter()
+        for i in range(sessionCount):
+            rsp=client.get("/redfish/v1/SessionService/Sessions", headers={"X-Auth-Token": tokens[i]})
+            if rsp.status_code == 200:
+                valid+=1
+            else:
+                login(i)
+                reLogins+=1
+        recoveryMs=1000.0*(time.perf_counter()-startTime)
+        label="SessionCheckpointInterval=" + str(checkpointInterval)
+        print("{:>26} {:>11.1f} {:>7} {:>10} {:>12.1f}".format(label, startupMs, valid, reLogins, recoveryMs))
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,51 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: sessionService.getSessionAuthInfo(authtoken=...) latency vs number of open sessions
+#    the linear sessionsDict scan that getSessionAuthInfo used before the token index is timed for comparison
+#
+# usage:   python3 benchmarks/benchSessionTokenLookup.py [-n <callsPerPoint>]
+
+import sys
+import time
+import getopt
+from benchUtils import rdBenchRootData, rdBenchTimeit
+
+def main(argv):
+    calls=5000
+    opts, args = getopt.getopt(argv[1:], "n:")
+    for opt, arg in opts:
+        if opt == "-n":
+            calls=int(arg)
+
+    from reddrum_frontend.sessionService import RfSessionService
+    from reddrum_frontend.generateId import rfGenerateId
+    rdr=rdBenchRootData()
+    sessSvc=RfSessionService(rdr)
+    sessSvc.sessionServiceDb["SessionTimeout"]=86400   # keep sessions from expiring during the run
+
+    print("{:>10} {:>20} {:>20}".format("sessions", "indexed usec/lookup", "scan usec/lookup"))
+    for numSessions in (10, 100, 1000, 10000, 20000):
+        while sessSvc.sessionStore.count() < numSessions:
+            sessionid=rfGenerateId(leading="S",size=8)
+            authtoken=rfGenerateId(leading="A",size=16)
+            sessSvc.addSession(sessionid, {"UserName": "root", "UserPrivileges": ["Login"], "AccountId": "root",
+                   "X-Auth-Token": authtoken, "LocationUri": "/redfish/v1/SessionService/Sessions/" + sessionid,
+                   "LastAccessTime": int(time.time()), "UserPrivilegeMask": 0x01})
+
+        # look up the most recently created session--the worst case for the linear scan
+        indexedUsec=rdBenchTimeit(lambda: sessSvc.getSessionAuthInfo(authtoken=authtoken), calls)
+
+        def scanLookup():
+            sessionsDict=sessSvc.sessionStore.sessionsDict
+            for sessid in sessionsDict:
+                if sessionsDict[sessid]["X-Auth-Token"] == authtoken:
+                    return(sessid)
+        scanUsec=rdBenchTimeit(scanLookup, max(1, calls//50))
+        print("{:>10} {:>20.2f} {:>20.2f}".format(numSessions, indexedUsec, scanUsec))
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,55 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# benchmark: Frontend startup time without and with the base data snapshot (see baseDataSnapshot.py)
+#    creates the service <count> times on one varDataPath:  the first start has no snapshot (cold:  every template
+#    and registry is parsed, and the snapshot is written), the others read the snapshot (warm).  then a template is
+#    touched, so the next start finds the snapshot stale and rebuilds it
+#       startup ms   -- msecs to create the service (RfServiceRoot and the Flask app)
+#       stat ms      -- msecs to stat the base data files to check the snapshot
+#       load ms      -- msecs to read the snapshot file
+#       parse ms     -- msecs to parse the files and build the indexes that were not in the snapshot
+#       save ms      -- msecs to write the snapshot
+#       hits, parsed -- files read from the snapshot, and files parsed
+#
+# usage:   python3 benchmarks/benchStartupSnapshot.py [-c <count>]
+
+import sys
+import os
+import time
+import getopt
+from benchUtils import rdBenchApp
+
+def main(argv):
+    count=5
+    opts, args = getopt.getopt(argv[1:], "c:")
+    for opt, arg in opts:
+        if opt == "-c":
+            count=int(arg)
+
+    confOverrides={"passwordHashWorkers": 0}
+    print("{:>8} {:>11} {:>8} {:>8} {:>9} {:>8} {:>6} {:>7}".format("", "startup ms", "stat ms", "load ms", "parse ms",
+                                                                   "save ms", "hits", "parsed"))
+    for run in range(count+1):
+        if run == 0:
+            label="cold"
+        elif run < count:
+            label="warm"
+        else:
+            # a changed template makes the snapshot stale
+            label="stale"
+            templatePath=os.path.join(rdr.baseDataPath, "templates", "ServiceRoot.json")
+            os.utime(templatePath, ns=(time.time_ns(), time.time_ns()))
+        startTime=time.perf_counter()
+        rdr,app=rdBenchApp(confOverrides)
+        startupMs=1000.0*(time.perf_counter()-startTime)
+        confOverrides["varDataPath"]=rdr.varDataPath
+        stats=rdr.baseData.stats
+        print("{:>8} {:>11.1f} {:>8.2f} {:>8.2f} {:>9.2f} {:>8.2f} {:>6} {:>7}".format(label, startupMs, stats["StatMs"],
+              stats["LoadMs"], stats["ParseMs"], stats["SaveMs"], stats["Hits"], stats["Misses"]))
+    return(0)
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,69 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# common setup used by the RedDrum-Frontend benchmark scripts in this directory
+#   the benchmarks run from a RedDrum-Frontend source tree and use a temporary varDataPath
+#   so they never touch the databases of a running service
+
+import sys
+import os
+import time
+import tempfile
+import contextlib
+import io
+
+frontEndDirPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if frontEndDirPath not in sys.path:
+    sys.path.insert(0, frontEndDirPath)
+
+
+# create a RedDrum root data object with paths under the source tree and a temporary varDataPath
+#   confOverrides is an optional dict of rootData properties to set after RedDrum.conf is read
+def rdBenchRootData(confOverrides=None):
+    from reddrum_frontend import RdRootData
+    rdr=RdRootData()
+    rdr.rdTarget=""
+    rdr.frontEndDirPath=frontEndDirPath
+    rdr.baseDataPath=os.path.join(frontEndDirPath, "reddrum_frontend", "Data")
+    rdr.varDataPath=tempfile.mkdtemp(prefix="rdbench")
+    rdr.RedDrumConfPath=os.path.join(frontEndDirPath, "RedDrum.conf")
+    rdr.schemasPath=os.path.join(frontEndDirPath, "schemas")
+    os.makedirs(os.path.join(rdr.varDataPath, "db"))
+
+    # the conf file dump is noise in benchmark output
+    with contextlib.redirect_stdout(io.StringIO()):
+        rdr.readRedDrumConfFile()
+    if confOverrides is not None:
+        for prop in confOverrides:
+            setattr(rdr, prop, confOverrides[prop])
+    return(rdr)
+
+
+# time fn() called count times.   returns avg usecs per call
+def rdBenchTimeit(fn, count):
+    startTime=time.perf_counter()
+    for _ in range(count):
+        fn()
+    return( 1000000.0*(time.perf_counter()-startTime)/count )
+
+# create a RedDrum root data object, the Frontend ServiceRoot, and the Flask app (without starting it)
+#   backend discovery is not run, so only the Frontend resources (AccountService, SessionService, ...) are populated
+#   returns: rdr, app
+def rdBenchApp(confOverrides=None):
+    rdr=rdBenchRootData(confOverrides)
+    rdr.debug=False
+    rdr.rdHost="127.0.0.1"
+    rdr.rdPort=5001
+    from reddrum_frontend import RfServiceRoot, rdCreate_RedDrum_Flask_app
+    with contextlib.redirect_stdout(io.StringIO()):
+        rdr.root=RfServiceRoot(rdr)
+        app=rdCreate_RedDrum_Flask_app(rdr)
+    return(rdr, app)
+
+
+# make a Basic auth Authorization header
+def rdBenchBasicAuthHdr(username, password):
+    import base64
+    return({"Authorization": "Basic " + base64.b64encode((username + ":" + password).encode("utf-8")).decode("ascii")})
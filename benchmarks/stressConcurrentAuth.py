@@ -0,0 +1,118 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# stress test: run the Frontend APIs from many threads at once and check that every response is what that
+#   thread's user should get.  fails if a request sees another request's user, or if any API returns a 5xx
+#
+#   each thread loops over:
+#     - an Administrator and a ReadOnlyUser (ConfigureSelf) PATCH another user's account:  expect 204 and 403
+#     - the ReadOnlyUser deletes an admin session (expect 403) and its own session (expect 204)
+#     - create and delete a per-thread account while other threads GET the Accounts and Sessions collections
+#     - create, GET, PATCH, and delete an event subscription while other threads GET the Subscriptions collection
+#
+# usage:   python3 benchmarks/stressConcurrentAuth.py [-t <threads>] [-n <loopsPerThread>]
+
+import sys
+import time
+import getopt
+import threading
+from benchUtils import rdBenchApp, rdBenchBasicAuthHdr
+
+def main(argv):
+    numThreads=16
+    loops=50
+    opts, args = getopt.getopt(argv[1:], "t:n:")
+    for opt, arg in opts:
+        if opt == "-t":
+            numThreads=int(arg)
+        elif opt == "-n":
+            loops=int(arg)
+
+    # hash inline so the test only exercises the request threads
+    rdr,app=rdBenchApp({"passwordHashWorkers": 0})
+    rdr.root.accountService.accountServiceDb["AccountLockoutThreshold"]=0    # failed-auth checks must not lock accounts
+    rdr.printLogMsgs=False
+    adminHdr=rdBenchBasicAuthHdr("root", "password")
+
+    client=app.test_client()
+    for userName in ("target", "reader"):
+        rsp=client.post("/redfish/v1/AccountService/Accounts", headers=adminHdr,
+                        json={"UserName": userName, "Password": "Passw0rd", "RoleId": "ReadOnlyUser"})
+        if rsp.status_code != 201:
+            print("FAIL: could not create account {}: {}".format(userName, rsp.status_code))
+            return(1)
+    readerHdr=rdBenchBasicAuthHdr("reader", "Passw0rd")
+
+    failures=[]
+    counts={"requests": 0}
+    countsLock=threading.Lock()
+
+    def check(what, rsp, expected):
+        with countsLock:
+            counts["requests"]+=1
+        if rsp.status_code != expected:
+            failures.append("{}: expected {} got {}".format(what, expected, rsp.status_code))
+
+    def worker(threadId):
+        c=app.test_client()
+        for i in range(loops):
+            # privilege checks done inside the API use the request's own user
+            check("admin PATCH other account",
+                  c.patch("/redfish/v1/AccountService/Accounts/target", headers=adminHdr, json={"Enabled": True}), 204)
+            check("reader PATCH other account",
+                  c.patch("/redfish/v1/AccountService/Accounts/target", headers=readerHdr, json={"Enabled": True}), 403)
+
+            # sessions:  a Login-only user can only delete its own session
+            rsp=c.post("/redfish/v1/SessionService/Sessions", json={"UserName": "root", "Password": "password"})
+            check("admin POST session", rsp, 201)
+            adminSession=rsp.headers.get("Location")
+            rsp=c.post("/redfish/v1/SessionService/Sessions", json={"UserName": "reader", "Password": "Passw0rd"})
+            check("reader POST session", rsp, 201)
+            readerSession=rsp.headers.get("Location")
+            readerTokenHdr={"X-Auth-Token": rsp.headers.get("X-Auth-Token", "")}
+            check("reader DELETE admin session", c.delete(adminSession, headers=readerTokenHdr), 403)
+            check("reader DELETE own session", c.delete(readerSession, headers=readerTokenHdr), 204)
+            check("admin DELETE admin session", c.delete(adminSession, headers=adminHdr), 204)
+
+            # accounts created and deleted while other threads walk the collections
+            userName="stress{}x{}".format(threadId, i)
+            check("POST account", c.post("/redfish/v1/AccountService/Accounts", headers=adminHdr,
+                  json={"UserName": userName, "Password": "Passw0rd", "RoleId": "ReadOnlyUser"}), 201)
+            check("GET accounts", c.get("/redfish/v1/AccountService/Accounts", headers=adminHdr), 200)
+            check("GET sessions", c.get("/redfish/v1/SessionService/Sessions", headers=adminHdr), 200)
+            check("DELETE account", c.delete("/redfish/v1/AccountService/Accounts/" + userName, headers=adminHdr), 204)
+
+            # event subscriptions created and deleted while other threads walk the collection
+            rsp=c.post("/redfish/v1/EventService/Subscriptions", headers=adminHdr,
+                       json={"Context": userName, "Destination": "http://127.0.0.1/events", "EventTypes": ["Alert"],
+                             "Protocol": "Redfish"})
+            check("POST subscription", rsp, 201)
+            subscription=rsp.headers.get("Location")
+            if subscription is not None:
+                check("GET subscription", c.get(subscription, headers=adminHdr), 200)
+                check("PATCH subscription", c.patch(subscription, headers=adminHdr, json={"Context": "patched"}), 204)
+                check("DELETE subscription", c.delete(subscription, headers=adminHdr), 204)
+            check("GET subscriptions", c.get("/redfish/v1/EventService/Subscriptions", headers=adminHdr), 200)
+
+    threads=[threading.Thread(target=worker, args=(t,)) for t in range(numThreads)]
+    startTime=time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed=time.time() - startTime
+
+    print("threads: {}, requests: {}, secs: {:.2f}, requests/sec: {:.0f}".format(numThreads, counts["requests"], elapsed,
+          counts["requests"]/elapsed))
+    if len(failures) > 0:
+        print("FAIL: {} unexpected responses".format(len(failures)))
+        for failure in failures[:20]:
+            print("    {}".format(failure))
+        return(1)
+    print("PASS")
+    return(0)
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -13,11 +13,14 @@
 import sys
 import os
 import getopt
+import time
 
 def rdUsage(rdProgram):
     print("Usage:")
     print("   {}:    [-Vh][--Version][--help] ".format(rdProgram))
     print("   {}:    [--Host=<hostIP>][--Port=<port>] ".format(rdProgram))
+    print("   {}:    [--DevServer][--Workers=<workers>][--Threads=<threads>] ".format(rdProgram))
+    print("   {}:    [--ProfileStartup] ".format(rdProgram))
     return(0)
 
 def rdHelp(rdProgram, rdVersion):
@@ -31,6 +34,10 @@ def rdHelp(rdProgram, rdVersion):
     print("       -D       --Debug       --- print debug messages on Flask console for each API executed")
     print("       --Host=<hostIp>        --- host IP address. dflt=127.0.0.1")
     print("       --Port=<port>          --- the port to use. dflt=5001")
+    print("       --DevServer            --- run on the Flask development server instead of the RedDrum server")
+    print("       --Workers=<workers>    --- number of pre-forked server worker processes. dflt=ServerWorkers in RedDrum.conf")
+    print("       --Threads=<threads>    --- number of request threads per worker. dflt=ServerThreads in RedDrum.conf")
+    print("       --ProfileStartup       --- log the wall time of each startup phase before the service starts serving")
     print("")
     return(0)
 
@@ -46,9 +53,14 @@ def main(argv):
     rdTarget=""
     rdVersion="v1.0.0"
     rdProfile=""
+    useDevServer=None      # None: use the RedDrum.conf setting
+    serverWorkers=None
+    serverThreads=None
+    profileStartup=False
 
     try:
-        opts, args = getopt.getopt(argv[1:],"VhLD", ["Version", "help", "Debug", "Local", "Host=", "Port="  ])
+        opts, args = getopt.getopt(argv[1:],"VhLD", ["Version", "help", "Debug", "Local", "Host=", "Port=",
+                                                     "DevServer", "Workers=", "Threads=", "ProfileStartup"  ])
     except getopt.GetoptError:
         print(" {}: Error parsing options".format(rdProgram))
         rdUsage(rdProgram)
@@ -68,6 +80,14 @@ def main(argv):
             rdHost=arg
         elif opt in ("--Port="):
             rdPort=int(arg)
+        elif opt in ("--DevServer"):
+            useDevServer=True
+        elif opt in ("--Workers="):
+            serverWorkers=int(arg)
+        elif opt in ("--Threads="):
+            serverThreads=int(arg)
+        elif opt in ("--ProfileStartup"):
+            profileStartup=True
         else:
             print(" {}: Error: unsupported option".format(rdProgram))
             rdUsage(rdProgram)
@@ -78,7 +98,8 @@ def main(argv):
 
     # start the service.   Returns if control-C
     redDrumMain(rdHost=rdHost, rdPort=rdPort, isLocal=isLocal, debug=debug, rdServiceName=rdServiceName, rdTarget=rdTarget, 
-                rdVersion=rdVersion, rdProfile=rdProfile)
+                rdVersion=rdVersion, rdProfile=rdProfile, useDevServer=useDevServer, serverWorkers=serverWorkers,
+                serverThreads=serverThreads, profileStartup=profileStartup)
 
 
     print("Exiting RedDrum Service From Main Console")
@@ -87,8 +108,43 @@ def main(argv):
 
 
 
+# RdStartupProfiler(enabled)
+#    the --ProfileStartup option:  measures the wall time of each startup phase, from the first RedDrum import
+#    until the service is ready to serve requests, to check the cold start time against the failover budget
+#    startPhase(name) - ends the current phase and starts the next one.   does nothing if not enabled
+#    report(rdr)      - ends the last phase and logs the phase times.   called before the server starts
+class RdStartupProfiler():
+    def __init__(self, enabled):
+        self.enabled=enabled
+        self.startTime=time.perf_counter()
+        self.phases=list()
+        self.phaseName=None
+        self.phaseStartTime=self.startTime
+
+    def startPhase(self, phaseName):
+        if self.enabled is not True:
+            return(0)
+        now=time.perf_counter()
+        if self.phaseName is not None:
+            self.phases.append((self.phaseName, 1000.0*(now-self.phaseStartTime)))
+        self.phaseName=phaseName
+        self.phaseStartTime=now
+        return(0)
+
+    def report(self, rdr):
+        if self.enabled is not True:
+            return(0)
+        self.startPhase(None)
+        totalMs=1000.0*(time.perf_counter()-self.startTime)
+        rdr.logMsg("INFO"," Startup Profile: {:.1f} ms until ready to serve".format(totalMs))
+        for phaseName,phaseMs in self.phases:
+            rdr.logMsg("INFO","    {:<30} {:9.1f} ms {:5.1f}%".format(phaseName, phaseMs, 100.0*phaseMs/totalMs if totalMs > 0 else 0.0))
+        return(0)
+
+
 def redDrumMain(rdHost="127.0.0.1", rdPort=5001, isLocal=False, debug=False, rdServiceName="RedDrumService", rdTarget="", 
-                rdVersion="0.9.0", rdProfile=""):
+                rdVersion="0.9.0", rdProfile="", useDevServer=None, serverWorkers=None, serverThreads=None,
+                profileStartup=False):
 
     # create instance of RedDrum root data object 
     # this includes method logMsg used to print messages and integrate with the logger
@@ -96,9 +152,15 @@ def redDrumMain(rdHost="127.0.0.1", rdPort=5001, isLocal=False, debug=False, rdS
     #      rdr=RdRootData()
     #      rdr.logMsg(sev,"message")  # where sev= "INFO" "WARNING" "ERROR" "CRITICAL" "DEBUG"
 
+    # the startup phase times are logged if --ProfileStartup
+    startupProfiler=RdStartupProfiler(profileStartup)
+
     # just import the local FlaskApp
+    startupProfiler.startPhase("import reddrum_frontend")
     from reddrum_frontend import RdRootData  # import the RedDrum Root Data Structure and logMsg Method
     rdr=RdRootData()
+    if profileStartup is True:
+        rdr.startupProfiler=startupProfiler
 
     # initialize root data with passed-in args
     rdr.rdHost=rdHost                  # the dflt is 127.0.0.1
@@ -140,9 +202,11 @@ def redDrumMain(rdHost="127.0.0.1", rdPort=5001, isLocal=False, debug=False, rdS
     #    and initializes the file paths:  baseDataPath, varDataPath, RedDrumConfPath   based on the target
     # RedDrum currently has three backends defined.   Others can be defined using Sim_Backend as a template
     # the backends are: "Simulator","OpenBMC", "RackManager", and "" used here for testing the Frontend
+    startupProfiler.startPhase("import backend")
     from backend import RedDrumBackend  
 
     rdr.logMsg("INFO"," Initializing {} Backend".format(rdr.rdTarget))
+    startupProfiler.startPhase("backend init")
     rdr.backend=RedDrumBackend(rdr)
 
     # update the paths (baseDataPath, varDataPath, RedDrumConfPath) and config if isLocal is set true 
@@ -153,11 +217,20 @@ def redDrumMain(rdHost="127.0.0.1", rdPort=5001, isLocal=False, debug=False, rdS
     # Now update the root data with any data stored in the RedDrum.conf config file
     #    This includes the config parameteers for Authentication and header processing
     #    Anything from RedDrum.conf can be OVER_WRITTEN by Backend start code!
+    startupProfiler.startPhase("read RedDrum.conf")
     rc = rdr.readRedDrumConfFile()
     if rc != 0:
         rdr.logMsg("CRITICAL","   RedDrumMain.py:  Error reading RedDrum.conf file.   exiting")
         sys.exit(9)
 
+    # server options passed on the command line override RedDrum.conf
+    if useDevServer is not None:
+        rdr.useDevServer=useDevServer
+    if serverWorkers is not None:
+        rdr.serverWorkers=serverWorkers
+    if serverThreads is not None:
+        rdr.serverThreads=serverThreads
+
 
     # import the RedfishService front-end root service class 
     #     this instantiates all of the Front-end RedfishService resources--all resource live "under" the ServiceRoot
@@ -172,16 +245,18 @@ def redDrumMain(rdHost="127.0.0.1", rdPort=5001, isLocal=False, debug=False, rdS
     #     This will create Python dictionary for all resources under the root service 
     #     It also runs phase-1 discovery 
     rdr.logMsg("INFO"," Initializing Frontend ServiceRoot ")
+    startupProfiler.startPhase("RfServiceRoot")
     rdr.root=RfServiceRoot(rdr )
 
     # run startup discovery
     #   this discovers resources and loads them into the Front-end data cache.
     #   For the Frontend test, no resource data is actually loaded
     rdr.logMsg("INFO"," Running Startup Resource Discovery")
+    startupProfiler.startPhase("runStartupDiscovery")
     rdr.backend.runStartupDiscovery(rdr)
 
     # start the RedDrum Flask app 
-    #     This does not return unless the Flask App exits
+    #     This returns when the server is shutdown (SIGTERM or control-C)
     #     Once this is called, Flask is handling Fron-end APIs from user
     rdr.logMsg("INFO"," Starting Flask App ")
     rdStart_RedDrum_Flask_app(rdr)
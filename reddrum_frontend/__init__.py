@@ -1,4 +1,5 @@
 from .serviceRoot      import  RfServiceRoot
 from .redDrumStartURIs import  rdStart_RedDrum_Flask_app 
+from .redDrumStartURIs import  rdCreate_RedDrum_Flask_app 
 from .rootData         import  RdRootData
 from .RedDrumLogger    import  RdLogger
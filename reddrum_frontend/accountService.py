@@ -11,11 +11,13 @@ import re
 import string
 #from .rootData import RfRoot
 import hashlib
-# support passlib v1.7.0 or later
-#from passlib.hash import sha512_crypt
-#from passlib.hash import plaintext
-from passlib.context import CryptContext
-from .redfish_headers import RfAddHeaders
+import threading
+from .redfish_headers import RfAddHeaders, rfIfNoneMatch, rfIfMatch
+from .credentialCache import RfCredentialCache
+from .passwordHasher import RfPasswordHasher
+from .collectionView import RfCollectionView
+from .persistentDb import rfLoadPersistentDb, rfClearPersistentDb
+from .authenticate import rfPrivilegeMask, rfGetCurrentUser
 
 
 class RfAccountService():  
@@ -26,19 +28,26 @@ class RfAccountService():
         self.loadResourceTemplates(rfr )
         self.loadAccountServiceDatabaseFiles(rfr )
         self.initializeAccountsDict(rfr)
-        self.cryptContext = CryptContext(schemes=["sha512_crypt","sha256_crypt", "plaintext"]) # supported passwd schemes in db
-            # NOTE that plaintext must be last--since all other schemes could be plaintext
-        self.cryptContext.update(default="sha512_crypt") # strictly assign sha512 as the scheme used when "Setting" passwds
-        self.cryptContext.update(sha512_crypt__default_rounds=5000)  # sets normal linux rounds=5000, otherwise it is very slow
+        # password hash and verify calls run on a bounded pool of worker processes (see passwordHasher.py)
+        #   so a login burst can't starve the other APIs.  calls over the queue limit get a 503 with Retry-After
+        self.passwordHasher=RfPasswordHasher(rfr, rfr.passwordHashWorkers, rfr.passwordHashMaxQueueDepth, rfr.passwordHashRetryAfter)
 
-        # default currentUserId and currentUserPrivileges to None
-        #   these are used by APIs that need to do auththen or authroization checking inside the API eg Patch account or Delete Session
-        self.currentUserAccountId=None
-        self.currentUserPrivileges=None
+        # cache of recently verified user/password credentials so Basic auth clients don't re-hash on every request
+        #   entries are invalidated when the account's password, username, role, enabled or locked state changes
+        self.credentialCache=RfCredentialCache(rfr.credentialCacheTimeout, rfr.credentialCacheMaxEntries)
+
+        # the URI handlers run on multiple threads.  hold this lock while reading or updating
+        #   the accountServiceDb, accountsDb, rolesDb, accountsDict and their indexes
+        self.accountsLock=threading.RLock()
 
         self.hdrs=RfAddHeaders(rfr)
         self.magic="123456"
 
+        # generation numbers used for the ETags of the AccountService, Accounts, and Roles resources
+        #   every change to one of these resources must bump its generation (and its collection's, for a POST or DELETE)
+        self.generations=rfr.resourceGenerations
+        self.initializeRefreshHandlers(rfr)
+
     def loadResourceTemplates( self, rfr ):
         #load AccountService Template
         self.accountServiceTemplate=self.loadResourceTemplateFile(rfr.baseDataPath,"templates", "AccountService.json")
@@ -59,12 +68,13 @@ class RfAccountService():
     # returns a dict loaded of the template file, which calling function saves to a variable
     # if file does not exist, the service exits
     #    assumes good json in the template file
+    # the templates are read from the base data snapshot (see baseDataSnapshot.py)
     def loadResourceTemplateFile( self, dataPath, subDir, filename ):
-        indxFilePath=os.path.join(dataPath, subDir, filename)
-        if os.path.isfile(indxFilePath):
-            response=json.loads( open(indxFilePath,"r").read() )
+        response=self.rfr.baseData.readJson(subDir, filename)
+        if response is not None:
             return(response)
         else:
+            indxFilePath=os.path.join(dataPath, subDir, filename)
             self.rfr.logMsg("CRITICAL", 
                "*****ERROR: AccountService: Json Data file:{} Does not exist. Exiting.".format(indxFilePath))
             sys.exit(10)
@@ -72,66 +82,37 @@ class RfAccountService():
     def loadAccountServiceDatabaseFiles(self, rfr ):
         # load the AccountService database file:      "AccountServiceDb.json"
         filename="AccountServiceDb.json"
-        self.accountServiceDbFilePath,self.accountServiceDb=self.loadDatabaseFile(rfr,"db",filename) 
+        self.accountServiceDbFilePath,self.accountServiceDb=rfLoadPersistentDb(rfr,"db",filename) 
 
         # load the Accounts collection database file: "AccountsDb.json"
         filename="AccountsDb.json"
-        self.accountsDbFilePath,self.accountsDb=self.loadDatabaseFile(rfr,"db",filename) 
+        self.accountsDbFilePath,self.accountsDb=rfLoadPersistentDb(rfr,"db",filename) 
 
         # load the Roles collection  database file:     "RolesDb.json"
         filename="RolesDb.json"
-        self.rolesDbFilePath,self.rolesDb=self.loadDatabaseFile(rfr,"db",filename) 
-
-    # worker function called by loadAccountServiceDatabaseFiles() to load a specific database file
-    # returns two positional parameters:
-    #    the database filepath,
-    #    a dict of the database file
-    # if file does not exist in the varDataPath/subDir directory (the database dir), 
-    #   then it loads the file from baseDataBath (the default database), and saves it back to the varDataPath dir
-    # assumes good json in the database file
-    def loadDatabaseFile( self, rfr, subDir, filename ):
-        dbFilePath=os.path.join(rfr.varDataPath,subDir, filename)
-        if os.path.isfile(dbFilePath):
-            dbDict=json.loads( open(dbFilePath,"r").read() )
-        else:
-            self.rfr.logMsg("INFO","*****WARNING: Json Data file:{} Does not exist. Creating default.".format(dbFilePath))
-            # read the data in from the default database dir with the rm-tools package
-            dfltDbFilePath=os.path.join(rfr.baseDataPath,subDir,filename)
-            if os.path.isfile(dfltDbFilePath):
-                dbDict=json.loads( open(dfltDbFilePath,"r").read() )
-            else:
-                self.rfr.logMsg("CRITICAL", 
-                    "*****ERROR: Default Json Database file:{} Does not exist. Exiting.".format(dfltDbFilePath))
-                sys.exit(10)
-            #write the data back out to the var directory where the dynamic db info is kept
-            dbDictJson=json.dumps(dbDict,indent=4)
-            with open( dbFilePath, 'w', encoding='utf-8') as f:
-                f.write(dbDictJson)
-        # return path and data
-        return(dbFilePath,dbDict)
+        self.rolesDbFilePath,self.rolesDb=rfLoadPersistentDb(rfr,"db",filename) 
 
     def clearAccountServiceDatabaseFiles(self, rfr ):
         # clear the AccountService database file:      "AccountServiceDb.json"
         filename="AccountServiceDb.json"
-        self.accountServiceDb=self.clearDatabaseFile(rfr,"db",filename) 
+        self.accountServiceDb=rfClearPersistentDb(rfr,"db",filename) 
 
         # clear the Accounts collection database file: "AccountsDb.json"
         filename="AccountsDb.json"
-        self.accountsDb=self.clearDatabaseFile(rfr,"db",filename) 
+        self.accountsDb=rfClearPersistentDb(rfr,"db",filename) 
 
         # clear the Roles collection  database file:     "RolesDb.json"
         filename="RolesDb.json"
-        self.rolesDb=self.clearDatabaseFile(rfr,"db",filename) 
-
-    def clearDatabaseFile( self, rfr, subDir, filename ):
-        clearedDb=dict()
-        dbFilePath=os.path.join(rfr.varDataPath,subDir, filename)
-        #write the data back out to the var directory where the dynamic db info is kept
-        dbDictJson=json.dumps(clearedDb,indent=4)
-        with open( dbFilePath, 'w', encoding='utf-8') as f:
-                f.write(dbDictJson)
-        # return path and data
-        return(clearedDb)
+        self.rolesDb=rfClearPersistentDb(rfr,"db",filename) 
+
+        # drop all cached credentials since the accounts they were verified against are gone
+        self.credentialCache.clear()
+
+        # and rebuild the (now empty) username index and role privilege masks
+        self.initializeUserNameIndex(rfr)
+        self.initializeRolePrivilegeMasks(rfr)
+        self.initializeCollectionViews(rfr)
+        self.initializeRefreshHandlers(rfr)
 
     def initializeAccountsDict(self,rfr):
         # this is the in-memory database of account properties that are not persistent
@@ -145,91 +126,199 @@ class RfAccountService():
         #create the initial state of the accountsDict from the accountsDb
         for acct in self.accountsDb:
             self.accountsDict[acct]={ "Locked": False, "FailedLoginCount": 0, "LockedTime": 0, "AuthFailTime": 0 }
+
+        self.initializeUserNameIndex(rfr)
+        self.initializeRolePrivilegeMasks(rfr)
+        self.initializeCollectionViews(rfr)
+
+    def initializeUserNameIndex(self,rfr):
+        # secondary index of the accountsDb used to lookup an account by UserName without walking the accountsDb
+        #   self.accountIdByUserName[username]=accountid
+        # it must be updated wherever an account is created, deleted, or its UserName is patched
+        self.accountIdByUserName=dict()
+        for acct in self.accountsDb:
+            self.accountIdByUserName[self.accountsDb[acct]["UserName"]]=acct
+
+    def initializeRolePrivilegeMasks(self,rfr):
+        # the AssignedPrivileges of each role in the rolesDb compiled to a privilege mask (see authenticate.py)
+        #   self.rolePrivilegeMasks[roleid]=privilegeMask
+        # it must be updated wherever a role is created, deleted, or its AssignedPrivileges are patched
+        self.rolePrivilegeMasks=dict()
+        for roleid in self.rolesDb:
+            self.setRolePrivilegeMask(roleid)
+
+    def initializeCollectionViews(self,rfr):
+        # the Members of the Accounts and Roles collections, and their cached GET responses (see collectionView.py)
+        # they must be updated wherever an account or role is created or deleted
+        self.accountsView=RfCollectionView(rfr, self.accountsCollectionTemplate, "/redfish/v1/AccountService/Accounts/",
+                                           self.accountsDb)
+        self.rolesView=RfCollectionView(rfr, self.rolesCollectionTemplate, "/redfish/v1/AccountService/Roles/", self.rolesDb)
+
+    def initializeRefreshHandlers(self,rfr):
+        # with DatabaseEngine=sqlite, other server workers also change the databases.  when their changes are read into
+        #   the accountServiceDb, accountsDb, and rolesDb (see persistentDb.py), update the data derived from them
+        self.accountServiceDb.setRefreshHandler(self.accountsLock,
+                                                lambda keys: self.generations.bump("/redfish/v1/AccountService"))
+        self.accountsDb.setRefreshHandler(self.accountsLock, self.accountsRefreshed)
+        self.rolesDb.setRefreshHandler(self.accountsLock, self.rolesRefreshed)
+        # the ETags of the resources stored in the databases are the same on all workers (see resourceGenerations.py)
+        self.generations.setDbSource("/redfish/v1/AccountService", self.accountServiceDb)
+        self.generations.setDbSource("/redfish/v1/AccountService/Accounts", self.accountsDb, members=True)
+        self.generations.setDbSource("/redfish/v1/AccountService/Roles", self.rolesDb, members=True)
+
+    # refresh handler of the accountsDb:  called with the accountsLock held
+    def accountsRefreshed(self, accountids):
+        for accountid in accountids:
+            accountUri="/redfish/v1/AccountService/Accounts/" + accountid
+            self.credentialCache.invalidateAccount(accountid)
+            if accountid in self.accountsDb:
+                if accountid not in self.accountsDict:
+                    self.accountsDict[accountid]={ "Locked": False, "FailedLoginCount": 0, "LockedTime": 0, "AuthFailTime": 0 }
+                self.accountsView.add(accountid)
+                self.generations.bump(accountUri)
+            else:
+                self.accountsDict.pop(accountid, None)
+                self.accountsView.remove(accountid)
+                self.generations.remove(accountUri)
+        self.generations.bump("/redfish/v1/AccountService/Accounts")
+        # UserNames may have changed:  rebuild the index
+        self.initializeUserNameIndex(self.rfr)
+        return(0)
+
+    # refresh handler of the rolesDb:  called with the accountsLock held
+    def rolesRefreshed(self, roleids):
+        for roleid in roleids:
+            roleUri="/redfish/v1/AccountService/Roles/" + roleid
+            if roleid in self.rolesDb:
+                self.setRolePrivilegeMask(roleid)
+                self.rolesView.add(roleid)
+                self.generations.bump(roleUri)
+            else:
+                self.rolePrivilegeMasks.pop(roleid, None)
+                self.rolesView.remove(roleid)
+                self.generations.remove(roleUri)
+        self.generations.bump("/redfish/v1/AccountService/Roles")
+        # the privileges of the cached credentials may have changed
+        self.credentialCache.clear()
+        return(0)
+
+    # the current privileges of the account of a session that is restored at startup (see sessionService.py)
+    #   returns: rc, userPrivileges, userPrivilegeMask
+    #      rc=404 if the account was deleted, its UserName changed, it is not enabled, or its role has no Login privilege
+    def getSessionAccountInfo(self, accountid, username):
+        with self.accountsLock:
+            if (accountid not in self.accountsDb) or (self.accountsDb[accountid]["UserName"] != username):
+                return(404, None, None)
+            roleId=self.accountsDb[accountid]["RoleId"]
+            if (self.accountsDb[accountid]["Enabled"] is not True) or (roleId not in self.rolesDb):
+                return(404, None, None)
+            userPrivileges=self.rolesDb[roleId]["AssignedPrivileges"]
+            if "Login" not in userPrivileges:
+                return(404, None, None)
+            return(0, userPrivileges, self.getRolePrivilegeMask(roleId))
+
+    def setRolePrivilegeMask(self, roleid):
+        self.rolePrivilegeMasks[roleid]=rfPrivilegeMask(self.rolesDb[roleid]["AssignedPrivileges"])
+        return(0)
+
+    # get the privilege mask of a role.  returns 0 (no privileges) if the role does not exist
+    def getRolePrivilegeMask(self, roleid):
+        return(self.rolePrivilegeMasks.get(roleid, 0))
         
             
     # GET AccountService
     def getAccountServiceResource(self,request):
-        # generate headers
-        hdrs = self.hdrs.rfRespHeaders(request, contentType="json", resource=self.accountServiceTemplate, allow="GetPatch")
-
-        # Process HEAD method
-        if request.method=="HEAD":
-            return(0,200,"","",hdrs)
-
-        # create a copy of the AccountService resource template 
-        resData2=dict(self.accountServiceTemplate)
-
-        # add required properties
-        resData2["@odata.id"] = "/redfish/v1/AccountService"
-        resData2["Id"] = "AccountService"
-        resData2["Name"] = "Account Service"
-        resData2["Description"] = "RackManager User Account Service"
-
-        # add links to Accounts and Roles collections
-        resData2["Accounts"] = { "@odata.id": "/redfish/v1/AccountService/Accounts" }
-        resData2["Roles"] = { "@odata.id": "/redfish/v1/AccountService/Roles" }
-
-        # set the dynamic data in the template copy to the value in the accountService database
-        resData2["AuthFailureLoggingThreshold"]=self.accountServiceDb["AuthFailureLoggingThreshold"]
-        resData2["MinPasswordLength"]=self.accountServiceDb["MinPasswordLength"]
-        resData2["AccountLockoutThreshold"]=self.accountServiceDb["AccountLockoutThreshold"]
-        resData2["AccountLockoutDuration"]=self.accountServiceDb["AccountLockoutDuration"]
-        resData2["AccountLockoutCounterResetAfter"]=self.accountServiceDb["AccountLockoutCounterResetAfter"]
-        if "MaxPasswordLength" in self.accountServiceDb:  # early RedDrum did not support MaxPasswordLength
-            resData2["MaxPasswordLength"] = self.accountServiceDb["MaxPasswordLength"]
-        if "ServiceEnabled" in self.accountServiceDb:  # early RedDrum did not support ServiceEnabled
-            resData2["ServiceEnabled"]= self.accountServiceDb["ServiceEnabled"]
-
-        # create the response json data and return
-        resp=json.dumps(resData2,indent=4)
-        return(0, 200, "", resp, hdrs)
+        with self.accountsLock:
+            # generate headers
+            etagValue=self.generations.etag("/redfish/v1/AccountService")
+            hdrs = self.hdrs.rfRespHeaders(request, contentType="json", resource=self.accountServiceTemplate, allow="GetPatch",
+                                           strongEtag=etagValue)
+            if rfIfNoneMatch(request, etagValue) is True:
+                return(0,304,"","",hdrs)
+
+            # Process HEAD method
+            if request.method=="HEAD":
+                return(0,200,"","",hdrs)
+
+            # create a copy of the AccountService resource template 
+            resData2=dict(self.accountServiceTemplate)
+
+            # add required properties
+            resData2["@odata.id"] = "/redfish/v1/AccountService"
+            resData2["Id"] = "AccountService"
+            resData2["Name"] = "Account Service"
+            resData2["Description"] = "RackManager User Account Service"
+
+            # add links to Accounts and Roles collections
+            resData2["Accounts"] = { "@odata.id": "/redfish/v1/AccountService/Accounts" }
+            resData2["Roles"] = { "@odata.id": "/redfish/v1/AccountService/Roles" }
+
+            # set the dynamic data in the template copy to the value in the accountService database
+            resData2["AuthFailureLoggingThreshold"]=self.accountServiceDb["AuthFailureLoggingThreshold"]
+            resData2["MinPasswordLength"]=self.accountServiceDb["MinPasswordLength"]
+            resData2["AccountLockoutThreshold"]=self.accountServiceDb["AccountLockoutThreshold"]
+            resData2["AccountLockoutDuration"]=self.accountServiceDb["AccountLockoutDuration"]
+            resData2["AccountLockoutCounterResetAfter"]=self.accountServiceDb["AccountLockoutCounterResetAfter"]
+            if "MaxPasswordLength" in self.accountServiceDb:  # early RedDrum did not support MaxPasswordLength
+                resData2["MaxPasswordLength"] = self.accountServiceDb["MaxPasswordLength"]
+            if "ServiceEnabled" in self.accountServiceDb:  # early RedDrum did not support ServiceEnabled
+                resData2["ServiceEnabled"]= self.accountServiceDb["ServiceEnabled"]
+
+            # create the response json data and return
+            resp=self.rdr.jsonSerializer.dumps(resData2)
+            return(0, 200, "", resp, hdrs)
 
     # PATCH AccountService
     def patchAccountServiceResource(self, request, patchData):
-        # generate headers
-        hdrs = self.hdrs.rfRespHeaders(request)
-
-        #first verify client didn't send us a property we cant patch
-        patachables=("AccountLockoutThreshold", "AuthFailureLoggingThreshold",
-                     "AccountLockoutDuration","AccountLockoutCounterResetAfter")
-        for key in patchData:
-            if( not key in patachables ):
-                return (4, 400, "Bad Request-Invalid Patch Property Sent", "", hdrs)
-
-        # then convert the patch properties passed-in to integers
-        for key in patchData:
-            newVal=patchData[key]
-            try:
-                numVal=round(newVal)
-            except ValueError:
-                return(4,400,"invalid value","",hdrs)
-            else:
-                patchData[key]=numVal
-
-        # then verify the properties passed-in are in valid ranges
-        newDuration=self.accountServiceDb["AccountLockoutDuration"]
-        newResetAfter=self.accountServiceDb["AccountLockoutCounterResetAfter"]
-        if( "AccountLockoutDuration" in patchData ):
-            newDuration=patchData["AccountLockoutDuration"]
-        if( "AccountLockoutCounterResetAfter" in patchData ):
-            newResetAfter=patchData["AccountLockoutCounterResetAfter"]
-        if( newDuration < newResetAfter ):
-            return(4,400,"Bad Request-Invalid value","",hdrs)
-
-        # if here, all values are good. Update the accountServiceDb dict
-        for key in patchData:
-            self.accountServiceDb[key]=patchData[key]
-
-        # write the data back out to the accountService database file
-        accountServiceDbJson=json.dumps(self.accountServiceDb,indent=4)
-        with open( self.accountServiceDbFilePath, 'w', encoding='utf-8') as f:
-            f.write(accountServiceDbJson)
-        return(0, 204, "", "", hdrs)
+        with self.accountsLock:
+            # generate headers
+            hdrs = self.hdrs.rfRespHeaders(request)
+
+            # if the request has an If-Match header, verify the AccountService was not modified since the client read it
+            if rfIfMatch(request, self.generations.etag("/redfish/v1/AccountService")) is not True:
+                return (4, 412, "Precondition Failed-If-Match", "", hdrs)
+
+            #first verify client didn't send us a property we cant patch
+            patachables=("AccountLockoutThreshold", "AuthFailureLoggingThreshold",
+                         "AccountLockoutDuration","AccountLockoutCounterResetAfter")
+            for key in patchData:
+                if( not key in patachables ):
+                    return (4, 400, "Bad Request-Invalid Patch Property Sent", "", hdrs)
+
+            # then convert the patch properties passed-in to integers
+            for key in patchData:
+                newVal=patchData[key]
+                try:
+                    numVal=round(newVal)
+                except ValueError:
+                    return(4,400,"invalid value","",hdrs)
+                else:
+                    patchData[key]=numVal
+
+            # then verify the properties passed-in are in valid ranges
+            newDuration=self.accountServiceDb["AccountLockoutDuration"]
+            newResetAfter=self.accountServiceDb["AccountLockoutCounterResetAfter"]
+            if( "AccountLockoutDuration" in patchData ):
+                newDuration=patchData["AccountLockoutDuration"]
+            if( "AccountLockoutCounterResetAfter" in patchData ):
+                newResetAfter=patchData["AccountLockoutCounterResetAfter"]
+            if( newDuration < newResetAfter ):
+                return(4,400,"Bad Request-Invalid value","",hdrs)
+
+            # if here, all values are good. Update the accountServiceDb dict
+            for key in patchData:
+                self.accountServiceDb[key]=patchData[key]
+            self.generations.bump("/redfish/v1/AccountService")
+
+            # journal the changes to the accountService database
+            self.accountServiceDb.persist(*patchData.keys())
+            return(0, 204, "", "", hdrs)
 
     # getAccountAuthInfo(username,password)
     #   returns: rc, errMsgString, accountId, roleId, userPrivileges
     #      rc=404 if username is not in accountsDb
     #      rc=401 if username is invalid or mismatches password, or account is locked or not enabled
+    #      rc=503 if the password hasher is overloaded--the caller should return 503 with a Retry-After header
     #        =0   if authenticated
     #   self.accountsDict[accountid]={ "Locked": False, "FailedLoginCount": 0, "LockedTime": 0, "AuthFailTime": 0 }
 
@@ -244,89 +333,116 @@ class RfAccountService():
         if password is None:
             return(500, "Invalid Auth Check for password",None,None,None)
 
-        # from username, lookup accountId --- they are not necessarily the same
-        accountid=None
-        for acctid in self.accountsDb:
-            if( username == self.accountsDb[acctid]["UserName"] ):
-                accountid=acctid
-                break
-
-        # if we didn't find the username, return error
-        # since the username is invalid, we cant count invalid login attempts
-        if accountid is None:
-            return(404, "Not Found-Username Not Found",None,None,None)
-
-        # check if the account is disabled
-        if( self.accountsDb[accountid]["Enabled"] is False ): 
-            return(401, "Not Authorized--Account Disabled",None,None,None)
-
-        # check if account was locked 
-        #    if it is locked but has now exceeded LockoutDuration then unlock and continue
-        #    if it is locked and not exceeded lockout duration, return 401 Not authorized
-        curTime=time.time()
-        if self.accountsDict[accountid]["Locked"] is True:
-            if( (curTime - self.accountsDict[accountid]["LockedTime"]) > self.accountServiceDb["AccountLockoutDuration"] ):
-                # the lockout duration has expired.   unlock it.
-                self.accountsDict[accountid]["Locked"]=False
-                self.accountsDict[accountid]["LockedTime"]=0
-                self.accountsDict[accountid]["FailedLoginCount"]=0
-                self.accountsDict[accountid]["AuthFailTime"]=0
-            else:
-                # lockout duration has not expired, return auth error
-                return(401, "Not Authorized--Account Locked By Service",None,None,None)
-
-        #the accountid exists, and account is enabled and not locked
+        # the lockout state is shared with other requests, so the account checks and the lockout counter updates
+        #   are done holding the accountsLock.  the passwd verify is slow, so it is done without the lock
+        with self.accountsLock:
+            # from username, lookup accountId --- they are not necessarily the same
+            accountid=self.accountIdByUserName.get(username)
+
+            # if we didn't find the username, return error
+            # since the username is invalid, we cant count invalid login attempts
+            if accountid is None:
+                return(404, "Not Found-Username Not Found",None,None,None)
+
+            # check if the account is disabled
+            if( self.accountsDb[accountid]["Enabled"] is False ): 
+                return(401, "Not Authorized--Account Disabled",None,None,None)
+
+            # check if account was locked 
+            #    if it is locked but has now exceeded LockoutDuration then unlock and continue
+            #    if it is locked and not exceeded lockout duration, return 401 Not authorized
+            curTime=time.time()
+            if self.accountsDict[accountid]["Locked"] is True:
+                if( (curTime - self.accountsDict[accountid]["LockedTime"]) > self.accountServiceDb["AccountLockoutDuration"] ):
+                    # the lockout duration has expired.   unlock it.
+                    self.accountsDict[accountid]["Locked"]=False
+                    self.accountsDict[accountid]["LockedTime"]=0
+                    self.accountsDict[accountid]["FailedLoginCount"]=0
+                    self.accountsDict[accountid]["AuthFailTime"]=0
+                    self.generations.bumpLocal("/redfish/v1/AccountService/Accounts/" + accountid)
+                else:
+                    # lockout duration has not expired, return auth error
+                    return(401, "Not Authorized--Account Locked By Service",None,None,None)
+
+            #the accountid exists, and account is enabled and not locked
+
+            #reset the AuthFailTime if time since last login failure is > AccountLockoutCounterResetAfter
+            authFailTime=self.accountsDict[accountid]["AuthFailTime"]
+            if( authFailTime != 0 ):
+                # if we have had failures and are counting authentication failures
+                resetAfterThreshold=self.accountServiceDb["AccountLockoutCounterResetAfter"]
+                if( ( curTime - authFailTime ) > resetAfterThreshold ):
+                    # if time since last failure is greater than the reset counter threshold, then reset the counters
+                    self.accountsDict[accountid]["AuthFailTime"]=0
+                    self.accountsDict[accountid]["FailedLoginCount"]=0
 
-        #reset the AuthFailTime if time since last login failure is > AccountLockoutCounterResetAfter
-        authFailTime=self.accountsDict[accountid]["AuthFailTime"]
-        if( authFailTime != 0 ):
-            # if we have had failures and are counting authentication failures
-            resetAfterThreshold=self.accountServiceDb["AccountLockoutCounterResetAfter"]
-            if( ( curTime - authFailTime ) > resetAfterThreshold ):
-                # if time since last failure is greater than the reset counter threshold, then reset the counters
-                self.accountsDict[accountid]["AuthFailTime"]=0
-                self.accountsDict[accountid]["FailedLoginCount"]=0
+            # get the stored passwd hash while holding the lock.  the verify below runs without the lock
+            storedPasswordHash=self.accountsDb[accountid]["Password"]
 
         #now check the associated password to see if authentication passis this time 
         #check password
-        #xg11
-        #if( password != self.accountsDb[accountid]["Password"] ): # TODO change to check hash
-        if self.cryptContext.verify(password, self.accountsDb[accountid]["Password"]) is not True:
-            # authentication failed.
-
-            # check if lockout on authentication failures is enabled
-            lockoutThreshold=self.accountServiceDb["AccountLockoutThreshold"]
-            lockoutDuration=self.accountServiceDb["AccountLockoutDuration"]
-
-            # lockoutThreshold and lockoutDuration must BOTH be non-zero to enable lock on auth failures
-            if( (lockoutThreshold > 0) and (lockoutDuration > 0) ):
-                # check if we have now exceeded the login failures and need to lock the account
-                failedLoginCount=self.accountsDict[accountid]["FailedLoginCount"] + 1
-                if( failedLoginCount >= lockoutThreshold ):
-                    # lock the account and clear the AuthFailTime and FailedLogin counters
-                    self.accountsDict[accountid]["Locked"]=True
-                    self.accountsDict[accountid]["LockedTime"]=curTime
-                    self.accountsDict[accountid]["AuthFailTime"]=0
-                    self.accountsDict[accountid]["FailedLoginCount"]=0
-                    return(401, "Not Authorized--Password Incorrect and Account is now Locked By Service",None,None,None)
+        #   if this username/password was verified recently, use the cached result instead of re-hashing the password
+        #   only successful verifies are cached, so failed logins are always counted below
+        passwordVerified=False
+        if self.credentialCache.lookup(username, password, curTime) == accountid:
+            passwordOk=True
+        else:
+            passwordVerified=True
+            verifyStartTime=time.time()
+            rc,passwordOk=self.passwordHasher.verify(password, storedPasswordHash)
+            if rc == 503:
+                # the passwd was not checked, so don't count this as a failed login
+                return(503, "Service Unavailable--Password Hasher Overloaded",None,None,None)
+            elif rc != 0:
+                return(500, "Password Verify Failed",None,None,None)
+            self.credentialCache.addVerifyTime(time.time() - verifyStartTime)
+
+        with self.accountsLock:
+            # the account may have been deleted while the passwd was being verified
+            if accountid not in self.accountsDb:
+                return(404, "Not Found-Username Not Found",None,None,None)
+
+            if passwordOk is not True:
+                # authentication failed.
+
+                # check if lockout on authentication failures is enabled
+                lockoutThreshold=self.accountServiceDb["AccountLockoutThreshold"]
+                lockoutDuration=self.accountServiceDb["AccountLockoutDuration"]
+
+                # lockoutThreshold and lockoutDuration must BOTH be non-zero to enable lock on auth failures
+                if( (lockoutThreshold > 0) and (lockoutDuration > 0) ):
+                    # check if we have now exceeded the login failures and need to lock the account
+                    failedLoginCount=self.accountsDict[accountid]["FailedLoginCount"] + 1
+                    if( failedLoginCount >= lockoutThreshold ):
+                        # lock the account and clear the AuthFailTime and FailedLogin counters
+                        self.accountsDict[accountid]["Locked"]=True
+                        self.accountsDict[accountid]["LockedTime"]=curTime
+                        self.accountsDict[accountid]["AuthFailTime"]=0
+                        self.accountsDict[accountid]["FailedLoginCount"]=0
+                        self.generations.bumpLocal("/redfish/v1/AccountService/Accounts/" + accountid)
+                        return(401, "Not Authorized--Password Incorrect and Account is now Locked By Service",None,None,None)
+                    else:
+                        # we have not exceeded the failed authN threshold, update the counter and continue
+                        self.accountsDict[accountid]["FailedLoginCount"]=failedLoginCount
+                        self.accountsDict[accountid]["AuthFailTime"]=curTime
+                        return(401, "Not Authorized--Password Incorrect",None,None,None)
+
                 else:
-                    # we have not exceeded the failed authN threshold, update the counter and continue
-                    self.accountsDict[accountid]["FailedLoginCount"]=failedLoginCount
-                    self.accountsDict[accountid]["AuthFailTime"]=curTime
+                    # case where account lockout is not enabled
                     return(401, "Not Authorized--Password Incorrect",None,None,None)
 
-            else:
-                # case where account lockout is not enabled
-                return(401, "Not Authorized--Password Incorrect",None,None,None)
+            #if here, the authentication was successful
+            #reset the lockout timers
+            self.accountsDict[accountid]["FailedLoginCount"]=0
+            self.accountsDict[accountid]["AuthFailTime"]=0
 
-        #if here, the authentication was successful
-        #reset the lockout timers
-        self.accountsDict[accountid]["FailedLoginCount"]=0
-        self.accountsDict[accountid]["AuthFailTime"]=0
+            # cache the verified credential--unless the passwd was changed while it was being verified
+            if (passwordVerified is True) and (self.accountsDb[accountid]["Password"] == storedPasswordHash):
+                self.credentialCache.add(username, password, accountid, curTime)
 
-        storedpassword=self.accountsDb[accountid]["Password"]
-        storedRoleId=self.accountsDb[accountid]["RoleId"]
-        storedPrivileges=self.rolesDb[storedRoleId]["AssignedPrivileges"]
+            storedpassword=self.accountsDb[accountid]["Password"]
+            storedRoleId=self.accountsDb[accountid]["RoleId"]
+            storedPrivileges=self.rolesDb[storedRoleId]["AssignedPrivileges"]
 
         # if here, all ok, return privileges
         #   returns:  rc, errMsgString, userName, roleId, userPrivileges
@@ -340,151 +456,141 @@ class RfAccountService():
     # GET RolesCollection
     # GET roles Collection
     def getRolesCollectionResource(self, request):
-        hdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=["HEAD","GET","POST"],
-                                     resource=self.rolesCollectionTemplate)
-        if request.method=="HEAD":
-            return(0,200,"","",hdrs)
-
-        # the routine copies a template file with the static redfish parameters
-        # then it updates the dynamic properties from the rolesDb dict
-        # for RolesCollection GET, we build the Members array
-
-        # copy the rolesCollection template file (which has an empty roles array)
-        resData2=dict(self.rolesCollectionTemplate)
-        count=0
-        # now walk through the entries in the rolesDb and build the rolesCollection Members array
-        # note that the members array is an empty array in the template
-        roleUriBase="/redfish/v1/AccountService/Roles/"
-        for roleid in self.rolesDb:
-            # increment members count, and create the member for the next entry
-            count=count+1
-            memberUri=roleUriBase + roleid
-            newMember=[{"@odata.id": memberUri}]
-
-            # add the new member to the members array we are building
-            resData2["Members"] = resData2["Members"] + newMember
-        resData2["Members@odata.count"]=count
+        with self.accountsLock:
+            etagValue=self.generations.etag("/redfish/v1/AccountService/Roles")
+            hdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=["HEAD","GET","POST"],
+                                         resource=self.rolesCollectionTemplate, strongEtag=etagValue)
+            if rfIfNoneMatch(request, etagValue) is True:
+                return(0,304,"","",hdrs)
+            if request.method=="HEAD":
+                return(0,200,"","",hdrs)
 
-        # convert to json
-        jsonRespData2=(json.dumps(resData2,indent=4))
-
-        return(0, 200, "", jsonRespData2, hdrs)
+            # the rolesView keeps the rolesCollection Members array, and the json response, up to date with the rolesDb
+            #   it returns the page of the collection if the request has $skip or $top
+            return(self.rolesView.getResponse(request, hdrs))
 
 
     # GET Role Entry
     def getRoleEntry(self, request, roleid):
+        with self.accountsLock:
+
+            # First verify that the roleId is valid
+            if roleid not in self.rolesDb:
+                # generate error header for 4xx errors
+                errhdrs=self.hdrs.rfRespHeaders(request)
+                return(4, 404, "Not Found", "",errhdrs)
+
+            # generate header info depending on the specific roleId
+            # predefined roles cannot be deleted or modified
+            #     self.rolesDb[roleid]={"Name": rolename, "Description": roleDescription, "IsPredefined": idPredefined, 
+            #                       "AssignedPrivileges": privileges }
+            if self.rolesDb[roleid]["IsPredefined"] is True:
+                # pre-defined roles cannot be deleted or modified
+                allowMethods="Get"
+            else:
+                allowMethods=["HEAD","GET","PATCH","DELETE"]
+            etagValue=self.generations.etag("/redfish/v1/AccountService/Roles/" + roleid)
+            respHdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=allowMethods,
+                                         resource=self.roleEntryTemplate, strongEtag=etagValue)
+            if rfIfNoneMatch(request, etagValue) is True:
+                return(0,304,"","",respHdrs)
+            if request.method=="HEAD":
+                return(0,200,"","",respHdrs)
+
+            # copy the template roleEntry resource
+            resData2=dict(self.roleEntryTemplate)
+
+            # now overwrite the dynamic data from the rolesDb 
+            roleEntryUri="/redfish/v1/AccountService/Roles/" + roleid
+            resData2["@odata.id"]=roleEntryUri
+            resData2["Id"]=roleid
+            resData2["Name"]=self.rolesDb[roleid]["Name"]
+            resData2["Description"]=self.rolesDb[roleid]["Description"]
+            resData2["IsPredefined"]=self.rolesDb[roleid]["IsPredefined"]
+            resData2["AssignedPrivileges"]=self.rolesDb[roleid]["AssignedPrivileges"]
+            if "RoleId" in self.rolesDb[roleid]:
+                resData2["RoleId"]=self.rolesDb[roleid]["RoleId"]
+            else:
+                resData2["RoleId"]=roleid
 
-        # First verify that the roleId is valid
-        if roleid not in self.rolesDb:
-            # generate error header for 4xx errors
-            errhdrs=self.hdrs.rfRespHeaders(request)
-            return(4, 404, "Not Found", "",errhdrs)
-
-        # generate header info depending on the specific roleId
-        # predefined roles cannot be deleted or modified
-        #     self.rolesDb[roleid]={"Name": rolename, "Description": roleDescription, "IsPredefined": idPredefined, 
-        #                       "AssignedPrivileges": privileges }
-        if self.rolesDb[roleid]["IsPredefined"] is True:
-            # pre-defined roles cannot be deleted or modified
-            allowMethods="Get"
-        else:
-            allowMethods=["HEAD","GET","PATCH","DELETE"],
-        respHdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=allowMethods,
-                                     resource=self.roleEntryTemplate)
-        if request.method=="HEAD":
-            return(0,200,"","",respHdrs)
-
-        # copy the template roleEntry resource
-        resData2=dict(self.roleEntryTemplate)
-
-        # now overwrite the dynamic data from the rolesDb 
-        roleEntryUri="/redfish/v1/AccountService/Roles/" + roleid
-        resData2["@odata.id"]=roleEntryUri
-        resData2["Id"]=roleid
-        resData2["Name"]=self.rolesDb[roleid]["Name"]
-        resData2["Description"]=self.rolesDb[roleid]["Description"]
-        resData2["IsPredefined"]=self.rolesDb[roleid]["IsPredefined"]
-        resData2["AssignedPrivileges"]=self.rolesDb[roleid]["AssignedPrivileges"]
-        if "RoleId" in self.rolesDb[roleid]:
-            resData2["RoleId"]=self.rolesDb[roleid]["RoleId"]
-        else:
-            resData2["RoleId"]=roleid
-
-        # convert to json
-        jsonResponseData=(json.dumps(resData2,indent=4))
+            # convert to json
+            jsonResponseData=(self.rdr.jsonSerializer.dumps(resData2))
 
-        return(0, 200, "", jsonResponseData, respHdrs)
+            return(0, 200, "", jsonResponseData, respHdrs)
 
 
     # Post RolesCollection
     # POST to roles collection  (add a custom role)
     def postRolesResource(self, request, postData):
-        # generate headers for 4xx error messages
-        errhdrs = self.hdrs.rfRespHeaders(request )
-
-        # first verify that the client didn't send us a property we cant patch
-        # we need to fail the request if we cant handle any properties sent
-        #   note that this implementation does not support OemPrivileges
-        for key in postData:
-            if( (key != "Id") and (key != "AssignedPrivileges") and (key != "RoleId")):
-                return (4, 400, "Bad Request-Invalid Post Property Sent", "", errhdrs)
-        # now check that all required on create properties were sent as post data
-        privileges=None
-
-        # Note RedDrum allows sending either "Id" or "RoleId" because early schema definitions did not
-        #   include the RoldId property and clients like Redfishtool used Id to identify the role
-        #   Starting with Role.v1_2_0, the RoleId was added as RequiredOnCreate 
-        #   so RedDrum will require EITHER RoleId or Id and will use RoleId if both are sent
-        if( "RoleId" in postData):
-            roleId=postData['RoleId']
-        elif( "Id" in postData):
-            roleId=postData['Id']
-        else:
-            roleId=None
+        with self.accountsLock:
+            # generate headers for 4xx error messages
+            errhdrs = self.hdrs.rfRespHeaders(request )
+
+            # first verify that the client didn't send us a property we cant patch
+            # we need to fail the request if we cant handle any properties sent
+            #   note that this implementation does not support OemPrivileges
+            for key in postData:
+                if( (key != "Id") and (key != "AssignedPrivileges") and (key != "RoleId")):
+                    return (4, 400, "Bad Request-Invalid Post Property Sent", "", errhdrs)
+            # now check that all required on create properties were sent as post data
+            privileges=None
+
+            # Note RedDrum allows sending either "Id" or "RoleId" because early schema definitions did not
+            #   include the RoldId property and clients like Redfishtool used Id to identify the role
+            #   Starting with Role.v1_2_0, the RoleId was added as RequiredOnCreate 
+            #   so RedDrum will require EITHER RoleId or Id and will use RoleId if both are sent
+            if( "RoleId" in postData):
+                roleId=postData['RoleId']
+            elif( "Id" in postData):
+                roleId=postData['Id']
+            else:
+                roleId=None
 
-        if("AssignedPrivileges" in postData):
-            privileges=postData['AssignedPrivileges']
+            if("AssignedPrivileges" in postData):
+                privileges=postData['AssignedPrivileges']
 
-        if( (roleId is None) or (privileges is None) ):
-            return (4, 400, "Bad Request-Required On Create properties not all sent", "",errhdrs)
+            if( (roleId is None) or (privileges is None) ):
+                return (4, 400, "Bad Request-Required On Create properties not all sent", "",errhdrs)
 
-        # now verify that the post data properties have valid values
-        if roleId in self.rolesDb:   # if the roleId already exists, return error
-            return (4, 400, "Bad Request-Invalid RoleId--RoleId already exists", "",errhdrs)
-        validPrivilegesList=("Login","ConfigureManager","ConfigureUsers","ConfigureSelf","ConfigureComponents")
-        for priv in privileges:
-            if priv not in validPrivilegesList:
-                return (4, 400, "Bad Request-Invalid Privilige", "",errhdrs)
+            # now verify that the post data properties have valid values
+            if roleId in self.rolesDb:   # if the roleId already exists, return error
+                return (4, 400, "Bad Request-Invalid RoleId--RoleId already exists", "",errhdrs)
+            validPrivilegesList=("Login","ConfigureManager","ConfigureUsers","ConfigureSelf","ConfigureComponents")
+            for priv in privileges:
+                if priv not in validPrivilegesList:
+                    return (4, 400, "Bad Request-Invalid Privilige", "",errhdrs)
 
-        # create response header data
-        locationUri="/redfish/v1/AccountService/Roles/" + roleId
-        #respHeaderData={"Location": locationUri}
+            # create response header data
+            locationUri="/redfish/v1/AccountService/Roles/" + roleId
+            #respHeaderData={"Location": locationUri}
 
-        # create rolesDb data and response properties
-        roleName=roleId + "Custom Role"
-        roleDescription="Custom Role"
-        isPredefined=False
+            # create rolesDb data and response properties
+            roleName=roleId + "Custom Role"
+            roleDescription="Custom Role"
+            isPredefined=False
 
-        # add the new role entry to add to the roleDb
-        self.rolesDb[roleId]={"RoleId": roleId, "Name": roleName, "Description": roleDescription, "IsPredefined": isPredefined, 
-            "AssignedPrivileges": privileges }
+            # add the new role entry to add to the roleDb
+            self.rolesDb[roleId]={"RoleId": roleId, "Name": roleName, "Description": roleDescription, "IsPredefined": isPredefined, 
+                "AssignedPrivileges": privileges }
+            self.setRolePrivilegeMask(roleId)
+            self.rolesView.add(roleId)
+            self.generations.bump("/redfish/v1/AccountService/Roles", locationUri)
 
-        # write the data back out to the accountService/Roles database file
-        rolesDbJson=json.dumps(self.rolesDb,indent=4)
-        with open( self.rolesDbFilePath, 'w', encoding='utf-8') as f:
-            f.write(rolesDbJson)
+            # journal the new role in the Roles database
+            self.rolesDb.persist(roleId)
 
-        # get the response data
-        rc,status,msg,respData,respHdr=self.getRoleEntry(request, roleId)
-        if( rc != 0):
-            #something went wrong--return 500
-            return(5, 500, "Error Getting New Role Data","",{})
+            # get the response data
+            rc,status,msg,respData,respHdr=self.getRoleEntry(request, roleId)
+            if( rc != 0):
+                #something went wrong--return 500
+                return(5, 500, "Error Getting New Role Data","",{})
 
-        # get the response Header with Link and Location headers
-        respHeaderData = self.hdrs.rfRespHeaders(request, contentType="json", location=locationUri, resource=self.roleEntryTemplate)
+            # get the response Header with Link and Location headers
+            respHeaderData = self.hdrs.rfRespHeaders(request, contentType="json", location=locationUri, resource=self.roleEntryTemplate,
+                                                     strongEtag=self.generations.etag(locationUri))
 
-        #return to flask uri handler, include location header
-        return(0, 201, "Created",respData,respHeaderData)
+            #return to flask uri handler, include location header
+            return(0, 201, "Created",respData,respHeaderData)
 
 
 
@@ -495,76 +601,101 @@ class RfAccountService():
     #    self.rolesDb[roleId]={"Name": rolename, "Description": roleDescription, "IsPredefined": idPredefined, 
     #       "AssignedPrivileges": privileges }
     def deleteRole(self, request, roleid):
-        # generate the headers
-        hdrs=self.hdrs.rfRespHeaders(request)
+        with self.accountsLock:
+            # generate the headers
+            hdrs=self.hdrs.rfRespHeaders(request)
 
-        # First, verify that the roleid is valid
-        if roleid not in self.rolesDb:
-            return(4, 404, "Not Found","",hdrs)
+            # First, verify that the roleid is valid
+            if roleid not in self.rolesDb:
+                return(4, 404, "Not Found","",hdrs)
 
-        # 2nd: verify this is not a pre-defined role that cannot be deleted
-        if self.rolesDb[roleid]["IsPredefined"] is True:
-            resp405Hdrs=self.hdrs.rfRespHeaders(request, contentType="raw", allow="Get" )
-            return(4, 405, "Method Not Allowed--Builtin Roles cannot be deleted","",resp405Hdrs)
+            # if the request has an If-Match header, verify the role was not modified since the client read it
+            roleUri="/redfish/v1/AccountService/Roles/" + roleid
+            if rfIfMatch(request, self.generations.etag(roleUri)) is not True:
+                return(4, 412, "Precondition Failed-If-Match", "", hdrs)
 
-        # get the roleId name if it is included in the rolesDb
-        if "RoleId" in self.rolesDb[roleid]:
-            roleidName=self.rolesDb[roleid]["RoleId"]
-        else:
-            roleidName=roleid
+            # 2nd: verify this is not a pre-defined role that cannot be deleted
+            if self.rolesDb[roleid]["IsPredefined"] is True:
+                resp405Hdrs=self.hdrs.rfRespHeaders(request, contentType="raw", allow="Get" )
+                return(4, 405, "Method Not Allowed--Builtin Roles cannot be deleted","",resp405Hdrs)
+
+            # get the roleId name if it is included in the rolesDb
+            if "RoleId" in self.rolesDb[roleid]:
+                roleidName=self.rolesDb[roleid]["RoleId"]
+            else:
+                roleidName=roleid
         
-        roleIdIsUsed=False
-        for accountid in self.accountsDb:
-            if self.accountsDb[accountid]["RoleId"]==roleidName:
-                roleIdIsUsed=True
-        if roleIdIsUsed is True:
-            return(4, 409, "Conflict-Role is being used by an existing user account", "", hdrs)
+            # the accounts with this role are found with the RoleId index of the database engine
+            roleIdIsUsed = (len(self.accountsDb.keysWhere("RoleId", roleidName)) > 0)
+            if roleIdIsUsed is True:
+                return(4, 409, "Conflict-Role is being used by an existing user account", "", hdrs)
+
+            # otherwise go ahead and delete the roleid
+            del self.rolesDb[roleid]
+            self.rolePrivilegeMasks.pop(roleid, None)
+            self.rolesView.remove(roleid)
+            self.generations.bump("/redfish/v1/AccountService/Roles")
+            self.generations.remove(roleUri)
 
-        # otherwise go ahead and delete the roleid
-        del self.rolesDb[roleid]
+            # journal the delete in the Roles database
+            self.rolesDb.persist(roleid)
 
-        return(0, 204, "No Content", "", hdrs)
+            return(0, 204, "No Content", "", hdrs)
 
 
     # Patch Role
     # PATCH a ROLE ENTRY
     def patchRoleEntry(self, request, roleid, patchData):
-        # generate headers
-        hdrs = self.hdrs.rfRespHeaders(request)
-
-        # First, verify that the roleId is valid, 
-        if roleid not in self.rolesDb:
-            return(4, 404, "Not Found","",hdrs)
-
-        # verify this is not a pre-defined role that cannot be patched/modified
-        if self.rolesDb[roleid]["IsPredefined"] is True:
-            resp405Hdrs=self.hdrs.rfRespHeaders(request, contentType="raw", allow="Get" )
-            return(4, 405, "Method Not Allowed--Builtin Roles cannot be Patched","",resp405Hdrs)
-
-        # verify that the patch data is good
-        # first verify that ALL of the properties sent in patch data are patchable for redfish spec
-        for prop in patchData:
-            if prop != "AssignedPrivileges":
-                return (4, 400, "Bad Request-one or more properties not patchable", "",hdrs)
-
-        # check if any privilege is not valid
-        redfishPrivileges=("Login","ConfigureManager","ConfigureUsers","ConfigureSelf","ConfigureComponents")
-        if "AssignedPrivileges" in patchData:
-            for privilege in patchData["AssignedPrivileges"]:
-                if not privilege in redfishPrivileges:
-                    return (4, 400, "Bad Request-one or more Privileges are invalid", "",hdrs)
-
-        # if here, all values are good. Update the accountServiceDb dict
-        self.rolesDb[roleid]["AssignedPrivileges"]=patchData["AssignedPrivileges"]
+        with self.accountsLock:
+            # generate headers
+            hdrs = self.hdrs.rfRespHeaders(request)
+
+            # First, verify that the roleId is valid, 
+            if roleid not in self.rolesDb:
+                return(4, 404, "Not Found","",hdrs)
+
+            # if the request has an If-Match header, verify the role was not modified since the client read it
+            roleUri="/redfish/v1/AccountService/Roles/" + roleid
+            if rfIfMatch(request, self.generations.etag(roleUri)) is not True:
+                return(4, 412, "Precondition Failed-If-Match", "", hdrs)
+
+            # verify this is not a pre-defined role that cannot be patched/modified
+            if self.rolesDb[roleid]["IsPredefined"] is True:
+                resp405Hdrs=self.hdrs.rfRespHeaders(request, contentType="raw", allow="Get" )
+                return(4, 405, "Method Not Allowed--Builtin Roles cannot be Patched","",resp405Hdrs)
+
+            # verify that the patch data is good
+            # first verify that ALL of the properties sent in patch data are patchable for redfish spec
+            for prop in patchData:
+                if prop != "AssignedPrivileges":
+                    return (4, 400, "Bad Request-one or more properties not patchable", "",hdrs)
+
+            # check if any privilege is not valid
+            redfishPrivileges=("Login","ConfigureManager","ConfigureUsers","ConfigureSelf","ConfigureComponents")
+            if "AssignedPrivileges" in patchData:
+                for privilege in patchData["AssignedPrivileges"]:
+                    if not privilege in redfishPrivileges:
+                        return (4, 400, "Bad Request-one or more Privileges are invalid", "",hdrs)
+
+            # if here, all values are good. Update the accountServiceDb dict
+            self.rolesDb[roleid]["AssignedPrivileges"]=patchData["AssignedPrivileges"]
+            self.setRolePrivilegeMask(roleid)
+            self.generations.bump(roleUri)
+
+            # invalidate cached credentials of accounts using this role
+            if "RoleId" in self.rolesDb[roleid]:
+                roleidName=self.rolesDb[roleid]["RoleId"]
+            else:
+                roleidName=roleid
+            for accountid in self.accountsDb.keysWhere("RoleId", roleidName):
+                self.credentialCache.invalidateAccount(accountid)
 
-        #xg5 note: service currently does not support oem privileges
+            #xg5 note: service currently does not support oem privileges
 
-        # write the rolesDb back out to the file
-        dbDictJson=json.dumps(self.rolesDb, indent=4)
-        with open( self.rolesDbFilePath, 'w', encoding='utf-8') as f:
-            f.write(dbDictJson)
+            # journal the changed role in the Roles database
+            self.rolesDb.persist(roleid)
 
-        return(0, 204, "No Content", "", hdrs)
+            return(0, 204, "No Content", "", hdrs)
 
 
     # ------------Accounts Collection Functions----------------
@@ -572,245 +703,225 @@ class RfAccountService():
 
     # GET Accounts Collection
     def getAccountsCollectionResource(self, request ):
-        hdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=["HEAD","GET","POST"],
-                                     resource=self.accountsCollectionTemplate)
-        if request.method=="HEAD":
-            return(0,200,"","",hdrs)
+        with self.accountsLock:
+            etagValue=self.generations.etag("/redfish/v1/AccountService/Accounts")
+            hdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=["HEAD","GET","POST"],
+                                         resource=self.accountsCollectionTemplate, strongEtag=etagValue)
+            if rfIfNoneMatch(request, etagValue) is True:
+                return(0,304,"","",hdrs)
+            if request.method=="HEAD":
+                return(0,200,"","",hdrs)
 
-        # the routine copies a template file with the static redfish parameters
-        # then it updates the dynamic properties from the accountsDb and accountsDict
-
-        # copy the accountsCollection template file (which has an empty accounts array)
-        resData2=dict(self.accountsCollectionTemplate)
-        count=0
-        # now walk through the entries in the accountsDb and built the accountsCollection Members array
-        # note that the template starts out an empty array
-        accountUriBase="/redfish/v1/AccountService/Accounts/"
-        for accountEntry in self.accountsDb:
-            # increment members count, and create the member for the next entry
-            count=count+1
-            memberUri=accountUriBase + accountEntry
-            newMember=[{"@odata.id": memberUri}]
-
-            # add the new member to the members array we are building
-            resData2["Members"] = resData2["Members"] + newMember
-
-        resData2["Members@odata.count"]=count
-
-        # convert to json
-        jsonResponseData2=json.dumps(resData2,indent=4)
-
-        return(0, 200, "",  jsonResponseData2, hdrs)
+            # the accountsView keeps the accountsCollection Members array, and the json response, up to date with the accountsDb
+            #   it returns the page of the collection if the request has $skip or $top
+            return(self.accountsView.getResponse(request, hdrs))
 
 
     # GET Account Entry
     def getAccountEntry(self, request, accountid):
-        # verify that the accountId is valid
-        if accountid not in self.accountsDb:
-            # generate error header for 4xx errors
-            errhdrs=self.hdrs.rfRespHeaders(request)
-            return(4, 404, "Not Found","",errhdrs)
-
-        # first just copy the template sessionEntry resource
-        resData=dict(self.accountEntryTemplate)
-
-        # generate header info depending on the specific accountid
-        #    accounts with property "Deletable"=False cannot be deleted
-        #    for RedDrum, this includes accountid "root"
-        #    for reference:   self.accountsDb[accountid]=
-        #          {"UserName": username,    "Password": password, 
-        #          "RoleId": roleId,    "Enabled": enabled,    "Deletable": True}
-        if self.accountsDb[accountid]["Deletable"] is False:
-            allowMethods="GetPatch"
-        else:
-            allowMethods=["HEAD","GET","PATCH","DELETE"]
-
-        # check if account was locked but has now exceeded LockoutDuration
-        #    if so, then unlock before returning data
-        curTime=time.time()
-        if self.accountsDict[accountid]["Locked"] is True:
-            if( (curTime - self.accountsDict[accountid]["LockedTime"]) > self.accountServiceDb["AccountLockoutDuration"] ):
-                # the lockout duration has expired.   unlock it.
-                self.accountsDict[accountid]["Locked"]=False
-                self.accountsDict[accountid]["LockedTime"]=0
-                self.accountsDict[accountid]["FailedLoginCount"]=0
-                self.accountsDict[accountid]["AuthFailTime"]=0
-
-        # now overwrite the dynamic data from the accountsDb
-        accountUri="/redfish/v1/AccountService/Accounts/" + accountid
-        accountRoleId=self.accountsDb[accountid]["RoleId"]
-        resData["@odata.id"]=accountUri
-        resData["Id"]=accountid
-        resData["Name"]="UserAccount"
-        resData["Description"]="Local Redfish User Account"
-        resData["Enabled"]=self.accountsDb[accountid]["Enabled"]
-        resData["Password"]=None   # translates to Json: null
-        resData["UserName"]=self.accountsDb[accountid]["UserName"]
-        resData["RoleId"]=accountRoleId
-        roleUri="/redfish/v1/AccountService/Roles/" + accountRoleId
-        resData["Links"]={ "Role": {} }
-        resData["Links"]["Role"]["@odata.id"]=roleUri
-
-        # now overwrite the dynamic data from the sessionsDict
-        # this is non-persistent account data
-        resData["Locked"]=self.accountsDict[accountid]["Locked"]  
-
-        # calculate eTag
-        etagValue=self.calculateAccountEtag(accountid)
-
-        respHdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=allowMethods,
-                                     resource=self.accountEntryTemplate, strongEtag=etagValue)
-        if request.method=="HEAD":
-            return(0,200,"","",respHdrs)
-
-        # convert to json
-        jsonResponseData=json.dumps(resData,indent=4)
-
-        #return etagHeader in response back to URI processing.  It will merge it
-        return(0, 200, "",jsonResponseData, respHdrs)
-
-
-    # general account service function to calculate the AccountEntry Etag
-    #    this is a STRONG Etag
-    #    Example:   etag="1ABCDEREDR"
+        with self.accountsLock:
+            # verify that the accountId is valid
+            if accountid not in self.accountsDb:
+                # generate error header for 4xx errors
+                errhdrs=self.hdrs.rfRespHeaders(request)
+                return(4, 404, "Not Found","",errhdrs)
+
+            # first just copy the template sessionEntry resource
+            resData=dict(self.accountEntryTemplate)
+
+            # generate header info depending on the specific accountid
+            #    accounts with property "Deletable"=False cannot be deleted
+            #    for RedDrum, this includes accountid "root"
+            #    for reference:   self.accountsDb[accountid]=
+            #          {"UserName": username,    "Password": password, 
+            #          "RoleId": roleId,    "Enabled": enabled,    "Deletable": True}
+            if self.accountsDb[accountid]["Deletable"] is False:
+                allowMethods="GetPatch"
+            else:
+                allowMethods=["HEAD","GET","PATCH","DELETE"]
+
+            # check if account was locked but has now exceeded LockoutDuration
+            #    if so, then unlock before returning data
+            curTime=time.time()
+            if self.accountsDict[accountid]["Locked"] is True:
+                if( (curTime - self.accountsDict[accountid]["LockedTime"]) > self.accountServiceDb["AccountLockoutDuration"] ):
+                    # the lockout duration has expired.   unlock it.
+                    self.accountsDict[accountid]["Locked"]=False
+                    self.accountsDict[accountid]["LockedTime"]=0
+                    self.accountsDict[accountid]["FailedLoginCount"]=0
+                    self.accountsDict[accountid]["AuthFailTime"]=0
+                    self.generations.bumpLocal("/redfish/v1/AccountService/Accounts/" + accountid)
+
+            # now overwrite the dynamic data from the accountsDb
+            accountUri="/redfish/v1/AccountService/Accounts/" + accountid
+            accountRoleId=self.accountsDb[accountid]["RoleId"]
+            resData["@odata.id"]=accountUri
+            resData["Id"]=accountid
+            resData["Name"]="UserAccount"
+            resData["Description"]="Local Redfish User Account"
+            resData["Enabled"]=self.accountsDb[accountid]["Enabled"]
+            resData["Password"]=None   # translates to Json: null
+            resData["UserName"]=self.accountsDb[accountid]["UserName"]
+            resData["RoleId"]=accountRoleId
+            roleUri="/redfish/v1/AccountService/Roles/" + accountRoleId
+            resData["Links"]={ "Role": {} }
+            resData["Links"]["Role"]["@odata.id"]=roleUri
+
+            # now overwrite the dynamic data from the sessionsDict
+            # this is non-persistent account data
+            resData["Locked"]=self.accountsDict[accountid]["Locked"]  
+
+            # calculate eTag
+            etagValue=self.calculateAccountEtag(accountid)
+
+            respHdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=allowMethods,
+                                         resource=self.accountEntryTemplate, strongEtag=etagValue)
+            if rfIfNoneMatch(request, etagValue) is True:
+                return(0,304,"","",respHdrs)
+            if request.method=="HEAD":
+                return(0,200,"","",respHdrs)
+
+            # convert to json
+            jsonResponseData=self.rdr.jsonSerializer.dumps(resData)
+
+            #return etagHeader in response back to URI processing.  It will merge it
+            return(0, 200, "",jsonResponseData, respHdrs)
+
+
+    # general account service function to get the AccountEntry Etag
+    #    this is a STRONG Etag from the generation number of the account--bumped whenever the account data changes
+    #    Example:   etag="3fa2c91b-17"
     def calculateAccountEtag(self, accountid):
-        enable   = self.accountsDb[accountid]["Enabled"]
-        locked   = self.accountsDict[accountid]["Locked"]  
-        username = self.accountsDb[accountid]["UserName"]
-        password = self.accountsDb[accountid]["Password"]
-        roleId   = self.accountsDb[accountid]["RoleId"]
-        #etag="\"1234\""
-
-        flag = 0
-        if enable is True:
-            flag = flag+1
-        if locked is True:
-            flag = flag+2
-        m = hashlib.md5()
-        m.update((username+password+roleId).encode('utf-8'))
-        etagValue = str(flag) + m.hexdigest()
-        return(etagValue)
-        #etagHdr={"ETag": "\"" + m.hexdigest() + "\"" }
-        #return(etagHdr)
+        return(self.generations.etag("/redfish/v1/AccountService/Accounts/" + accountid))
 
 
     # POST Accounts
     # POST to Accounts collection  (add user)
     def postAccountsResource(self,request, postData):
-        # generate headers for 4xx error messages
-        errhdrs = self.hdrs.rfRespHeaders(request )
+        with self.accountsLock:
+            # generate headers for 4xx error messages
+            errhdrs = self.hdrs.rfRespHeaders(request )
 
-        # first verify that the client didn't send us a property we cant write when creating the account
-        # we need to fail the request if we cant handle any properties sent
-        patchables=("UserName","Password","RoleId","Enabled","Locked")
-        for prop in postData:
-            if not prop in patchables:
-                return (4, 400, "Bad Request-Invalid Post Property Sent", "",errhdrs)
+            # first verify that the client didn't send us a property we cant write when creating the account
+            # we need to fail the request if we cant handle any properties sent
+            patchables=("UserName","Password","RoleId","Enabled","Locked")
+            for prop in postData:
+                if not prop in patchables:
+                    return (4, 400, "Bad Request-Invalid Post Property Sent", "",errhdrs)
 
-        #get the data needed to create the account
-        username=None
-        password=None
-        roleid=None
-        enabled=True
-        locked=False
+            #get the data needed to create the account
+            username=None
+            password=None
+            roleid=None
+            enabled=True
+            locked=False
 
-        if( "UserName" in postData):
-            username=postData['UserName']
+            if( "UserName" in postData):
+                username=postData['UserName']
 
-        if("Password" in postData):
-            password=postData['Password']
+            if("Password" in postData):
+                password=postData['Password']
 
-        if("RoleId" in postData):
-            roleId=postData['RoleId']
+            if("RoleId" in postData):
+                roleId=postData['RoleId']
 
-        if("Enabled" in postData):
-            enabled=postData['Enabled']
+            if("Enabled" in postData):
+                enabled=postData['Enabled']
 
-        if("Locked" in postData):
-            locked=postData['Locked']
+            if("Locked" in postData):
+                locked=postData['Locked']
 
-        # now check that all required on create properties were sent as post data
-        if( (username is None) or (password is None) or (roleId is None ) ):
-            return (4, 400, "Bad Request-Required On Create properties not all sent", "",errhdrs)
+            # now check that all required on create properties were sent as post data
+            if( (username is None) or (password is None) or (roleId is None ) ):
+                return (4, 400, "Bad Request-Required On Create properties not all sent", "",errhdrs)
 
-        # now verify that the Post data is valid
+            # now verify that the Post data is valid
 
-        # check if this username already exists
-        for userId in self.accountsDb:
-            if (username == self.accountsDb[userId]["UserName"]):
+            # check if this username already exists
+            if username in self.accountIdByUserName:
                 return (4, 400, "Bad Request-Username already exists", "",errhdrs)
 
-        # check if password length is less than value set in accountService MinPasswordLength
-        if "MinPasswordLength" in self.accountServiceDb:
-            if len(password) < self.accountServiceDb["MinPasswordLength"]:
-                return (4, 400, "Bad Request-Password length less than min", "",errhdrs)
-        if "MaxPasswordLength" in self.accountServiceDb:
-            if len(password) > self.accountServiceDb["MaxPasswordLength"]:
-                return (4, 400, "Bad Request-Password length exceeds max", "",errhdrs)
-        # check if password meets regex requirements---no whitespace or ":"
-        passwordMatchPattern="^[^\s:]+$"
-        passwordMatch = re.search(passwordMatchPattern,password)
-        if not passwordMatch:
-            return (4, 400, "Bad Request-invalid password-whitespace or : is not allowed", "",errhdrs)
-
-        # check if roleId does not exist
-        #   check if the specified "RoleId" properly matches the RoleId property in RolesDb
-        #   but if no RoleId property in RolesDb entry, check against the id of the role in RolesDb
-        foundRoleId = False
-        for roleid in self.rolesDb:
-            if "RoleId" in self.rolesDb[roleid]:
-                thisRoleIdName = self.rolesDb[roleid]["RoleId"]
-            else:
-                thisRoleIdName = roleId  # early Redfish model before RoleId prop existed in Roles
-            # check if the specified roleId for the user matches one in the rolesDb 
-            if thisRoleIdName == roleId:
-                foundRoleId=True
-                break    # so roleId will be the roleid value
-
-        # if roleId was not found, return Bad Request error
-        if foundRoleId is not True:
-            return (4, 400, "Bad Request-roleId does not exist", "",errhdrs)
-
-        # check if Enabled is a boul
-        if (enabled is not True) and (enabled is not False):
-            return (4, 400, "Bad Request-Enabled must be either True or False", "",errhdrs)
-        # check if Locked  is a boul
-        if locked is not False:
-            return (4, 400, "Bad Request-Locked can only be set to False by user", "",errhdrs)
-
-        # create response header data
-        accountid=username
-        locationUri="/redfish/v1/AccountService/Accounts/" + accountid
-
-        # add the new account entry to the accountsDb
-        self.accountsDb[accountid]={"UserName": username, "Password": password, 
-                  "RoleId": roleId, "Enabled": enabled, "Deletable": True}
-
-        # add the new account entry to the accountsDict
-        dfltAccountDictEntry={ "Locked": False, "FailedLoginCount": 0, "LockedTime": 0, "AuthFailTime": 0 }
-        self.accountsDict[accountid]=dfltAccountDictEntry
-
-        # write the AccountDb back out to the file
-        dbFilePath=os.path.join(self.rfr.varDataPath,"db", "AccountsDb.json")
-        dbDictJson=json.dumps(self.accountsDb, indent=4)
-        with open( dbFilePath, 'w', encoding='utf-8') as f:
-            f.write(dbDictJson)
+            # check if password length is less than value set in accountService MinPasswordLength
+            if "MinPasswordLength" in self.accountServiceDb:
+                if len(password) < self.accountServiceDb["MinPasswordLength"]:
+                    return (4, 400, "Bad Request-Password length less than min", "",errhdrs)
+            if "MaxPasswordLength" in self.accountServiceDb:
+                if len(password) > self.accountServiceDb["MaxPasswordLength"]:
+                    return (4, 400, "Bad Request-Password length exceeds max", "",errhdrs)
+            # check if password meets regex requirements---no whitespace or ":"
+            passwordMatchPattern="^[^\s:]+$"
+            passwordMatch = re.search(passwordMatchPattern,password)
+            if not passwordMatch:
+                return (4, 400, "Bad Request-invalid password-whitespace or : is not allowed", "",errhdrs)
+
+            # check if roleId does not exist
+            #   check if the specified "RoleId" properly matches the RoleId property in RolesDb
+            #   but if no RoleId property in RolesDb entry, check against the id of the role in RolesDb
+            foundRoleId = False
+            for roleid in self.rolesDb:
+                if "RoleId" in self.rolesDb[roleid]:
+                    thisRoleIdName = self.rolesDb[roleid]["RoleId"]
+                else:
+                    thisRoleIdName = roleId  # early Redfish model before RoleId prop existed in Roles
+                # check if the specified roleId for the user matches one in the rolesDb 
+                if thisRoleIdName == roleId:
+                    foundRoleId=True
+                    break    # so roleId will be the roleid value
+
+            # if roleId was not found, return Bad Request error
+            if foundRoleId is not True:
+                return (4, 400, "Bad Request-roleId does not exist", "",errhdrs)
+
+            # check if Enabled is a boul
+            if (enabled is not True) and (enabled is not False):
+                return (4, 400, "Bad Request-Enabled must be either True or False", "",errhdrs)
+            # check if Locked  is a boul
+            if locked is not False:
+                return (4, 400, "Bad Request-Locked can only be set to False by user", "",errhdrs)
+
+            # generate the password hash
+            # for sha512, this creates string like: "$6$R53DEEDrreeesg$REEDD/esEEFereg"  ie "$6$<salt>$<hash>"
+            rc,passwdHash = self.passwordHasher.hash(password)
+            if rc == 503:
+                return (4, 503, "Service Unavailable-Password Hasher Overloaded", "", self.passwordHasher.addRetryAfterHdr(errhdrs))
+            elif rc != 0:
+                return (5, 500, "Error Hashing Password", "", errhdrs)
+
+            # create response header data
+            accountid=username
+            locationUri="/redfish/v1/AccountService/Accounts/" + accountid
+
+            # add the new account entry to the accountsDb
+            self.accountsDb[accountid]={"UserName": username, "Password": passwdHash, 
+                      "RoleId": roleId, "Enabled": enabled, "Deletable": True}
+
+            # add the new account entry to the accountsDict
+            dfltAccountDictEntry={ "Locked": False, "FailedLoginCount": 0, "LockedTime": 0, "AuthFailTime": 0 }
+            self.accountsDict[accountid]=dfltAccountDictEntry
+
+            # and to the username index
+            self.accountIdByUserName[username]=accountid
+            self.accountsView.add(accountid)
+            self.generations.bump("/redfish/v1/AccountService/Accounts", locationUri)
+
+            # journal the new account in the Accounts database
+            self.accountsDb.persist(accountid)
         
-        # get the response data
-        rc,status,msg,respData,respHdr=self.getAccountEntry(request, accountid)
-        if( rc != 0):
-            #something went wrong--return 500
-            return(5, 500, "Error Getting New Account Data","",{})
+            # get the response data
+            rc,status,msg,respData,respHdr=self.getAccountEntry(request, accountid)
+            if( rc != 0):
+                #something went wrong--return 500
+                return(5, 500, "Error Getting New Account Data","",{})
 
-        # calculate eTag
-        etagValue=self.calculateAccountEtag(accountid)
+            # calculate eTag
+            etagValue=self.calculateAccountEtag(accountid)
 
-        # get the response Header with Link, and Location
-        respHeaderData=self.hdrs.rfRespHeaders(request, contentType="json", location=locationUri,
-                                     resource=self.accountEntryTemplate, strongEtag=etagValue)
+            # get the response Header with Link, and Location
+            respHeaderData=self.hdrs.rfRespHeaders(request, contentType="json", location=locationUri,
+                                         resource=self.accountEntryTemplate, strongEtag=etagValue)
 
-        #return to flask uri handler
-        return(0, 201, "Created",respData,respHeaderData)
+            #return to flask uri handler
+            return(0, 201, "Created",respData,respHeaderData)
 
 
 
@@ -819,33 +930,42 @@ class RfAccountService():
     # all we have to do is verify the accountid is correct--
     # and then, if it is valid, delete the entry for that accountid from the accountsDb and accountsDict
     def deleteAccount(self, request, accountid):
-        # generate the headers
-        hdrs=self.hdrs.rfRespHeaders(request)
+        with self.accountsLock:
+            # generate the headers
+            hdrs=self.hdrs.rfRespHeaders(request)
+
+            # First, verify that the accountid is valid, 
+            if accountid not in self.accountsDb:
+                return(4, 404, "Not Found","",hdrs)
+
+            # if the request has an If-Match header, verify the account was not modified since the client read it
+            if rfIfMatch(request, self.calculateAccountEtag(accountid)) is not True:
+                return(4, 412, "Precondition Failed-If-Match", "", hdrs)
+
+            # check if this is a deletable account
+            if "Deletable" in self.accountsDb[accountid]:
+                if self.accountsDb[accountid]["Deletable"] is True:
+                    self.accountIdByUserName.pop(self.accountsDb[accountid]["UserName"], None)
+                    del self.accountsDb[accountid]
+                else:
+                    # get allow headers
+                    resp405Hdrs=self.hdrs.rfRespHeaders(request, contentType="raw", allow="GetPatch" )
+                    return(4, 405, "Method Not Allowed for this Account/URI","",resp405Hdrs)
 
-        # First, verify that the accountid is valid, 
-        if accountid not in self.accountsDb:
-            return(4, 404, "Not Found","",hdrs)
+            # delete the accountid entry from the accountsDict also
+            if accountid in self.accountsDict:
+                del self.accountsDict[accountid]
 
-        # check if this is a deletable account
-        if "Deletable" in self.accountsDb[accountid]:
-            if self.accountsDb[accountid]["Deletable"] is True:
-                del self.accountsDb[accountid]
-            else:
-                # get allow headers
-                resp405Hdrs=self.hdrs.rfRespHeaders(request, contentType="raw", allow="GetPatch" )
-                return(4, 405, "Method Not Allowed for this Account/URI","",resp405Hdrs)
+            # and drop any cached credentials for the account
+            self.credentialCache.invalidateAccount(accountid)
+            self.accountsView.remove(accountid)
+            self.generations.bump("/redfish/v1/AccountService/Accounts")
+            self.generations.remove("/redfish/v1/AccountService/Accounts/" + accountid)
 
-        # delete the accountid entry from the accountsDict also
-        if accountid in self.accountsDict:
-            del self.accountsDict[accountid]
-
-        # write the data back out to the accountService database file
-        accountsDbJson=json.dumps(self.accountsDb,indent=4)
-        filename="AccountsDb.json"
-        with open( self.accountsDbFilePath, 'w', encoding='utf-8') as f:
-            f.write(accountsDbJson)
+            # journal the delete in the Accounts database
+            self.accountsDb.persist(accountid)
 
-        return(0, 204, "No Content","",hdrs)
+            return(0, 204, "No Content","",hdrs)
 
     # Patch Account
     # patch an Account Entry 
@@ -854,168 +974,179 @@ class RfAccountService():
     #       { "Locked": <locked>,  "FailedLoginCount": <failedLoginCnt>, "LockedTime": <lockedTimestamp>,
     #         "AuthFailTime": <authFailTimestamp> }
     def patchAccountEntry(self, request, accountid, patchData):
-        # generate headers for 4xx error messages
-        errhdrs = self.hdrs.rfRespHeaders(request )
-
-        # First, verify that the accountid is valid, 
-        if accountid not in self.accountsDb:
-            return(4, 404, "Not Found", "", errhdrs)
-
-        # 2nd if Password is in patch data, make sure that the request used https, or that credential update over http was enabled
-        if "Password" in patchData:
-            # procesa special cases for request coming in over http or https based on RedDrum.conf auth config settings
-            requestHeadersLower = {k.lower() : v.lower() for k,v in request.headers.items()}
-            #print("EEEEEEEE: hdrs: {}".format(requestHeadersLower))
-            #if "X-rm-from-rproxy" in requestHeadersLower and requestHeadersLower["x-rm-from-rproxy"]=="https":
-            if "X-Rm-From-Rproxy" in request.headers and request.headers["X-Rm-From-Rproxy"]=="HTTPS":
-                # case: scheme is https,  so execute the API
-                pass
-            elif self.rdr.RedfishAllowUserCredUpdateOverHttp is True:
-                # case: scheme=http,  but credential update over Http is allowed 
-                pass
-            else:
-                # case: scheme=http, credential update over http is NOT allowed
-                #  so return a 404-Not Found  status code
-                return(4, 404, "404-Not Found-URI not supported over http", "", errhdrs)
-
-        # verify that the patch data is good
-
-        # first verify that ALL of the properties sent in patch data are patchable for redfish spec
-        patchables=("Password","RoleId","Locked","Enabled","UserName")
-        for prop in patchData:
-            if( not prop in patchables ):
-                return (4, 400, "Bad Request-one or more properties not patchable", "", errhdrs)
-
-        # verify privilege is sufficient to change this property
-        #    Privilege "ConfigureSelf" allows a user to change THEIR password, but no other property
-        #    Privilege "ConfigureUsers" is required to change other users passwords
-
-        # note that if "Password" is in patchData:
-        # from auth wrapper, we know this user has either privilege ConfigureUsers or ConfigureSelf or both
-
-        # Define which properties can be patched with different privileges
-        #     Note: validPrivilegesList=("Login","ConfigureManager","ConfigureUsers","ConfigureSelf","ConfigureComponents")
-        if "ConfigureUsers" in self.currentUserPrivileges:
-            userHasPrivilegeToPatchProperties=["Password","RoleId","Locked","Enabled","UserName"]
-        elif (self.currentUserAccountId == accountid) and ("ConfigureSelf" in self.currentUserPrivileges):     
-            # user's accountId is same as target accountId and   the user that ConfigureSelf privilege to update their passwd
-            userHasPrivilegeToPatchProperties=["Password"]
-        else:  
-            userHasPrivilegeToPatchProperties=[]
+        with self.accountsLock:
+            # generate headers for 4xx error messages
+            errhdrs = self.hdrs.rfRespHeaders(request )
+
+            # First, verify that the accountid is valid, 
+            if accountid not in self.accountsDb:
+                return(4, 404, "Not Found", "", errhdrs)
+
+            # 2nd if Password is in patch data, make sure that the request used https, or that credential update over http was enabled
+            if "Password" in patchData:
+                # procesa special cases for request coming in over http or https based on RedDrum.conf auth config settings
+                #print("EEEEEEEE: hdrs: {}".format(requestHeadersLower))
+                #if "X-rm-from-rproxy" in requestHeadersLower and requestHeadersLower["x-rm-from-rproxy"]=="https":
+                if "X-Rm-From-Rproxy" in request.headers and request.headers["X-Rm-From-Rproxy"]=="HTTPS":
+                    # case: scheme is https,  so execute the API
+                    pass
+                elif self.rdr.RedfishAllowUserCredUpdateOverHttp is True:
+                    # case: scheme=http,  but credential update over Http is allowed 
+                    pass
+                else:
+                    # case: scheme=http, credential update over http is NOT allowed
+                    #  so return a 404-Not Found  status code
+                    return(4, 404, "404-Not Found-URI not supported over http", "", errhdrs)
+
+            # verify that the patch data is good
+
+            # first verify that ALL of the properties sent in patch data are patchable for redfish spec
+            patchables=("Password","RoleId","Locked","Enabled","UserName")
+            for prop in patchData:
+                if( not prop in patchables ):
+                    return (4, 400, "Bad Request-one or more properties not patchable", "", errhdrs)
+
+            # verify privilege is sufficient to change this property
+            #    Privilege "ConfigureSelf" allows a user to change THEIR password, but no other property
+            #    Privilege "ConfigureUsers" is required to change other users passwords
+
+            # note that if "Password" is in patchData:
+            # from auth wrapper, we know this user has either privilege ConfigureUsers or ConfigureSelf or both
+
+            # Define which properties can be patched with different privileges
+            #     Note: validPrivilegesList=("Login","ConfigureManager","ConfigureUsers","ConfigureSelf","ConfigureComponents")
+            #     the authenticated user is saved in the request context by the auth verify callbacks
+            currentUserAccountId,currentUserPrivileges,currentUserPrivilegeMask=rfGetCurrentUser()
+            if "ConfigureUsers" in currentUserPrivileges:
+                userHasPrivilegeToPatchProperties=["Password","RoleId","Locked","Enabled","UserName"]
+            elif (currentUserAccountId == accountid) and ("ConfigureSelf" in currentUserPrivileges):     
+                # user's accountId is same as target accountId and   the user that ConfigureSelf privilege to update their passwd
+                userHasPrivilegeToPatchProperties=["Password"]
+            else:  
+                userHasPrivilegeToPatchProperties=[]
         
-        # check if user does not have sufficient privilege to set ANY of the properties in the patch data
-        # we must fail the ENTIRE patch if we can't update ANY of the properties
-        #     otherwise, per redfish spec, we would need to generate extended data detailing which properties cant be updated and why
-        for prop in patchData:
-            if prop not in userHasPrivilegeToPatchProperties:
-                self.rfr.logMsg("WARNING",
-                   "403 Unauthorized-Patch Account: User does not have privilege to update account prop: {}".format(prop))
-                return (4, 403, "User does not have privilege to update account data", "", errhdrs)
-
-        # verify that the etag requirements are met
-        # if request header had an If-Match: <etag>, verify the etag is still valid
-        doIfMatchEtag=False
-        if request.headers.get('if-match') is True:
-            requestEtag = request.headers["if-match"]
-            doIfMatchEtag=True
-
-        if doIfMatchEtag is True:
-            # first calculate strong eTag for this account
-            currentEtag='"' + self.calculateAccountEtag(accountid) + '"'
-            # verify they match
-            if requestEtag  != currentEtag:
+            # check if user does not have sufficient privilege to set ANY of the properties in the patch data
+            # we must fail the ENTIRE patch if we can't update ANY of the properties
+            #     otherwise, per redfish spec, we would need to generate extended data detailing which properties cant be updated and why
+            for prop in patchData:
+                if prop not in userHasPrivilegeToPatchProperties:
+                    self.rfr.logMsg("WARNING",
+                       "403 Unauthorized-Patch Account: User does not have privilege to update account prop: {}".format(prop))
+                    return (4, 403, "User does not have privilege to update account data", "", errhdrs)
+
+            # verify that the etag requirements are met
+            # if request header had an If-Match: <etag>, verify the etag is still valid
+            if rfIfMatch(request, self.calculateAccountEtag(accountid)) is not True:
                 self.rfr.logMsg("WARNING","412 If-Match Condition Failed-Patch Account")
                 return (4, 412, "If-Match Condition Failed", "", errhdrs)
 
-        # if Password was in patchData, verify value is good 
-        if "Password" in patchData:
-            password=patchData["Password"]
-            # check if password length is less than value set in accountService MinPasswordLength
-            if "MinPasswordLength" in self.accountServiceDb:
-                if len(password) < self.accountServiceDb["MinPasswordLength"]:
-                    self.rfr.logMsg("WARNING","400 Bad Request-Patch Account: Password length less than min")
-                    return (4, 400, "Bad Request-Password length less than min", "", errhdrs)
-            if "MaxPasswordLength" in self.accountServiceDb:
-                if len(password) > self.accountServiceDb["MaxPasswordLength"]:
-                    self.rfr.logMsg("WARNING","400 Bad Request-Patch Account: Password length exceeds max")
-                    return (4, 400, "Bad Request-Password length exceeds max", "", errhdrs)
-
-            # check if password meets regex requirements---no whitespace or ":"
-            passwordMatchPattern="^[^\s:]+$"
-            passwordMatch = re.search(passwordMatchPattern, password)
-            if not passwordMatch:
-                self.rfr.logMsg("WARNING","400 Bad Request-Patch Account: invalid password: whitespace or : is not allowed")
-                return (4, 400, "Bad Request-invalid password-whitespace or : is not allowed", "", errhdrs)
-
-            # generate the password hash
-            # for sha512, this creates string like: "$6$R53DEEDrreeesg$REEDD/esEEFereg"  ie "$6$<salt>$<hash>"
-            passwdHash = self.cryptContext.hash(password) 
-
-        # if roleId was in patchData, verify value is good 
-        if "RoleId" in patchData: 
-            foundRoleId=False
-            for roleid in self.rolesDb:
-                if "RoleId" in self.rolesDb[roleid]:
-                    thisRoleIdName = self.rolesDb[roleid]["RoleId"]
-                else:
-                    thisRoleIdName = roleId  # early Redfish model before RoleId prop existed in Roles
-                # check if the specified roleId for the user matches one in the rolesDb 
-                if thisRoleIdName == patchData["RoleId"]:
-                    foundRoleId=True
-                    break
-
-            if foundRoleId is not True:
-                self.rfr.logMsg("WARNING","400 Bad Request-Patch Account: roleId does not exist")
-                return (4, 400, "Bad Request-roleId does not exist", "", errhdrs)
-
-        # check if Enabled is a boul
-        if "Enabled" in patchData: 
-            if (patchData["Enabled"] is not True) and (patchData["Enabled"] is not False):
-                self.rfr.logMsg("WARNING","400 Bad Request-Patch Account: Enabled must be either True or False")
-                return (4, 400, "Bad Request-Enabled must be either True or False", "", errhdrs)
-
-        # check if Locked is a legal value.   a user can only set locked to False, not true
-        if "Locked" in patchData: 
-            if patchData["Locked"] is not False:
-                self.rfr.logMsg("WARNING",
-                     "400 Bad Request-Patch Account: Locked can only be set to False by user")
-                return (4, 400, "Bad Request-Locked can only be set to False by user", "", errhdrs)
-
-        if "UserName" in patchData: 
-            badName=False
-            if ":" in patchData["UserName"]:
-                badName=True
-            for ch in patchData["UserName"]:
-                if ch in string.whitespace:
+            # if Password was in patchData, verify value is good 
+            if "Password" in patchData:
+                password=patchData["Password"]
+                # check if password length is less than value set in accountService MinPasswordLength
+                if "MinPasswordLength" in self.accountServiceDb:
+                    if len(password) < self.accountServiceDb["MinPasswordLength"]:
+                        self.rfr.logMsg("WARNING","400 Bad Request-Patch Account: Password length less than min")
+                        return (4, 400, "Bad Request-Password length less than min", "", errhdrs)
+                if "MaxPasswordLength" in self.accountServiceDb:
+                    if len(password) > self.accountServiceDb["MaxPasswordLength"]:
+                        self.rfr.logMsg("WARNING","400 Bad Request-Patch Account: Password length exceeds max")
+                        return (4, 400, "Bad Request-Password length exceeds max", "", errhdrs)
+
+                # check if password meets regex requirements---no whitespace or ":"
+                passwordMatchPattern="^[^\s:]+$"
+                passwordMatch = re.search(passwordMatchPattern, password)
+                if not passwordMatch:
+                    self.rfr.logMsg("WARNING","400 Bad Request-Patch Account: invalid password: whitespace or : is not allowed")
+                    return (4, 400, "Bad Request-invalid password-whitespace or : is not allowed", "", errhdrs)
+
+                # generate the password hash
+                # for sha512, this creates string like: "$6$R53DEEDrreeesg$REEDD/esEEFereg"  ie "$6$<salt>$<hash>"
+                rc,passwdHash = self.passwordHasher.hash(password) 
+                if rc == 503:
+                    self.rfr.logMsg("WARNING","503 Service Unavailable-Patch Account: Password Hasher Overloaded")
+                    return (4, 503, "Service Unavailable-Password Hasher Overloaded", "", self.passwordHasher.addRetryAfterHdr(errhdrs))
+                elif rc != 0:
+                    return (5, 500, "Error Hashing Password", "", errhdrs)
+
+            # if roleId was in patchData, verify value is good 
+            if "RoleId" in patchData: 
+                foundRoleId=False
+                for roleid in self.rolesDb:
+                    if "RoleId" in self.rolesDb[roleid]:
+                        thisRoleIdName = self.rolesDb[roleid]["RoleId"]
+                    else:
+                        thisRoleIdName = roleId  # early Redfish model before RoleId prop existed in Roles
+                    # check if the specified roleId for the user matches one in the rolesDb 
+                    if thisRoleIdName == patchData["RoleId"]:
+                        foundRoleId=True
+                        break
+
+                if foundRoleId is not True:
+                    self.rfr.logMsg("WARNING","400 Bad Request-Patch Account: roleId does not exist")
+                    return (4, 400, "Bad Request-roleId does not exist", "", errhdrs)
+
+            # check if Enabled is a boul
+            if "Enabled" in patchData: 
+                if (patchData["Enabled"] is not True) and (patchData["Enabled"] is not False):
+                    self.rfr.logMsg("WARNING","400 Bad Request-Patch Account: Enabled must be either True or False")
+                    return (4, 400, "Bad Request-Enabled must be either True or False", "", errhdrs)
+
+            # check if Locked is a legal value.   a user can only set locked to False, not true
+            if "Locked" in patchData: 
+                if patchData["Locked"] is not False:
+                    self.rfr.logMsg("WARNING",
+                         "400 Bad Request-Patch Account: Locked can only be set to False by user")
+                    return (4, 400, "Bad Request-Locked can only be set to False by user", "", errhdrs)
+
+            if "UserName" in patchData: 
+                badName=False
+                if ":" in patchData["UserName"]:
                     badName=True
-            if badName is True:
-                self.rfr.logMsg("WARNING",
-                     "400 Bad Request-Patch Account: UserName cannot contait : or whitespace")
-                return (4, 400, "Bad Request-UserName cannot contain : or whitespace", "", errhdrs)
-
-        # if here, all values are good. Update the account dict
-        updateDb=False
-        for prop in patchData:
-            if (prop == "Locked"):
-                # save new value to the volatile accountsDict
-                self.accountsDict[accountid][prop]=patchData[prop]
-            else:
-                # save new value to the non-vol accountsDb and update the Db cache file
-                updateDb=True
-                # if updating the password, save hash instead of cleartext passwd
-                if (prop == "Password"):
-                    self.accountsDb[accountid][prop]=passwdHash
+                for ch in patchData["UserName"]:
+                    if ch in string.whitespace:
+                        badName=True
+                if badName is True:
+                    self.rfr.logMsg("WARNING",
+                         "400 Bad Request-Patch Account: UserName cannot contait : or whitespace")
+                    return (4, 400, "Bad Request-UserName cannot contain : or whitespace", "", errhdrs)
+
+                # check that the new UserName is not already used by another account
+                existingAccountId=self.accountIdByUserName.get(patchData["UserName"])
+                if (existingAccountId is not None) and (existingAccountId != accountid):
+                    self.rfr.logMsg("WARNING","400 Bad Request-Patch Account: UserName already exists")
+                    return (4, 400, "Bad Request-Username already exists", "", errhdrs)
+
+            # if here, all values are good. Update the account dict
+            updateDb=False
+            for prop in patchData:
+                if (prop == "Locked"):
+                    # save new value to the volatile accountsDict
+                    self.accountsDict[accountid][prop]=patchData[prop]
+                    self.generations.bumpLocal("/redfish/v1/AccountService/Accounts/" + accountid)
                 else:
-                    self.accountsDb[accountid][prop]=patchData[prop]
-
-        # write the data back out to the accountService database file
-        if updateDb is True:
-            accountsDbJson=json.dumps(self.accountsDb,indent=4)
-            filename="AccountsDb.json"
-            with open( self.accountsDbFilePath, 'w', encoding='utf-8') as f:
-                f.write(accountsDbJson)
-
-        return(0, 204, "No Content","", errhdrs)
+                    # save new value to the non-vol accountsDb and update the Db cache file
+                    updateDb=True
+                    # if updating the password, save hash instead of cleartext passwd
+                    if (prop == "Password"):
+                        self.accountsDb[accountid][prop]=passwdHash
+                    elif (prop == "UserName"):
+                        # move the username index entry to the new UserName
+                        self.accountIdByUserName.pop(self.accountsDb[accountid]["UserName"], None)
+                        self.accountsDb[accountid][prop]=patchData[prop]
+                        self.accountIdByUserName[patchData[prop]]=accountid
+                    else:
+                        self.accountsDb[accountid][prop]=patchData[prop]
+
+            # all patchable properties affect authentication, so drop any cached credentials for the account
+            self.credentialCache.invalidateAccount(accountid)
+            self.generations.bump("/redfish/v1/AccountService/Accounts/" + accountid)
+
+            # journal the changed account in the Accounts database
+            if updateDb is True:
+                self.accountsDb.persist(accountid)
+
+            return(0, 204, "No Content","", errhdrs)
 
     def postPutAccountEntry(self, request, accountid):
         # the function returns a 405-Method not allowed
@@ -1031,7 +1162,7 @@ class RfAccountService():
         if self.accountsDb[accountid]["Deletable"] is False:
             allowMethods="GetPatch"
         else:
-            allowMethods=["HEAD","GET","PATCH","DELETE"],
+            allowMethods=["HEAD","GET","PATCH","DELETE"]
         respHdrs=self.hdrs.rfRespHeaders(request, contentType="raw", allow=allowMethods)
 
         return(0, 405, "Method Not Allowed","", respHdrs)
@@ -1051,7 +1182,7 @@ class RfAccountService():
             # pre-defined roles cannot be deleted or modified
             allowMethods="Get"
         else:
-            allowMethods=["HEAD","GET","PATCH","DELETE"],
+            allowMethods=["HEAD","GET","PATCH","DELETE"]
         respHdrs=self.hdrs.rfRespHeaders(request, contentType="raw", allow=allowMethods)
 
         return(0, 405, "Method Not Allowed","", respHdrs)
@@ -7,62 +7,106 @@
 # These routines are called from rfApi_RackManager() in redfishURIs.py
 # They registered the callback routines for validating Basic and Token auth credentials
 #   using whatever method is implemented for the service
+#
+# The verify callbacks save the authenticated user in the flask request context (flask.g)
+#   so APIs that do more authorization checking inside the API (eg Patch Account or Delete Session)
+#   can get it with rfGetCurrentUser().  It is per-request, so it is safe with multiple requests in flight
+#
+# Privileges are checked as bitmasks:
+#   rfAuthRequired compiles each API's privilege list with rfCompilePrivileges() when the route is registered,
+#   the accountService keeps a compiled mask for each role, and sessions cache the mask of the user's role,
+#   so the verify callbacks below are passed the compiled API privilege masks, not the nested privilege lists
+
+from flask import g
+
+# the bit used for each Redfish privilege in a privilege mask
+rfPrivilegeBits={ "Login": 0x01, "ConfigureManager": 0x02, "ConfigureUsers": 0x04, "ConfigureSelf": 0x08,
+                  "ConfigureComponents": 0x10 }
+
+# the bit used for a privilege an API requires that is not in rfPrivilegeBits (eg an Oem privilege)
+#   it is never set in a user's mask, so a privilege sublist that requires an unknown privilege never matches
+rfUnknownPrivilegeBit=0x40000000
+
+
+# convert a list of privileges into a privilege mask
+#   unknownBit is the bit used for privileges not in rfPrivilegeBits.  0 ignores them (used for user privileges)
+def rfPrivilegeMask( privileges, unknownBit=0 ):
+    mask=0
+    for priv in privileges:
+        mask |= rfPrivilegeBits.get(priv, unknownBit)
+    return(mask)
+
+
+# compile an API privilege list of form  [ ["privA",privB"],["privC", "privD"] ] into a tuple of masks, one per sublist
+#   None (no privilege checking) stays None
+def rfCompilePrivileges( apiPrivileges ):
+    if apiPrivileges is None:
+        return(None)
+    return( tuple( rfPrivilegeMask(privSublist, unknownBit=rfUnknownPrivilegeBit) for privSublist in apiPrivileges ) )
+
+
+# save the authenticated user for the current request
+def rfSetCurrentUser( accountid, userPrivileges, userPrivilegeMask ):
+    g.currentUserAccountId=accountid
+    g.currentUserPrivileges=userPrivileges
+    g.currentUserPrivilegeMask=userPrivilegeMask
+    return(0)
+
+# get the authenticated user for the current request
+#   returns: accountId, userPrivileges, userPrivilegeMask
+#   if the request was not authenticated (eg RedfishAllowAuthNone is set) returns: None, [], 0
+def rfGetCurrentUser():
+    return( g.get("currentUserAccountId"), g.get("currentUserPrivileges", []), g.get("currentUserPrivilegeMask", 0) )
+
 
 def rfRegisterBasicAuthVerify( auth, rfr ):
     #define basic auth decorator used by flask
     # for RMv06 basic auth, we only support user=root, passwd=calvin
+    #   privilege is the API privilege masks compiled by rfCompilePrivileges()
     @auth.verify_basic_password
-    def  verifyRfPasswd(user,passwd, privilege="None"):
+    def  verifyRfPasswd(user,passwd, privilege=None):
         rc,errMsg,accountid,roleId,userPrivileges=rfr.root.accountService.getAccountAuthInfo(user,passwd)
         
         if( rc == 0 ): #authenticated:
-            check = rfCheckPrivileges( userPrivileges, privilege)
+            userPrivilegeMask = rfr.root.accountService.getRolePrivilegeMask(roleId)
+            check = rfCheckPrivilegeMask( userPrivilegeMask, privilege)
             if check is False:
                 return ("403")
             else:
-                # set currentUserId and currentUserPrivileges for this user
-                rfr.root.accountService.currentUserAccountId=accountid
-                rfr.root.accountService.currentUserPrivileges=userPrivileges
+                # save the authenticated user in the request context
+                rfSetCurrentUser(accountid, userPrivileges, userPrivilegeMask)
                 return("200")        
+        elif( rc == 503 ): # the password hasher is overloaded
+            return("503")
         else:  #unauthentication failed
             return("401")
 
 
 
 def rfRegisterTokenAuthVerify( auth, rfr ):
+    #   privilege is the API privilege masks compiled by rfCompilePrivileges()
     @auth.verify_token
-    def  verifyRfToken(auth_token, privilege="None"):
-        rc,errMsg,sessionid,authtoken,userprivileges,accountid,username = rfr.root.sessionService.getSessionAuthInfo(authtoken=auth_token)
+    def  verifyRfToken(auth_token, privilege=None):
+        rc,errMsg,sessionid,authtoken,userprivileges,accountid,username,userPrivilegeMask = \
+                  rfr.root.sessionService.getSessionAuthInfo(authtoken=auth_token)
         if( rc == 0 ):
-            check = rfCheckPrivileges( userprivileges, privilege)
+            check = rfCheckPrivilegeMask( userPrivilegeMask, privilege)
             if check is False:
                 return ("403")
             else:
-                # set currentUserId and currentUserPrivileges for this user
-                rfr.root.accountService.currentUserAccountId=accountid
-                rfr.root.accountService.currentUserPrivileges=userprivileges
+                # save the authenticated user in the request context
+                rfSetCurrentUser(accountid, userprivileges, userPrivilegeMask)
                 return("200")
         else:
             return("401")  #unauthorized user
 
 
 
-# Check if the user has sufficient privileges to execute the API 
-# The user privileges are a list of privileges.
-# The API privileges are a nested set of privileges of form: 
-#      privilege=[ ["privA",privB"],["privC", "privD"] ]
-# This means the user must have (privA && privB) || (privC && privD) in their priv array
-# Normally it is simple
-
-def rfCheckPrivileges( userPrivileges, apiPrivileges ):
-    for privSublist in apiPrivileges:          # go through each sublist of required privileges
-        authorized=True                        # 
-        for priv in privSublist:               # go throuh each required privilege in sublist
-            if priv not in userPrivileges:     #   user must have all of the privileges in the sublist
-                authorized=False               #   so mark auth false if any mismatch
-                break                          #   break out of for privSublist in privilege
-        if authorized is True:                 # if we authorized on 1st sublist, no need to proceed
-            break
-    return( authorized)
-
+# Check if the user privilege mask satisfies the compiled API privilege masks from rfCompilePrivileges()
+#   the user must have all of the privilege bits of at least one of the API masks
+def rfCheckPrivilegeMask( userPrivilegeMask, apiPrivilegeMasks ):
+    for apiMask in apiPrivilegeMasks:
+        if (userPrivilegeMask & apiMask) == apiMask:
+            return(True)
+    return(False)
 
@@ -0,0 +1,162 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+import os
+import time
+import json
+import pickle
+import threading
+
+# RfBaseDataSnapshot(rdr)   -- rdr.baseData
+#    the templates, static resources, and registries under baseDataPath are read at every startup, and the jsonSchemas
+#    and registries indexes are built from them.  on slow flash this adds seconds to startup, so the parsed files and
+#    the indexes are kept in a snapshot file:  varDataPath/db/BaseDataSnapshot.pickle
+#
+#    the snapshot is keyed on the mtime and size of each file in baseDataPath/templates, static, and registries and
+#      of the RedDrum-Frontend source files (a new release may build the indexes differently).  if any of them changed,
+#      the snapshot is stale:  the files are parsed again, and save() writes a new snapshot.  stat'ing the files is
+#      much cheaper than parsing them
+#    each file and index is kept pickled, so every read returns a new copy--a service may change its template--and
+#      the snapshot always has the data as it was read from baseDataPath
+#
+#    readJson(subDir, filename)   - the parsed json file in baseDataPath/subDir,  or None if it does not exist
+#    readText(subDir, filename)   - the contents of a non-json file (eg the xml metadata),  or None
+#    listFiles(subDir)            - the filenames in baseDataPath/subDir
+#    getIndex(name, buildFn)      - an index built from the files by buildFn()--eg the jsonSchemasDb
+#    save()                       - write the snapshot if it was stale.  called when the service root is created
+#    self.stats                   - the startup time breakdown:  logged by save()
+class RfBaseDataSnapshot():
+    snapshotVersion=1
+    snapshotDirs=("templates", "static", "registries")
+
+    def __init__(self, rdr):
+        self.rdr=rdr
+        self.lock=threading.Lock()
+        self.loaded=False
+        self.stale=False
+        self.manifest=None
+        self.files=dict()
+        self.indexes=dict()
+        self.stats={"StatMs": 0.0, "LoadMs": 0.0, "ParseMs": 0.0, "SaveMs": 0.0, "Hits": 0, "Misses": 0}
+
+    def snapshotFilePath(self):
+        return(os.path.join(self.rdr.varDataPath, "db", "BaseDataSnapshot.pickle"))
+
+    # the mtime and size of each file the snapshot depends on
+    def buildManifest(self):
+        manifest=list()
+        dirPaths=[(subDir, os.path.join(self.rdr.baseDataPath, subDir)) for subDir in self.snapshotDirs]
+        dirPaths.append(("reddrum_frontend", os.path.dirname(os.path.abspath(__file__))))
+        for subDir,dirPath in dirPaths:
+            if not os.path.isdir(dirPath):
+                continue
+            for entry in os.scandir(dirPath):
+                if entry.is_file():
+                    fileStat=entry.stat()
+                    manifest.append((subDir + "/" + entry.name, fileStat.st_mtime_ns, fileStat.st_size))
+        manifest.sort()
+        return(manifest)
+
+    # read the snapshot file the first time data is read.   called with the lock held
+    def load(self):
+        if self.loaded is True:
+            return(0)
+        self.loaded=True
+        startTime=time.perf_counter()
+        self.manifest=self.buildManifest()
+        self.stats["StatMs"]=1000.0*(time.perf_counter()-startTime)
+
+        startTime=time.perf_counter()
+        snapshot=None
+        try:
+            with open(self.snapshotFilePath(), "rb") as f:
+                snapshot=pickle.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.rdr.logMsg("WARNING","BaseDataSnapshot: rebuilding bad snapshot file {}: {}".format(self.snapshotFilePath(), e))
+        if (isinstance(snapshot, dict) and snapshot.get("Version") == self.snapshotVersion and
+                snapshot.get("BaseDataPath") == self.rdr.baseDataPath and snapshot.get("Manifest") == self.manifest):
+            self.files=snapshot["Files"]
+            self.indexes=snapshot["Indexes"]
+        else:
+            self.stale=True
+        self.stats["LoadMs"]=1000.0*(time.perf_counter()-startTime)
+        return(0)
+
+    # get the pickled data of a file, reading it from baseDataPath if the snapshot does not have it
+    #   only files in the snapshotDirs are kept in the snapshot, since the manifest only has their mtimes
+    def readFile(self, subDir, filename, parseFn):
+        key=subDir + "/" + filename
+        with self.lock:
+            self.load()
+            if key in self.files:
+                self.stats["Hits"]+=1
+                return(self.files[key])
+            startTime=time.perf_counter()
+            filePath=os.path.join(self.rdr.baseDataPath, subDir, filename)
+            if not os.path.isfile(filePath):
+                return(None)
+            with open(filePath, "r") as f:
+                data=pickle.dumps(parseFn(f.read()), protocol=pickle.HIGHEST_PROTOCOL)
+            if subDir in self.snapshotDirs:
+                self.files[key]=data
+                self.stale=True
+            self.stats["Misses"]+=1
+            self.stats["ParseMs"]+=1000.0*(time.perf_counter()-startTime)
+        return(data)
+
+    def readJson(self, subDir, filename):
+        data=self.readFile(subDir, filename, json.loads)
+        return(pickle.loads(data) if data is not None else None)
+
+    def readText(self, subDir, filename):
+        data=self.readFile(subDir, filename, lambda text: text)
+        return(pickle.loads(data) if data is not None else None)
+
+    def listFiles(self, subDir):
+        with self.lock:
+            self.load()
+            return([path.split("/", 1)[1] for path,mtime,size in self.manifest if path.split("/", 1)[0] == subDir])
+
+    def getIndex(self, name, buildFn):
+        with self.lock:
+            self.load()
+            data=self.indexes.get(name)
+        if data is None:
+            startTime=time.perf_counter()
+            index=buildFn()
+            with self.lock:
+                self.indexes[name]=pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+                self.stale=True
+                self.stats["ParseMs"]+=1000.0*(time.perf_counter()-startTime)
+            return(index)
+        return(pickle.loads(data))
+
+    # write the snapshot if it was stale, and log the startup time breakdown
+    #   the snapshot is written to a temp file and renamed, so a snapshot is never torn
+    def save(self):
+        with self.lock:
+            if self.stale is True:
+                startTime=time.perf_counter()
+                snapshot={"Version": self.snapshotVersion, "BaseDataPath": self.rdr.baseDataPath, "Manifest": self.manifest,
+                          "Files": self.files, "Indexes": self.indexes}
+                snapshotFilePath=self.snapshotFilePath()
+                tmpFilePath="{}.{}.tmp".format(snapshotFilePath, os.getpid())
+                try:
+                    with open(tmpFilePath, "wb") as f:
+                        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    # pickle files must only be written by the service
+                    os.chmod(tmpFilePath, 0o600)
+                    os.replace(tmpFilePath, snapshotFilePath)
+                    self.stale=False
+                except OSError as e:
+                    self.rdr.logMsg("WARNING","BaseDataSnapshot: error writing {}: {}".format(snapshotFilePath, e))
+                self.stats["SaveMs"]=1000.0*(time.perf_counter()-startTime)
+            stats=self.stats
+            self.rdr.logMsg("INFO","BaseDataSnapshot: {} files from the snapshot, {} parsed.  stat {:.1f} ms, snapshot load {:.1f} ms,"
+                            " parse {:.1f} ms, snapshot save {:.1f} ms".format(stats["Hits"], stats["Misses"], stats["StatMs"],
+                            stats["LoadMs"], stats["ParseMs"], stats["SaveMs"]))
+        return(0)
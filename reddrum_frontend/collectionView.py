@@ -0,0 +1,171 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+import json
+import threading
+import itertools
+from urllib.parse import quote
+
+# RfCollectionView(rdr, template, memberUriBase, memberIds=())
+#    the Members of a collection resource, kept up to date as members are added and removed--so a collection GET
+#    does not walk the database and rebuild the Members array on every request
+#    template      = the collection resource template (with an empty Members array)
+#    memberUriBase = the collection uri with a trailing "/".  the member uri is memberUriBase + memberId
+#    memberIds     = the initial member ids.  eg the keys of the accountsDb
+#
+#    self.members[memberId]={"@odata.id": memberUri}   -- in the order the members were added
+#    the serialized collection response is cached as utf-8 bytes: getResponseData() re-serializes it only after
+#      a member is added or removed, or JsonOutputFormat changes.  so a GET is O(1) apart from sending the response
+#    the URI handlers must call add() and remove() wherever they add or remove a collection member
+#
+#    getResponse(request, hdrs) returns the usual rc,statusCode,errString,resp,hdrs tuple for a collection GET:
+#      the cached response, or if the request has $skip/$top query parameters or the collection has more than
+#      CollectionPageSize members, one page of the collection (see rfCollectionPage)
+class RfCollectionView():
+    def __init__(self, rdr, template, memberUriBase, memberIds=()):
+        self.rdr=rdr
+        self.template=template
+        self.memberUriBase=memberUriBase
+        self.lock=threading.Lock()
+        self.reset(memberIds)
+
+    # rebuild the members from a list of member ids
+    def reset(self, memberIds):
+        with self.lock:
+            self.members=dict()
+            for memberId in memberIds:
+                self.members[memberId]={"@odata.id": self.memberUriBase + memberId}
+            self.cachedResp=None
+        return(0)
+
+    def add(self, memberId):
+        with self.lock:
+            self.members[memberId]={"@odata.id": self.memberUriBase + memberId}
+            self.cachedResp=None
+        return(0)
+
+    def remove(self, memberId):
+        with self.lock:
+            if self.members.pop(memberId, None) is not None:
+                self.cachedResp=None
+        return(0)
+
+    def count(self):
+        return(len(self.members))
+
+    # returns a copy of the Members array
+    def getMembers(self):
+        with self.lock:
+            return(list(self.members.values()))
+
+    # returns the serialized collection resource: the template with the Members array and Members@odata.count
+    def getResponseData(self):
+        outputFormat=self.rdr.jsonOutputFormat
+        cachedResp=self.cachedResp
+        if (cachedResp is not None) and (cachedResp[0] == outputFormat):
+            return(cachedResp[1])
+        with self.lock:
+            resData=dict(self.template)
+            resData["Members"]=list(self.members.values())
+            resData["Members@odata.count"]=len(resData["Members"])
+            resp=self.rdr.jsonSerializer.dumps(resData).encode("utf-8")
+            self.cachedResp=(outputFormat, resp)
+        return(resp)
+
+    def getResponse(self, request, hdrs):
+        rc,skip,top=rfCollectionPagingParams(request)
+        if rc != 0:
+            return(4, 400, "Bad Request-invalid $skip or $top query parameter", "", hdrs)
+        pageSize=rfCollectionPageSize(self.rdr, request)
+        if (skip == 0) and (top is None) and ((pageSize == 0) or (len(self.members) <= pageSize)):
+            return(0, 200, "", self.getResponseData(), hdrs)
+
+        # only the members on the page are copied from the member list
+        with self.lock:
+            members,nextLink=rfCollectionPage(self.rdr, request, self.memberUriBase[:-1], self.members.values(),
+                                              len(self.members), skip, top)
+            count=len(self.members)
+        resData=dict(self.template)
+        resData["Members@odata.count"]=count
+        resData["Members"]=members
+        if nextLink is not None:
+            resData["Members@odata.nextLink"]=nextLink
+        return(0, 200, "", self.rdr.jsonSerializer.dumps(resData), hdrs)
+
+
+# get the $skip and $top query parameters of a collection GET
+#   returns rc,skip,top:  rc=400 if either is not a non-negative integer.  if not sent, skip=0 and top=None
+def rfCollectionPagingParams(request):
+    skip=0
+    top=None
+    try:
+        if "$skip" in request.args:
+            skip=int(request.args["$skip"])
+            if skip < 0:
+                return(400, 0, None)
+        if "$top" in request.args:
+            top=int(request.args["$top"])
+            if top < 0:
+                return(400, 0, None)
+    except ValueError:
+        return(400, 0, None)
+    return(0, skip, top)
+
+
+# the max number of members in a page of a collection GET:  CollectionPageSize, 0 is no limit
+#   a $filter GET reads the whole collection (request.unpaged is set, see expandQuery.py), and pages the members
+#   that match the filter
+def rfCollectionPageSize(rdr, request):
+    if getattr(request, "unpaged", False) is True:
+        return(0)
+    return(rdr.collectionPageSize)
+
+
+# get one page of a collection
+#   members = an iterable of the collection Members in order, count = the number of members
+#   the page starts at member skip, and has up to top members--but no more than CollectionPageSize (0 is no limit)
+#   returns: the Members list of the page, and the Members@odata.nextLink uri of the next page or None if there is none
+#      the nextLink keeps what is left of the client's $top, and the other query parameters ($expand, $select, ...)
+def rfCollectionPage(rdr, request, collectionUri, members, count, skip, top):
+    limit = (count - skip) if top is None else top
+    pageSize=rfCollectionPageSize(rdr, request)
+    if (pageSize > 0) and (limit > pageSize):
+        pageLimit=pageSize
+    else:
+        pageLimit=max(0, limit)
+    page=list(itertools.islice(members, skip, skip + pageLimit))
+    nextLink=None
+    if ((skip + len(page)) < count) and (limit > len(page)):
+        nextLink=collectionUri + "?$skip=" + str(skip + len(page))
+        if top is not None:
+            nextLink=nextLink + "&$top=" + str(top - len(page))
+        for name,value in request.args.items(multi=True):
+            if name not in ("$skip", "$top"):
+                nextLink=nextLink + "&" + quote(name, safe="$") + "=" + quote(value, safe="$*.~(),'/=")
+    return(page, nextLink)
+
+
+# page a collection response from the backend  (Systems, Chassis, Managers)
+#   the backend returns all of the collection members, so the page is sliced from the backend response
+#   takes and returns the usual rc,statusCode,errString,resp,hdrs tuple
+def rfPageBackendCollection(rdr, request, collectionUri, rc, statusCode, errString, resp, hdrs):
+    if (rc != 0) or (statusCode != 200) or (request.method != "GET") or (not resp):
+        return(rc, statusCode, errString, resp, hdrs)
+    pagingRc,skip,top=rfCollectionPagingParams(request)
+    if pagingRc != 0:
+        return(4, 400, "Bad Request-invalid $skip or $top query parameter", "", hdrs)
+    pageSize=rfCollectionPageSize(rdr, request)
+    if (skip == 0) and (top is None) and (pageSize == 0):
+        return(rc, statusCode, errString, resp, hdrs)
+    resData=json.loads(resp)
+    members=resData.get("Members")
+    if (not isinstance(members, list)) or ((skip == 0) and (top is None) and (len(members) <= pageSize)):
+        return(rc, statusCode, errString, resp, hdrs)
+    resData["Members"],nextLink=rfCollectionPage(rdr, request, collectionUri, members, len(members), skip, top)
+    resData["Members@odata.count"]=len(members)
+    if nextLink is not None:
+        resData["Members@odata.nextLink"]=nextLink
+    return(rc, statusCode, errString, rdr.jsonSerializer.dumps(resData), hdrs)
+
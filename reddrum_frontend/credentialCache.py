@@ -0,0 +1,125 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+import os
+import hmac
+import hashlib
+import threading
+from collections import OrderedDict
+
+# RfCredentialCache(timeout, maxEntries)
+#    a bounded cache of (username,password) credentials that recently passed the password verify
+#    used by accountService.getAccountAuthInfo() so that clients that send Basic auth on every request
+#      do not pay for a sha512_crypt verify on every request
+#    timeout    = secs an entry is valid after it was verified.  0 disables the cache
+#    maxEntries = max number of entries. the least recently used entry is dropped when full
+#
+#    cleartext passwords are never stored:  entries are keyed by an HMAC-SHA256 digest of (username,password)
+#      using a random key generated when the service starts
+#
+#    self.entries[credDigest]={ "AccountId": accountid, "ExpireTime": expireTime }
+class RfCredentialCache():
+    def __init__(self, timeout=60, maxEntries=1024):
+        self.timeout=timeout if timeout is not None else 0
+        self.maxEntries=maxEntries if maxEntries is not None else 0
+        self.enabled = (self.timeout > 0) and (self.maxEntries > 0)
+        self.digestKey=os.urandom(32)
+        self.entries=OrderedDict()
+        self.lock=threading.RLock()  # lookups from concurrent requests reorder the LRU, so all access holds the lock
+        self.accountDigests=dict()   # accountid -> set of credDigests, used to invalidate all entries for an account
+
+        # counters reported by getStats()
+        self.hits=0
+        self.misses=0
+        self.invalidations=0
+        self.verifyCount=0           # number of password verify calls made on a miss
+        self.verifyTime=0.0          # total secs spent in password verify on a miss
+
+    def credentialDigest(self, username, password):
+        credBytes = username.encode('utf-8') + b'\x00' + password.encode('utf-8')
+        return(hmac.new(self.digestKey, credBytes, hashlib.sha256).digest())
+
+    # lookup a credential.
+    #   returns the accountid the credential was verified for, or None if not cached (or expired)
+    def lookup(self, username, password, curTime):
+        with self.lock:
+            if self.enabled is not True:
+                return(None)
+            credDigest=self.credentialDigest(username, password)
+            entry=self.entries.get(credDigest)
+            if entry is None:
+                self.misses+=1
+                return(None)
+            if curTime > entry["ExpireTime"]:
+                self.removeEntry(credDigest)
+                self.misses+=1
+                return(None)
+            self.entries.move_to_end(credDigest)
+            self.hits+=1
+            return(entry["AccountId"])
+
+    # add a credential after the password verify passed
+    def add(self, username, password, accountid, curTime):
+        with self.lock:
+            if self.enabled is not True:
+                return(0)
+            credDigest=self.credentialDigest(username, password)
+            if credDigest in self.entries:
+                self.removeEntry(credDigest)
+            while len(self.entries) >= self.maxEntries:
+                oldestDigest=next(iter(self.entries))
+                self.removeEntry(oldestDigest)
+            self.entries[credDigest]={ "AccountId": accountid, "ExpireTime": curTime + self.timeout }
+            self.accountDigests.setdefault(accountid, set()).add(credDigest)
+            return(0)
+
+    # record the time spent in a password verify call made on a cache miss
+    def addVerifyTime(self, verifySecs):
+        with self.lock:
+            self.verifyCount+=1
+            self.verifyTime+=verifySecs
+            return(0)
+
+    def removeEntry(self, credDigest):
+        with self.lock:
+            entry=self.entries.pop(credDigest, None)
+            if entry is not None:
+                digests=self.accountDigests.get(entry["AccountId"])
+                if digests is not None:
+                    digests.discard(credDigest)
+                    if len(digests)==0:
+                        del self.accountDigests[entry["AccountId"]]
+            return(0)
+
+    # drop all cached credentials for an account
+    #   called when the account password, username, role, enabled or locked state changes, or it is deleted
+    def invalidateAccount(self, accountid):
+        with self.lock:
+            digests=self.accountDigests.pop(accountid, None)
+            if digests is not None:
+                for credDigest in digests:
+                    self.entries.pop(credDigest, None)
+                self.invalidations+=1
+            return(0)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.accountDigests.clear()
+            self.invalidations+=1
+            return(0)
+
+    # returns a dict of cache counters
+    #   AvgMissVerifyMs is the avg time a Basic auth request spends verifying the passwd when it misses the cache
+    def getStats(self):
+        with self.lock:
+            entries=len(self.entries)
+        lookups=self.hits + self.misses
+        stats={ "Enabled": self.enabled, "Entries": entries, "Hits": self.hits, "Misses": self.misses,
+                "HitRatio": (self.hits/lookups) if lookups > 0 else 0.0,
+                "Invalidations": self.invalidations,
+                "AvgMissVerifyMs": (1000.0*self.verifyTime/self.verifyCount) if self.verifyCount > 0 else 0.0 }
+        return(stats)
+
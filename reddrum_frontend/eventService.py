@@ -9,10 +9,13 @@ import time
 import sys
 import re
 import string
+import threading
 #from .rootData import RfRoot
-from .redfish_headers import RfAddHeaders
+from .redfish_headers import RfAddHeaders, rfIfNoneMatch, rfIfMatch
 from enum import Enum
 from .generateId import rfGenerateId
+from .collectionView import RfCollectionView
+from .persistentDb import rfLoadPersistentDb, rfClearPersistentDb
 
 # TODO shouldn't this be moved to the "Event" class???
 class EventType(Enum):
@@ -35,7 +38,16 @@ class RfEventService():
         self.loadResourceTemplates(rdr )
         self.loadEventServiceDatabaseFiles(rdr )
 #       self.initializeSubscriptionsDict(rdr)
+        # the Members of the Subscriptions collection and its cached GET response (see collectionView.py)
+        #   it must be updated wherever a subscription is created or deleted
+        self.subscriptionsView=RfCollectionView(rdr, self.subscriptionsTemplate, "/redfish/v1/EventService/Subscriptions/",
+                                                self.subscriptionsDb)
+        # the URI handlers run on multiple threads.  hold this lock while reading or updating the eventServiceDb or subscriptionsDb
+        self.eventServiceLock=threading.RLock()
         self.hdrs=RfAddHeaders(rdr)
+        # generation numbers used for the ETags of the EventService and Subscriptions resources
+        self.generations=rdr.resourceGenerations
+        self.initializeRefreshHandlers(rdr)
 
     def loadResourceTemplates( self, rdr ):
         #load EventService Template
@@ -54,12 +66,13 @@ class RfEventService():
     # returns a dict loaded of the template file, which calling function saves to a variable
     # if file does not exist, the service exits
     #    assumes good json in the template file
+    # the templates are read from the base data snapshot (see baseDataSnapshot.py)
     def loadResourceTemplateFile( self, dataPath, subDir, filename ):
-        indxFilePath=os.path.join(dataPath, subDir, filename)
-        if os.path.isfile(indxFilePath):
-            response=json.loads( open(indxFilePath,"r").read() )
+        response=self.rdr.baseData.readJson(subDir, filename)
+        if response is not None:
             return(response)
         else:
+            indxFilePath=os.path.join(dataPath, subDir, filename)
             self.rdr.logMsg("CRITICAL", 
                "*****ERROR: EventService: Json Data file:{} Does not exist. Exiting.".format(indxFilePath))
             sys.exit(10)
@@ -67,60 +80,48 @@ class RfEventService():
     def loadEventServiceDatabaseFiles(self, rdr ):
         # load the EventService database file:      "EventServiceDb.json"
         filename="EventServiceDb.json"
-        self.eventServiceDbFilePath,self.eventServiceDb=self.loadDatabaseFile(rdr,"db",filename) 
+        self.eventServiceDbFilePath,self.eventServiceDb=rfLoadPersistentDb(rdr,"db",filename) 
 
         # load the Events collection database file: "EventDestinationCollectionDb.json"
         filename="EventDestinationCollectionDb.json"
-        self.subscriptionsDbFilePath,self.subscriptionsDb=self.loadDatabaseFile(rdr,"db",filename) 
+        self.subscriptionsDbFilePath,self.subscriptionsDb=rfLoadPersistentDb(rdr,"db",filename) 
 
         # load the Events collection database file: "EventsDb.json"
         #filename="EventsDb.json"
-        #self.eventsDbFilePath,self.eventsDb=self.loadDatabaseFile(rdr,"db",filename) 
-
-    # worker function called by loadEventServiceDatabaseFiles() to load a specific database file
-    # returns two positional parameters:
-    #    the database filepath,
-    #    a dict of the database file
-    # if file does not exist in the varDataPath/subDir directory (the database dir), 
-    #   then it loads the file from baseDataBath (the default database), and saves it back to the varDataPath dir
-    # assumes good json in the database file
-    def loadDatabaseFile( self, rdr, subDir, filename ):
-        dbFilePath=os.path.join(rdr.varDataPath,subDir, filename)
-        if os.path.isfile(dbFilePath):
-            dbDict=json.loads( open(dbFilePath,"r").read() )
-        else:
-            self.rdr.logMsg("INFO","*****WARNING: Json Data file:{} Does not exist. Creating default.".format(dbFilePath))
-            # read the data in from the default database dir with the rm-tools package
-            dfltDbFilePath=os.path.join(rdr.baseDataPath,subDir,filename)
-            if os.path.isfile(dfltDbFilePath):
-                dbDict=json.loads( open(dfltDbFilePath,"r").read() )
-            else:
-                self.rdr.logMsg("CRITICAL", 
-                    "*****ERROR: Default Json Database file:{} Does not exist. Exiting.".format(dfltDbFilePath))
-                sys.exit(10)
-            #write the data back out to the var directory where the dynamic db info is kept
-            dbDictJson=json.dumps(dbDict,indent=4)
-            with open( dbFilePath, 'w', encoding='utf-8') as f:
-                f.write(dbDictJson)
-        # return path and data
-        return(dbFilePath,dbDict)
-
-    # clear the EventService related database files
+        #self.eventsDbFilePath,self.eventsDb=rfLoadPersistentDb(rdr,"db",filename) 
+
+    # clear the EventService related database files:  the default databases are loaded at the next restart
     def clearEventServiceDatabaseFiles(self, rdr ):
         filename="EventServiceDb.json"
-        self.eventServiceDb=self.clearDatabaseFile(rdr,"db",filename) 
+        self.eventServiceDb=rfClearPersistentDb(rdr,"db",filename,removeFiles=True) 
 
         filename="EventDestinationCollectionDb.json"
-        self.subscriptionsDb=self.clearDatabaseFile(rdr,"db",filename) 
-
-    def clearDatabaseFile( self, rdr, subDir, filename ):
-        clearedDb=dict()
-        dbFilePath=os.path.join(rdr.varDataPath,subDir, filename)
-
-        if os.path.exists(dbFilePath):
-            os.remove(dbFilePath)
-        # return path and data
-        return(clearedDb)
+        self.subscriptionsDb=rfClearPersistentDb(rdr,"db",filename,removeFiles=True) 
+        self.subscriptionsView.reset(self.subscriptionsDb)
+        self.initializeRefreshHandlers(rdr)
+
+    # with DatabaseEngine=sqlite, other server workers also change the databases.  when their changes are read into
+    #   the eventServiceDb and subscriptionsDb (see persistentDb.py), update the data derived from them
+    def initializeRefreshHandlers(self, rdr):
+        self.eventServiceDb.setRefreshHandler(self.eventServiceLock,
+                                              lambda keys: self.generations.bump("/redfish/v1/EventService"))
+        self.subscriptionsDb.setRefreshHandler(self.eventServiceLock, self.subscriptionsRefreshed)
+        # the ETags of the resources stored in the databases are the same on all workers (see resourceGenerations.py)
+        self.generations.setDbSource("/redfish/v1/EventService", self.eventServiceDb)
+        self.generations.setDbSource("/redfish/v1/EventService/Subscriptions", self.subscriptionsDb, members=True)
+
+    # refresh handler of the subscriptionsDb:  called with the eventServiceLock held
+    def subscriptionsRefreshed(self, subscriptionIds):
+        for subscriptionId in subscriptionIds:
+            subscriptionUri="/redfish/v1/EventService/Subscriptions/" + subscriptionId
+            if subscriptionId in self.subscriptionsDb:
+                self.subscriptionsView.add(subscriptionId)
+                self.generations.bump(subscriptionUri)
+            else:
+                self.subscriptionsView.remove(subscriptionId)
+                self.generations.remove(subscriptionUri)
+        self.generations.bump("/redfish/v1/EventService/Subscriptions")
+        return(0)
 
     # Stub response for unimplemented API's
     def stubResponse(self):
@@ -134,226 +135,223 @@ class RfEventService():
             
     # GET EventService
     def getEventServiceResource(self,request):
-        # generate headers
-        # TODO where are allow methods defined in spec?
-        allowMethods=["HEAD","GET"],
-        hdrs = self.hdrs.rfRespHeaders(request, contentType="json", resource=self.eventServiceTemplate, allow=allowMethods)
-
-        # Process HEAD method
-        if request.method=="HEAD":
-            return(0,200,"","",hdrs)
-
-        # create a copy of the EventService resource template 
-        resData2=dict(self.eventServiceTemplate)
-
-        # add required properties
-        resData2["@odata.id"] = "/redfish/v1/EventService"
-        resData2["Id"] = "EventService"
-        resData2["Name"] = "Event Service"
-        resData2["ServiceEnabled"]  = True
-
-        # Health
-        #TODO change static entries to read from DB
-        resData2["Status"]  = dict()
-        resData2["Status"]["Health"] = self.eventServiceDb["Status"]["Health"] #e.g. "OK"
-        resData2["Status"]["State"] = self.eventServiceDb["Status"]["State"] #e.g. "Enabled"
-
-        # Retry
-        resData2["DeliveryRetryAttempts"] = self.eventServiceDb["DeliveryRetryAttempts"] #e.g. "3"
-        resData2["DeliveryRetryIntervalSeconds"] = self.eventServiceDb["DeliveryRetryIntervalSeconds"] #e.g. "60"
-
-        # Event Types; Currently only "Alert" is supported for now
-        # TODO write custom JSON Encoder but use string for now
-        resData2["EventTypesForSubscription"]  = ["Alert"]
+        with self.eventServiceLock:
+            # generate headers
+            # TODO where are allow methods defined in spec?
+            allowMethods=["HEAD","GET"]
+            etagValue=self.generations.etag("/redfish/v1/EventService")
+            hdrs = self.hdrs.rfRespHeaders(request, contentType="json", resource=self.eventServiceTemplate, allow=allowMethods,
+                                           strongEtag=etagValue)
+            if rfIfNoneMatch(request, etagValue) is True:
+                return(0,304,"","",hdrs)
+
+            # Process HEAD method
+            if request.method=="HEAD":
+                return(0,200,"","",hdrs)
+
+            # create a copy of the EventService resource template 
+            resData2=dict(self.eventServiceTemplate)
+
+            # add required properties
+            resData2["@odata.id"] = "/redfish/v1/EventService"
+            resData2["Id"] = "EventService"
+            resData2["Name"] = "Event Service"
+            resData2["ServiceEnabled"]  = True
+
+            # Health
+            #TODO change static entries to read from DB
+            resData2["Status"]  = dict()
+            resData2["Status"]["Health"] = self.eventServiceDb["Status"]["Health"] #e.g. "OK"
+            resData2["Status"]["State"] = self.eventServiceDb["Status"]["State"] #e.g. "Enabled"
+
+            # Retry
+            resData2["DeliveryRetryAttempts"] = self.eventServiceDb["DeliveryRetryAttempts"] #e.g. "3"
+            resData2["DeliveryRetryIntervalSeconds"] = self.eventServiceDb["DeliveryRetryIntervalSeconds"] #e.g. "60"
+
+            # Event Types; Currently only "Alert" is supported for now
+            # TODO write custom JSON Encoder but use string for now
+            resData2["EventTypesForSubscription"]  = ["Alert"]
             
-        # Subscriptions
-        resData2["Subscriptions"] = { "@odata.id": "/redfish/v1/EventService/Subscriptions" }
+            # Subscriptions
+            resData2["Subscriptions"] = { "@odata.id": "/redfish/v1/EventService/Subscriptions" }
 
-        # Action (SubmitTestEvent)
-        #TODO properly implement Actions; Where should they be defined?
-        resData2["Actions"] = self.eventServiceDb["Actions"] #e.g. "60"
-        # create the response json data and return
-        resp=json.dumps(resData2,indent=4)
-        return(0, 200, "", resp, hdrs)
+            # Action (SubmitTestEvent)
+            #TODO properly implement Actions; Where should they be defined?
+            resData2["Actions"] = self.eventServiceDb["Actions"] #e.g. "60"
+            # create the response json data and return
+            resp=self.rdr.jsonSerializer.dumps(resData2)
+            return(0, 200, "", resp, hdrs)
 
     #TODO do we need a separate EventSubscriptions class?
     # GET EventDestination Collection
     def getEventSubscriptionsResource(self, request):
-        hdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=["HEAD","GET","POST"],
-                                     resource=self.subscriptionsTemplate)
-        if request.method=="HEAD":
-            return(0,200,"","",hdrs)
-
-        # the routine copies a template file with the static redfish parameters
-        # then it updates the dynamic properties from the EventDestinationDb dict
-        # for EventDestinationCollection GET, we build the Members array
-
-        # copy the EventDestinationCollection template file (which has an empty EventDestination array)
-        resData2=dict(self.subscriptionsTemplate)
-        count=0
-        # now walk through the entries in the EventDestinationDb and build the EventDestinationCollection Members array
-        # note that the members array is an empty array in the template
-        eventDestinationUriBase="/redfish/v1/EventService/Subscriptions/"
-        for eventDestinationid in self.subscriptionsDb:
-            # increment members count, and create the member for the next entry
-            count=count+1
-            memberUri=eventDestinationUriBase + eventDestinationid
-            newMember=[{"@odata.id": memberUri}]
-
-            # add the new member to the members array we are building
-            resData2["Members"] = resData2["Members"] + newMember
-        resData2["Members@odata.count"]=count
-
-        # convert to json
-        jsonRespData2=(json.dumps(resData2,indent=4))
-
-        return(0, 200, "", jsonRespData2, hdrs)
+        with self.eventServiceLock:
+            etagValue=self.generations.etag("/redfish/v1/EventService/Subscriptions")
+            hdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=["HEAD","GET","POST"],
+                                         resource=self.subscriptionsTemplate, strongEtag=etagValue)
+            if rfIfNoneMatch(request, etagValue) is True:
+                return(0,304,"","",hdrs)
+            if request.method=="HEAD":
+                return(0,200,"","",hdrs)
+
+            # the subscriptionsView keeps the EventDestinationCollection Members array, and the json response,
+            #   up to date with the subscriptionsDb.  it returns the page of the collection if the request has $skip or $top
+            return(self.subscriptionsView.getResponse(request, hdrs))
 
     # GET subscription Entry
     def getSubscriptionEntry(self, request, subscriptionId):
-
-        # First verify that the subscriptionId is valid
-        if subscriptionId not in self.subscriptionsDb:
-            # generate error header for 4xx errors
-            hdrs=self.hdrs.rfRespHeaders(request)
-            return(4, 404, "Not Found", "",hdrs)
-
-        #TODO is this correct headers?
-        allowMethods=["HEAD","GET","PATCH","DELETE"], #is DELETE/PATCH allowed?
-        respHdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=allowMethods,
-                                     resource=self.subscriptionTemplate)
-        if request.method=="HEAD":
-            return(0,200,"","",respHdrs)
-
-        # copy the template subscriptionEntry resource
-        resData2=dict(self.subscriptionTemplate)
-
-        # now overwrite the dynamic data from the subscriptionsDb 
-        subscriptionEntryUri="/redfish/v1/EventService/Subscriptions/" + subscriptionId
-        resData2["@odata.id"]=subscriptionEntryUri
-        resData2["Id"]=subscriptionId
-        #TODO what is Name #resData2["Name"]=self.subscriptionsDb[subscriptionId]["Name"]
-        resData2["Protocol"]=self.subscriptionsDb[subscriptionId]["Protocol"]
-        resData2["Context"]=self.subscriptionsDb[subscriptionId]["Context"]
-        resData2["Destination"]=self.subscriptionsDb[subscriptionId]["Destination"]
-        #subscriptionType assumed to be "RedFishEvent"
-        resData2["EventTypes"]=self.subscriptionsDb[subscriptionId]["EventTypes"]
-
-        # convert to json
-        jsonResponseData=(json.dumps(resData2,indent=4))
-
-        return(0, 200, "", jsonResponseData, respHdrs)
+        with self.eventServiceLock:
+
+            # First verify that the subscriptionId is valid
+            if subscriptionId not in self.subscriptionsDb:
+                # generate error header for 4xx errors
+                hdrs=self.hdrs.rfRespHeaders(request)
+                return(4, 404, "Not Found", "",hdrs)
+
+            #TODO is this correct headers?
+            allowMethods=["HEAD","GET","PATCH","DELETE"] #is DELETE/PATCH allowed?
+            etagValue=self.generations.etag("/redfish/v1/EventService/Subscriptions/" + subscriptionId)
+            respHdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=allowMethods,
+                                         resource=self.subscriptionTemplate, strongEtag=etagValue)
+            if rfIfNoneMatch(request, etagValue) is True:
+                return(0,304,"","",respHdrs)
+            if request.method=="HEAD":
+                return(0,200,"","",respHdrs)
+
+            # copy the template subscriptionEntry resource
+            resData2=dict(self.subscriptionTemplate)
+
+            # now overwrite the dynamic data from the subscriptionsDb 
+            subscriptionEntryUri="/redfish/v1/EventService/Subscriptions/" + subscriptionId
+            resData2["@odata.id"]=subscriptionEntryUri
+            resData2["Id"]=subscriptionId
+            #TODO what is Name #resData2["Name"]=self.subscriptionsDb[subscriptionId]["Name"]
+            resData2["Protocol"]=self.subscriptionsDb[subscriptionId]["Protocol"]
+            resData2["Context"]=self.subscriptionsDb[subscriptionId]["Context"]
+            resData2["Destination"]=self.subscriptionsDb[subscriptionId]["Destination"]
+            #subscriptionType assumed to be "RedFishEvent"
+            resData2["EventTypes"]=self.subscriptionsDb[subscriptionId]["EventTypes"]
+
+            # convert to json
+            jsonResponseData=(self.rdr.jsonSerializer.dumps(resData2))
+
+            return(0, 200, "", jsonResponseData, respHdrs)
 
 
     # PATCH EventService
     def patchEventServiceResource(self,request, patchData):
-        # TODO privileges check?
-        # TODO Do we allow GET and HEAD? 
-        hdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=["HEAD","GET","PATCH"],
-                                     resource=self.subscriptionsTemplate)
-        # generate headers for 4xx error messages
-        errhdrs = self.hdrs.rfRespHeaders(request )
-
-        # First check only patchable properties are present
-        # Empty for now...so we don't support EventService patch at the moment
-        # patchables=("DeliveryRetryAttempts","DeliveryRetryIntervalSeconds")
-        # Or return annotated object response saying these are read-only properties...for now reject
-        patchables=()
-
-        if patchData is not None:
-            return (4, 400, "Bad Request-Invalid Patch Property Received", "",errhdrs)
-            
-        for prop in patchData:
-            if not prop in patchables:
+        with self.eventServiceLock:
+            # TODO privileges check?
+            # TODO Do we allow GET and HEAD? 
+            hdrs=self.hdrs.rfRespHeaders(request, contentType="json", allow=["HEAD","GET","PATCH"],
+                                         resource=self.subscriptionsTemplate)
+            # generate headers for 4xx error messages
+            errhdrs = self.hdrs.rfRespHeaders(request )
+
+            # if the request has an If-Match header, verify the EventService was not modified since the client read it
+            if rfIfMatch(request, self.generations.etag("/redfish/v1/EventService")) is not True:
+                return (4, 412, "Precondition Failed-If-Match", "", errhdrs)
+
+            # First check only patchable properties are present
+            # Empty for now...so we don't support EventService patch at the moment
+            # patchables=("DeliveryRetryAttempts","DeliveryRetryIntervalSeconds")
+            # Or return annotated object response saying these are read-only properties...for now reject
+            patchables=()
+
+            if patchData is not None:
                 return (4, 400, "Bad Request-Invalid Patch Property Received", "",errhdrs)
+            
+            for prop in patchData:
+                if not prop in patchables:
+                    return (4, 400, "Bad Request-Invalid Patch Property Received", "",errhdrs)
 
-        if( (patchData['DeliveryRetryAttempts'] is None) or (patchData['DeliveryRetryIntervalSeconds'] is None)):
-            return (4, 400, "Bad Request-No patchable properties received", "",errhdrs)
+            if( (patchData['DeliveryRetryAttempts'] is None) or (patchData['DeliveryRetryIntervalSeconds'] is None)):
+                return (4, 400, "Bad Request-No patchable properties received", "",errhdrs)
 
 
-        ##########################################
-        # now verify that the Post data is valid #
-        ##########################################
+            ##########################################
+            # now verify that the Post data is valid #
+            ##########################################
 
-        for key in patchData:
-            newVal=patchData[key]
-            try:
-                numVal=round(newVal)
-            except ValueError:
-                return(4,400,"invalid value","",hdrs)
-            else:
-                patchData[key]=numVal
+            for key in patchData:
+                newVal=patchData[key]
+                try:
+                    numVal=round(newVal)
+                except ValueError:
+                    return(4,400,"invalid value","",hdrs)
+                else:
+                    patchData[key]=numVal
 
-        # then verify the properties passed-in are in valid ranges
-        dlvyRtryAttempts=self.eventServiceDb['DeliveryRetryAttempts']
-        dlvyRtryIntvlSecs=self.eventServiceDb['DeliveryRetryIntervalSeconds']
+            # then verify the properties passed-in are in valid ranges
+            dlvyRtryAttempts=self.eventServiceDb['DeliveryRetryAttempts']
+            dlvyRtryIntvlSecs=self.eventServiceDb['DeliveryRetryIntervalSeconds']
 
-        if("DeliveryRetryAttempts" in patchData):
-            dlvyRtryAttempts=patchData['DeliveryRetryAttempts']
-        if("DeliveryRetryIntervalSeconds" in patchData):
-            dlvyRtryIntvlSecs=patchData['DeliveryRetryIntervalSeconds']
+            if("DeliveryRetryAttempts" in patchData):
+                dlvyRtryAttempts=patchData['DeliveryRetryAttempts']
+            if("DeliveryRetryIntervalSeconds" in patchData):
+                dlvyRtryIntvlSecs=patchData['DeliveryRetryIntervalSeconds']
 
-        if( not (0 <= dlvyRtryAttempts < 5) or not(0 <= dlvyRtryIntvlSecs < 60) ):
-            return(4,400,"Bad Request-Invalid value","",hdrs)
+            if( not (0 <= dlvyRtryAttempts < 5) or not(0 <= dlvyRtryIntvlSecs < 60) ):
+                return(4,400,"Bad Request-Invalid value","",hdrs)
 
-        # if here, all values are good. Update the eventServiceDb dict
-        for key in patchData:
-            self.eventServiceDb[key]=patchData[key]
+            # if here, all values are good. Update the eventServiceDb dict
+            for key in patchData:
+                self.eventServiceDb[key]=patchData[key]
+            self.generations.bump("/redfish/v1/EventService")
 
-        # write the data back out to the eventService database file
-        eventServiceDbJson=json.dumps(self.eventServiceDb,indent=4)
-        with open( self.eventServiceDbFilePath, 'w', encoding='utf-8') as f:
-            f.write(eventServiceDbJson)
-        return(0, 204, "", "", hdrs)
+            # journal the changes to the eventService database
+            self.eventServiceDb.persist(*patchData.keys())
+            return(0, 204, "", "", hdrs)
 
 
     # POST to Subscription collection  (add subscription)
     def postSubscriptionResource(self,request, postData):
-        # generate headers for 4xx error messages
-        errhdrs = self.hdrs.rfRespHeaders(request )
+        with self.eventServiceLock:
+            # generate headers for 4xx error messages
+            errhdrs = self.hdrs.rfRespHeaders(request )
 
-        postables=("Context","Destination","EventTypes", "Protocol")
+            postables=("Context","Destination","EventTypes", "Protocol")
 
-        if not all (key in postData for key in postables):
-            return (4, 400, "Bad Request-Invalid Post Property Sent", "", errhdrs)
+            if not all (key in postData for key in postables):
+                return (4, 400, "Bad Request-Invalid Post Property Sent", "", errhdrs)
 
-        # Check all required on create properties were sent as post data
-        if( (postData['Context'] is None) or (postData['Destination'] is None) or (postData['EventTypes'] is None) or (postData['Protocol'] is None ) ):
-            return (4, 400, "Bad Request-Required On Create properties not all sent", "",errhdrs)
+            # Check all required on create properties were sent as post data
+            if( (postData['Context'] is None) or (postData['Destination'] is None) or (postData['EventTypes'] is None) or (postData['Protocol'] is None ) ):
+                return (4, 400, "Bad Request-Required On Create properties not all sent", "",errhdrs)
 
-        context=None
-        protocol=None
-        eventDestination=None
-        eventTypes=[""]
+            context=None
+            protocol=None
+            eventDestination=None
+            eventTypes=[""]
 
-        if("Context" in postData):
-            context=postData['Context']
+            if("Context" in postData):
+                context=postData['Context']
 
-        if("Protocol" in postData):
-            protocol=postData['Protocol']
+            if("Protocol" in postData):
+                protocol=postData['Protocol']
 
-        if("Destination" in postData):
-            eventDestination=postData['Destination']
+            if("Destination" in postData):
+                eventDestination=postData['Destination']
 
-        if("EventTypes" in postData):
-            eventTypes=postData['EventTypes']
+            if("EventTypes" in postData):
+                eventTypes=postData['EventTypes']
 
 
 
-        ##########################################
-        # now verify that the Post data is valid #
-        ##########################################
+            ##########################################
+            # now verify that the Post data is valid #
+            ##########################################
 
-        # 'Redfish' is the only protocol supported
-        if (protocol != 'Redfish'):
-            return (4, 400, "Bad Request-Only the 'Redfish' protocol is supported", "",errhdrs)
+            # 'Redfish' is the only protocol supported
+            if (protocol != 'Redfish'):
+                return (4, 400, "Bad Request-Only the 'Redfish' protocol is supported", "",errhdrs)
 
-        # TODO eventDestination must be of the form (URL/URI) http:// 
+            # TODO eventDestination must be of the form (URL/URI) http:// 
 
-        #if (eventDestination != 
+            #if (eventDestination != 
 
-        # https://docs.python.org/2/library/urlparse.html
-        # https://codereview.stackexchange.com/questions/19663/http-url-validating
+            # https://docs.python.org/2/library/urlparse.html
+            # https://codereview.stackexchange.com/questions/19663/http-url-validating
 #        regex = re.compile(
 #    r'^(?:http|ftp)s?://' # http:// or https://
 #    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|' # domain...
@@ -364,75 +362,79 @@ class RfEventService():
 #    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
 
 
-        # eventTypes must exist in the collection Event.EventType enum
-        # TODO in reality, we only support 3 event types...
-        if not isinstance(eventTypes, list):
-            return (4, 400, "Bad Request-Context must be a list", "",errhdrs)
-        for event in eventTypes:
-            if not EventType.has_value(event):
-                return (4, 400, "Bad Request-Supported EventType not sent", "",errhdrs)
+            # eventTypes must exist in the collection Event.EventType enum
+            # TODO in reality, we only support 3 event types...
+            if not isinstance(eventTypes, list):
+                return (4, 400, "Bad Request-Context must be a list", "",errhdrs)
+            for event in eventTypes:
+                if not EventType.has_value(event):
+                    return (4, 400, "Bad Request-Supported EventType not sent", "",errhdrs)
 
-        if not isinstance(context, str):
-            return (4, 400, "Bad Request-Context must be a string", "",errhdrs)
+            if not isinstance(context, str):
+                return (4, 400, "Bad Request-Context must be a string", "",errhdrs)
 
-        # create response header data
-        subscriptionId=rfGenerateId(leading="E",size=8)
-        locationUri="/redfish/v1/EventService/Subscriptions/" + subscriptionId
-
-        # TODO add correct data ; add the new subscription entry to the eventDestinationCollectionDb
-        postables=("Context","Destination","EventTypes", "Protocol")
-        self.subscriptionsDb[subscriptionId]={"Context": context, "Destination": eventDestination, 
-                   "Protocol": protocol, "EventTypes": eventTypes}
-
-        #TODO 
-        # write the EventDb back out to the file
-        subscriptionsDbJson=json.dumps(self.subscriptionsDb, indent=4)
-        with open( self.subscriptionsDbFilePath, 'w', encoding='utf-8') as f:
-            f.write(subscriptionsDbJson)
-        
-        # get the response data
-        rc,status,msg,respData,respHdr=self.getSubscriptionEntry(request, subscriptionId)
-        if( rc != 0):
-            #something went wrong--return 500
-            return(5, 500, "Error Getting New Event Data","",{})
+            # create response header data
+            subscriptionId=rfGenerateId(leading="E",size=8)
+            locationUri="/redfish/v1/EventService/Subscriptions/" + subscriptionId
+
+            # TODO add correct data ; add the new subscription entry to the eventDestinationCollectionDb
+            postables=("Context","Destination","EventTypes", "Protocol")
+            self.subscriptionsDb[subscriptionId]={"Context": context, "Destination": eventDestination, 
+                       "Protocol": protocol, "EventTypes": eventTypes}
+            self.subscriptionsView.add(subscriptionId)
+            self.generations.bump("/redfish/v1/EventService/Subscriptions", locationUri)
+
+            # journal the new subscription in the subscriptions database
+            self.subscriptionsDb.persist(subscriptionId)
 
-        # get the response Header with Link, and Location
-        respHeaderData=self.hdrs.rfRespHeaders(request, contentType="json", location=locationUri,
-                                     resource=self.subscriptionTemplate)
+            # get the response data
+            rc,status,msg,respData,respHdr=self.getSubscriptionEntry(request, subscriptionId)
+            if( rc != 0):
+                #something went wrong--return 500
+                return(5, 500, "Error Getting New Event Data","",{})
 
-        #return to flask uri handler
-        return(0, 201, "Created",respData,respHeaderData)
+            # get the response Header with Link, and Location
+            respHeaderData=self.hdrs.rfRespHeaders(request, contentType="json", location=locationUri,
+                                         resource=self.subscriptionTemplate, strongEtag=self.generations.etag(locationUri))
+
+            #return to flask uri handler
+            return(0, 201, "Created",respData,respHeaderData)
 
     # PATCH Subscription
     def patchSubscriptionEntry(self, request, subscriptionId, patchData):
-        # generate headers
-        hdrs = self.hdrs.rfRespHeaders(request)
+        with self.eventServiceLock:
+            # generate headers
+            hdrs = self.hdrs.rfRespHeaders(request)
+
+            # First, verify that the subscriptionIdId is valid, 
+            if subscriptionId not in self.subscriptionsDb:
+                return(4, 404, "Not Found","",hdrs)
 
-        # First, verify that the subscriptionIdId is valid, 
-        if subscriptionId not in self.subscriptionsDb:
-            return(4, 404, "Not Found","",hdrs)
+            # if the request has an If-Match header, verify the subscription was not modified since the client read it
+            subscriptionUri="/redfish/v1/EventService/Subscriptions/" + subscriptionId
+            if rfIfMatch(request, self.generations.etag(subscriptionUri)) is not True:
+                return(4, 412, "Precondition Failed-If-Match", "", hdrs)
 
-        #first verify client didn't send us a property we cant patch
-        # TODO complete list of patchables
-        patchables=("Context")
+            #first verify client didn't send us a property we cant patch
+            # TODO complete list of patchables
+            patchables=("Context")
 
-        for key in patchData:
-            if( not key in patchables ):
-                return (4, 400, "Bad Request-Invalid Patch Property Sent", "", hdrs)
+            for key in patchData:
+                if( not key in patchables ):
+                    return (4, 400, "Bad Request-Invalid Patch Property Sent", "", hdrs)
 
-        context=patchData["Context"]
-        if not isinstance(context, str):
-            return (4, 400, "Bad Request-Context must be a string", "",hdrs)
+            context=patchData["Context"]
+            if not isinstance(context, str):
+                return (4, 400, "Bad Request-Context must be a string", "",hdrs)
 
-        self.subscriptionsDb[subscriptionId]["Context"]=context
+            self.subscriptionsDb[subscriptionId]["Context"]=context
+            self.generations.bump(subscriptionUri)
 
-        # write the EventDb back out to the file
-        subscriptionsDbJson=json.dumps(self.subscriptionsDb, indent=4)
-        with open( self.subscriptionsDbFilePath, 'w', encoding='utf-8') as f:
-            f.write(subscriptionsDbJson)
+            # journal the changed subscription in the subscriptions database
+            self.subscriptionsDb.persist(subscriptionId)
 
-        #return to flask uri handler
-        return(0, 204, "No Content", "", hdrs)
+            #return to flask uri handler
+            return(0, 204, "No Content", "", hdrs)
 
     # Test Event Subscription
     # TODO not complete
@@ -513,21 +515,27 @@ class RfEventService():
 #    # all we have to do is verify the subscriptionid is correct--
 #    # and then, if it is valid, delete the entry for that subscriptionid from the eventDestinationCollectionDb and subscriptionsDict
     def deleteSubscriptionEntry(self, request, subscriptionid):
-        hdrs=self.hdrs.rfRespHeaders(request)
-        # generate the headers
+        with self.eventServiceLock:
+            hdrs=self.hdrs.rfRespHeaders(request)
+            # generate the headers
+
+            # First, verify that the subscriptionid is valid, 
+            if subscriptionid not in self.subscriptionsDb:
+                return(4, 404, "Not Found","",hdrs)
 
-        # First, verify that the subscriptionid is valid, 
-        if subscriptionid not in self.subscriptionsDb:
-            return(4, 404, "Not Found","",hdrs)
+            # if the request has an If-Match header, verify the subscription was not modified since the client read it
+            subscriptionUri="/redfish/v1/EventService/Subscriptions/" + subscriptionid
+            if rfIfMatch(request, self.generations.etag(subscriptionUri)) is not True:
+                return(4, 412, "Precondition Failed-If-Match", "", hdrs)
 
-        # write the data back out to the eventService database file
-        del self.subscriptionsDb[subscriptionid]
-        eventDestinationCollectionDbJson=json.dumps(self.subscriptionsDb,indent=4)
-        filename="SubscriptionsDb.json"
-        with open( self.subscriptionsDbFilePath, 'w', encoding='utf-8') as f:
-            f.write(eventDestinationCollectionDbJson)
+            # delete the subscription, and journal the delete in the subscriptions database
+            del self.subscriptionsDb[subscriptionid]
+            self.subscriptionsView.remove(subscriptionid)
+            self.generations.bump("/redfish/v1/EventService/Subscriptions")
+            self.generations.remove(subscriptionUri)
+            self.subscriptionsDb.persist(subscriptionid)
 
-        return(0, 204, "No Content","",hdrs)
+            return(0, 204, "No Content","",hdrs)
 ## end
 ## NOTES TODO
 ## search for other TODOs
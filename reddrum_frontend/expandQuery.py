@@ -0,0 +1,308 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+import re
+import json
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from flask import stream_with_context, has_request_context
+from werkzeug.datastructures import Headers, MultiDict
+from .queryFilter import rfCompileFilter, rfCompileSelect, rfSelectProperties
+from .collectionView import rfCollectionPagingParams, rfCollectionPage
+
+# $expand=<type> or $expand=<type>($levels=<n>).   type: "." subordinate links, "~" links under Links, "*" both
+expandQueryRe=re.compile(r'^([.~*])(?:\(\$levels=([0-9]+)\))?$')
+
+# the query parameters applied to the members of a collection by RfExpander.processCollectionQuery()
+collectionQueryParams=("$expand", "$filter", "$select")
+
+# marks where the streamed Members array goes in the serialized collection resource
+membersMarker="\u0000RdExpandMembers"
+
+
+# get the $expand query parameter of a GET
+#   returns rc,expandType,levels:  rc=400 if it is not valid or $levels is more than ExpandMaxLevels
+#   expandType is None if $expand was not sent
+def rfExpandParams(rdr, request):
+    expandQuery=request.args.get("$expand")
+    if expandQuery is None:
+        return(0, None, 0)
+    match=expandQueryRe.match(expandQuery)
+    if match is None:
+        return(400, None, 0)
+    levels = 1 if match.group(2) is None else int(match.group(2))
+    if (levels < 1) or (levels > rdr.expandMaxLevels):
+        return(400, None, 0)
+    return(0, match.group(1), levels)
+
+
+# RfExpandRequest(request)
+#    the request passed to the collection and member GETs of an $expand, $filter, or $select request:  the client
+#    request without the If-None-Match and If-Match headers.  those are for the response, not the resources it is built
+#    from.   it is a plain object, so the member GETs can also run on the RfExpander threads--outside the Flask request
+#    context.   for $filter, the collection GET gets the whole collection:  it has no $skip/$top and is not paged
+#    (unpaged=True).  RfExpander pages the members that match the filter
+class RfExpandRequest():
+    def __init__(self, request):
+        self.request=request._get_current_object() if hasattr(request, "_get_current_object") else request
+        self.headers=Headers([(name,value) for name,value in self.request.headers.items()
+                              if name.lower() not in ("if-none-match", "if-match")])
+        self.unpaged = ("$filter" in self.request.args)
+        if self.unpaged is True:
+            self.args=MultiDict([(name,value) for name,value in self.request.args.items(multi=True)
+                                 if name not in ("$skip", "$top")])
+
+    def __getattr__(self, name):
+        return(getattr(self.request, name))
+
+
+# RfExpander(rdr)
+#    expands the Members of a collection GET that has the $expand query parameter, so one GET returns the collection
+#    and its member resources.    for reference:  $expand=.  $expand=*  $expand=~  $expand=.($levels=2)
+#    the member resources are read with the same functions as the member GET URIs.  they are registered with:
+#       addResolver(uriBase, getFn, concurrent)  -- getFn(request, subPath) returns rc,statusCode,errString,resp,hdrs
+#         for a resource uri uriBase + subPath.  if concurrent=True (backend resources), the GETs run on a pool of
+#         ExpandWorkers threads.  Frontend resources are in memory and are read inline on the request thread
+#    the expanded collection is streamed:  the members are sent in order as their GETs finish, with at most
+#      4 * ExpandWorkers backend GETs in flight, so the full response is never built in memory
+#    a member that can't be read (eg deleted since the collection GET) is sent as its {"@odata.id": uri} reference
+#    $filter and $select also read the members, see processCollectionQuery() and queryFilter.py
+#    with $levels > 1, the hyperlinks in each member are expanded the same way, to $levels deep.  those members
+#      are parsed and re-serialized.   the deeper levels of a member read on an expander thread are read inline on
+#      that thread:  an expander thread never waits for another, so the pool can't run out of threads
+class RfExpander():
+    def __init__(self, rdr):
+        self.rdr=rdr
+        self.resolvers=list()
+        # the thread pool is created on the first backend GET:  after the server has forked its worker processes
+        self.pool=None
+        self.poolLock=threading.Lock()
+
+    def addResolver(self, uriBase, getFn, concurrent=False):
+        self.resolvers.append((uriBase, getFn, concurrent))
+        return(0)
+
+    # get the resolver of a uri.  returns getFn,subPath,concurrent  or None,None,False if there is none
+    #   Frontend resolvers (concurrent=False) only get the member ids directly under their collection
+    def findResolver(self, uri):
+        for uriBase,getFn,concurrent in self.resolvers:
+            if uri.startswith(uriBase) and len(uri) > len(uriBase):
+                subPath=uri[len(uriBase):]
+                if (concurrent is False) and ("/" in subPath):
+                    continue
+                return(getFn, subPath, concurrent)
+        return(None, None, False)
+
+    def getPool(self):
+        with self.poolLock:
+            if self.pool is None:
+                self.pool=ThreadPoolExecutor(max_workers=self.rdr.expandWorkers, thread_name_prefix="rdExpand")
+            return(self.pool)
+
+    # the request to pass to the collection GET:  an RfExpandRequest if the request has $expand, $filter, or $select,
+    #   else the request
+    def collectionRequest(self, request):
+        if (request.method != "GET") or not any(param in request.args for param in collectionQueryParams):
+            return(request)
+        return(RfExpandRequest(request))
+
+    # read the resource at uri.   returns its serialized json as a str, or None if it can't be read
+    def getResource(self, request, getFn, subPath):
+        try:
+            rc,statusCode,errString,resp,hdrs=getFn(request, subPath)
+        except Exception as e:
+            self.rdr.logMsg("ERROR", "RfExpander: exception reading {}: {}".format(subPath, str(e)))
+            return(None)
+        if (rc != 0) or (statusCode != 200) or (not resp):
+            return(None)
+        if isinstance(resp, bytes):
+            resp=resp.decode("utf-8")
+        return(resp)
+
+    # read and expand the resource at uri, to levels-1 more levels.  returns the serialized json, or None
+    #   inline=True reads the deeper levels on this thread
+    def getExpandedResource(self, request, getFn, subPath, expandType, levels, inline):
+        resp=self.getResource(request, getFn, subPath)
+        if (resp is None) or (levels <= 1):
+            return(resp)
+        try:
+            resData=json.loads(resp)
+        except ValueError:
+            return(resp)
+        self.expandResource(request, resData, expandType, levels-1, inline)
+        return(self.rdr.jsonSerializer.dumps(resData))
+
+    # start reading the resource at uri:  returns a Future, or the serialized json (or None) if read inline
+    def startResource(self, request, uri, expandType, levels, inline=False):
+        getFn,subPath,concurrent=self.findResolver(uri)
+        if getFn is None:
+            return(None)
+        if (concurrent is True) and (inline is False):
+            return(self.getPool().submit(self.getExpandedResource, request, getFn, subPath, expandType, levels, True))
+        return(self.getExpandedResource(request, getFn, subPath, expandType, levels, inline))
+
+    # find the hyperlinks {"@odata.id": uri} in resData to expand:  under Links for "~", not under Links for ".",
+    #   any for "*".   the resource's own @odata.id is a string, not a hyperlink, so it is never expanded
+    def findLinks(self, resData, expandType, inLinks, links):
+        if isinstance(resData, dict):
+            if (len(resData) == 1) and isinstance(resData.get("@odata.id"), str):
+                if (expandType == "*") or ((expandType == "~") is inLinks):
+                    links.append(resData)
+                return(links)
+            for prop,value in resData.items():
+                if isinstance(value, (dict,list)):
+                    self.findLinks(value, expandType, inLinks or (prop == "Links"), links)
+        elif isinstance(resData, list):
+            for value in resData:
+                if isinstance(value, (dict,list)):
+                    self.findLinks(value, expandType, inLinks, links)
+        return(links)
+
+    # expand the hyperlinks in resData in place, to levels deep.  the backend GETs of a level run concurrently
+    #   unless inline=True
+    def expandResource(self, request, resData, expandType, levels, inline=False):
+        links=self.findLinks(resData, expandType, False, [])
+        started=[(link, self.startResource(request, link["@odata.id"], expandType, levels, inline)) for link in links]
+        for link,result in started:
+            resp = result.result() if hasattr(result, "result") else result
+            if resp is None:
+                continue
+            try:
+                link.update(json.loads(resp))
+            except ValueError:
+                continue
+        return(0)
+
+    # apply the $expand, $filter, and $select query parameters to a collection GET response
+    #   takes and returns the usual rc,statusCode,errString,resp,hdrs tuple.  the collection ETag is dropped: it does
+    #   not cover the member resources
+    #   $expand or $select without $filter:  the Members are streamed (resp is a str generator)
+    #   $filter:  all of the members are read, and the members that match the filter are paged with $skip/$top and
+    #     CollectionPageSize.   Members@odata.count is the number that match.  Members are the matching members if
+    #     $expand or $select is sent, else their references
+    def processCollectionQuery(self, request, rc, statusCode, errString, resp, hdrs):
+        if (rc != 0) or (statusCode != 200) or (not isinstance(request, RfExpandRequest)) or (not resp):
+            return(rc, statusCode, errString, resp, hdrs)
+        expandRc,expandType,levels=rfExpandParams(self.rdr, request)
+        if expandRc != 0:
+            return(4, 400, "Bad Request-invalid $expand query parameter", "", hdrs)
+        filterPredicate=None
+        if "$filter" in request.args:
+            filterRc,filterPredicate=rfCompileFilter(request.args["$filter"])
+            if filterRc != 0:
+                return(4, 400, "Bad Request-invalid $filter query parameter", "", hdrs)
+        selectTree=None
+        if "$select" in request.args:
+            selectRc,selectTree=rfCompileSelect(request.args["$select"])
+            if selectRc != 0:
+                return(4, 400, "Bad Request-invalid $select query parameter", "", hdrs)
+        hdrs=dict(hdrs)
+        hdrs.pop("ETag", None)
+        resData=json.loads(resp)
+        members=resData.get("Members")
+
+        # the Members of a collection are subordinate links, so $expand=~ only expands the collection's Links
+        if expandType == "~":
+            self.expandResource(request, resData, expandType, levels)
+        if not isinstance(members, list):
+            return(rc, statusCode, errString, self.rdr.jsonSerializer.dumps(resData), hdrs)
+        expandMembers = (expandType in (".", "*"))
+        if expandMembers is False:
+            if (filterPredicate is None) and (selectTree is None):
+                return(rc, statusCode, errString, self.rdr.jsonSerializer.dumps(resData), hdrs)
+            # the members are read for $filter and $select, but not expanded
+            expandType,levels=".",1
+        memberUris=[member.get("@odata.id") if isinstance(member, dict) else None for member in members]
+
+        if filterPredicate is not None:
+            # the collection GET did not see $skip and $top
+            pagingRc,skip,top=rfCollectionPagingParams(request.request)
+            if pagingRc != 0:
+                return(4, 400, "Bad Request-invalid $skip or $top query parameter", "", hdrs)
+            self.filterMembers(request, resData, memberUris, expandType, levels, filterPredicate, selectTree,
+                               expandMembers, skip, top)
+            return(rc, statusCode, errString, self.rdr.jsonSerializer.dumps(resData), hdrs)
+
+        # serialize the collection with a marker for the Members array, and stream the members in its place
+        resData["Members"]=membersMarker
+        head,tail=self.rdr.jsonSerializer.dumps(resData).split(json.dumps(membersMarker), 1)
+        stream=self.streamMembers(request, head, tail, memberUris, expandType, levels, selectTree)
+        # the Frontend member GETs run while the response is sent: keep the request context (flask.g) until then
+        if has_request_context():
+            stream=stream_with_context(stream)
+        return(rc, statusCode, errString, stream, hdrs)
+
+    # read the members of a collection in order:  yields uri,resp  (resp is the serialized json, or None)
+    #   up to 4 * ExpandWorkers members are started ahead of the one returned
+    def readMembers(self, request, memberUris, expandType, levels):
+        maxInFlight=4 * max(1, self.rdr.expandWorkers)
+        pending=collections.deque()
+        uris=iter(memberUris)
+        while True:
+            while len(pending) < maxInFlight:
+                uri=next(uris, StopIteration)
+                if uri is StopIteration:
+                    break
+                pending.append((uri, self.startResource(request, uri, expandType, levels) if uri else None))
+            if not pending:
+                break
+            uri,result=pending.popleft()
+            yield(uri, result.result() if hasattr(result, "result") else result)
+
+    def streamMembers(self, request, head, tail, memberUris, expandType, levels, selectTree):
+        if self.rdr.jsonOutputFormat == "compact":
+            separator=","
+            memberIndent=""
+            arrayStart,arrayEnd="[","]"
+        else:
+            separator=",\n        "
+            memberIndent="\n        "
+            arrayStart,arrayEnd="[\n        ","\n    ]"
+        yield(head + (arrayStart if memberUris else "[]"))
+
+        first=True
+        for uri,memberResp in self.readMembers(request, memberUris, expandType, levels):
+            if memberResp is None:
+                memberResp=self.rdr.jsonSerializer.dumps({"@odata.id": uri})
+            elif selectTree is not None:
+                memberResp=self.rdr.jsonSerializer.dumps(rfSelectProperties(json.loads(memberResp), selectTree))
+            chunk=memberResp.replace("\n", memberIndent) if memberIndent else memberResp
+            yield(chunk if first else separator + chunk)
+            first=False
+
+        yield((arrayEnd if memberUris else "") + tail)
+
+    # set the Members of resData to the page of the members that match the filter, and Members@odata.count and
+    #   Members@odata.nextLink.   only the members on the page are kept:  the others are counted
+    #   a member that can't be read does not match
+    def filterMembers(self, request, resData, memberUris, expandType, levels, filterPredicate, selectTree,
+                      expandMembers, skip, top):
+        pageSize=self.rdr.collectionPageSize
+        pageEnd = None if top is None else skip + top
+        if (pageSize > 0) and ((pageEnd is None) or (pageEnd > skip + pageSize)):
+            pageEnd=skip + pageSize
+        matches=list()
+        for uri,memberResp in self.readMembers(request, memberUris, expandType, levels):
+            if memberResp is None:
+                continue
+            memberData=json.loads(memberResp)
+            if filterPredicate(memberData) is not True:
+                continue
+            if (len(matches) < skip) or ((pageEnd is not None) and (len(matches) >= pageEnd)):
+                matches.append(None)
+            elif selectTree is not None:
+                matches.append(rfSelectProperties(memberData, selectTree))
+            elif expandMembers is True:
+                matches.append(memberData)
+            else:
+                matches.append({"@odata.id": uri})
+        collectionUri=resData.get("@odata.id", request.path)
+        resData["Members"],nextLink=rfCollectionPage(self.rdr, request.request, collectionUri, matches, len(matches),
+                                                     skip, top)
+        resData["Members@odata.count"]=len(matches)
+        if nextLink is not None:
+            resData["Members@odata.nextLink"]=nextLink
+        return(0)
@@ -44,6 +44,7 @@ from functools import wraps
 from flask import request, Response
 
 from urllib.parse import urlparse, urlunparse
+from .authenticate import rfCompilePrivileges
 
 #this is the Base HTTP Auth class that is used to derive the Redfish "Basic or Token Auth" class
 class HTTPAuth(object):
@@ -109,9 +110,9 @@ class HTTPAuth(object):
         # Access-Control-Allow-Origin:  
         if rdr.HttpHeaderAccessControlAllowOrigin is not None:
             if rdr.HttpHeaderAccessControlAllowOrigin == "FromOrigin":
-                requestHeadersLower = {k.lower() : v for k,v in request.headers.items()}
-                if 'origin' in requestHeadersLower:
-                    hdrs['Access-Control-Allow-Origin'] = requestHeadersLower['origin']
+                origin=request.headers.get('Origin')
+                if origin is not None:
+                    hdrs['Access-Control-Allow-Origin'] = origin
             else:
                 hdrs['Access-Control-Allow-Origin'] = rdr.HttpHeaderAccessControlAllowOrigin
         else:
@@ -128,6 +129,9 @@ class HTTPAuth(object):
 
     #for redfish, we need to hook this to check if its token auth before trying basic auth
     def rfAuthRequired(self, rdr, privilege=None):
+        # compile the API privilege list into bitmasks once--when the route is registered
+        #   the verify callbacks are passed the compiled masks
+        privilegeMasks=rfCompilePrivileges(privilege)
         def rfAuthRequiredCallable(f ):
             @wraps(f)
             def decorated(*args, **kwargs):
@@ -186,7 +190,7 @@ class HTTPAuth(object):
 
                         # Authenticate session auth
                         if authType=="SessionAuth":
-                            authOk=self.verify_token_callback(auth_token,privilege=privilege) 
+                            authOk=self.verify_token_callback(auth_token,privilege=privilegeMasks) 
                             ###print("verify_token={}".format(authOk))
                             if( authOk != '200'):
                                 #we had an auth token, but it didn't validate, return error
@@ -212,7 +216,7 @@ class HTTPAuth(object):
                             else:
                                 password = None
                             ###print("basic auth: auth={}, pwd={}".format(auth,password))
-                            basicAuthOk = self.authenticate(auth, password, privilege=privilege)
+                            basicAuthOk = self.authenticate(auth, password, privilege=privilegeMasks)
                             if( basicAuthOk != '200'):
                                 if basicAuthOk == '401':
                                     #401-Authentication Failed. dont send WWW-Authenticate header
@@ -221,6 +225,14 @@ class HTTPAuth(object):
                                     errMsg="401-BasicAuth failed Authentication"
                                     self.processErrors(rdr, request, errMsg, statusCode)
                                     return Response('', statusCode, errhdrs)
+                                elif basicAuthOk == '503':
+                                    #503-the password hasher is overloaded. tell the client when to retry
+                                    errhdrs=self.makeErrHdrs(rdr)
+                                    rdr.root.accountService.passwordHasher.addRetryAfterHdr(errhdrs)
+                                    statusCode=503
+                                    errMsg="503-BasicAuth password hasher overloaded"
+                                    self.processErrors(rdr, request, errMsg, statusCode)
+                                    return Response('', statusCode, errhdrs)
                                 else:
                                     #403-Authroziation Failed
                                     errhdrs=self.makeErrHdrs(rdr)
@@ -8,6 +8,7 @@ import json
 import sys
 from .redfishUtils import RedfishUtils
 from .redfish_headers import RfAddHeaders
+from .collectionView import RfCollectionView
 
 class RfJsonSchemas():
     # Note that resource was created in serviceRoot for the session service.
@@ -21,31 +22,35 @@ class RfJsonSchemas():
 
     def loadResourceTemplates( self ):
         #load JsonSchemaFile Collection Template
-        indxFilePath=os.path.join(self.rdr.baseDataPath,"templates", "JsonSchemaFileCollection.json")
-        if os.path.isfile(indxFilePath):
-            self.jsonSchemaFileCollectionTemplate=json.loads( open(indxFilePath,"r").read() )
-        else:
+        self.jsonSchemaFileCollectionTemplate=self.rdr.baseData.readJson("templates", "JsonSchemaFileCollection.json")
+        if self.jsonSchemaFileCollectionTemplate is None:
+            indxFilePath=os.path.join(self.rdr.baseDataPath,"templates", "JsonSchemaFileCollection.json")
             self.rdr.logMsg("CRITICAL","*****ERROR: JsonSchema Resource: Json Data file:{} Does not exist. Exiting.".format(indxFilePath))
             sys.exit(10)
 
         #load JsonSchemaFile Entry Template
-        indxFilePath=os.path.join(self.rdr.baseDataPath,"templates", "JsonSchemaFile.json")
-        if os.path.isfile(indxFilePath):
-            self.jsonSchemaFileEntryTemplate=json.loads( open(indxFilePath,"r").read() )
-        else:
+        self.jsonSchemaFileEntryTemplate=self.rdr.baseData.readJson("templates", "JsonSchemaFile.json")
+        if self.jsonSchemaFileEntryTemplate is None:
+            indxFilePath=os.path.join(self.rdr.baseDataPath,"templates", "JsonSchemaFile.json")
             self.rdr.logMsg("CRITICAL","*****ERROR: JsonSchema Resource: Json Data file:{} Does not exist. Exiting".format(indxFilePath))
             sys.exit(10)
 
     # generate a jsonSchema Database dict with all data needed for Link headers, GET jsonSchema Collection, 
     #   and GET JsonSchema File
+    #   the jsonSchemasDb is kept in the base data snapshot, so the templates are only parsed if one of them changed
     def loadJsonSchemaCollectionResource(self):
-        self.jsonSchemasDb=dict()
-        dirPath = os.path.join(self.rdr.baseDataPath,"templates")
-        for filename in os.listdir(dirPath):
+        self.jsonSchemasDb=self.rdr.baseData.getIndex("jsonSchemasDb", self.buildJsonSchemasDb)
+        # the collection Members array and its json response are built once, since the jsonSchemasDb does not change
+        self.jsonSchemasView=RfCollectionView(self.rdr, self.jsonSchemaFileCollectionTemplate, "/redfish/v1/JsonSchemas/",
+                                              self.jsonSchemasDb)
+        return(0)
+
+    def buildJsonSchemasDb(self):
+        jsonSchemasDb=dict()
+        for filename in self.rdr.baseData.listFiles("templates"):
             baseFilename, extension = os.path.splitext(filename)
             if extension == ".json":
-                filePath = os.path.join( dirPath, filename)
-                templateDict = json.loads( open(filePath, "r").read() )
+                templateDict = self.rdr.baseData.readJson("templates", filename)
                 rc,namespace, version, resourceType = self.rfutils.parseOdataType(templateDict)
                 if(rc == 0):
                     if version is not None:
@@ -53,15 +58,15 @@ class RfJsonSchemas():
                     else:     
                         versionedNamespace = namespace 
                     jsId = versionedNamespace
-                    self.jsonSchemasDb[jsId] = {}
-                    self.jsonSchemasDb[jsId]["@odata.type"] = templateDict["@odata.type"]
-                    self.jsonSchemasDb[jsId]["Namespace"] = namespace
-                    self.jsonSchemasDb[jsId]["Version"] = version
-                    self.jsonSchemasDb[jsId]["ResourceType"] = resourceType
-                    self.jsonSchemasDb[jsId]["VersionedNamespace"] = versionedNamespace
+                    jsonSchemasDb[jsId] = {}
+                    jsonSchemasDb[jsId]["@odata.type"] = templateDict["@odata.type"]
+                    jsonSchemasDb[jsId]["Namespace"] = namespace
+                    jsonSchemasDb[jsId]["Version"] = version
+                    jsonSchemasDb[jsId]["ResourceType"] = resourceType
+                    jsonSchemasDb[jsId]["VersionedNamespace"] = versionedNamespace
                 else:
                     self.rdr.logMsg("ERROR","*****ERROR: JsonSchema Resource: template file:{} missing odata.type.".format(filename))
-        return(0)
+        return(jsonSchemasDb)
                     
 
 
@@ -74,28 +79,9 @@ class RfJsonSchemas():
         if request.method=="HEAD":
             return(0,200,"","",hdrs)
 
-        responseData2 = dict(self.jsonSchemaFileCollectionTemplate)
-        count=0
-        # now walk through the entries in the jsonSchemas and build the chassisCollection Members array
-        # note that the members array is an empty array in the template
-        uriBase="/redfish/v1/JsonSchemas/"
-        for jsonSchemaId in self.jsonSchemasDb:
-            # increment members count, and create the member for the next entry
-            count=count+1
-
-            memberUri = uriBase + jsonSchemaId
-            newMember=[{"@odata.id": memberUri}]
-
-            # add the new member to the members array we are building
-            responseData2["Members"] = responseData2["Members"] + newMember
-
-        # update the members count
-        responseData2["Members@odata.count"]=count
-
-        # convert to json
-        jsonRespData2=(json.dumps(responseData2,indent=4))
-
-        return(0, 200, "", jsonRespData2, hdrs)
+        # the jsonSchemasView has a Members entry for each jsonSchemasDb entry, and caches the json response
+        #   it returns the page of the collection if the request has $skip or $top
+        return(self.jsonSchemasView.getResponse(request, hdrs))
 
 
     # Get JsonSchema File
@@ -147,7 +133,7 @@ class RfJsonSchemas():
         responseData2["Location"].append( locationEntry ) 
 
         # convert to json
-        jsonRespData2=(json.dumps(responseData2,indent=4))
+        jsonRespData2=(self.rdr.jsonSerializer.dumps(responseData2))
 
         return(0, 200,"", jsonRespData2, hdrs)
 
@@ -0,0 +1,33 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+import json
+# orjson is optional.  if it is installed, it is used to encode compact output
+try:
+    import orjson
+except ImportError:
+    orjson=None
+
+# RfJsonSerializer(rdr)
+#    the serializer for all JSON response data.  the URI handlers (and backends) call rdr.jsonSerializer.dumps(data)
+#    the output format is JsonOutputFormat from RedDrum.conf  (rdr.jsonOutputFormat):
+#       "pretty"  -- indented by 4 spaces.  the default, and what RedDrum has always sent
+#       "compact" -- no whitespace between tokens.  encoded with orjson if it is installed
+#    dumps() returns a str
+class RfJsonSerializer():
+    def __init__(self, rdr):
+        self.rdr=rdr
+        self.useOrjson = (orjson is not None)
+
+    def dumps(self, data):
+        if self.rdr.jsonOutputFormat == "compact":
+            if self.useOrjson is True:
+                try:
+                    return(orjson.dumps(data).decode("utf-8"))
+                except TypeError:
+                    pass    # data orjson can't encode (eg ints > 64 bits): use json
+            return(json.dumps(data, separators=(",",":")))
+        return(json.dumps(data, indent=4))
+
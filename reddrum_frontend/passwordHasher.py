@@ -0,0 +1,174 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+import time
+import threading
+import multiprocessing
+
+# create the passlib CryptContext used to hash and verify account passwords
+#    used by the accountService and by the password hashing worker processes
+#    passlib (and the crypt module it loads) is imported here, on the first hash or verify, instead of at startup:
+#      requests that don't check a password never need it, and it is the slowest Frontend import
+def rfCreateCryptContext():
+    # support passlib v1.7.0 or later
+    from passlib.context import CryptContext
+    cryptContext = CryptContext(schemes=["sha512_crypt","sha256_crypt", "plaintext"]) # supported passwd schemes in db
+        # NOTE that plaintext must be last--since all other schemes could be plaintext
+    cryptContext.update(default="sha512_crypt") # strictly assign sha512 as the scheme used when "Setting" passwds
+    cryptContext.update(sha512_crypt__default_rounds=5000)  # sets normal linux rounds=5000, otherwise it is very slow
+    return(cryptContext)
+
+
+# the worker process functions
+#    each worker process creates its own CryptContext the first time it is used
+#    they return the result plus the worker start and end time so the caller can measure queue wait and hash time
+workerCryptContext=None
+
+def rfWorkerCryptContext():
+    global workerCryptContext
+    if workerCryptContext is None:
+        workerCryptContext=rfCreateCryptContext()
+    return(workerCryptContext)
+
+def rfWorkerHashPassword(password):
+    startTime=time.time()
+    passwdHash=rfWorkerCryptContext().hash(password)
+    return(passwdHash, startTime, time.time())
+
+def rfWorkerVerifyPassword(password, passwdHash):
+    startTime=time.time()
+    passwordOk=rfWorkerCryptContext().verify(password, passwdHash)
+    return(passwordOk, startTime, time.time())
+
+
+# RfPasswordHasher(rdr, workers, maxQueueDepth, retryAfter)
+#    runs the sha512_crypt hash and verify calls for the accountService on a small pool of worker processes
+#    so a burst of logins or Basic auth requests can't use all of the CPU and stall cheap GETs
+#    workers       = number of worker processes. 0 runs hash/verify inline in the request thread (no pool)
+#    maxQueueDepth = max hash/verify calls running or waiting for a worker. Calls over this limit are
+#                    rejected with rc=503 and the URI returns 503 with a Retry-After header
+#    retryAfter    = secs sent in the Retry-After header of the 503
+#
+#    the pool is created the first time it is used, so a process that forks after startup creates its own pool
+#    the inline CryptContext is also created the first time it is used
+class RfPasswordHasher():
+    def __init__(self, rdr, workers=2, maxQueueDepth=32, retryAfter=5):
+        self.rdr=rdr
+        self.workers=workers if workers is not None else 0
+        self.maxQueueDepth=maxQueueDepth if maxQueueDepth is not None else 0
+        self.retryAfter=retryAfter
+        self.cryptContext=None   # used when workers=0.  see getCryptContext()
+        self.executor=None
+        self.executorPid=None
+        self.lock=threading.Lock()
+        self.queueDepth=0
+
+        # counters reported by getStats()
+        self.completed=0
+        self.rejected=0
+        self.queueWaitTime=0.0
+        self.maxQueueWaitTime=0.0
+        self.hashTime=0.0
+        self.maxHashTime=0.0
+
+    # get the process pool, creating it if this process does not have one yet
+    def getExecutor(self):
+        pid=multiprocessing.current_process().pid
+        if (self.executor is None) or (self.executorPid != pid):
+            # use forkserver so the workers are not forked from a process that is already running threads
+            from concurrent.futures import ProcessPoolExecutor
+            mpContext=multiprocessing.get_context("forkserver")
+            self.executor=ProcessPoolExecutor(max_workers=self.workers, mp_context=mpContext)
+            self.executorPid=pid
+        return(self.executor)
+
+    # get the CryptContext used when workers=0, creating it on the first hash or verify
+    def getCryptContext(self):
+        if self.cryptContext is None:
+            with self.lock:
+                if self.cryptContext is None:
+                    self.cryptContext=rfCreateCryptContext()
+        return(self.cryptContext)
+
+    # run fn(*args) on the pool and wait for the result
+    #   returns: rc, result.   rc=503 if the queue is full, 500 if the worker failed
+    def run(self, fn, *args):
+        with self.lock:
+            if (self.maxQueueDepth > 0) and (self.queueDepth >= self.maxQueueDepth):
+                self.rejected+=1
+                return(503, None)
+            self.queueDepth+=1
+        submitTime=time.time()
+        try:
+            if self.workers > 0:
+                with self.lock:
+                    executor=self.getExecutor()
+                result,startTime,endTime = executor.submit(fn, *args).result()
+            else:
+                result,startTime,endTime = fn(*args)
+        except Exception as e:
+            self.rdr.logMsg("ERROR","RfPasswordHasher: worker failed: {}".format(e))
+            return(500, None)
+        finally:
+            with self.lock:
+                self.queueDepth-=1
+        queueWait=max(0.0, startTime - submitTime)
+        hashTime=endTime - startTime
+        with self.lock:
+            self.completed+=1
+            self.queueWaitTime+=queueWait
+            self.hashTime+=hashTime
+            self.maxQueueWaitTime=max(self.maxQueueWaitTime, queueWait)
+            self.maxHashTime=max(self.maxHashTime, hashTime)
+        return(0, result)
+
+    # hash a password
+    #   returns: rc, passwdHash.  rc=503 if overloaded
+    def hash(self, password):
+        if self.workers > 0:
+            return(self.run(rfWorkerHashPassword, password))
+        return(self.run(self.inlineHash, password))
+
+    # verify a password against the stored hash
+    #   returns: rc, passwordOk.  rc=503 if overloaded
+    def verify(self, password, passwdHash):
+        if self.workers > 0:
+            return(self.run(rfWorkerVerifyPassword, password, passwdHash))
+        return(self.run(self.inlineVerify, password, passwdHash))
+
+    def inlineHash(self, password):
+        startTime=time.time()
+        passwdHash=self.getCryptContext().hash(password)
+        return(passwdHash, startTime, time.time())
+
+    def inlineVerify(self, password, passwdHash):
+        startTime=time.time()
+        passwordOk=self.getCryptContext().verify(password, passwdHash)
+        return(passwordOk, startTime, time.time())
+
+    # add the Retry-After header to the headers of a 503 response sent when the hasher is overloaded
+    def addRetryAfterHdr(self, hdrs):
+        hdrs['Retry-After']=str(self.retryAfter)
+        return(hdrs)
+
+    # returns a dict of hasher counters
+    #   AvgQueueWaitMs is the avg time a call waited for a worker, AvgHashMs is the avg time spent in hash/verify
+    def getStats(self):
+        with self.lock:
+            stats={ "Workers": self.workers, "MaxQueueDepth": self.maxQueueDepth, "QueueDepth": self.queueDepth,
+                    "Completed": self.completed, "Rejected": self.rejected,
+                    "AvgQueueWaitMs": (1000.0*self.queueWaitTime/self.completed) if self.completed > 0 else 0.0,
+                    "MaxQueueWaitMs": 1000.0*self.maxQueueWaitTime,
+                    "AvgHashMs": (1000.0*self.hashTime/self.completed) if self.completed > 0 else 0.0,
+                    "MaxHashMs": 1000.0*self.maxHashTime }
+        return(stats)
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False)
+                self.executor=None
+        return(0)
+
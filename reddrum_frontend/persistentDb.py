@@ -0,0 +1,454 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+import os
+import sys
+import json
+import time
+import atexit
+import sqlite3
+import threading
+import contextlib
+
+# persistent databases:  the AccountService, Accounts, Roles, SessionService, EventService, and Subscriptions databases
+#    each database is a dict kept in memory (RfPersistentDict).  a URI handler changes the dict, then calls
+#      db.persist(key,...) with the top level keys it changed.  the database engine writes the new value of each key
+#      (or its delete)--it never rewrites the whole database
+#    the database engine is selected by DatabaseEngine in RedDrum.conf:
+#       json   -- RfJsonDbEngine.   (the default)  each database is stored in varDataPath/db as:
+#                   <name>.json          -- the snapshot:  the json dump of the dict
+#                   <name>.json.journal  -- the changes since the snapshot:  one json record per line
+#                      {"set": key, "value": value}   or   {"del": key}
+#       sqlite -- RfSqliteDbEngine.  all databases are stored in varDataPath/db/RedDrumDb.sqlite, a table per database
+#                   with a row per key.  the databases are shared by all server worker processes (ServerWorkers > 1)
+#
+#    both engines have the same methods:
+#       loadDb(subDir, filename)                - returns dbFilePath, db.  the default database in baseDataPath/subDir
+#                                                 is loaded if the database does not exist
+#       clearDb(subDir, filename, removeFiles)  - returns an empty db.  removeFiles=True: the default database is
+#                                                 loaded the next time
+#       write(db, keys)                         - write the current value of each key (called by db.persist)
+#       keysWhere(db, prop, value)              - the keys whose entry has entry[prop]==value.  prop: UserName or RoleId
+#       refresh()                               - read the changes written by other worker processes (sqlite)
+#       flush()                                 - write the changes that are not yet written (json)
+#
+#    the json engine writes the journal records with a writer thread (write-behind):
+#       JournalFlushInterval (msecs) -- the records of all databases are written and fsync'ed together (group commit)
+#         by a writer thread this often.  0 writes and fsyncs them in the request, before it returns
+#       JournalCompactRecords -- once a journal has this many records, the snapshot is rewritten and the journal
+#         truncated.  the snapshot is written to a temp file, fsync'ed, and renamed over the old one, so a crash
+#         leaves either the old or the new snapshot--never a torn one
+#       when a database is loaded, the journal is replayed over the snapshot.  a torn last record (a crash during a
+#         journal write) is dropped.   the database is then compacted, so the service starts with an empty journal
+
+
+# write a snapshot file:  temp file, fsync, rename over the old file, fsync the directory
+#   the temp file is per process, since server workers may write the same file
+def rfWriteSnapshotFile(dbFilePath, dbDict):
+    tmpFilePath="{}.{}.tmp".format(dbFilePath, os.getpid())
+    with open(tmpFilePath, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(dbDict, indent=4))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmpFilePath, dbFilePath)
+    dirFd=os.open(os.path.dirname(dbFilePath), os.O_RDONLY)
+    try:
+        os.fsync(dirFd)
+    finally:
+        os.close(dirFd)
+    return(0)
+
+
+# read a json database:  the snapshot in varDataPath/subDir with its journal replayed, or if there is no snapshot,
+#   the default database in baseDataPath/subDir
+#   returns dbFilePath, the database dict, and the number of journal records replayed
+def rfReadJsonDb(rdr, subDir, filename):
+    dbFilePath=os.path.join(rdr.varDataPath, subDir, filename)
+    if os.path.isfile(dbFilePath):
+        dbDict=json.loads( open(dbFilePath,"r").read() )
+    else:
+        rdr.logMsg("INFO","*****WARNING: Json Data file:{} Does not exist. Creating default.".format(dbFilePath))
+        # read the data in from the default database dir with the rm-tools package
+        dfltDbFilePath=os.path.join(rdr.baseDataPath, subDir, filename)
+        if os.path.isfile(dfltDbFilePath):
+            dbDict=json.loads( open(dfltDbFilePath,"r").read() )
+        else:
+            rdr.logMsg("CRITICAL", "*****ERROR: Default Json Database file:{} Does not exist. Exiting.".format(dfltDbFilePath))
+            sys.exit(10)
+
+    # replay the journal.  stop at a record that is not complete json: it was being written when the service stopped
+    journalPath=dbFilePath + ".journal"
+    journalRecords=0
+    if os.path.isfile(journalPath):
+        with open(journalPath, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record=json.loads(line)
+                except ValueError:
+                    rdr.logMsg("WARNING","*****WARNING: dropped an incomplete record at the end of {}".format(journalPath))
+                    break
+                if "set" in record:
+                    dbDict[record["set"]]=record["value"]
+                elif "del" in record:
+                    dbDict.pop(record["del"], None)
+                journalRecords+=1
+    return(dbFilePath, dbDict, journalRecords)
+
+
+# RfPersistentDict(engine, dbFilePath, dbDict)
+#    a database dict whose changes are written by its database engine.  see above
+#    a service that derives data from the dict (indexes, collection views, ETags) calls
+#      setRefreshHandler(lock, handler):  when the sqlite engine reads changes written by another worker process,
+#      it updates the dict with the lock held, then calls handler(changedKeys)--still holding the lock
+#    with the sqlite engine, self.seq is the Seq of the last change read into the dict, and self.keySeq[key] is the Seq
+#      of the last change of key.  all workers have the same Seqs, so the ETags are built from them (see
+#      resourceGenerations.py).   the json engine leaves them None
+class RfPersistentDict(dict):
+    def __init__(self, engine, dbFilePath, dbDict):
+        super().__init__(dbDict)
+        self.engine=engine
+        self.dbFilePath=dbFilePath
+        self.lock=threading.Lock()
+        self.refreshLock=None
+        self.refreshHandler=None
+        self.seq=None
+        self.keySeq=None
+
+    # write the current value of each key:  or a delete if the key is no longer in the dict
+    #   called by the URI handlers after they change the dict
+    def persist(self, *keys):
+        return(self.engine.write(self, keys))
+
+    # the keys whose entry has entry[prop]==value.  prop: "UserName" or "RoleId"
+    def keysWhere(self, prop, value):
+        return(self.engine.keysWhere(self, prop, value))
+
+    def setRefreshHandler(self, lock, handler):
+        self.refreshLock=lock
+        self.refreshHandler=handler
+        return(0)
+
+
+# RfJsonDbEngine(rdr)
+#    json snapshot and journal files.  see above
+#    self.pending[journalPath] = the journal records not yet written
+#    db.journaled[key] = the json of the value of key as last journaled.  the snapshot is built from it, so a compaction
+#      never reads a dict value while a URI handler is changing it
+#    the writer thread is started by the first write.  threads are not copied by fork, so a worker process starts its
+#      own writer thread.  the parent flushes its records before it forks the workers (see redDrumServer.py)
+class RfJsonDbEngine():
+    def __init__(self, rdr):
+        self.rdr=rdr
+        self.dbs=dict()
+        self.pending=dict()
+        self.lock=threading.Lock()
+        self.flushLock=threading.Lock()
+        self.thread=None
+        # write the records still pending when the process exits
+        atexit.register(self.flush)
+
+    def loadDb(self, subDir, filename):
+        dbFilePath,dbDict,journalRecords=rfReadJsonDb(self.rdr, subDir, filename)
+        db=self.newDb(dbFilePath, dbDict)
+        # start with an up to date snapshot and an empty journal.  this also writes the default database to varDataPath
+        if (journalRecords > 0) or (not os.path.isfile(dbFilePath)) or os.path.isfile(db.journalPath):
+            with self.flushLock:
+                self.compact(db)
+        return(dbFilePath, db)
+
+    def clearDb(self, subDir, filename, removeFiles=False):
+        db=self.newDb(os.path.join(self.rdr.varDataPath, subDir, filename), dict())
+        with self.flushLock:
+            if removeFiles is True:
+                for filePath in (db.dbFilePath, db.journalPath):
+                    if os.path.exists(filePath):
+                        os.remove(filePath)
+            else:
+                self.compact(db)
+        return(db)
+
+    # create the dict of a database, and register it.  a database that is cleared is replaced by a new one
+    def newDb(self, dbFilePath, dbDict):
+        db=RfPersistentDict(self, dbFilePath, dbDict)
+        db.journalPath=dbFilePath + ".journal"
+        db.journalRecords=0
+        db.journaled={key: json.dumps(value) for key,value in dbDict.items()}
+        with self.lock:
+            self.dbs[db.journalPath]=db
+            self.pending.pop(db.journalPath, None)
+        return(db)
+
+    # add a set record, or a delete record, of each key to the pending records of the database
+    def write(self, db, keys):
+        with db.lock:
+            records=list()
+            for key in keys:
+                if key in db:
+                    value=json.dumps(db[key])
+                    db.journaled[key]=value
+                    records.append('{"set": ' + json.dumps(key) + ', "value": ' + value + '}\n')
+                else:
+                    db.journaled.pop(key, None)
+                    records.append('{"del": ' + json.dumps(key) + '}\n')
+            with self.lock:
+                self.pending.setdefault(db.journalPath, []).extend(records)
+                if (self.rdr.journalFlushInterval > 0) and ((self.thread is None) or (not self.thread.is_alive())):
+                    self.thread=threading.Thread(target=self.writerLoop, name="RdJournalWriter", daemon=True)
+                    self.thread.start()
+        if self.rdr.journalFlushInterval == 0:
+            self.flush()
+        return(0)
+
+    def keysWhere(self, db, prop, value):
+        return([key for key,entry in list(db.items()) if isinstance(entry, dict) and entry.get(prop) == value])
+
+    # each worker process has its own copy of the json databases:  there is nothing to read
+    def refresh(self):
+        return(0)
+
+    def writerLoop(self):
+        while True:
+            time.sleep(self.rdr.journalFlushInterval/1000.0)
+            try:
+                self.flush()
+            except OSError as e:
+                self.rdr.logMsg("ERROR", "RfJsonDbEngine: error writing a database journal: {}".format(str(e)))
+
+    # write and fsync the pending records, and compact the databases whose journals are full
+    def flush(self):
+        with self.flushLock:
+            with self.lock:
+                pending=self.pending
+                self.pending=dict()
+                dbs=[(self.dbs[journalPath], records) for journalPath,records in pending.items()]
+            for db,records in dbs:
+                with open(db.journalPath, 'a', encoding='utf-8') as f:
+                    f.write("".join(records))
+                    f.flush()
+                    os.fsync(f.fileno())
+                db.journalRecords+=len(records)
+                if db.journalRecords >= self.rdr.journalCompactRecords:
+                    self.compact(db)
+        return(0)
+
+    # rewrite the snapshot with the journaled values, and truncate the journal.  called with the flushLock held
+    def compact(self, db):
+        with db.lock:
+            snapshot={key: json.loads(value) for key,value in db.journaled.items()}
+        rfWriteSnapshotFile(db.dbFilePath, snapshot)
+        with open(db.journalPath, 'w', encoding='utf-8') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        db.journalRecords=0
+        return(0)
+
+
+# RfSqliteDbEngine(rdr)
+#    all databases are stored in varDataPath/db/RedDrumDb.sqlite, in WAL mode so the worker processes read while
+#      another one writes
+#    a database is a table:   Key TEXT PRIMARY KEY, Value TEXT (the json of the value), UserName, RoleId, Seq
+#      - UserName and RoleId are copied from the value (accounts and roles) and indexed, for keysWhere()
+#      - Seq is the change number of the row.  each write() is one transaction that sets the Seq of the rows it writes
+#        to the max Seq of the table + 1.  a deleted key is kept as a row with a null Value until the next startup,
+#        so other workers see the delete
+#    write() writes only the rows of the keys that changed, in the request:  there is no write-behind
+#    the statements of each table are built once (db.sql), so the sqlite3 statement cache keeps them prepared
+#    refresh() is called at the start of each request.  PRAGMA data_version tells if another connection has written
+#      the database since this connection last looked.  if so, the rows with a Seq greater than the last Seq read into
+#      the dict (db.seq) are read, and the refresh handler of the database is called with the changed keys
+#    the databases are loaded before the server workers fork, and each worker opens its own connection per thread
+#    the first time a database is loaded, its json database (in varDataPath, or the default) is imported
+class RfSqliteDbEngine():
+    def __init__(self, rdr):
+        self.rdr=rdr
+        self.dbFilePath=os.path.join(rdr.varDataPath, "db", "RedDrumDb.sqlite")
+        self.dbs=dict()
+        self.local=threading.local()
+        self.getConnection().execute("PRAGMA journal_mode=WAL")
+        # the file holds password hashes, so only the service user can read it
+        os.chmod(self.dbFilePath, 0o600)
+
+    # get the connection for this thread, opening it if this thread (or process, after a fork) does not have one
+    def getConnection(self):
+        pid=os.getpid()
+        if getattr(self.local, "pid", None) != pid:
+            # isolation_level=None: transactions are started with an explicit BEGIN
+            conn=sqlite3.connect(self.dbFilePath, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn=conn
+            self.local.pid=pid
+            self.local.dataVersion=None
+        return(self.local.conn)
+
+    # the statements used on the table of a database
+    def tableStatements(self, table):
+        return({
+            "create":   'CREATE TABLE IF NOT EXISTS "{0}" (Key TEXT PRIMARY KEY, Value TEXT, UserName TEXT, RoleId TEXT,'
+                        ' Seq INTEGER NOT NULL)'.format(table),
+            "indexes":  ['CREATE INDEX IF NOT EXISTS "{0}UserName" ON "{0}" (UserName)'.format(table),
+                         'CREATE INDEX IF NOT EXISTS "{0}RoleId" ON "{0}" (RoleId)'.format(table),
+                         'CREATE INDEX IF NOT EXISTS "{0}Seq" ON "{0}" (Seq)'.format(table)],
+            "drop":     'DROP TABLE IF EXISTS "{0}"'.format(table),
+            "purge":    'DELETE FROM "{0}" WHERE Value IS NULL'.format(table),
+            "selectAll":'SELECT Key, Value, Seq FROM "{0}" WHERE Value IS NOT NULL'.format(table),
+            "selectNew":'SELECT Key, Value, Seq FROM "{0}" WHERE Seq > ?'.format(table),
+            "maxSeq":   'SELECT COALESCE(MAX(Seq), 0) FROM "{0}"'.format(table),
+            "set":      'INSERT OR REPLACE INTO "{0}" VALUES (?,?,?,?,?)'.format(table),
+            "clear":    'UPDATE "{0}" SET Value=NULL, UserName=NULL, RoleId=NULL, Seq=? WHERE Value IS NOT NULL'.format(table),
+            "UserName": 'SELECT Key FROM "{0}" WHERE UserName=? AND Value IS NOT NULL'.format(table),
+            "RoleId":   'SELECT Key FROM "{0}" WHERE RoleId=? AND Value IS NOT NULL'.format(table)
+        })
+
+    # the row values of a key, without the Seq:  Key, Value, UserName, RoleId
+    def rowValues(self, key, value):
+        if value is None:
+            return((key, None, None, None))
+        if not isinstance(value, dict):
+            return((key, json.dumps(value), None, None))
+        return((key, json.dumps(value), value.get("UserName"), value.get("RoleId")))
+
+    def loadDb(self, subDir, filename):
+        table=filename.split(".")[0]
+        sql=self.tableStatements(table)
+        conn=self.getConnection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            isNew=conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is None
+            conn.execute(sql["create"])
+            for indexSql in sql["indexes"]:
+                conn.execute(indexSql)
+            if isNew is True:
+                # import the json database.  (the one in varDataPath, or the default)
+                jsonDbFilePath,dbDict,journalRecords=rfReadJsonDb(self.rdr, subDir, filename)
+                conn.executemany(sql["set"], [self.rowValues(key, dbDict[key]) + (1,) for key in dbDict])
+            else:
+                conn.execute(sql["purge"])
+            rows=conn.execute(sql["selectAll"]).fetchall()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        db=self.newDb(table, sql, {row[0]: json.loads(row[1]) for row in rows})
+        db.keySeq={row[0]: row[2] for row in rows}
+        db.seq=max([row[2] for row in rows], default=0)
+        return(self.dbFilePath, db)
+
+    def clearDb(self, subDir, filename, removeFiles=False):
+        table=filename.split(".")[0]
+        sql=self.tableStatements(table)
+        db=self.newDb(table, sql, dict())
+        db.seq=0
+        if removeFiles is True:
+            # the json database is imported again the next time
+            self.getConnection().execute(sql["drop"])
+        else:
+            db.seq=self.writeRows(db, lambda conn,seq: conn.execute(sql["clear"], (seq,)))
+        return(db)
+
+    # create the dict of a database, and register it.  a database that is cleared is replaced by a new one
+    def newDb(self, table, sql, dbDict):
+        db=RfPersistentDict(self, self.dbFilePath, dbDict)
+        db.table=table
+        db.sql=sql
+        db.keySeq=dict()
+        self.dbs[table]=db
+        return(db)
+
+    # run writeFn(conn, seq) in a transaction, where seq = the Seq of the rows it writes.  returns seq
+    def writeRows(self, db, writeFn):
+        conn=self.getConnection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            seq=conn.execute(db.sql["maxSeq"]).fetchone()[0] + 1
+            writeFn(conn, seq)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return(seq)
+
+    def write(self, db, keys):
+        with db.lock:
+            rows=[self.rowValues(key, db[key] if key in db else None) for key in keys]
+        seq=self.writeRows(db, lambda conn,seq: conn.executemany(db.sql["set"], [row + (seq,) for row in rows]))
+        # if no other worker wrote the table since it was last read, the dict is up to date with this seq
+        with db.lock:
+            for row in rows:
+                # a refresh may already have read a later change of the key
+                if db.keySeq.get(row[0], 0) > seq:
+                    continue
+                if row[1] is None:
+                    db.keySeq.pop(row[0], None)
+                else:
+                    db.keySeq[row[0]]=seq
+            if db.seq == seq - 1:
+                db.seq=seq
+        return(0)
+
+    def keysWhere(self, db, prop, value):
+        rows=self.getConnection().execute(db.sql[prop], (value,)).fetchall()
+        return([row[0] for row in rows])
+
+    def refresh(self):
+        conn=self.getConnection()
+        dataVersion=conn.execute("PRAGMA data_version").fetchone()[0]
+        if dataVersion == self.local.dataVersion:
+            return(0)
+        self.local.dataVersion=dataVersion
+        for db in list(self.dbs.values()):
+            self.refreshDb(conn, db)
+        return(0)
+
+    # read the rows written since db.seq into the dict, and call its refresh handler with the keys that changed
+    def refreshDb(self, conn, db):
+        if conn.execute(db.sql["maxSeq"]).fetchone()[0] <= db.seq:
+            return(0)
+        with (db.refreshLock if db.refreshLock is not None else contextlib.nullcontext()):
+            changedKeys=list()
+            with db.lock:
+                for key,valueJson,seq in conn.execute(db.sql["selectNew"], (db.seq,)).fetchall():
+                    if valueJson is None:
+                        db.keySeq.pop(key, None)
+                        if key in db:
+                            del db[key]
+                            changedKeys.append(key)
+                    else:
+                        db.keySeq[key]=seq
+                        value=json.loads(valueJson)
+                        if db.get(key) != value:
+                            db[key]=value
+                            changedKeys.append(key)
+                    db.seq=max(db.seq, seq)
+            if (len(changedKeys) > 0) and (db.refreshHandler is not None):
+                db.refreshHandler(changedKeys)
+        return(0)
+
+    # each write is committed in the request
+    def flush(self):
+        return(0)
+
+
+# create the database engine selected by DatabaseEngine in RedDrum.conf
+def rfCreateDbEngine(rdr):
+    if rdr.databaseEngine == "sqlite":
+        return(RfSqliteDbEngine(rdr))
+    elif rdr.databaseEngine != "json":
+        rdr.logMsg("WARNING","*****WARNING: DatabaseEngine: {} is not supported. Using json".format(rdr.databaseEngine))
+    return(RfJsonDbEngine(rdr))
+
+
+# load a database with the database engine (rdr.dbEngine, created by the first load)
+#   returns two positional parameters:  the database filepath,  the database dict (an RfPersistentDict)
+def rfLoadPersistentDb(rdr, subDir, filename):
+    if rdr.dbEngine is None:
+        rdr.dbEngine=rfCreateDbEngine(rdr)
+    return(rdr.dbEngine.loadDb(subDir, filename))
+
+
+# clear a database:  with removeFiles=True the default database is loaded the next time.   returns the empty database
+def rfClearPersistentDb(rdr, subDir, filename, removeFiles=False):
+    if rdr.dbEngine is None:
+        rdr.dbEngine=rfCreateDbEngine(rdr)
+    return(rdr.dbEngine.clearDb(subDir, filename, removeFiles))
@@ -0,0 +1,200 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+import re
+from functools import lru_cache
+
+# $filter and $select query parameters of collection GETs
+#    $filter -- the Redfish subset of the OData filter syntax:
+#         <property> eq|ne|gt|ge|lt|le <literal>,   combined with and, or, not, and ( )
+#         property: a property name, or a path into the resource eg Status/Health
+#         literal:  'string' (a quote in the string is written ''), a number, true, false, or null
+#       eg  $filter=PowerState eq 'On' and Status/Health ne 'OK'
+#    $select -- a comma separated list of the properties to return, eg $select=PowerState,Status/Health
+#       the @odata annotations of the resource (@odata.id, @odata.type, ...) are always returned
+#    clients send the same few queries over and over, so the compiled filters and selects are kept in bounded LRU caches
+
+# filter tokens:  ( ) 'string' number name
+filterTokenRe=re.compile(r"\s*(?:(\()|(\))|'((?:[^']|'')*)'|(-?[0-9]+(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?)(?![\w.])|([A-Za-z_@#][\w@#./]*))")
+
+filterComparisons={
+    "eq": lambda a,b: a == b,
+    "ne": lambda a,b: a != b,
+    "gt": lambda a,b: a > b,
+    "ge": lambda a,b: a >= b,
+    "lt": lambda a,b: a < b,
+    "le": lambda a,b: a <= b
+}
+filterLiterals={"true": True, "false": False, "null": None}
+
+
+# split a filter string into tokens:  (kind,value) kind is "(", ")", "str", "num", or "name"
+#   returns None if the string has a character that is not part of any token
+def rfFilterTokens(filterString):
+    tokens=list()
+    pos=0
+    filterString=filterString.rstrip()
+    while pos < len(filterString):
+        match=filterTokenRe.match(filterString, pos)
+        if match is None or match.end() == pos:
+            return(None)
+        pos=match.end()
+        if match.group(1) is not None:
+            tokens.append(("(", None))
+        elif match.group(2) is not None:
+            tokens.append((")", None))
+        elif match.group(3) is not None:
+            tokens.append(("str", match.group(3).replace("''", "'")))
+        elif match.group(4) is not None:
+            number=match.group(4)
+            tokens.append(("num", float(number) if any(c in number for c in ".eE") else int(number)))
+        else:
+            tokens.append(("name", match.group(5)))
+    return(tokens)
+
+
+# get the value of a property path (a list of names) in a resource.  returns None if it is not there
+def rfPropertyValue(resData, path):
+    value=resData
+    for name in path:
+        if not isinstance(value, dict):
+            return(None)
+        value=value.get(name)
+    return(value)
+
+
+# a recursive descent parser of the filter tokens that builds the predicate:  a function(resData) returning True/False
+#    orExpr  := andExpr ("or" andExpr)*
+#    andExpr := unary ("and" unary)*
+#    unary   := "not" unary | "(" orExpr ")" | <property> <comparison> <literal>
+class RfFilterParser():
+    def __init__(self, tokens):
+        self.tokens=tokens
+        self.pos=0
+
+    def peek(self):
+        return(self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None))
+
+    def next(self):
+        token=self.peek()
+        self.pos+=1
+        return(token)
+
+    def isKeyword(self, keyword):
+        kind,value=self.peek()
+        return(kind == "name" and value == keyword)
+
+    def parse(self):
+        predicate=self.orExpr()
+        if predicate is None or self.pos != len(self.tokens):
+            return(None)
+        return(predicate)
+
+    def orExpr(self):
+        terms=[self.andExpr()]
+        while self.isKeyword("or"):
+            self.next()
+            terms.append(self.andExpr())
+        if None in terms:
+            return(None)
+        if len(terms) == 1:
+            return(terms[0])
+        return(lambda resData: any(term(resData) for term in terms))
+
+    def andExpr(self):
+        terms=[self.unary()]
+        while self.isKeyword("and"):
+            self.next()
+            terms.append(self.unary())
+        if None in terms:
+            return(None)
+        if len(terms) == 1:
+            return(terms[0])
+        return(lambda resData: all(term(resData) for term in terms))
+
+    def unary(self):
+        if self.isKeyword("not"):
+            self.next()
+            term=self.unary()
+            if term is None:
+                return(None)
+            return(lambda resData: not term(resData))
+        kind,value=self.peek()
+        if kind == "(":
+            self.next()
+            term=self.orExpr()
+            if self.next()[0] != ")":
+                return(None)
+            return(term)
+        return(self.comparison())
+
+    def comparison(self):
+        kind,propName=self.next()
+        opKind,opName=self.next()
+        litKind,literal=self.next()
+        if (kind != "name") or (opKind != "name") or (opName not in filterComparisons):
+            return(None)
+        if litKind == "name":
+            if literal not in filterLiterals:
+                return(None)
+            literal=filterLiterals[literal]
+        elif litKind not in ("str", "num"):
+            return(None)
+        path=propName.split("/")
+        compare=filterComparisons[opName]
+        # comparing values of different types (eg a string and a number, or null with gt) is False, not an error
+        def predicate(resData):
+            value=rfPropertyValue(resData, path)
+            try:
+                return(compare(value, literal) is True)
+            except TypeError:
+                return(False)
+        return(predicate)
+
+
+# compile a $filter query string.   returns rc,predicate:  rc=400 and predicate=None if the filter is not valid
+@lru_cache(maxsize=256)
+def rfCompileFilter(filterString):
+    tokens=rfFilterTokens(filterString)
+    if not tokens:
+        return(400, None)
+    predicate=RfFilterParser(tokens).parse()
+    if predicate is None:
+        return(400, None)
+    return(0, predicate)
+
+
+# compile a $select query string into a tree of the selected properties:  {name: subtree or None (the whole property)}
+#   returns rc,selectTree:  rc=400 if it is not valid
+@lru_cache(maxsize=256)
+def rfCompileSelect(selectString):
+    selectTree=dict()
+    for selectPath in selectString.split(","):
+        path=selectPath.strip().split("/")
+        if "" in path:
+            return(400, None)
+        node=selectTree
+        for name in path[:-1]:
+            if node.get(name, {}) is None:
+                break   # the whole property is already selected
+            node=node.setdefault(name, dict())
+        else:
+            node[path[-1]]=None
+    return(0, selectTree)
+
+
+# return the properties of a resource selected by a selectTree, and its @odata annotations
+def rfSelectProperties(resData, selectTree, topLevel=True):
+    selected=dict()
+    for prop,value in resData.items():
+        if topLevel and prop.startswith("@odata."):
+            selected[prop]=value
+        elif prop in selectTree:
+            subTree=selectTree[prop]
+            if subTree is None:
+                selected[prop]=value
+            elif isinstance(value, dict):
+                selected[prop]=rfSelectProperties(value, subTree, False)
+    return(selected)
@@ -0,0 +1,305 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+# RedDrum production HTTP server
+#   runs the RedDrum Flask app on a WSGI server (based on the python wsgiref server) with:
+#     - a bounded pool of request threads per worker process (ServerThreads)
+#     - optionally, several pre-forked worker processes that share the listening socket (ServerWorkers)
+#     - HTTP/1.1 keep-alive connections, closed after ServerKeepAliveTimeout secs idle.  at most ServerThreads-1
+#       connections are kept open, so an idle keep-alive connection can't hold the last free request thread
+#     - graceful shutdown on SIGTERM or SIGINT: stop accepting connections, finish the requests in flight, then exit
+#
+#   the Flask development server (app.run) is still used if UseDevServer is set in RedDrum.conf or --DevServer is passed
+#
+#   NOTE: each worker process has its own copy of the Frontend data (account lockout state, ...)
+#     sessions are only shared between the workers if SessionStore=sqlite is set in RedDrum.conf.
+#     otherwise a session created in one worker is not seen by the others
+#     accounts, roles, and subscriptions are only shared if DatabaseEngine=sqlite is set (see persistentDb.py)
+
+import os
+import sys
+import socket
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, ServerHandler
+from werkzeug.wsgi import LimitedStream
+
+
+# WSGI handler that writes HTTP/1.1 responses
+class RdServerHandler(ServerHandler):
+    http_version = "1.1"
+    sentContentLength = False
+
+    # tell the client if the connection is closed after this response
+    def cleanup_headers(self):
+        super().cleanup_headers()
+        if (self.request_handler.close_connection is True) and ("Connection" not in self.headers):
+            self.headers["Connection"] = "close"
+
+    def close(self):
+        # remember if the end of the response is known before close() clears the headers:
+        #   it has a Content-Length, or it is a 204 or 304, which never have a body
+        self.sentContentLength = (self.headers is not None) and (("Content-Length" in self.headers) or
+                                  (self.status is not None and self.status[0:3] in ("204","304")))
+        super().close()
+
+
+# request handler that supports HTTP/1.1 keep-alive
+#   the Werkzeug and wsgiref request handlers close the connection after every request.
+#   this handler gives the app a request body stream limited to the Content-Length, reads any part of the body the app
+#   did not read after the response is sent, and then leaves the connection open for the next request.
+#   the connection is closed after HTTP/1.0 requests, requests sent with "Connection: close", requests with a chunked body,
+#   responses without a Content-Length, once shutdown starts, and if ServerThreads-1 other connections are kept open
+class RdRequestHandler(WSGIRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1     # buffer the response so the headers and body go out together. flushed after each request
+
+    def setup(self):
+        # socketserver sets this as the socket timeout.  an idle keep-alive connection is closed when it expires
+        self.timeout = self.server.keepAliveTimeout
+        super().setup()
+        # send responses right away rather than waiting for the client's ACK of the previous response
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.idle = False
+        self.server.addConnection(self)
+
+    def finish(self):
+        self.server.removeConnection(self)
+        super().finish()
+
+    # handle requests on the connection until it is closed.  (the wsgiref handler only handles one request)
+    def handle(self):
+        try:
+            BaseHTTPRequestHandler.handle(self)
+        except (ConnectionError, TimeoutError):
+            pass
+
+    def handle_one_request(self):
+        # while idle, waiting for the next request, startShutdown() may close the connection
+        self.idle = True
+        if self.server.shuttingDown is True:
+            self.close_connection = True
+            return
+        self.raw_requestline = self.rfile.readline(65537)
+        self.idle = False
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            return
+        if not self.raw_requestline:
+            self.close_connection = True
+            return
+        # parse_request() sets close_connection from the request version and Connection header
+        if not self.parse_request():
+            return
+
+        # a keep-alive connection holds a request thread while it waits for its next request
+        if (self.close_connection is not True) and (self.server.keepAlive(self) is not True):
+            self.close_connection = True
+
+        environ=self.get_environ()
+        requestBody=None
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            # we can't find the end of a chunked body if the app doesn't read it all
+            self.close_connection = True
+        else:
+            requestBody=LimitedStream(self.rfile, int(self.headers.get("Content-Length") or 0))
+            environ["wsgi.input"]=requestBody
+
+        handler=RdServerHandler(environ["wsgi.input"], self.wfile, self.get_stderr(), environ, multithread=True)
+        handler.request_handler=self
+        handler.run(self.server.get_app())
+
+        # read the rest of the request body so the next request on the connection starts at a request line
+        if requestBody is not None:
+            requestBody.exhaust()
+        # without a Content-Length, the end of the response is marked by closing the connection
+        if handler.sentContentLength is not True:
+            self.close_connection = True
+        # once shutdown starts, close keep-alive connections after the current request
+        if self.server.shuttingDown is True:
+            self.close_connection = True
+        self.wfile.flush()
+
+    def log_request(self, code="-", size="-"):
+        # the per-API messages are printed by rfProcessErrors if debug is set
+        if self.server.rdr.debug is True:
+            super().log_request(code, size)
+
+
+# WSGI server that handles each connection on a bounded pool of threads
+class RdThreadPoolWSGIServer(WSGIServer):
+    def __init__(self, rdr, app, threads, keepAliveTimeout):
+        self.rdr=rdr
+        self.keepAliveTimeout=keepAliveTimeout
+        self.shuttingDown=False
+        self.connections=set()                  # the request handler of each open connection
+        self.keepAliveConnections=set()         # the request handlers of the connections kept open:  at most threads-1
+        self.connectionsLock=threading.Lock()
+        self.threads=threads
+        super().__init__((rdr.rdHost, rdr.rdPort), RdRequestHandler)
+        self.set_app(app)
+        # the pool does not start any threads until the first request, so it is safe to fork after this
+        self.executor=ThreadPoolExecutor(max_workers=threads, thread_name_prefix="RdRequest")
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.processRequestThread, request, client_address)
+
+    def processRequestThread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def addConnection(self, requestHandler):
+        with self.connectionsLock:
+            self.connections.add(requestHandler)
+
+    def removeConnection(self, requestHandler):
+        with self.connectionsLock:
+            self.connections.discard(requestHandler)
+            self.keepAliveConnections.discard(requestHandler)
+
+    # returns True if the connection can be kept open after this request
+    #   each keep-alive connection holds a pool thread until its next request or the keep-alive timeout.  at most
+    #   threads-1 are kept open, so a thread is always free for new connections:  idle clients can't starve the worker
+    def keepAlive(self, requestHandler):
+        with self.connectionsLock:
+            if requestHandler in self.keepAliveConnections:
+                return(True)
+            if len(self.keepAliveConnections) >= self.threads - 1:
+                return(False)
+            self.keepAliveConnections.add(requestHandler)
+            return(True)
+
+    # stop accepting connections, and close keep-alive connections that are waiting for a request
+    #   called from the signal handler, so serve_forever() is stopped from another thread
+    def startShutdown(self):
+        if self.shuttingDown is False:
+            self.shuttingDown=True
+            threading.Thread(target=self.shutdown, name="RdShutdown", daemon=True).start()
+            with self.connectionsLock:
+                for requestHandler in self.connections:
+                    if requestHandler.idle is True:
+                        try:
+                            # the handler's blocked readline() returns end-of-file, so it closes the connection
+                            requestHandler.connection.shutdown(socket.SHUT_RD)
+                        except OSError:
+                            pass
+        return(0)
+
+    # close the listening socket and wait for the requests in flight to finish
+    def finishShutdown(self):
+        self.server_close()
+        self.executor.shutdown(wait=True)
+        return(0)
+
+
+# run the RedDrum app on the production server.  returns after a graceful shutdown
+def rdRunServer(rdr, app):
+    workers=max(1, rdr.serverWorkers)
+    threads=max(1, rdr.serverThreads)
+    # the json database engine writes each database file from the dict of one process:  workers would overwrite
+    #   each other's changes when they compact the shared journals.  only the sqlite engine is shared by workers
+    if (workers > 1) and (rdr.databaseEngine != "sqlite"):
+        rdr.logMsg("ERROR"," ServerWorkers > 1 requires DatabaseEngine=sqlite.  running 1 worker")
+        workers=1
+    server=RdThreadPoolWSGIServer(rdr, app, threads, rdr.serverKeepAliveTimeout)
+    rdr.logMsg("INFO"," Running RedDrum Server at {}:{}  workers: {}, threads per worker: {}, keep-alive timeout: {}".format(
+               rdr.rdHost, rdr.rdPort, workers, threads, rdr.serverKeepAliveTimeout))
+
+    if workers == 1:
+        rdServeForever(rdr, server)
+    else:
+        if rdr.sessionStore != "sqlite":
+            rdr.logMsg("WARNING"," ServerWorkers > 1 without SessionStore=sqlite: each worker keeps its own sessions")
+        rdRunPreforkedWorkers(rdr, server, workers)
+    rdr.logMsg("INFO"," RedDrum Server stopped ")
+    return(0)
+
+
+# serve requests in this process until SIGTERM or SIGINT
+def rdServeForever(rdr, server):
+    def stopHandler(signum, frame):
+        rdr.logMsg("INFO"," pid {}: received signal {}, shutting down".format(os.getpid(), signum))
+        server.startShutdown()
+    signal.signal(signal.SIGTERM, stopHandler)
+    signal.signal(signal.SIGINT, stopHandler)
+
+    server.serve_forever()
+    server.finishShutdown()
+    # write the database changes still pending in the database engine, and the sessions
+    if rdr.dbEngine is not None:
+        rdr.dbEngine.flush()
+    rdr.root.sessionService.checkpointSessions()
+    return(0)
+
+
+# fork the worker processes.  they all accept connections on the listening socket created by the parent
+#   the parent restarts workers that exit unexpectedly, and on SIGTERM or SIGINT it stops the workers and waits for them
+def rdRunPreforkedWorkers(rdr, server, workers):
+    workerPids=set()
+    stopping=threading.Event()
+
+    def startWorker():
+        pid=os.fork()
+        if pid == 0:
+            # worker process.  threads are not copied by fork, so restart the service threads
+            workerPids.clear()
+            rdr.root.sessionService.startSessionReaper(rdr)
+            rdr.root.sessionService.startSessionCheckpointer(rdr)
+            exitCode=0
+            try:
+                rdServeForever(rdr, server)
+            except Exception as e:
+                rdr.logMsg("ERROR","RedDrum worker {} failed: {}".format(os.getpid(), e))
+                exitCode=1
+            finally:
+                sys.stdout.flush()
+                os._exit(exitCode)
+        workerPids.add(pid)
+        return(pid)
+
+    def stopHandler(signum, frame):
+        stopping.set()
+        for pid in list(workerPids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, stopHandler)
+    signal.signal(signal.SIGINT, stopHandler)
+
+    # the database changes made during startup are written by the parent:  the workers start with no pending records
+    if rdr.dbEngine is not None:
+        rdr.dbEngine.flush()
+    # stop the parent's service threads:  the workers start their own.  a thread that holds a lock when the parent
+    #   forks (now, or later to restart a worker) would leave the lock held in the worker forever
+    rdr.root.sessionService.stopSessionCheckpointer()
+    rdr.root.sessionService.stopSessionReaper()
+    for _ in range(workers):
+        startWorker()
+
+    while len(workerPids) > 0:
+        try:
+            pid,status=os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workerPids.discard(pid)
+        if not stopping.is_set():
+            rdr.logMsg("WARNING"," RedDrum worker {} exited with status {}, restarting it".format(pid, status))
+            startWorker()
+
+    server.server_close()
+    return(0)
+
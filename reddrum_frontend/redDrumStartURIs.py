@@ -11,6 +11,9 @@ from .flask_redfish_auth import RfHTTPBasicOrTokenAuth
 from .authenticate import rfRegisterBasicAuthVerify
 from .authenticate import rfRegisterTokenAuthVerify
 from .redfish_headers import rfcheckHeaders
+from .collectionView import rfPageBackendCollection
+from .expandQuery import RfExpander
+from .redDrumServer import rdRunServer
 from flask import g
 from flask import make_response
 
@@ -20,7 +23,32 @@ from flask import make_response
 #   
 
 # -----------------------------------------------------------------------
+# create the RedDrum Flask app and start it running.  returns when the server is shutdown
 def rdStart_RedDrum_Flask_app(rdr):
+    if rdr.startupProfiler is not None:
+        rdr.startupProfiler.startPhase("route registration")
+    app=rdCreate_RedDrum_Flask_app(rdr)
+
+    # startup is done:  log the startup phase times if --ProfileStartup
+    if rdr.startupProfiler is not None:
+        rdr.startupProfiler.report(rdr)
+
+    # ======================================================================
+    # start Flask REST engine running
+    #   requests are handled on multiple threads: the authenticated user is kept in the request context (flask.g)
+    #   and the account, session, and event services lock their shared dicts
+    if rdr.useDevServer is True:
+        rdr.logMsg("INFO"," Running Flask App on the Flask development server ")
+        app.run(host=rdr.rdHost, port=rdr.rdPort, threaded=True)
+    else:
+        # the production server: pre-forked workers and a pool of request threads per worker, see redDrumServer.py
+        #   returns after a graceful shutdown on SIGTERM or SIGINT
+        rdRunServer(rdr, app)
+
+
+# -----------------------------------------------------------------------
+# create the RedDrum Flask app and register the Redfish URIs.  returns the app
+def rdCreate_RedDrum_Flask_app(rdr):
     rfr = rdr  
 
     rdr.logMsg("INFO"," Initializing Flask URIs ")
@@ -40,17 +68,27 @@ def rdStart_RedDrum_Flask_app(rdr):
     rfRegisterBasicAuthVerify(auth,rdr)
     rfRegisterTokenAuthVerify(auth,rdr)
 
-
     # =======================================================================
-    # Define the default "After Request" processing method
-    #    This is a flask hook for after request. 
-    #    It is invoked for every post-request.
-    @app.after_request
-    def after_request_call(response):
-        # reset the currentUserId and currentUserPrivileges
-        rfr.root.accountService.currentUserId=None
-        rfr.root.accountService.currentUserPrivileges=None
-        return response
+    # $expand of collection GETs  (see expandQuery.py)
+    #   the member resources are read with the same functions as the member GET URIs below
+    #   backend resources are read concurrently on the expander threads.  the backend is looked up per GET
+    #   since it is initialized after the app is created
+    expander=RfExpander(rdr)
+    expander.addResolver("/redfish/v1/Registries/", lambda req,subPath: rdr.root.registries.getRegistriesFile(req,subPath))
+    expander.addResolver("/redfish/v1/JsonSchemas/", lambda req,subPath: rdr.root.jsonSchemas.getJsonSchemaFile(req,subPath))
+    expander.addResolver("/redfish/v1/SessionService/Sessions/",
+                         lambda req,subPath: rdr.root.sessionService.getSessionEntry(req,subPath))
+    expander.addResolver("/redfish/v1/EventService/Subscriptions/",
+                         lambda req,subPath: rdr.root.eventService.getSubscriptionEntry(req,subPath))
+    expander.addResolver("/redfish/v1/AccountService/Roles/", lambda req,subPath: rdr.root.accountService.getRoleEntry(req,subPath))
+    expander.addResolver("/redfish/v1/AccountService/Accounts/",
+                         lambda req,subPath: rdr.root.accountService.getAccountEntry(req,subPath))
+    expander.addResolver("/redfish/v1/Systems/", lambda req,subPath: rfr.backend.systems.processSystemsResource(req,subPath),
+                         concurrent=True)
+    expander.addResolver("/redfish/v1/Chassis/", lambda req,subPath: rfr.backend.chassis.processChassisResource(req,subPath),
+                         concurrent=True)
+    expander.addResolver("/redfish/v1/Managers/", lambda req,subPath: rfr.backend.managers.processManagersResource(req,subPath),
+                         concurrent=True)
 
 
     # =======================================================================
@@ -140,7 +178,9 @@ def rdStart_RedDrum_Flask_app(rdr):
     @rfcheckHeaders(rdr)
     @auth.rfAuthRequired(rdr, privilege=[["Login"]])
     def rfRegistriesCollection():
-        rc,statusCode,errString,resp,hdrs=rdr.root.registries.getRegistriesCollection(request)
+        expandRequest=expander.collectionRequest(request)
+        rc,statusCode,errString,resp,hdrs=rdr.root.registries.getRegistriesCollection(expandRequest)
+        rc,statusCode,errString,resp,hdrs=expander.processCollectionQuery(expandRequest,rc,statusCode,errString,resp,hdrs)
         resp,statusCode,hdrs=rfProcessErrors(rdr,request,rc,statusCode,errString,resp,hdrs)
         return rfMakeResponse(resp,statusCode,hdrs)
 
@@ -163,7 +203,9 @@ def rdStart_RedDrum_Flask_app(rdr):
     @rfcheckHeaders(rdr)
     @auth.rfAuthRequired(rdr, privilege=[["Login"]])
     def rfJsonSchemasCollection():
-        rc,statusCode,errString,resp,hdrs=rdr.root.jsonSchemas.getJsonSchemaCollection(request)
+        expandRequest=expander.collectionRequest(request)
+        rc,statusCode,errString,resp,hdrs=rdr.root.jsonSchemas.getJsonSchemaCollection(expandRequest)
+        rc,statusCode,errString,resp,hdrs=expander.processCollectionQuery(expandRequest,rc,statusCode,errString,resp,hdrs)
         resp,statusCode,hdrs=rfProcessErrors(rdr,request,rc,statusCode,errString,resp,hdrs)
         return rfMakeResponse(resp,statusCode,hdrs)
 
@@ -188,10 +230,11 @@ def rdStart_RedDrum_Flask_app(rdr):
     # Get SchemaFile
     # GET /redfish/v1/Schemas/<schemaFile>    
     #  -unauthenticated static, json or xml. flask generates Content-Type
+    #  -sent gzip (or br) compressed if the client accepts it.  the compressed files are cached
     @app.route("/redfish/v1/schemas/<schemaFile>",methods=['GET'])
     @rfcheckHeaders(rdr)
     def rfGetSchemaFile(schemaFile):
-        return send_from_directory( rdr.schemasPath, schemaFile, add_etags=False)
+        return rdr.responseCompressor.sendStaticFile(request, rdr.schemasPath, schemaFile)
 
     # Get RegistryFile
     # GET /redfish/v1/Schemas/Registries/<registryFile>    
@@ -199,7 +242,7 @@ def rdStart_RedDrum_Flask_app(rdr):
     @rfcheckHeaders(rdr)
     def rfGetRegistryFile(registryFile):
         regPath=os.path.join(rdr.schemasPath, "registries")
-        return send_from_directory( regPath, registryFile, add_etags=False )
+        return rdr.responseCompressor.sendStaticFile(request, regPath, registryFile)
 
 
     # -----------------------------------------------------------------------
@@ -235,7 +278,9 @@ def rdStart_RedDrum_Flask_app(rdr):
     @rfcheckHeaders(rfr)
     @auth.rfAuthRequired(rdr, privilege=[["Login"]])
     def rfGetSessions():
-        rc,statusCode,errString,resp,hdrs=rdr.root.sessionService.getSessionsCollectionResource(request)
+        expandRequest=expander.collectionRequest(request)
+        rc,statusCode,errString,resp,hdrs=rdr.root.sessionService.getSessionsCollectionResource(expandRequest)
+        rc,statusCode,errString,resp,hdrs=expander.processCollectionQuery(expandRequest,rc,statusCode,errString,resp,hdrs)
         resp,statusCode,hdrs=rfProcessErrors(rdr,request,rc,statusCode,errString,resp,hdrs)
         return rfMakeResponse(resp,statusCode,hdrs)
     
@@ -301,7 +346,9 @@ def rdStart_RedDrum_Flask_app(rdr):
     @rfcheckHeaders(rdr)
     @auth.rfAuthRequired(rdr, privilege=[["Login"]])
     def rfGetSubscriptions():
-        rc,statusCode,errString,resp,hdrs=rdr.root.eventService.getEventSubscriptionsResource(request)
+        expandRequest=expander.collectionRequest(request)
+        rc,statusCode,errString,resp,hdrs=rdr.root.eventService.getEventSubscriptionsResource(expandRequest)
+        rc,statusCode,errString,resp,hdrs=expander.processCollectionQuery(expandRequest,rc,statusCode,errString,resp,hdrs)
         resp,statusCode,hdrs=rfProcessErrors(rdr,request,rc,statusCode,errString,resp,hdrs)
         return(resp,statusCode,hdrs)
 
@@ -422,7 +469,9 @@ def rdStart_RedDrum_Flask_app(rdr):
     @rfcheckHeaders(rdr)
     @auth.rfAuthRequired(rdr, privilege=[["Login"]])
     def rfGetRoles():
-        rc,statusCode,errString,resp,hdrs=rdr.root.accountService.getRolesCollectionResource(request)
+        expandRequest=expander.collectionRequest(request)
+        rc,statusCode,errString,resp,hdrs=rdr.root.accountService.getRolesCollectionResource(expandRequest)
+        rc,statusCode,errString,resp,hdrs=expander.processCollectionQuery(expandRequest,rc,statusCode,errString,resp,hdrs)
         resp,statusCode,hdrs=rfProcessErrors(rdr,request,rc,statusCode,errString,resp,hdrs)
         return rfMakeResponse(resp,statusCode,hdrs)
 
@@ -498,7 +547,9 @@ def rdStart_RedDrum_Flask_app(rdr):
     @rfcheckHeaders(rdr)
     @auth.rfAuthRequired(rdr, privilege=[["Login"]])
     def rfGetAccounts():
-        rc,statusCode,errString,resp,hdrs=rfr.root.accountService.getAccountsCollectionResource(request)
+        expandRequest=expander.collectionRequest(request)
+        rc,statusCode,errString,resp,hdrs=rfr.root.accountService.getAccountsCollectionResource(expandRequest)
+        rc,statusCode,errString,resp,hdrs=expander.processCollectionQuery(expandRequest,rc,statusCode,errString,resp,hdrs)
         resp,statusCode,hdrs=rfProcessErrors(rdr,request,rc,statusCode,errString,resp,hdrs)
         return rfMakeResponse(resp,statusCode,hdrs)
     
@@ -570,7 +621,10 @@ def rdStart_RedDrum_Flask_app(rdr):
     @rfcheckHeaders(rfr)
     @auth.rfAuthRequired(rdr, privilege=[["Login"]])
     def rfSystems():
-        rc,statusCode,errString,resp,hdrs=rfr.backend.systems.getSystemsCollection(request)
+        expandRequest=expander.collectionRequest(request)
+        rc,statusCode,errString,resp,hdrs=rfr.backend.systems.getSystemsCollection(expandRequest)
+        rc,statusCode,errString,resp,hdrs=rfPageBackendCollection(rdr,expandRequest,"/redfish/v1/Systems",rc,statusCode,errString,resp,hdrs)
+        rc,statusCode,errString,resp,hdrs=expander.processCollectionQuery(expandRequest,rc,statusCode,errString,resp,hdrs)
         resp,statusCode,hdrs=rfProcessErrors(rdr,request,rc,statusCode,errString,resp,hdrs)
         return rfMakeResponse(resp,statusCode,hdrs)
 
@@ -581,7 +635,10 @@ def rdStart_RedDrum_Flask_app(rdr):
     @rfcheckHeaders(rfr)
     @auth.rfAuthRequired(rdr, privilege=[["Login"]])
     def rfChassis():
-        rc,statusCode,errString,resp,hdrs=rfr.backend.chassis.getChassisCollection(request)
+        expandRequest=expander.collectionRequest(request)
+        rc,statusCode,errString,resp,hdrs=rfr.backend.chassis.getChassisCollection(expandRequest)
+        rc,statusCode,errString,resp,hdrs=rfPageBackendCollection(rdr,expandRequest,"/redfish/v1/Chassis",rc,statusCode,errString,resp,hdrs)
+        rc,statusCode,errString,resp,hdrs=expander.processCollectionQuery(expandRequest,rc,statusCode,errString,resp,hdrs)
         resp,statusCode,hdrs=rfProcessErrors(rdr,request,rc,statusCode,errString,resp,hdrs)
         return rfMakeResponse(resp,statusCode,hdrs)
 
@@ -592,7 +649,10 @@ def rdStart_RedDrum_Flask_app(rdr):
     @rfcheckHeaders(rfr)
     @auth.rfAuthRequired(rdr, privilege=[["Login"]])
     def rfManagers():
-        rc,statusCode,errString,resp,hdrs=rfr.backend.managers.getManagersCollection(request)
+        expandRequest=expander.collectionRequest(request)
+        rc,statusCode,errString,resp,hdrs=rfr.backend.managers.getManagersCollection(expandRequest)
+        rc,statusCode,errString,resp,hdrs=rfPageBackendCollection(rdr,expandRequest,"/redfish/v1/Managers",rc,statusCode,errString,resp,hdrs)
+        rc,statusCode,errString,resp,hdrs=expander.processCollectionQuery(expandRequest,rc,statusCode,errString,resp,hdrs)
         resp,statusCode,hdrs=rfProcessErrors(rdr,request,rc,statusCode,errString,resp,hdrs)
         return rfMakeResponse(resp,statusCode,hdrs)
 
@@ -700,16 +760,29 @@ def rdStart_RedDrum_Flask_app(rdr):
 
 
     # -----------------------------------------------------------------------
-    #END file redfishURIs
+    # Database refresh
+    #   with DatabaseEngine=sqlite, read the account, role, and event database changes made by other server workers
+    #   before the request is handled.  see persistentDb.py
+    @app.before_request
+    def rdRefreshDatabases():
+        if (rdr.dbEngine is not None) and request.path.startswith("/redfish"):
+            rdr.dbEngine.refresh()
 
 
-    # ======================================================================
-    # start Flask REST engine running
-    rfr.logMsg("INFO"," Running Flask App ")
+    # -----------------------------------------------------------------------
+    # Response compression
+    #   compress /redfish responses if the client sent Accept-Encoding: gzip (or br). see responseCompression.py
+    @app.after_request
+    def rdCompressResponse(response):
+        if not request.path.startswith("/redfish"):
+            return(response)
+        return(rdr.responseCompressor.compressResponse(request, response))
+
 
-    app.run(host=rfr.rdHost, port=rfr.rdPort)
+    # -----------------------------------------------------------------------
+    #END file redfishURIs
 
-    #never returns
+    return(app)
 
 
 # ======================================================================
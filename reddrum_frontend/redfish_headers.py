@@ -3,8 +3,8 @@
 #    Copyright 2018 Dell, Inc. All rights reserved.
 #    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
 
-from functools import wraps
-from flask import request, Response, make_response
+from functools import wraps, lru_cache
+from flask import request, Response, make_response, g
 from .redfishUtils import RedfishUtils
 
 #
@@ -29,6 +29,67 @@ def errorOdataVersion():
     return Response("", 412, {'OData-Version': '4.0'})
 
 
+# RfRequestHeadersLower(headers)
+#    a case-insensitive view of the request headers that returns lower-cased values
+#    a header value is lower-cased the first time it is looked up--headers that are never looked up are never copied
+#    supports:  name in view,  view[name],  view.get(name, default)
+class RfRequestHeadersLower():
+    def __init__(self, headers):
+        self.headers=headers
+        self.values=dict()
+
+    def get(self, name, default=None):
+        key=name.lower()
+        if key in self.values:
+            value=self.values[key]
+        else:
+            value=self.headers.get(name)    # the Flask request headers lookup is case-insensitive
+            if value is not None:
+                value=value.lower()
+            self.values[key]=value
+        if value is None:
+            return(default)
+        return(value)
+
+    def __contains__(self, name):
+        return(self.get(name) is not None)
+
+    def __getitem__(self, name):
+        value=self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return(value)
+
+# get the lower-cased request headers view for the current request
+#   it is created once per request and kept in the request context (flask.g), so rfcheckHeaders and the URI handlers
+#   share it
+def rfRequestHeadersLower(request):
+    headersLower=g.get("rfRequestHeadersLower")
+    if headersLower is None:
+        headersLower=RfRequestHeadersLower(request.headers)
+        g.rfRequestHeadersLower=headersLower
+    return(headersLower)
+
+
+# the Accept and Content-Type checks done by rfcheckHeaders
+#   clients send the same few header values over and over, so the results are kept in a bounded LRU cache
+#   the values passed in are lower-cased
+acceptableAcceptHeaderValues = { "json": ["application/json", "*/*", "application/*"],
+                                 "xml":  ["application/xml", "*/*", "application/*"] }
+
+@lru_cache(maxsize=256)
+def rfAcceptable(contentType, acceptValue):
+    # note that headers['accept'] may have multiple values like: "application/*;charset=utf-8"
+    for val in acceptableAcceptHeaderValues[contentType]:
+        if val in acceptValue:
+            return(True)
+    return(False)
+
+@lru_cache(maxsize=256)
+def rfContentTypeOk(contentTypeValue):
+    return( any(x in contentTypeValue for x in ('charset=utf-8', 'application/json')) )
+
+
 def rfcheckHeaders(*o_args, **o_kwargs):
     
     def header_processor(fn):
@@ -46,8 +107,8 @@ def rfcheckHeaders(*o_args, **o_kwargs):
                 contentType="json"
             #print("EEEEEEEEEEEE: contentType: {}".format(contentType))
 
-            # convert request headers (keys and values) to lower-case for comparisons
-            requestHeadersLower = {k.lower() : v.lower() for k,v in request.headers.items()}
+            # case-insensitive view of the request headers with lower-case values, for comparisons
+            requestHeadersLower = rfRequestHeadersLower(request)
             
             # check that the host header was sent:
             if 'host' not in requestHeadersLower:
@@ -55,33 +116,20 @@ def rfcheckHeaders(*o_args, **o_kwargs):
 
             # Checks for rest of URI contains 'application/json' in 'Accept' header or not 
             if contentType=="json":
-                acceptable=False
-                acceptableAcceptHeaderValuesForJson= ["application/json", "*/*", "application/*"]
                 if ('accept' in requestHeadersLower):
-                    # note that headers['accept'] may have multiple values like: "application/*;charset=utf-8"
-                    for val in acceptableAcceptHeaderValuesForJson:
-                        if val in requestHeadersLower["accept"]:
-                            acceptable=True
-                            break
-                    if acceptable is False:
+                    if rfAcceptable("json", requestHeadersLower["accept"]) is False:
                         return errorNotAcceptable("application/json")
 
             if contentType=="xml":
-                acceptable=False
-                acceptableAcceptHeaderValuesForXml = ["application/xml", "*/*", "application/*"]
                 if 'accept' in requestHeadersLower:
-                    for val in acceptableAcceptHeaderValuesForXml:
-                        if val in requestHeadersLower["accept"]:
-                            acceptable=True
-                            break
-                    if acceptable is False:
+                    if rfAcceptable("xml", requestHeadersLower["accept"]) is False:
                         return errorNotAcceptable("application/xml")
 
 
             # Checks for methods of PATCH and POST if "Content-Type" in header contains 'charset=utf-8', 'application/json' 
             # or not
             if any(x in request.method for x in ('PATCH', 'POST'))  and ('content-type' in requestHeadersLower):
-                if not ( any(x in requestHeadersLower['content-type']  for x in ('charset=utf-8', 'application/json') ) ) :
+                if not rfContentTypeOk(requestHeadersLower['content-type']):
                     return errorContentType()
 
             # Checks that if OData-Version if present, the version must be  4.0 or higher
@@ -96,14 +144,86 @@ def rfcheckHeaders(*o_args, **o_kwargs):
 
 
 
+# check the If-None-Match request header against the strong ETag of a resource (etag is without quotes)
+#   returns True if it matches--the response should be 304 Not Modified
+#   If-None-Match uses the weak comparison, so W/"<etag>" matches too
+def rfIfNoneMatch(request, etag):
+    ifNoneMatch=request.headers.get("If-None-Match")
+    if ifNoneMatch is None:
+        return(False)
+    quotedEtag='"' + etag + '"'
+    for tag in ifNoneMatch.split(","):
+        tag=tag.strip()
+        if tag.startswith("W/"):
+            tag=tag[2:]
+        if (tag == "*") or (tag == quotedEtag):
+            return(True)
+    return(False)
+
+# check the If-Match request header of a PATCH or DELETE against the strong ETag of a resource (etag is without quotes)
+#   returns True if the request can proceed: there is no If-Match header, it is "*", or it lists the ETag
+#   returns False if the response should be 412 Precondition Failed
+#   If-Match uses the strong comparison, so W/"<etag>" never matches
+def rfIfMatch(request, etag):
+    ifMatch=request.headers.get("If-Match")
+    if ifMatch is None:
+        return(True)
+    quotedEtag='"' + etag + '"'
+    for tag in ifMatch.split(","):
+        tag=tag.strip()
+        if (tag == "*") or (tag == quotedEtag):
+            return(True)
+    return(False)
+
+
 class RfAddHeaders():
     def __init__(self, rdr):
         self.rdr = rdr
         self.rfutils = RedfishUtils()
+        self.linkHeaders = dict()     # memoized Link header value for each @odata.type.  None if it gets no Link header
+        self.allowHeaders = dict()    # memoized Allow header value for each allow spec
+        self.updateStaticHeaders()
+
+    # precompute the headers that are the same on every response from the settings in rootData / RedDrum.conf:
+    #    OData-Version, Server, Cache-Control, Access-Control-Allow-Origin
+    #    RfAddHeaders objects are created after RedDrum.conf is read.  call this again if the settings are changed
+    def updateStaticHeaders(self):
+        staticHdrs=dict()
+
+        # add Odata-Version
+        odataVersion=True
+        if odataVersion is True:
+            staticHdrs['OData-Version'] = '4.0'
+
+        # add Server header:   supports customizing the Server header based on RedDrum.conf
+        if self.rdr.HttpHeaderServer is not None:
+            staticHdrs['Server'] = self.rdr.HttpHeaderServer
+        else:
+            pass # let Apache fill-in the Server header 
+
+        # add Cache-Control:  indicates if a response can be cached.   
+        if self.rdr.HttpHeaderCacheControl is not None:
+            staticHdrs['Cache-Control'] = self.rdr.HttpHeaderCacheControl
+        else:
+            pass  # use default Apache behavior
+
+        # add Access-Control-Allow-Origin:  return Access Control Allow Origin
+        #   if it is FromOrigin, it is copied from the request Origin header by rfRespHeaders()
+        self.originFromRequest=False
+        if self.rdr.HttpHeaderAccessControlAllowOrigin is not None:
+            if self.rdr.HttpHeaderAccessControlAllowOrigin == "FromOrigin":
+                self.originFromRequest=True
+            else:
+                staticHdrs['Access-Control-Allow-Origin'] = self.rdr.HttpHeaderAccessControlAllowOrigin 
+        else:
+            pass  # don't create this header--use default Apache behavior 
+
+        self.staticHdrs=staticHdrs
+        return(0)
 
     # creates headers:   
     #    OData-Version, Server, Cache-Control, Access-Control-Allow-Origin -- are returned on all responses
-    #           and are driven by settings in rootData / RedDrum.conf
+    #           and are driven by settings in rootData / RedDrum.conf.  (precomputed by updateStaticHeaders)
     #    Content-Type -- added if <contentType> is not None. 
     #                    <contentType> is oneOf: None(dflt). "json", "xml", "raw"
     #                    if "json" content-type="application/json;metadata=minimal;charset=utf-8"
@@ -126,39 +246,14 @@ class RfAddHeaders():
     #                    If BOTH a strongEtag and etag are sent, the strongEtag will be generated
     def rfRespHeaders(self, request, contentType=None, resource=None, allow=None, location=None, xauthtoken=None, 
                       strongEtag=None, etag=None):
-        hdrs=dict()
-
-        # add Odata-Version
-        odataVersion=True
-        if odataVersion is True:
-            hdrs['OData-Version'] = '4.0'
-
-        # add Server header:   supports customizing the Server header based on RedDrum.conf
-        if self.rdr.HttpHeaderServer is not None:
-            hdrs['Server'] = self.rdr.HttpHeaderServer
-        else:
-            pass # let Apache fill-in the Server header 
-
-
-        # add Cache-Control:  indicates if a response can be cached.   
-        if self.rdr.HttpHeaderCacheControl is not None:
-            hdrs['Cache-Control'] = self.rdr.HttpHeaderCacheControl
-        else:
-            pass  # use default Apache behavior
-
-
-        # add Access-Control-Allow-Origin:  return Access Control Allow Origin
-        if self.rdr.HttpHeaderAccessControlAllowOrigin is not None:
-            if self.rdr.HttpHeaderAccessControlAllowOrigin == "FromOrigin":
-                requestHeadersLower = {k.lower() : v for k,v in request.headers.items()}
-                if 'origin' in requestHeadersLower:
-                    hdrs['Access-Control-Allow-Origin'] = requestHeadersLower['origin']
-            else:
-                hdrs['Access-Control-Allow-Origin'] = self.rdr.HttpHeaderAccessControlAllowOrigin 
-        else:
-            pass  # don't create this header--use default Apache behavior 
-
+        hdrs=dict(self.staticHdrs)
 
+        # add Access-Control-Allow-Origin from the request Origin header
+        #   request is None when the headers of a cached response are built.  RfCachedResponse adds it to each response
+        if (self.originFromRequest is True) and (request is not None):
+            origin=request.headers.get('Origin')
+            if origin is not None:
+                hdrs['Access-Control-Allow-Origin'] = origin
 
         # add ContentType
         if contentType is not None:
@@ -179,39 +274,12 @@ class RfAddHeaders():
 
         # add Allow:   return Allow header from list of Allow headers passed in
         if allow is not None:
-            if allow=="Get":
-                allowList=["GET","HEAD"]
-            elif allow=="GetPatch":
-                allowList=["GET","HEAD","PATCH"]
-            else:
-                allowList=allow
-            hdrs['Allow'] = allowList
+            hdrs['Allow'] = self.allowHeader(allow)
 
         # return Link header pointing to the resource
         #  if resourceTemplate is None(the default), don't include the link header
         if resource is not None:
-            linkHeader=None
-            # parse the odata.type into namespace, version, resourctType.  note that collections don't have a version
-            rc,namespace,version,resourceType = self.rfutils.parseOdataType(resource)
-            if rc==0:
-                if version is None:
-                    versionedNamespace = namespace + ".json"
-                else:
-                    versionedNamespace = namespace + "." + version + ".json"
-
-                #if (self.rdr.includeLocalJsonSchemas is True) and (self.rdr.useLocalJsonSchemasInLinkHeader is True):
-                x=True
-                if x is True:
-                    # set Link header to point to local jsonSchema uri
-                    linkHeader= "</redfish/v1/schemas/" + versionedNamespace + ">;rel=describedby"
-                else:
-                    # set Link header to point to dmtf hosted jsonSchema uri
-                    linkHeader= "<http://redfish.dmtf.org/schemas/v1/" + versionedNamespace + ">;rel=describedby"
-            else:
-                # there was no @odata.type in the resource, so don't add a Link header
-                #   this will be the case for odata, metadata, redDrumInfo, etc
-                pass
-
+            linkHeader=self.linkHeader(resource)
             if linkHeader is not None:
                 hdrs['Link'] = linkHeader
 
@@ -234,4 +302,54 @@ class RfAddHeaders():
         # return the hdrs dict back
         return(hdrs)
 
+    # get the Allow header value for an allow spec.  memoized per allow spec
+    #   the value is a tuple, since the memoized value is shared by all responses
+    def allowHeader(self, allow):
+        allowKey = tuple(allow) if isinstance(allow, list) else allow
+        allowMethods = self.allowHeaders.get(allowKey)
+        if allowMethods is None:
+            if allow=="Get":
+                allowMethods=("GET","HEAD")
+            elif allow=="GetPatch":
+                allowMethods=("GET","HEAD","PATCH")
+            else:
+                allowMethods=tuple(allow)
+            self.allowHeaders[allowKey]=allowMethods
+        return(allowMethods)
+
+    # get the Link header value for a resource from its @odata.type.  returns None if it gets no Link header
+    #   memoized per @odata.type, so the odata.type is only parsed the first time it is seen
+    def linkHeader(self, resource):
+        if not isinstance(resource, dict):
+            # eg the $metadata xml document
+            return(None)
+        odataType=resource.get("@odata.type")
+        if odataType in self.linkHeaders:
+            return(self.linkHeaders[odataType])
+
+        linkHeader=None
+        # parse the odata.type into namespace, version, resourctType.  note that collections don't have a version
+        rc,namespace,version,resourceType = self.rfutils.parseOdataType(resource)
+        if rc==0:
+            if version is None:
+                versionedNamespace = namespace + ".json"
+            else:
+                versionedNamespace = namespace + "." + version + ".json"
+
+            #if (self.rdr.includeLocalJsonSchemas is True) and (self.rdr.useLocalJsonSchemasInLinkHeader is True):
+            x=True
+            if x is True:
+                # set Link header to point to local jsonSchema uri
+                linkHeader= "</redfish/v1/schemas/" + versionedNamespace + ">;rel=describedby"
+            else:
+                # set Link header to point to dmtf hosted jsonSchema uri
+                linkHeader= "<http://redfish.dmtf.org/schemas/v1/" + versionedNamespace + ">;rel=describedby"
+        else:
+            # there was no @odata.type in the resource, so don't add a Link header
+            #   this will be the case for odata, metadata, redDrumInfo, etc
+            pass
+
+        self.linkHeaders[odataType]=linkHeader
+        return(linkHeader)
+
 
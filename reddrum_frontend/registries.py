@@ -8,6 +8,7 @@ import json
 import sys
 from .redfishUtils import RedfishUtils
 from .redfish_headers  import RfAddHeaders
+from .collectionView import RfCollectionView
 
 class RfRegistries():
     def __init__(self,rdr):
@@ -20,32 +21,36 @@ class RfRegistries():
 
     def loadResourceTemplates( self ):
         #load Registries Collection Template
-        indxFilePath=os.path.join(self.rdr.baseDataPath,"templates", "MessageRegistryFileCollection.json")
-        if os.path.isfile(indxFilePath):
-            self.registryFileCollectionTemplate=json.loads( open(indxFilePath,"r").read() )
-        else:
+        self.registryFileCollectionTemplate=self.rdr.baseData.readJson("templates", "MessageRegistryFileCollection.json")
+        if self.registryFileCollectionTemplate is None:
+            indxFilePath=os.path.join(self.rdr.baseDataPath,"templates", "MessageRegistryFileCollection.json")
             self.rdr.logMsg("CRITICAL","*****ERROR: Registries Resource: Json Data file:{} Does not exist. Exiting.".format(indxFilePath))
             sys.exit(10)
 
         #load Registries Entry Template
-        indxFilePath=os.path.join(self.rdr.baseDataPath,"templates", "MessageRegistryFile.json")
-        if os.path.isfile(indxFilePath):
-            self.registryFileEntryTemplate=json.loads( open(indxFilePath,"r").read() )
-        else:
+        self.registryFileEntryTemplate=self.rdr.baseData.readJson("templates", "MessageRegistryFile.json")
+        if self.registryFileEntryTemplate is None:
+            indxFilePath=os.path.join(self.rdr.baseDataPath,"templates", "MessageRegistryFile.json")
             self.rdr.logMsg("CRITICAL","*****ERROR: Registries Resource: Json Data file:{} Does not exist. Exiting".format(indxFilePath))
             sys.exit(10)
 
 
     # generate a Registries Database dict with all data needed for Link headers, GET Registries Collection, and GET Registry File
+    #   the registriesDb is kept in the base data snapshot, so the registry files are only parsed if one of them changed
     def loadRegistriesCollectionResource(self):
-        self.registriesDb=dict()
-        dirPath = os.path.join(self.rdr.baseDataPath,"registries")
-        for filename in os.listdir(dirPath):
+        self.registriesDb=self.rdr.baseData.getIndex("registriesDb", self.buildRegistriesDb)
+        # the collection Members array and its json response are built once, since the registriesDb does not change
+        self.registriesView=RfCollectionView(self.rdr, self.registryFileCollectionTemplate, "/redfish/v1/Registries/",
+                                             self.registriesDb)
+        return(0)
+
+    def buildRegistriesDb(self):
+        registriesDb=dict()
+        for filename in self.rdr.baseData.listFiles("registries"):
             registryError = False
             baseFilename, extension = os.path.splitext(filename)
             if extension == ".json":
-                filePath = os.path.join( dirPath, filename)
-                templateDict = json.loads( open(filePath, "r").read() )
+                templateDict = self.rdr.baseData.readJson("registries", filename)
                 #rc,namespace, version, resourceType = self.rfutils.parseOdataType(templateDict)
                 requiredProperties = ["RegistryPrefix","RegistryVersion","Name","Description"]
                 for prop in requiredProperties:
@@ -58,13 +63,13 @@ class RfRegistries():
                 regPrefix  = templateDict["RegistryPrefix"]
                 regVersion = templateDict["RegistryVersion"]
                 regId = regPrefix + "." + regVersion
-                self.registriesDb[regId] = {}
-                self.registriesDb[regId]["RegistryVersion"] = regVersion
-                self.registriesDb[regId]["RegistryPrefix"] =  regPrefix
-                self.registriesDb[regId]["Name"] = templateDict["Name"]
-                self.registriesDb[regId]["Description"] = templateDict["Description"]
-                self.registriesDb[regId]["Registry"] = templateDict["Registry"]
-        return(0)
+                registriesDb[regId] = {}
+                registriesDb[regId]["RegistryVersion"] = regVersion
+                registriesDb[regId]["RegistryPrefix"] =  regPrefix
+                registriesDb[regId]["Name"] = templateDict["Name"]
+                registriesDb[regId]["Description"] = templateDict["Description"]
+                registriesDb[regId]["Registry"] = templateDict["Registry"]
+        return(registriesDb)
 
 
     # GET Registries Collection
@@ -76,28 +81,9 @@ class RfRegistries():
         if request.method=="HEAD":
             return(0,200,"","",hdrs)
 
-        responseData2 = dict(self.registryFileCollectionTemplate)
-        count=0
-        # now walk through the entries in the jsonSchemas and build the chassisCollection Members array
-        # note that the members array is an empty array in the template
-        uriBase="/redfish/v1/Registries/"
-        for regId in self.registriesDb:
-            # increment members count, and create the member for the next entry
-            count=count+1
-
-            memberUri = uriBase + regId
-            newMember=[{"@odata.id": memberUri}]
-
-            # add the new member to the members array we are building
-            responseData2["Members"] = responseData2["Members"] + newMember
-
-        # update the members count
-        responseData2["Members@odata.count"]=count
-
-        # convert to json
-        jsonRespData2=(json.dumps(responseData2,indent=4))
-
-        return(0, 200, "", jsonRespData2, hdrs)
+        # the registriesView has a Members entry for each registriesDb entry, and caches the json response
+        #   it returns the page of the collection if the request has $skip or $top
+        return(self.registriesView.getResponse(request, hdrs))
 
 
 
@@ -147,7 +133,7 @@ class RfRegistries():
         responseData2["Location"].append( locationEntry )
 
         # convert to json
-        jsonRespData2=(json.dumps(responseData2,indent=4))
+        jsonRespData2=(self.rdr.jsonSerializer.dumps(responseData2))
 
         return(0, 200,"", jsonRespData2, hdrs)
 
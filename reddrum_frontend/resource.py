@@ -6,7 +6,8 @@
 import os
 import json
 import sys
-from .redfish_headers import RfAddHeaders
+import hashlib
+from .redfish_headers import RfAddHeaders, rfIfNoneMatch
 
 # RfStaticResource( rfr, flag, filePath, dataFile, contentType="json")
 #    flag= string to indicate where to get initial data (baseData or varData, etc)
@@ -27,13 +28,21 @@ class RfStaticResource():
             rfr.logMsg("CRITICAL","****resource.py: Internal error, invalid flag given to init method: {}. Exiting".format(flag))
             sys.exit(9)
 
-        if os.path.isfile(indxFilePath):
+        # the base data files are read from the base data snapshot (see baseDataSnapshot.py)
+        if( flag == "base" ):
+            if( self.contentType=="json"):
+                self.resData=rfr.baseData.readJson(filePath, dataFile)
+            else:
+                self.resData=rfr.baseData.readText(filePath, dataFile)
+        elif os.path.isfile(indxFilePath):
             # load data into dict
             if( self.contentType=="json"):
                 self.resData=json.loads( open(indxFilePath,"r").read() )
             else:
                 self.resData=( open(indxFilePath,"r").read())
         else:
+            self.resData=None
+        if self.resData is None:
             rfr.logMsg("CRITICAL","****resource.py: Json Data file:{} Does not exist. Exiting.".format(indxFilePath))
             sys.exit(10)
 
@@ -46,16 +55,67 @@ class RfStaticResource():
 
     def finalInitProcessing(self, rfr, flag):
         self.hdrs=RfAddHeaders(rfr)
+        self.cachedResponse=None
+
+    # the resource data does not change, so the response is serialized on the first GET and reused
+    #   call updateResponseCache() if self.resData is modified
+    def updateResponseCache(self):
+        self.cachedResponse=RfCachedResponse(self.hdrs, self.resData, contentType=self.contentType)
+        return(0)
 
     def getResource(self,request):
-        hdrs = self.hdrs.rfRespHeaders(request,contentType=self.contentType,resource=self.resData,allow="Get")
-        if request.method=="HEAD":
-            return(0,200,"","",hdrs)
-        if self.contentType=="json":
-            response=json.dumps(self.resData,indent=4)
+        if self.cachedResponse is None:
+            self.updateResponseCache()
+        return(self.cachedResponse.getResponse(request))
+
+
+# RfCachedResponse(hdrs, resData, contentType="json", allow="Get")
+#    the GET response of a resource whose data does not change:
+#       the response data serialized once as utf-8 bytes, a strong ETag computed from it, and the response headers
+#    hdrs = the RfAddHeaders object of the resource
+#    getResponse(request) returns the usual rc,statusCode,errString,resp,hdrs tuple:
+#       304 if the request If-None-Match header matches the ETag.  HEAD returns the data too, and Flask drops it, so 
+#       the Content-Length of a HEAD response is the length of the GET response
+#    if the client accepts gzip (or br), the data is compressed once per encoding and the compressed bytes are reused
+#       self.encodedResps[encoding]=compressed data.  the compressed response has a weak ETag (see responseCompression.py)
+class RfCachedResponse():
+    def __init__(self, hdrs, resData, contentType="json", allow="Get"):
+        if contentType=="json":
+            self.resp=hdrs.rdr.jsonSerializer.dumps(resData).encode("utf-8")
         else:
-            response=self.resData
-        return(0,200,"",response,hdrs)
+            self.resp=resData.encode("utf-8")
+        self.etag=hashlib.sha256(self.resp).hexdigest()[0:32]
+
+        # the headers don't depend on the request--except Access-Control-Allow-Origin if it is set to FromOrigin
+        self.addOriginHdr = (hdrs.rdr.HttpHeaderAccessControlAllowOrigin == "FromOrigin")
+        self.hdrs=hdrs.rfRespHeaders(None, contentType=contentType, resource=resData, allow=allow, strongEtag=self.etag)
+        self.hdrs['Content-Length']=str(len(self.resp))
+        self.compressor=hdrs.rdr.responseCompressor
+        self.encodedResps=dict()
+
+    def getResponse(self, request):
+        hdrs=dict(self.hdrs)
+        if self.addOriginHdr is True:
+            origin=request.headers.get("Origin")
+            if origin is not None:
+                hdrs['Access-Control-Allow-Origin'] = origin
+        resp=self.resp
+        if self.compressor.rdr.responseCompression is True:
+            hdrs['Vary']='Accept-Encoding'
+            encoding=self.compressor.negotiate(request)
+            if (encoding is not None) and (len(self.resp) >= self.compressor.rdr.responseCompressionMinSize):
+                resp=self.encodedResps.get(encoding)
+                if resp is None:
+                    resp=self.compressor.compress(self.resp, encoding, precompress=True)
+                    self.encodedResps[encoding]=resp
+                hdrs['Content-Encoding']=encoding
+                hdrs['Content-Length']=str(len(resp))
+                hdrs['ETag']=self.compressor.weakenEtag(hdrs['ETag'])
+        if rfIfNoneMatch(request, self.etag) is True:
+            del hdrs['Content-Length']
+            hdrs.pop('Content-Encoding', None)
+            return(0,304,"","",hdrs)
+        return(0,200,"",resp,hdrs)
 
 
 
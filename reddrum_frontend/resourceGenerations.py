@@ -0,0 +1,85 @@
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+import os
+import threading
+
+# RfResourceGenerations()
+#    generation numbers of the Frontend-owned resources, used to send strong ETags without hashing the resource data
+#    self.generations[uri]=generation.   a resource that has not been modified since the service started has generation 0
+#    the URI handlers call bump(uri, ...) when they modify a resource--and its collection if a member is added or removed
+#      bump() sets the generation of each uri to the next value of one service-wide counter, so a generation number
+#      is never reused, even by a resource that is deleted and then created again with the same uri
+#    etag(uri) returns "<bootId>-<generation>" (without quotes).  the bootId is random and set when the service starts,
+#      so an ETag a client got before a restart never matches an ETag sent after it
+#
+#    with DatabaseEngine=sqlite, the server workers share the databases but each one has its own counter, so the
+#      generation of a resource stored in a database is the sqlite Seq of its last change instead (see persistentDb.py).
+#      all workers send the same ETag for it:  setDbSource(uri, db, members) registers the database of a uri
+#        uri          -- a resource stored in the db (eg AccountService) or a collection:  the Seq of the last db change
+#        uri/<key>    -- if members is True, a member stored in the db with <key>:  the Seq of the last change of key
+#      some resources also have data kept in each worker (eg the Locked state of an account).  the URI handlers call
+#        bumpLocal(uri) when they change it:  the ETag then also has "<pid>.<counter>", unique to this worker
+#      the etag is "<bootId>-s<seq>" or "<bootId>-s<seq>-<pid>.<counter>".  the workers are forked from the service,
+#        so they have the same bootId
+class RfResourceGenerations():
+    def __init__(self):
+        self.bootId=os.urandom(4).hex()
+        self.counter=0
+        self.generations=dict()
+        self.localGenerations=dict()
+        self.dbSources=dict()
+        self.dbMemberSources=dict()
+        self.lock=threading.Lock()
+
+    def bump(self, *uris):
+        with self.lock:
+            self.counter+=1
+            for uri in uris:
+                self.generations[uri]=self.counter
+        return(0)
+
+    # a change of data kept in this worker process
+    def bumpLocal(self, *uris):
+        with self.lock:
+            self.counter+=1
+            for uri in uris:
+                self.generations[uri]=self.counter
+                self.localGenerations[uri]="{}.{}".format(os.getpid(), self.counter)
+        return(0)
+
+    # drop the generation of a deleted resource
+    def remove(self, uri):
+        with self.lock:
+            self.generations.pop(uri, None)
+            self.localGenerations.pop(uri, None)
+        return(0)
+
+    # register the database of a resource or collection.  called again when the database is cleared (a new db)
+    def setDbSource(self, uri, db, members=False):
+        with self.lock:
+            self.dbSources[uri]=db
+            if members is True:
+                self.dbMemberSources[uri]=db
+        return(0)
+
+    # the Seq of the last change of a resource stored in a database,  or None if it isn't (or the engine is json)
+    def dbSeq(self, uri):
+        db=self.dbSources.get(uri)
+        if db is not None:
+            return(db.seq)
+        collectionUri,sep,key=uri.rpartition("/")
+        db=self.dbMemberSources.get(collectionUri)
+        if (db is not None) and (db.keySeq is not None):
+            return(db.keySeq.get(key, 0))
+        return(None)
+
+    def etag(self, uri):
+        seq=self.dbSeq(uri)
+        if seq is None:
+            return(self.bootId + "-" + str(self.generations.get(uri, 0)))
+        localGeneration=self.localGenerations.get(uri)
+        if localGeneration is None:
+            return(self.bootId + "-s" + str(seq))
+        return(self.bootId + "-s" + str(seq) + "-" + localGeneration)
@@ -0,0 +1,172 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+import os
+import gzip
+import zlib
+import threading
+import mimetypes
+from functools import lru_cache
+from flask import Response, send_from_directory
+from werkzeug.security import safe_join
+# brotli is optional.  if it is installed, "br" is offered as well as gzip
+try:
+    import brotli
+except ImportError:
+    brotli=None
+
+# the response Content-Types that are compressed
+compressibleMimetypes=("application/json", "application/xml", "application/schema+json", "text/xml", "text/plain")
+
+# choose the response Content-Encoding from a lower-cased Accept-Encoding request header value
+#   returns "br", "gzip", or None (no compression).  br is preferred over gzip if the client gives them the same q value
+#   clients send the same few values over and over, so the results are kept in a bounded LRU cache
+@lru_cache(maxsize=256)
+def rfNegotiateContentEncoding(acceptEncoding, brotliAvailable):
+    qValues=dict()
+    for coding in acceptEncoding.split(","):
+        params=coding.split(";")
+        codingName=params[0].strip()
+        q=1.0
+        for param in params[1:]:
+            param=param.strip()
+            if param.startswith("q="):
+                try:
+                    q=float(param[2:])
+                except ValueError:
+                    q=0.0
+        qValues[codingName]=q
+    supported=("br","gzip") if brotliAvailable is True else ("gzip",)
+    bestCoding=None
+    bestQ=0.0
+    for codingName in supported:
+        q=qValues.get(codingName, qValues.get("*", 0.0))
+        if q > bestQ:
+            bestCoding=codingName
+            bestQ=q
+    return(bestCoding)
+
+
+# RfResponseCompressor(rdr)
+#    compresses /redfish responses for clients that send Accept-Encoding: gzip (or br if brotli is installed)
+#    the settings are read from rootData / RedDrum.conf:
+#       ResponseCompression        -- true to enable compression
+#       ResponseCompressionMinSize -- responses smaller than this many bytes are not compressed
+#       ResponseCompressionLevel   -- gzip level (1-9) used for dynamic responses
+#    responses that never change are compressed once and the compressed bytes are reused:
+#       - RfCachedResponse (service root, $metadata, odata, ...) keeps its compressed variants, see resource.py
+#       - schema and registry files are compressed at max level on first access, and again only if the file changes
+#    other responses are compressed per request by compressResponse() (called after every request)
+#    a compressed response has its strong ETag changed to a weak ETag, since the bytes differ from the uncompressed response
+class RfResponseCompressor():
+    def __init__(self, rdr):
+        self.rdr=rdr
+        self.brotliAvailable = (brotli is not None)
+        # precompressed static files:  self.fileCache[(filePath,encoding)]=(mtime, size, compressedBytes)
+        self.fileCache=dict()
+        self.fileCacheLock=threading.Lock()
+
+    # get the Content-Encoding to use for the response to this request, or None to not compress it
+    def negotiate(self, request):
+        if self.rdr.responseCompression is not True:
+            return(None)
+        acceptEncoding=request.headers.get("Accept-Encoding")
+        if not acceptEncoding:
+            return(None)
+        return(rfNegotiateContentEncoding(acceptEncoding.lower(), self.brotliAvailable))
+
+    # compress data.  precompress=True uses the max level: for data that is compressed once and reused
+    def compress(self, data, encoding, precompress=False):
+        if encoding == "br":
+            return(brotli.compress(data, quality=11 if precompress is True else 4))
+        return(gzip.compress(data, compresslevel=9 if precompress is True else self.rdr.responseCompressionLevel, mtime=0))
+
+    # change a strong ETag header to a weak ETag
+    def weakenEtag(self, etag):
+        if etag is not None and etag.startswith('"'):
+            return('W/' + etag)
+        return(etag)
+
+    # compress a stream of str or bytes chunks as it is sent.  yields the compressed bytes
+    def compressStream(self, chunks, encoding):
+        if encoding == "br":
+            compressor=brotli.Compressor(quality=4)
+            compressChunk,finish=compressor.process,compressor.finish
+        else:
+            compressor=zlib.compressobj(self.rdr.responseCompressionLevel, zlib.DEFLATED, 31)
+            compressChunk,finish=compressor.compress,compressor.flush
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk=chunk.encode("utf-8")
+                data=compressChunk(chunk)
+                if data:
+                    yield(data)
+            yield(finish())
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    # compress a Flask response if the client accepts it and it is large enough
+    #   responses that are already encoded (RfCachedResponse variants, static files) are left alone
+    #   streamed responses ($expand collections) are compressed as they are sent, whatever their size
+    def compressResponse(self, request, response):
+        if self.rdr.responseCompression is not True:
+            return(response)
+        if response.direct_passthrough or ("Content-Encoding" in response.headers):
+            return(response)
+        if (response.status_code not in (200, 201)) or (response.mimetype not in compressibleMimetypes):
+            return(response)
+        response.vary.add("Accept-Encoding")
+        if request.method == "HEAD":
+            return(response)
+        encoding=self.negotiate(request)
+        if encoding is None:
+            return(response)
+        if response.is_streamed:
+            response.response=self.compressStream(response.response, encoding)
+            response.headers["Content-Encoding"]=encoding
+            return(response)
+        data=response.get_data()
+        if len(data) < self.rdr.responseCompressionMinSize:
+            return(response)
+        response.set_data(self.compress(data, encoding))
+        response.headers["Content-Encoding"]=encoding
+        if "ETag" in response.headers:
+            response.headers["ETag"]=self.weakenEtag(response.headers["ETag"])
+        return(response)
+
+    # send a file from a static directory (schema and registry files), compressed if the client accepts it
+    #   the compressed bytes are cached, and rebuilt if the file mtime or size changes
+    def sendStaticFile(self, request, dirPath, filename):
+        encoding=self.negotiate(request)
+        filePath=safe_join(dirPath, filename)
+        if (encoding is None) or (filePath is None) or (not os.path.isfile(filePath)):
+            response=send_from_directory(dirPath, filename, etag=False)
+            if self.rdr.responseCompression is True:
+                response.vary.add("Accept-Encoding")
+            return(response)
+        fileStat=os.stat(filePath)
+        if fileStat.st_size < self.rdr.responseCompressionMinSize:
+            response=send_from_directory(dirPath, filename, etag=False)
+            response.vary.add("Accept-Encoding")
+            return(response)
+
+        cacheKey=(filePath, encoding)
+        with self.fileCacheLock:
+            cacheEntry=self.fileCache.get(cacheKey)
+        if (cacheEntry is None) or (cacheEntry[0] != fileStat.st_mtime_ns) or (cacheEntry[1] != fileStat.st_size):
+            with open(filePath, "rb") as f:
+                compressedData=self.compress(f.read(), encoding, precompress=True)
+            cacheEntry=(fileStat.st_mtime_ns, fileStat.st_size, compressedData)
+            with self.fileCacheLock:
+                self.fileCache[cacheKey]=cacheEntry
+
+        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response=Response(cacheEntry[2], mimetype=mimetype)
+        response.headers["Content-Encoding"]=encoding
+        response.vary.add("Accept-Encoding")
+        return(response)
+
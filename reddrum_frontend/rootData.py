@@ -6,6 +6,10 @@
 import sys
 import os
 import configparser
+from .jsonSerializer import RfJsonSerializer
+from .responseCompression import RfResponseCompressor
+from .resourceGenerations import RfResourceGenerations
+from .baseDataSnapshot import RfBaseDataSnapshot
 
 # global data structure class for RedDrum Redfish Service
 class RdRootData():
@@ -21,6 +25,8 @@ class RdRootData():
         self.rdVersion="0.9.5"
         self.rdLogger=None
         self.printLogMsgs=False
+        self.debug=False                 # set by the -D option.  prints debug messages and the RedDrum.conf props
+        self.startupProfiler=None        # set by the --ProfileStartup option.  see RdStartupProfiler in redDrumMain.py
 
         # RedDrum.conf  ['Server Section' ] properties
         #   if these are set to None, the default Apache behavior is implemented which  may be no header or Apache generates it
@@ -52,6 +58,49 @@ class RdRootData():
         self.RedfishAllowSessionLoginOverHttp = True
         self.RedfishAllowUserCredUpdateOverHttp = True
 
+        self.credentialCacheTimeout = 60             # CredentialCacheTimeout: secs a verified Basic auth credential is cached
+                                                     #   set to 0 to disable the verified-credential cache
+        self.credentialCacheMaxEntries = 1024        # CredentialCacheMaxEntries: max number of cached credentials
+        self.passwordHashWorkers = 2                 # PasswordHashWorkers: number of password hashing processes
+                                                     #   set to 0 to hash passwords inline in the request thread
+        self.passwordHashMaxQueueDepth = 32          # PasswordHashMaxQueueDepth: max password hash/verify calls queued
+                                                     #   before logins get a 503.  0 is unlimited
+        self.passwordHashRetryAfter = 5              # PasswordHashRetryAfter: secs sent in Retry-After with the 503
+        self.sessionStore = "memory"                 # SessionStore: "memory", or "sqlite" to share sessions between workers
+        self.sessionTouchInterval = 5                # SessionTouchInterval: sqlite store--min secs between LastAccessTime writes
+        self.sessionCheckpointInterval = 0           # SessionCheckpointInterval: secs between checkpoints of the open sessions
+                                                     #   so they are kept across a restart.  0: sessions are not kept
+
+        self.useDevServer = False                    # UseDevServer: run on the Flask development server (app.run)
+        self.serverWorkers = 1                       # ServerWorkers: number of pre-forked server worker processes
+        self.serverThreads = 16                      # ServerThreads: number of request threads per worker
+        self.serverKeepAliveTimeout = 15             # ServerKeepAliveTimeout: secs an idle keep-alive connection is kept open
+        self.jsonOutputFormat = "pretty"             # JsonOutputFormat: "pretty" (indented) or "compact" JSON responses
+        self.responseCompression = True              # ResponseCompression: gzip (or br) responses if the client accepts it
+        self.responseCompressionMinSize = 1024       # ResponseCompressionMinSize: smaller responses are sent uncompressed
+        self.responseCompressionLevel = 6            # ResponseCompressionLevel: gzip level 1-9 for dynamic responses
+        self.collectionPageSize = 1000               # CollectionPageSize: max Members per collection GET. 0 is no limit
+        self.expandWorkers = 8                       # ExpandWorkers: threads per worker that read backend members for $expand
+        self.expandMaxLevels = 3                     # ExpandMaxLevels: max $levels of an $expand query
+        self.databaseEngine = "json"                 # DatabaseEngine: "json", or "sqlite" to share the databases between workers
+        self.journalFlushInterval = 100              # JournalFlushInterval: msecs between database journal writes
+                                                     #   0 writes and fsyncs the journal in the request
+        self.journalCompactRecords = 1000            # JournalCompactRecords: journal records before the database
+                                                     #   snapshot is rewritten
+
+        # the serializer used for all JSON responses.  it uses the jsonOutputFormat
+        self.jsonSerializer = RfJsonSerializer(self)
+        # compresses responses, and keeps the compressed static files.  it uses the responseCompression props
+        self.responseCompressor = RfResponseCompressor(self)
+        # generation numbers of the Frontend resources, used for their ETags
+        self.resourceGenerations = RfResourceGenerations()
+        # the database engine of the account, role, session service, and event databases (see persistentDb.py)
+        #   created when the first database is loaded, after RedDrum.conf is read
+        self.dbEngine = None
+        # the parsed templates, static resources, and registries of baseDataPath, kept in a snapshot file (see baseDataSnapshot.py)
+        #   the snapshot is read when the first file is read, after RedDrum.conf is read
+        self.baseData = RfBaseDataSnapshot(self)
+
         # pointers to backend and root resources
         #   these are initialized by RedDrumMain.py or equivalent
         self.root=None
@@ -172,9 +221,107 @@ class RdRootData():
         rc,self.memoryInfoCacheTimeout = self.parseConfigProp(config,'Server Section','MemoryInfoCacheTimeout',"int")
         rcsum+=rc
 
-        debug = False
-        debug = True
-        if debug is True:
+        # optional properties--if not in RedDrum.conf, the default set in __init__ is kept
+        rc,self.credentialCacheTimeout = self.parseOptionalConfigProp(config,'Auth Section','CredentialCacheTimeout',"int",
+                                                                      self.credentialCacheTimeout)
+        rcsum+=rc
+        rc,self.credentialCacheMaxEntries = self.parseOptionalConfigProp(config,'Auth Section','CredentialCacheMaxEntries',"int",
+                                                                         self.credentialCacheMaxEntries)
+        rcsum+=rc
+        rc,self.passwordHashWorkers = self.parseOptionalConfigProp(config,'Auth Section','PasswordHashWorkers',"int",
+                                                                   self.passwordHashWorkers)
+        rcsum+=rc
+        rc,self.passwordHashMaxQueueDepth = self.parseOptionalConfigProp(config,'Auth Section','PasswordHashMaxQueueDepth',"int",
+                                                                         self.passwordHashMaxQueueDepth)
+        rcsum+=rc
+        rc,self.passwordHashRetryAfter = self.parseOptionalConfigProp(config,'Auth Section','PasswordHashRetryAfter',"int",
+                                                                      self.passwordHashRetryAfter)
+        rcsum+=rc
+        rc,self.sessionStore = self.parseOptionalConfigProp(config,'Auth Section','SessionStore',"string",
+                                                            self.sessionStore)
+        rcsum+=rc
+        rc,self.sessionTouchInterval = self.parseOptionalConfigProp(config,'Auth Section','SessionTouchInterval',"int",
+                                                                    self.sessionTouchInterval)
+        rcsum+=rc
+        rc,self.sessionCheckpointInterval = self.parseOptionalConfigProp(config,'Auth Section','SessionCheckpointInterval',
+                                                                         "int", self.sessionCheckpointInterval)
+        rcsum+=rc
+        if self.sessionCheckpointInterval < 0:
+            self.logMsg("ERROR", "readRedDrumConfFile: Error parsing RedDrum.conf. prop: SessionCheckpointInterval must be >= 0")
+            self.sessionCheckpointInterval = 0
+            rcsum+=1
+        rc,self.useDevServer = self.parseOptionalConfigProp(config,'Server Section','UseDevServer',"boul",
+                                                            self.useDevServer)
+        rcsum+=rc
+        rc,self.serverWorkers = self.parseOptionalConfigProp(config,'Server Section','ServerWorkers',"int",
+                                                             self.serverWorkers)
+        rcsum+=rc
+        rc,self.serverThreads = self.parseOptionalConfigProp(config,'Server Section','ServerThreads',"int",
+                                                             self.serverThreads)
+        rcsum+=rc
+        rc,self.serverKeepAliveTimeout = self.parseOptionalConfigProp(config,'Server Section','ServerKeepAliveTimeout',"int",
+                                                                      self.serverKeepAliveTimeout)
+        rcsum+=rc
+        rc,self.jsonOutputFormat = self.parseOptionalConfigProp(config,'Server Section','JsonOutputFormat',"string",
+                                                                self.jsonOutputFormat)
+        rcsum+=rc
+        if self.jsonOutputFormat not in ("pretty","compact"):
+            self.logMsg("ERROR", "readRedDrumConfFile: Error parsing RedDrum.conf. prop: JsonOutputFormat must be pretty or compact")
+            self.jsonOutputFormat = "pretty"
+            rcsum+=1
+        rc,self.responseCompression = self.parseOptionalConfigProp(config,'Server Section','ResponseCompression',"boul",
+                                                                   self.responseCompression)
+        rcsum+=rc
+        rc,self.responseCompressionMinSize = self.parseOptionalConfigProp(config,'Server Section','ResponseCompressionMinSize',
+                                                                          "int", self.responseCompressionMinSize)
+        rcsum+=rc
+        rc,self.responseCompressionLevel = self.parseOptionalConfigProp(config,'Server Section','ResponseCompressionLevel',
+                                                                        "int", self.responseCompressionLevel)
+        rcsum+=rc
+        if self.responseCompressionLevel < 1 or self.responseCompressionLevel > 9:
+            self.logMsg("ERROR", "readRedDrumConfFile: Error parsing RedDrum.conf. prop: ResponseCompressionLevel must be 1-9")
+            self.responseCompressionLevel = 6
+            rcsum+=1
+        rc,self.collectionPageSize = self.parseOptionalConfigProp(config,'Server Section','CollectionPageSize',"int",
+                                                                  self.collectionPageSize)
+        rcsum+=rc
+        if self.collectionPageSize < 0:
+            self.logMsg("ERROR", "readRedDrumConfFile: Error parsing RedDrum.conf. prop: CollectionPageSize must be >= 0")
+            self.collectionPageSize = 1000
+            rcsum+=1
+        rc,self.expandWorkers = self.parseOptionalConfigProp(config,'Server Section','ExpandWorkers',"int",
+                                                             self.expandWorkers)
+        rcsum+=rc
+        if self.expandWorkers < 1:
+            self.logMsg("ERROR", "readRedDrumConfFile: Error parsing RedDrum.conf. prop: ExpandWorkers must be >= 1")
+            self.expandWorkers = 8
+            rcsum+=1
+        rc,self.expandMaxLevels = self.parseOptionalConfigProp(config,'Server Section','ExpandMaxLevels',"int",
+                                                               self.expandMaxLevels)
+        rcsum+=rc
+        if self.expandMaxLevels < 1:
+            self.logMsg("ERROR", "readRedDrumConfFile: Error parsing RedDrum.conf. prop: ExpandMaxLevels must be >= 1")
+            self.expandMaxLevels = 3
+            rcsum+=1
+        rc,self.databaseEngine = self.parseOptionalConfigProp(config,'Server Section','DatabaseEngine',"string",
+                                                              self.databaseEngine)
+        rcsum+=rc
+        rc,self.journalFlushInterval = self.parseOptionalConfigProp(config,'Server Section','JournalFlushInterval',"int",
+                                                                    self.journalFlushInterval)
+        rcsum+=rc
+        if self.journalFlushInterval < 0:
+            self.logMsg("ERROR", "readRedDrumConfFile: Error parsing RedDrum.conf. prop: JournalFlushInterval must be >= 0")
+            self.journalFlushInterval = 100
+            rcsum+=1
+        rc,self.journalCompactRecords = self.parseOptionalConfigProp(config,'Server Section','JournalCompactRecords',"int",
+                                                                     self.journalCompactRecords)
+        rcsum+=rc
+        if self.journalCompactRecords < 1:
+            self.logMsg("ERROR", "readRedDrumConfFile: Error parsing RedDrum.conf. prop: JournalCompactRecords must be >= 1")
+            self.journalCompactRecords = 1000
+            rcsum+=1
+
+        if self.debug is True:
             print(" DEBUG: rootData Conf file:")
             print("     HttpHeaderServer:                      {}".format( self.HttpHeaderServer ))
             print("     HttpHeaderCacheControl:                {}".format(self.HttpHeaderCacheControl ))
@@ -195,6 +342,30 @@ class RdRootData():
             print("     EthernetInterfaceInfoCacheTimeout:     {}".format(self.ethernetInterfaceInfoCacheTimeout))
             print("     MemoryInfoCacheTimeout:                {}".format(self.memoryInfoCacheTimeout))
 
+            print("     CredentialCacheTimeout:                {}".format(self.credentialCacheTimeout))
+            print("     CredentialCacheMaxEntries:             {}".format(self.credentialCacheMaxEntries))
+            print("     PasswordHashWorkers:                   {}".format(self.passwordHashWorkers))
+            print("     PasswordHashMaxQueueDepth:             {}".format(self.passwordHashMaxQueueDepth))
+            print("     PasswordHashRetryAfter:                {}".format(self.passwordHashRetryAfter))
+            print("     SessionStore:                          {}".format(self.sessionStore))
+            print("     SessionTouchInterval:                  {}".format(self.sessionTouchInterval))
+            print("     SessionCheckpointInterval:             {}".format(self.sessionCheckpointInterval))
+
+            print("     UseDevServer:                          {}".format(self.useDevServer))
+            print("     ServerWorkers:                         {}".format(self.serverWorkers))
+            print("     ServerThreads:                         {}".format(self.serverThreads))
+            print("     ServerKeepAliveTimeout:                {}".format(self.serverKeepAliveTimeout))
+            print("     JsonOutputFormat:                      {}".format(self.jsonOutputFormat))
+            print("     ResponseCompression:                   {}".format(self.responseCompression))
+            print("     ResponseCompressionMinSize:            {}".format(self.responseCompressionMinSize))
+            print("     ResponseCompressionLevel:              {}".format(self.responseCompressionLevel))
+            print("     CollectionPageSize:                    {}".format(self.collectionPageSize))
+            print("     ExpandWorkers:                         {}".format(self.expandWorkers))
+            print("     ExpandMaxLevels:                       {}".format(self.expandMaxLevels))
+            print("     DatabaseEngine:                        {}".format(self.databaseEngine))
+            print("     JournalFlushInterval:                  {}".format(self.journalFlushInterval))
+            print("     JournalCompactRecords:                 {}".format(self.journalCompactRecords))
+
         return(rcsum)
 
 
@@ -235,4 +406,12 @@ class RdRootData():
             return(1,None)
 
         return(0,rdrProp)
+
+    # parse a property that may be left out of RedDrum.conf
+    #   if the property is not in the file, returns rc=0 and the passed-in default
+    #   so that RedDrum.conf files from earlier releases still load
+    def parseOptionalConfigProp(self, config, section, prop, dtype, default):
+        if (section not in config) or (prop not in config[section]):
+            return(0,default)
+        return(self.parseConfigProp(config, section, prop, dtype))
         
@@ -7,7 +7,7 @@ import os
 import json
 import sys
 
-from  .resource         import  RfStaticResource 
+from  .resource         import  RfStaticResource, RfCachedResponse
 from  .sessionService   import RfSessionService
 from  .accountService   import RfAccountService
 from  .eventService     import RfEventService
@@ -42,10 +42,9 @@ class RfServiceRoot():
 
     def loadServiceRootDict(self,rfr):
         # load service root dict from template file
-        rootFilePath=os.path.join(rfr.baseDataPath,"templates", "ServiceRoot.json")
-        if os.path.isfile(rootFilePath):
-            self.resData=json.loads( open(rootFilePath,"r").read() )
-        else:
+        self.resData=rfr.baseData.readJson("templates", "ServiceRoot.json")
+        if self.resData is None:
+            rootFilePath=os.path.join(rfr.baseDataPath,"templates", "ServiceRoot.json")
             rfr.logMsg("CRITICAL", "*****Json Data file:{} Does not exist. Exiting.".format(rootFilePath))
             sys.exit(10)
 
@@ -158,6 +157,8 @@ class RfServiceRoot():
         self.sessionService=RfSessionService(rfr)
         self.accountService=RfAccountService(rfr)
         self.eventService=RfEventService(rfr)
+        # restore the sessions kept from the last run (SessionCheckpointInterval).  they are checked against the accounts
+        self.sessionService.restoreSessions(rfr, self.accountService)
 
         #create the JsonSchemas and Registries classes
         self.jsonSchemas = RfJsonSchemas(rfr)
@@ -172,16 +173,23 @@ class RfServiceRoot():
 
     def finalInitProcessing(self,rdr):
         self.hdrs=RfAddHeaders(rdr)
+        self.cachedResponse=None
+        # all of the base data has been read:  write the base data snapshot if it was stale, and log the startup times
+        rdr.baseData.save()
         rdr.logMsg("INFO","RedDrum Redfish Service Fronend Initialization Complete:\n{}".format(self.resData['Name']))
 
 
+    # the service root response is serialized on the first GET--after the backend has finished startup--and reused
+    #   call updateResponseCache() if self.resData is modified after that (eg the UUID)
+    def updateResponseCache(self):
+        self.cachedResponse=RfCachedResponse(self.hdrs, self.resData, contentType="json")
+        return(0)
+
     # GET service root resource
     def getResource(self, request):
-        hdrs = self.hdrs.rfRespHeaders(request, contentType="json", resource=self.resData, allow="Get")
-        if request.method=="HEAD":
-            return(0,200,"","",hdrs)
-        response=json.dumps(self.resData,indent=4)
-        return(0,200,"",response,hdrs)
+        if self.cachedResponse is None:
+            self.updateResponseCache()
+        return(self.cachedResponse.getResponse(request))
 
     class RfServiceVersions(RfStaticResource):
         pass
@@ -10,7 +10,14 @@ from .generateId import rfGenerateId
 import json
 import time
 import sys
-from  .redfish_headers import RfAddHeaders
+import hmac
+import hashlib
+import threading
+from .sessionStore import rfCreateSessionStore
+from .persistentDb import rfLoadPersistentDb
+from .collectionView import RfCollectionView, rfCollectionPagingParams, rfCollectionPage
+from  .redfish_headers import RfAddHeaders, rfIfNoneMatch, rfIfMatch
+from .authenticate import rfGetCurrentUser
 
 class RfSessionService():  
     # Note that resource was created in serviceRoot for the session service.
@@ -20,66 +27,195 @@ class RfSessionService():
         self.loadResourceTemplates(rfr )
         self.loadSessionServiceDatabase(rfr )
         self.initializeSessionsDict(rfr )
+        self.startSessionReaper(rfr )
         self.hdrs=RfAddHeaders(rfr)
         self.magic="123456"
 
     def loadResourceTemplates( self, rfr ):
         #load SessionService Template
-        indxFilePath=os.path.join(rfr.baseDataPath,"templates", "SessionService.json")
-        if os.path.isfile(indxFilePath):
-            self.sessionServiceTemplate=json.loads( open(indxFilePath,"r").read() )
-        else:
+        self.sessionServiceTemplate=rfr.baseData.readJson("templates", "SessionService.json")
+        if self.sessionServiceTemplate is None:
+            indxFilePath=os.path.join(rfr.baseDataPath,"templates", "SessionService.json")
             self.rfr.logMsg("CRITICAL","*****ERROR: SessionService: Json Data file:{} Does not exist. Exiting.".format(indxFilePath))
             sys.exit(10)
 
         #load Sessions Collection Template
-        indxFilePath=os.path.join(rfr.baseDataPath,"templates", "SessionCollection.json")
-        if os.path.isfile(indxFilePath):
-            self.sessionsCollectionTemplate=json.loads( open(indxFilePath,"r").read() )
-        else:
+        self.sessionsCollectionTemplate=rfr.baseData.readJson("templates", "SessionCollection.json")
+        if self.sessionsCollectionTemplate is None:
+            indxFilePath=os.path.join(rfr.baseDataPath,"templates", "SessionCollection.json")
             self.rfr.logMsg("CRITICAL","*****ERROR: SessionService: Json Data file:{} Does not exist. Exiting.".format(indxFilePath))
             sys.exit(10)
 
         #load Session Entry Template
-        indxFilePath=os.path.join(rfr.baseDataPath,"templates", "Session.json")
-        if os.path.isfile(indxFilePath):
-            self.sessionEntryTemplate=json.loads( open(indxFilePath,"r").read() )
-        else:
+        self.sessionEntryTemplate=rfr.baseData.readJson("templates", "Session.json")
+        if self.sessionEntryTemplate is None:
+            indxFilePath=os.path.join(rfr.baseDataPath,"templates", "Session.json")
             self.rfr.logMsg("CRITICAL","*****ERROR: SessionService: Json Data file:{} Does not exist. Exiting.".format(indxFilePath))
             sys.exit(10)
         
+    # the sessionServiceDb is an RfPersistentDict:  its changes are written with persist(key).  see persistentDb.py
     def loadSessionServiceDatabase(self,rfr ):
         sessionServiceDbFilename="SessionServiceDb.json"
-        self.sessionServiceDbFilePath=os.path.join(rfr.varDataPath,"db", sessionServiceDbFilename )
-        if os.path.isfile(self.sessionServiceDbFilePath):
-            self.sessionServiceDb=json.loads( open(self.sessionServiceDbFilePath,"r").read() )
-        else:
-            self.rfr.logMsg("WARNING",
-               "*****WARNING: Json Data file:{} Does not exist. Creating default.".format(self.sessionServiceDbFilePath))
-            # read the data in from the default database dir with the rm-tools package
-            dfltDbFilePath=os.path.join(rfr.baseDataPath,"db", sessionServiceDbFilename)
-            if os.path.isfile(dfltDbFilePath):
-                self.sessionServiceDb=json.loads( open(dfltDbFilePath,"r").read() )
-            else:
-                self.rfr.logMsg("CRITICAL","*****ERROR: Default Json Database file:{} Does not exist. Exiting.".format(dfltDbFilePath))
-                sys.exit(10)
-            #write the data back out to the var directory where the dynamic db info is kept
-            sessionServiceDbJson=json.dumps(self.sessionServiceDb,indent=4)
-            with open( self.sessionServiceDbFilePath, 'w', encoding='utf-8') as f:
-                f.write(sessionServiceDbJson)
+        self.sessionServiceDbFilePath,self.sessionServiceDb=rfLoadPersistentDb(rfr, "db", sessionServiceDbFilename)
 
     def initializeSessionsDict(self,rfr):
-        # this is the in-memory database of open sessions
-        # the sessionsDict is an dict indexed by   sessionsDict[sessionId][<sessionParameters>]
-        #   self.sessionsDict[sessionid]=
-        #       { "UserName": username,      "UserPrivileges": userPrivileges, "AccountId": accountid,
-        #         "X-Auth-Token": authtoken, "LocationUri": locationUri,     "LastAccessTime": lastAccessTime }
-        self.sessionsDict=dict() #create an empty dict of session entries
+        # the open sessions are kept in the session store selected by SessionStore in RedDrum.conf:
+        #   "memory" keeps them in this process.  "sqlite" keeps them in a database shared by all server workers
+        #   see sessionStore.py for the sessionEntry properties
+        # sessions must only be added with addSession() and removed with removeSession()
+        #   the memory store keeps the Sessions collection Members in the sessionsView as sessions are added and removed
+        sessionsView=RfCollectionView(rfr, self.sessionsCollectionTemplate, "/redfish/v1/SessionService/Sessions/")
+        self.sessionStore=rfCreateSessionStore(rfr, sessionsView)
+
+        # held while the SessionService resource is patched
+        self.sessionsLock=threading.RLock()
+
+        # with DatabaseEngine=sqlite, other server workers may patch the SessionTimeout (see persistentDb.py)
+        self.sessionServiceDb.setRefreshHandler(self.sessionsLock, self.sessionServiceRefreshed)
+        # its ETag is the same on all workers (see resourceGenerations.py)
+        self.rdr.resourceGenerations.setDbSource("/redfish/v1/SessionService", self.sessionServiceDb)
+
+    # refresh handler of the sessionServiceDb:  called with the sessionsLock held
+    def sessionServiceRefreshed(self, keys):
+        self.rdr.resourceGenerations.bump("/redfish/v1/SessionService")
+        # the session reaper reschedules for the new timeout
+        self.sessionReaperWakeup.set()
+        return(0)
+
+    # digest of an X-Auth-Token.  the session store indexes sessions by it
+    def tokenDigest(self, authtoken):
+        return(hashlib.sha256(authtoken.encode('utf-8')).digest())
+
+    # add a session to the session store
+    def addSession(self, sessionid, sessionEntry):
+        sessionEntry["TokenDigest"]=self.tokenDigest(sessionEntry["X-Auth-Token"])
+        wasEmpty = (self.sessionStore.count()==0)
+        self.sessionStore.add(sessionid, sessionEntry)
+        # if there were no sessions, the reaper is sleeping with no timeout. wake it to schedule this session
+        if wasEmpty is True:
+            self.sessionReaperWakeup.set()
+        return(0)
+
+    # remove a session from the session store.  used for logout and session expiry
+    def removeSession(self, sessionid):
+        self.sessionStore.remove(sessionid)
+        return(0)
+
+    # update a session's LastAccessTime
+    def touchSession(self, sessionid, sessionEntry, currentTime):
+        self.sessionStore.touch(sessionid, sessionEntry, currentTime)
+        return(0)
+
+    # remove all sessions that have timed-out
+    #   returns: the time the oldest remaining session will expire, or None if there are no sessions
+    def reapExpiredSessions(self, currentTime=None):
+        if currentTime is None:
+            currentTime=int(time.time())
+        return(self.sessionStore.reapExpired(currentTime, self.sessionServiceDb["SessionTimeout"]))
+
+    # restore the sessions kept from the last run, if SessionCheckpointInterval is set.  then start the checkpoint thread
+    #   a session is dropped if it has expired, or its account no longer exists, is not enabled, or can't login.
+    #   the privileges of the others are updated from their account's current role
+    #   called by the serviceRoot after the accountService is created
+    def restoreSessions(self, rfr, accountService):
+        self.sessionCheckpointFilePath=os.path.join(rfr.varDataPath, "db", "SessionsCheckpoint.json")
+        if rfr.sessionCheckpointInterval > 0:
+            startTime=time.time()
+            currentTime=int(startTime)
+            sessionTimeout=self.sessionServiceDb["SessionTimeout"]
+            try:
+                sessions=self.sessionStore.loadCheckpoint(self.sessionCheckpointFilePath)
+            except (OSError, ValueError, KeyError) as e:
+                rfr.logMsg("WARNING","*****WARNING: sessions not restored. bad checkpoint {}: {}".format(
+                           self.sessionCheckpointFilePath, str(e)))
+                sessions=list()
+            restored=0
+            for sessionid,sessionEntry in sessions:
+                rc,userPrivileges,userPrivilegeMask=accountService.getSessionAccountInfo(sessionEntry["AccountId"],
+                                                                                        sessionEntry["UserName"])
+                if (rc != 0) or self.sessionStore.isExpired(sessionEntry, currentTime, sessionTimeout):
+                    self.removeSession(sessionid)
+                    continue
+                sessionEntry["UserPrivileges"]=userPrivileges
+                sessionEntry["UserPrivilegeMask"]=userPrivilegeMask
+                self.sessionStore.add(sessionid, sessionEntry)
+                restored+=1
+            self.sessionReaperWakeup.set()
+            rfr.logMsg("INFO","SessionService: restored {} of {} checkpointed sessions in {:.1f} ms".format(
+                       restored, len(sessions), 1000.0*(time.time()-startTime)))
+        self.startSessionCheckpointer(rfr)
+        return(0)
+
+    # start the session checkpoint thread:  it checkpoints the sessions every SessionCheckpointInterval secs
+    def startSessionCheckpointer(self, rfr):
+        self.sessionCheckpointStop=threading.Event()
+        self.sessionCheckpointThread=None
+        if rfr.sessionCheckpointInterval > 0:
+            self.sessionCheckpointThread=threading.Thread(target=self.sessionCheckpointLoop, name="RdSessionCheckpoint",
+                                                          args=(self.sessionCheckpointStop,), daemon=True)
+            self.sessionCheckpointThread.start()
+        return(0)
+
+    # stop the session checkpoint thread.  the parent of the server workers stops it before it forks them:
+    #   the workers have the sessions, and the parent's copy would be out of date
+    #   it waits for the thread to exit, so a worker is never forked while the thread holds the session store lock
+    def stopSessionCheckpointer(self):
+        self.sessionCheckpointStop.set()
+        if self.sessionCheckpointThread is not None:
+            self.sessionCheckpointThread.join()
+            self.sessionCheckpointThread=None
+        return(0)
+
+    def sessionCheckpointLoop(self, stopEvent):
+        while not stopEvent.wait(self.rdr.sessionCheckpointInterval):
+            self.checkpointSessions()
+
+    # write the session checkpoint.  also called when the server stops
+    def checkpointSessions(self):
+        if (self.rdr.sessionCheckpointInterval > 0) and (not self.sessionCheckpointStop.is_set()):
+            try:
+                self.sessionStore.checkpoint(self.sessionCheckpointFilePath)
+            except OSError as e:
+                self.rdr.logMsg("ERROR","SessionService: error writing the session checkpoint: {}".format(str(e)))
+        return(0)
+
+    # start the session reaper thread
+    #   it sleeps until the oldest session is due to expire, then reaps expired sessions.
+    #   the sleep is cut short if a session is added to an empty session store, or if SessionTimeout is changed
+    def startSessionReaper(self, rfr):
+        self.sessionReaperWakeup=threading.Event()
+        self.sessionReaperStop=threading.Event()
+        self.sessionReaperThread=threading.Thread(target=self.sessionReaperLoop, name="RdSessionReaper",
+                                                  args=(self.sessionReaperStop,), daemon=True)
+        self.sessionReaperThread.start()
+        return(0)
+
+    # stop the session reaper thread.  the parent of the server workers stops it before it forks them (each worker
+    #   starts its own):  it waits for the thread to exit, so a worker is never forked while the reaper holds a lock
+    def stopSessionReaper(self):
+        self.sessionReaperStop.set()
+        self.sessionReaperWakeup.set()
+        self.sessionReaperThread.join()
+        return(0)
+
+    def sessionReaperLoop(self, stopEvent):
+        while not stopEvent.is_set():
+            nextExpireTime=self.reapExpiredSessions()
+            if nextExpireTime is None:
+                sleepTime=None
+            else:
+                sleepTime=max(0, nextExpireTime - time.time())
+            self.sessionReaperWakeup.wait(sleepTime)
+            self.sessionReaperWakeup.clear()
             
     # GET SessionService
     def getSessionServiceResource(self,request):
         # generate headers
-        hdrs = self.hdrs.rfRespHeaders(request, contentType="json", resource=self.sessionServiceTemplate, allow="GetPatch")
+        etagValue=self.rdr.resourceGenerations.etag("/redfish/v1/SessionService")
+        hdrs = self.hdrs.rfRespHeaders(request, contentType="json", resource=self.sessionServiceTemplate, allow="GetPatch",
+                                       strongEtag=etagValue)
+        if rfIfNoneMatch(request, etagValue) is True:
+            return(0,304,"","",hdrs)
 
         # Process HEAD method
         if request.method=="HEAD":
@@ -101,104 +237,116 @@ class RfSessionService():
         resData2["SessionTimeout"]=self.sessionServiceDb["SessionTimeout"]
 
         # create the response json data and return
-        resp=json.dumps(resData2,indent=4)
+        resp=self.rdr.jsonSerializer.dumps(resData2)
 
         # generate the headers and return the response
         return(0,200,"",resp,hdrs)
 
     # PATCH SessionService
     def patchSessionServiceResource(self, request, patchData):
-        # generate headers
-        hdrs = self.hdrs.rfRespHeaders(request)
-
-        #first verify client didn't send us a property we cant patch
-        for key in patchData:
-            if( key != "SessionTimeout" ):
-                return (4, 400, "Bad Request-Invalid Patch Property Sent", "", hdrs)
-        # now patch the valid properties sent
-        if( "SessionTimeout" in patchData):
-            newVal=patchData['SessionTimeout']
-            if( (newVal < 30) or (newVal >86400) ):
-                return(4, 400, "Bad Request-not in correct range", "", hdrs)
+        with self.sessionsLock:
+            # generate headers
+            hdrs = self.hdrs.rfRespHeaders(request)
+
+            # if the request has an If-Match header, verify the SessionService was not modified since the client read it
+            if rfIfMatch(request, self.rdr.resourceGenerations.etag("/redfish/v1/SessionService")) is not True:
+                return (4, 412, "Precondition Failed-If-Match", "", hdrs)
+
+            #first verify client didn't send us a property we cant patch
+            for key in patchData:
+                if( key != "SessionTimeout" ):
+                    return (4, 400, "Bad Request-Invalid Patch Property Sent", "", hdrs)
+            # now patch the valid properties sent
+            if( "SessionTimeout" in patchData):
+                newVal=patchData['SessionTimeout']
+                if( (newVal < 30) or (newVal >86400) ):
+                    return(4, 400, "Bad Request-not in correct range", "", hdrs)
+                else:
+                    # the data is good and in range, save it and return ok
+                    self.sessionServiceDb["SessionTimeout"]=newVal
+                    self.rdr.resourceGenerations.bump("/redfish/v1/SessionService")
+
+                    # wake the session reaper so it reschedules for the new timeout
+                    self.sessionReaperWakeup.set()
+
+                    # journal the change to the sessionService database
+                    self.sessionServiceDb.persist("SessionTimeout")
+
+                    # return to URI handling OK, with no content
+                    return(0, 204, "", "", hdrs)
             else:
-                # the data is good and in range, save it and return ok
-                self.sessionServiceDb["SessionTimeout"]=newVal
-
-                # write the data back out to the sessionService database file
-                sessionServiceDbJson=json.dumps(self.sessionServiceDb,indent=4)
-                with open( self.sessionServiceDbFilePath, 'w', encoding='utf-8') as f:
-                    f.write(sessionServiceDbJson)
-
-                # return to URI handling OK, with no content
-                return(0, 204, "", "", hdrs)
-        else:
-            return (4, 400, "Bad Request-Invalid Patch Property Sent", "", hdrs)
+                return (4, 400, "Bad Request-Invalid Patch Property Sent", "", hdrs)
 
 
     # getSessionAuthInfo()
-    #   returns: rc, errMsgString, sessionId, authToken, userPrivileges, accountId, username
+    #   returns: rc, errMsgString, sessionId, authToken, userPrivileges, accountId, username, userPrivilegeMask
     #      rc=404 if sessionId is invalid.  
     #      rc=401 if authToken is invalid or mismatches sessionid, or session is expired
-    #   self.sessionsDict[sessionid]={"UserName": username, "UserPrivileges": userPrivileges, 
-    #       "AccountId": accountid,
-    #       "X-Auth-Token": authtoken, "LocationUri": locationUri, "LastAccessTime": lastAccessTime}
+    #   the sessionEntry properties are described in sessionStore.py
     def getSessionAuthInfo(self,sessionid=None, authtoken=None ):
         storedAuthToken=None
         storedSessionId=None
         storedPrivileges=None
         # if sessionid is not None, verify that the sessionId is valid
+        #   get the session entry once, since the session reaper may remove it at any time
         if sessionid is not None:
-            if sessionid not in self.sessionsDict:
-                return(404, "SessionId Not Found",None,None,None,None,None)
+            sessionEntry=self.sessionStore.get(sessionid)
+            if sessionEntry is None:
+                return(404, "SessionId Not Found",None,None,None,None,None,None)
             else:
                 #the sessionid exists, so get associated authToken
+                #  (the sqlite session store only keeps the token digest)
                 storedSessionId=sessionid
-                storedAuthToken=self.sessionsDict[sessionid]["X-Auth-Token"]
-                storedPrivileges=self.sessionsDict[sessionid]["UserPrivileges"]
-                storedUserName=self.sessionsDict[sessid]["UserName"]
-                storedAccountId=self.sessionsDict[sessid]["AccountId"]
-                # if authtoken was also passed in, check if it matches the stored value
+                storedAuthToken=sessionEntry.get("X-Auth-Token")
+                storedPrivileges=sessionEntry["UserPrivileges"]
+                storedUserName=sessionEntry["UserName"]
+                storedAccountId=sessionEntry["AccountId"]
+                storedPrivilegeMask=sessionEntry["UserPrivilegeMask"]
+                # if authtoken was also passed in, check if its digest matches the stored value
                 if authtoken is not None:
-                    if(authtoken != storedAuthToken):
-                        return(401, "Not Authroized-AuthToken Incorrect",None,None,None,None,None)
+                    if hmac.compare_digest(self.tokenDigest(authtoken), sessionEntry["TokenDigest"]) is not True:
+                        return(401, "Not Authroized-AuthToken Incorrect",None,None,None,None,None,None)
+                    storedAuthToken=authtoken
 
         # else if authtoken is not None, look it up, verify it exists
         elif authtoken is not None:
             # case where sessionid was not passed in, but authtoken was
-            # we need to go lookup authtoken w/o sessionid
+            # we need to go lookup authtoken w/o sessionid -- the session store is indexed by the token digest
+            #   then compare the digests in constant time
             foundToken=False
-            for sessid in self.sessionsDict:
-                if( self.sessionsDict[sessid]["X-Auth-Token"] == authtoken ):
+            authTokenDigest=self.tokenDigest(authtoken)
+            sessid,sessionEntry=self.sessionStore.getByTokenDigest(authTokenDigest)
+            if sessionEntry is not None:
+                if hmac.compare_digest(sessionEntry["TokenDigest"], authTokenDigest):
                     foundToken=True
                     storedSessionId=sessid
-                    storedAuthToken=self.sessionsDict[sessid]["X-Auth-Token"]
-                    storedPrivileges=self.sessionsDict[sessid]["UserPrivileges"]
-                    storedUserName=self.sessionsDict[sessid]["UserName"]
-                    storedAccountId=self.sessionsDict[sessid]["AccountId"]
-                    break
+                    storedAuthToken=authtoken
+                    storedPrivileges=sessionEntry["UserPrivileges"]
+                    storedUserName=sessionEntry["UserName"]
+                    storedAccountId=sessionEntry["AccountId"]
+                    storedPrivilegeMask=sessionEntry["UserPrivilegeMask"]
             if foundToken is False:
-                return(401, "Not Authroized-Token Not Found",None,None,None,None,None)
+                return(401, "Not Authroized-Token Not Found",None,None,None,None,None,None)
 
         # else, both sessionid and authtoken are None, which is invalid call
         else:
-            return(500, "Invalid Auth Check",None,None,None,None,None)
+            return(500, "Invalid Auth Check",None,None,None,None,None,None)
 
         # verify that the session has not expired
         currentTime=int(time.time())
-        lastAccessTime=self.sessionsDict[storedSessionId]["LastAccessTime"]
         sessionTimeout=self.sessionServiceDb["SessionTimeout"] 
-        if( (currentTime - lastAccessTime) > sessionTimeout ):
+        if self.sessionStore.isExpired(sessionEntry, currentTime, sessionTimeout):
             # it timed out.  delete the session, and return unauthorized
-            del self.sessionsDict[storedSessionId]
+            self.removeSession(storedSessionId)
             # return 404 since we deleted the session and the uri is no longer valid
-            return(404, "Session Not Found-Expired",None,None,None,None,None)
+            return(404, "Session Not Found-Expired",None,None,None,None,None,None)
         else:
             #else-update the timestamp--to indicate the session was used
-            self.sessionsDict[storedSessionId]["LastAccessTime"]=currentTime
+            self.touchSession(storedSessionId, sessionEntry, currentTime)
 
         # if here, all ok, return privileges
-        #returns: rc, errMsgString, sessionId, authToken, userPrivileges
-        return(0, "OK", storedSessionId, storedAuthToken, storedPrivileges, storedAccountId, storedUserName )
+        #returns: rc, errMsgString, sessionId, authToken, userPrivileges, accountId, username, userPrivilegeMask
+        return(0, "OK", storedSessionId, storedAuthToken, storedPrivileges, storedAccountId, storedUserName, storedPrivilegeMask )
 
 
     # ------------Session Collection Functions----------------
@@ -245,6 +393,9 @@ class RfSessionService():
 
         # now verify that the login credentials are valid and get the privileges
         rc,errMsg,accountid,roleId,userPrivileges=self.rfr.root.accountService.getAccountAuthInfo(username,password)
+        if( rc == 503 ): # the password hasher is overloaded
+            return(4, 503, "Service Unavailable--Password Hasher Overloaded","",
+                   self.rfr.root.accountService.passwordHasher.addRetryAfterHdr(errhdrs))
         if( rc != 0 ): # unauthenticated
             return(4, 401, "Unauthorized--invalid user or password","", errhdrs)
 
@@ -263,9 +414,12 @@ class RfSessionService():
         # Generate the location header
         locationUri="/redfish/v1/SessionService/Sessions/" + sessionid
 
-        # add the new session entry to add to the sessionsDict
-        self.sessionsDict[sessionid]={"UserName": username, "UserPrivileges": userPrivileges, "AccountId": accountid,
-                  "X-Auth-Token": authtoken, "LocationUri": locationUri, "LastAccessTime": lastAccessTime}
+        # add the new session entry to the session store
+        #   the privilege mask of the user's role is cached in the session so token auth doesn't recompile it
+        userPrivilegeMask=self.rfr.root.accountService.getRolePrivilegeMask(roleId)
+        self.addSession(sessionid, {"UserName": username, "UserPrivileges": userPrivileges, "AccountId": accountid,
+                  "X-Auth-Token": authtoken, "LocationUri": locationUri, "LastAccessTime": lastAccessTime,
+                  "UserPrivilegeMask": userPrivilegeMask})
 
         # get the response data
         rc,status,msg,respData,respHdr=self.getSessionEntry(request, sessionid)
@@ -289,38 +443,30 @@ class RfSessionService():
         if request.method=="HEAD":
             return(0,200,"","",hdrs)
 
-        # the routine copies a template file with the static redfish parameters
-        # then it updates the dynamic properties from the sessionsDict
-        # for SessionCollection GET, build the Members array
-
-        # first walk the sessionsDict and check if any sessions have timed-out.
-        # If any session has timed-out, delete it now
-        currentTime=int(time.time())
-        sessionTimeout=self.sessionServiceDb["SessionTimeout"]
-        sessDict2=dict(self.sessionsDict)
-        for sessionid in sessDict2.keys():
-            # check if this session entry has timed-out.   If so, delete it.
-            lastAccessTime=sessDict2[sessionid]["LastAccessTime"]
-            if( (currentTime - lastAccessTime) > sessionTimeout ):
-                # this session is timed out.  remove it from the original sessionDict
-                del self.sessionsDict[sessionid]
-
-        # Then copy the sessionsCollection template file (which has an empty sessions array)
+        # first remove any sessions that have timed-out but the reaper thread has not gotten to yet
+        #   this only looks at the oldest sessions--not the whole session store
+        self.reapExpiredSessions()
+
+        # the memory store keeps the Members array, and the json response, in its sessionsView
+        #   it returns the page of the collection if the request has $skip or $top
+        if self.sessionStore.sessionsView is not None:
+            return(self.sessionStore.sessionsView.getResponse(request, hdrs))
+
+        # otherwise copy the sessionsCollection template and build the Members array (or the page) from the session store
+        rc,skip,top=rfCollectionPagingParams(request)
+        if rc != 0:
+            return(4, 400, "Bad Request-invalid $skip or $top query parameter", "", hdrs)
+        locationUris=self.sessionStore.getLocationUris()
+        members,nextLink=rfCollectionPage(self.rdr, request, "/redfish/v1/SessionService/Sessions",
+                                          ({"@odata.id": locationUri} for locationUri in locationUris), len(locationUris), skip, top)
         resData2=dict(self.sessionsCollectionTemplate)
-        count=0
-        # now walk through the entries in the sessionsDict and built the sessionsCollection Members array
-        # not that it starts out an empty array
-        for sessionEntry in self.sessionsDict.keys():
-            # increment members count, and create the member for the next entry
-            count=count+1
-            newMember=[{"@odata.id": self.sessionsDict[sessionEntry]["LocationUri"] } ]
-
-            # add the new member to the members array we are building
-            resData2["Members"] = resData2["Members"] + newMember
-        resData2["Members@odata.count"]=count
+        resData2["Members@odata.count"]=len(locationUris)
+        resData2["Members"]=members
+        if nextLink is not None:
+            resData2["Members@odata.nextLink"]=nextLink
 
         # convert to json
-        jsonRespData2=json.dumps(resData2,indent=4)
+        jsonRespData2=self.rdr.jsonSerializer.dumps(resData2)
 
         return(0, 200, "",jsonRespData2, hdrs)
 
@@ -330,20 +476,17 @@ class RfSessionService():
         errhdrs=self.hdrs.rfRespHeaders(request)
 
         # First: verify that the sessionId is valid
-        if sessionid not in self.sessionsDict:
+        sessionEntry=self.sessionStore.get(sessionid)
+        if sessionEntry is None:
             return(4, 404, "Not Found", "",errhdrs)
 
         # Second: Check if the session has timed-out.
-        # If it has timed-out, delete it now, and re-check if session is not found
+        # If it has timed-out, delete it now, and return not found
         currentTime=int(time.time())
         sessionTimeout=self.sessionServiceDb["SessionTimeout"]
-        lastAccessTime=self.sessionsDict[sessionid]["LastAccessTime"]
-        if( (currentTime - lastAccessTime) > sessionTimeout ):
-            # this session is timed out.  remove it from the sessionDict
-            del self.sessionsDict[sessionid]
-
-        # re-verify if the session exists - since we may have just removed it
-        if sessionid not in self.sessionsDict:
+        if self.sessionStore.isExpired(sessionEntry, currentTime, sessionTimeout):
+            # this session is timed out.  remove it from the session store
+            self.removeSession(sessionid)
             return(4, 404, "Not Found", "",errhdrs)
 
         # generate header info
@@ -359,26 +502,24 @@ class RfSessionService():
         resData["Name"]="Session Resource"
         resData["Description"]="Resource for a specific session that was created"
         resData["Id"]=sessionid
-        resData["UserName"]=self.sessionsDict[sessionid]["UserName"]
-        resData["@odata.id"]=self.sessionsDict[sessionid]["LocationUri"]
+        resData["UserName"]=sessionEntry["UserName"]
+        resData["@odata.id"]=sessionEntry["LocationUri"]
 
         # convert to json
-        jsonRespData=(json.dumps(resData,indent=4))
+        jsonRespData=(self.rdr.jsonSerializer.dumps(resData))
 
         return(0, 200, "", jsonRespData, respHdrs)
 
     # Delete Session,  logout,  delete the session
     #   all we have to do is verify the sessionid is correct--
-    #   and then, if it is valid, delete the entry for that sessionid from the sessionsDict
-    #   For reference:  self.sessionsDict[sessionid]=
-    #       { "UserName": username,      "UserPrivileges": userPrivileges, "AccountId": accountid,
-    #         "X-Auth-Token": authtoken, "LocationUri": locationUri,     "LastAccessTime": lastAccessTime }
+    #   and then, if it is valid, delete the entry for that sessionid from the session store
     def deleteSession(self, request, sessionid):
         # generate the headers
         hdrs=self.hdrs.rfRespHeaders(request)
 
         # First, verify that the sessionid is valid
-        if sessionid not in self.sessionsDict:
+        sessionEntry=self.sessionStore.get(sessionid)
+        if sessionEntry is None:
             return(4, 404, "Not Found","",hdrs)
 
         # verify authorization credentials
@@ -387,14 +528,16 @@ class RfSessionService():
         #   if user privileges do not include ConfigureManager, but do include Login, 
         #        then ONLY execute the API if the session belongs to "This User"  
         isAuthorized=False
-        if "ConfigureManager" in self.rdr.root.accountService.currentUserPrivileges:
+        #   the authenticated user is saved in the request context by the auth verify callbacks
+        currentUserAccountId,currentUserPrivileges,currentUserPrivilegeMask=rfGetCurrentUser()
+        if "ConfigureManager" in currentUserPrivileges:
             # this user has admin privileges for the sessions so it can delete any users session
             isAuthorized=True
-        elif "Login" in self.rdr.root.accountService.currentUserPrivileges:
+        elif "Login" in currentUserPrivileges:
             # this user only has privileges to delete its own sessions.  
             # check if sessionid is owned by the authenticated user
-            sessionAccountId = self.sessionsDict[sessionid]["AccountId"]
-            if sessionAccountId == self.rdr.root.accountService.currentUserAccountId:
+            sessionAccountId = sessionEntry.get("AccountId")
+            if sessionAccountId == currentUserAccountId:
                 # this user only has privileges to delete its own sessions
                 isAuthorized=True
 
@@ -403,7 +546,7 @@ class RfSessionService():
             return(4, 403, "Forbidden-Privileges not sufficient","",hdrs)
             
         # if here, authorization passesd.  delete the session and return 204   
-        del self.sessionsDict[sessionid]
+        self.removeSession(sessionid)
 
         return(0, 204, "No Content", "", hdrs)
 
@@ -0,0 +1,266 @@
+
+# Copyright Notice:
+#    Copyright 2018 Dell, Inc. All rights reserved.
+#    License: BSD License.  For full license text see link: https://github.com/RedDrum-Redfish-Project/RedDrum-Frontend/LICENSE.txt
+
+import os
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from .persistentDb import rfWriteSnapshotFile
+
+# session stores used by the sessionService to keep the open sessions
+#    RfMemorySessionStore - sessions are kept in a dict in the process.  (the default)
+#    RfSqliteSessionStore - sessions are kept in a SQLite database file in WAL mode, so they are shared by all
+#                           server worker processes (ServerWorkers > 1) on the same host
+#
+#    both stores have the same methods:
+#       add(sessionid, sessionEntry)            - add a session.  sessionEntry["TokenDigest"] must be set
+#       remove(sessionid)                       - remove a session
+#       get(sessionid)                          - returns the sessionEntry, or None
+#       getByTokenDigest(tokenDigest)           - returns sessionid, sessionEntry   or None,None
+#       touch(sessionid, sessionEntry, curTime) - update the session LastAccessTime
+#       isExpired(sessionEntry, curTime, sessionTimeout)
+#       reapExpired(curTime, sessionTimeout)    - remove expired sessions. returns the next expire time or None
+#       getLocationUris()                       - returns the LocationUri of each session, oldest first
+#       count()
+#       checkpoint(filePath)                    - save the sessions so they are kept across a service restart
+#       loadCheckpoint(filePath)                - returns the sessions saved by the last run:  a list of sessionid,sessionEntry
+#    and sessionsView: the RfCollectionView of the Sessions collection kept up to date by the store, or None
+#       if the store can't keep it (sessions added or removed by other worker processes)
+#
+#    a sessionEntry is a dict:
+#       { "UserName": username,      "UserPrivileges": userPrivileges, "AccountId": accountid,
+#         "X-Auth-Token": authtoken, "LocationUri": locationUri,     "LastAccessTime": lastAccessTime,
+#         "TokenDigest": tokenDigest, "UserPrivilegeMask": userPrivilegeMask }
+#    the SQLite store does not write the X-Auth-Token to the database--only its digest--so it returns entries without it
+#
+#    sessions are kept across a service restart if SessionCheckpointInterval is set in RedDrum.conf:
+#       the memory store writes its sessions to a checkpoint file (see checkpoint()).  the sqlite store keeps its database
+#       in either case the X-Auth-Token is not saved--only its digest--so restored entries do not have it
+
+
+# create the session store selected by SessionStore in RedDrum.conf
+#   sessionsView = the RfCollectionView of the Sessions collection.  the memory store adds and removes its members
+def rfCreateSessionStore(rfr, sessionsView=None):
+    if rfr.sessionStore == "sqlite":
+        dbFilePath=os.path.join(rfr.varDataPath, "db", "SessionStore.sqlite")
+        return(RfSqliteSessionStore(dbFilePath, rfr.sessionTouchInterval, keepSessions=(rfr.sessionCheckpointInterval > 0)))
+    elif rfr.sessionStore != "memory":
+        rfr.logMsg("WARNING","*****WARNING: SessionStore: {} is not supported. Using memory".format(rfr.sessionStore))
+    return(RfMemorySessionStore(sessionsView))
+
+
+# RfMemorySessionStore(sessionsView=None)
+#    self.sessionsDict[sessionid]=sessionEntry
+#      the sessionsDict is kept ordered by LastAccessTime (oldest first): a session is moved to the end when it is used.
+#      since SessionTimeout is the same for all sessions, sessions expire in this order,
+#      so expired sessions are always at the front and the reaper never has to scan the whole dict
+#    self.sessionIdByTokenDigest[tokenDigest]=sessionid
+#      index used to find the session for an X-Auth-Token without walking the sessionsDict
+#    self.sessionsView: the Sessions collection Members.  updated when a session is added or removed (incl. expiry)
+#    self.changes: counts the changes to the sessions, so checkpoint() only writes the file if they changed
+class RfMemorySessionStore():
+    def __init__(self, sessionsView=None):
+        self.touchInterval=0         # LastAccessTime is updated on every request
+        self.sessionsView=sessionsView
+        self.sessionsDict=OrderedDict()
+        self.sessionIdByTokenDigest=dict()
+        self.lock=threading.RLock()  # the session reaper thread and URI handlers both modify the sessionsDict
+        self.changes=0
+        self.checkpointChanges=None
+
+    def add(self, sessionid, sessionEntry):
+        with self.lock:
+            self.sessionsDict[sessionid]=sessionEntry
+            self.sessionIdByTokenDigest[sessionEntry["TokenDigest"]]=sessionid
+            if self.sessionsView is not None:
+                self.sessionsView.add(sessionid)
+            self.changes+=1
+        return(0)
+
+    def remove(self, sessionid):
+        with self.lock:
+            sessionEntry=self.sessionsDict.pop(sessionid, None)
+            if sessionEntry is not None:
+                self.sessionIdByTokenDigest.pop(sessionEntry["TokenDigest"], None)
+                if self.sessionsView is not None:
+                    self.sessionsView.remove(sessionid)
+                self.changes+=1
+        return(0)
+
+    def get(self, sessionid):
+        return(self.sessionsDict.get(sessionid))
+
+    def getByTokenDigest(self, tokenDigest):
+        sessionid=self.sessionIdByTokenDigest.get(tokenDigest)
+        sessionEntry=self.sessionsDict.get(sessionid) if sessionid is not None else None
+        if sessionEntry is None:
+            return(None, None)
+        return(sessionid, sessionEntry)
+
+    # update the LastAccessTime and move the session to the end of the expiry order
+    def touch(self, sessionid, sessionEntry, curTime):
+        with self.lock:
+            # the reaper may have removed the session since it was looked up
+            if sessionid in self.sessionsDict:
+                self.sessionsDict[sessionid]["LastAccessTime"]=curTime
+                self.sessionsDict.move_to_end(sessionid)
+                self.changes+=1
+        return(0)
+
+    def isExpired(self, sessionEntry, curTime, sessionTimeout):
+        return( (curTime - sessionEntry["LastAccessTime"]) > sessionTimeout )
+
+    # walks the sessionsDict from the oldest session and stops at the first one that has not timed-out,
+    #   so each session is looked at ~once over its life -- amortized O(1) per session
+    def reapExpired(self, curTime, sessionTimeout):
+        with self.lock:
+            while len(self.sessionsDict) > 0:
+                sessionid=next(iter(self.sessionsDict))
+                lastAccessTime=self.sessionsDict[sessionid]["LastAccessTime"]
+                if( (curTime - lastAccessTime) > sessionTimeout ):
+                    self.remove(sessionid)
+                else:
+                    # a session times out when (curTime - lastAccessTime) > sessionTimeout
+                    return(lastAccessTime + sessionTimeout + 1)
+        return(None)
+
+    def getLocationUris(self):
+        with self.lock:
+            return([sessionEntry["LocationUri"] for sessionEntry in self.sessionsDict.values()])
+
+    def count(self):
+        return(len(self.sessionsDict))
+
+    # write the sessions to the checkpoint file, oldest first, if they changed since the last checkpoint
+    #   the file has the TokenDigest (hex) of each session, not its X-Auth-Token, and only the service user can read it
+    def checkpoint(self, filePath):
+        with self.lock:
+            if self.changes == self.checkpointChanges:
+                return(0)
+            changes=self.changes
+            sessions=list()
+            for sessionid,sessionEntry in self.sessionsDict.items():
+                savedEntry={prop: value for prop,value in sessionEntry.items() if prop != "X-Auth-Token"}
+                savedEntry["TokenDigest"]=sessionEntry["TokenDigest"].hex()
+                sessions.append([sessionid, savedEntry])
+        rfWriteSnapshotFile(filePath, {"Sessions": sessions})
+        os.chmod(filePath, 0o600)
+        self.checkpointChanges=changes
+        return(0)
+
+    def loadCheckpoint(self, filePath):
+        if not os.path.isfile(filePath):
+            return([])
+        with open(filePath, "r", encoding="utf-8") as f:
+            sessions=json.loads(f.read())["Sessions"]
+        for sessionid,sessionEntry in sessions:
+            sessionEntry["TokenDigest"]=bytes.fromhex(sessionEntry["TokenDigest"])
+        return(sessions)
+
+
+# RfSqliteSessionStore(dbFilePath, touchInterval)
+#    sessions are kept in a SQLite database file shared by all worker processes
+#      - the database is in WAL mode so token lookups from all workers run while another worker writes
+#      - token lookups use the unique index on TokenDigest, expiry uses the index on LastAccessTime
+#    touchInterval = secs. the LastAccessTime of a session is only written to the database if it is older than this,
+#      so a client sending many requests does not write the database on every request.
+#      sessions expire touchInterval secs late at most, never early
+#
+#    the database is cleared when the store is created, so sessions do not survive a service restart--unless
+#      keepSessions is set (SessionCheckpointInterval > 0).  then the sessions in the database are kept, and every change
+#      is already written:  there is nothing to checkpoint
+#    the server workers fork after the store is created, and each opens its own connection per thread
+class RfSqliteSessionStore():
+    def __init__(self, dbFilePath, touchInterval=5, keepSessions=False):
+        self.sessionsView=None       # other workers add and remove sessions, so the Members are read from the database
+        self.dbFilePath=dbFilePath
+        self.touchInterval=touchInterval if touchInterval is not None else 0
+        self.local=threading.local()
+        conn=self.getConnection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS Sessions ("
+                     " SessionId TEXT PRIMARY KEY, TokenDigest BLOB NOT NULL UNIQUE,"
+                     " UserName TEXT, UserPrivileges TEXT, AccountId TEXT, LocationUri TEXT,"
+                     " LastAccessTime INTEGER NOT NULL, UserPrivilegeMask INTEGER)")
+        conn.execute("CREATE INDEX IF NOT EXISTS SessionsLastAccessTime ON Sessions (LastAccessTime)")
+        if keepSessions is not True:
+            conn.execute("DELETE FROM Sessions")
+        # the file holds token digests and user names, so only the service user can read it
+        os.chmod(self.dbFilePath, 0o600)
+
+    # get the connection for this thread, opening it if this thread (or process, after a fork) does not have one
+    def getConnection(self):
+        pid=os.getpid()
+        if getattr(self.local, "pid", None) != pid:
+            # isolation_level=None: each statement is committed when it runs
+            conn=sqlite3.connect(self.dbFilePath, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn=conn
+            self.local.pid=pid
+        return(self.local.conn)
+
+    def rowToSessionEntry(self, row):
+        sessionEntry={ "TokenDigest": row[1], "UserName": row[2], "UserPrivileges": json.loads(row[3]),
+                       "AccountId": row[4], "LocationUri": row[5], "LastAccessTime": row[6], "UserPrivilegeMask": row[7] }
+        return(row[0], sessionEntry)
+
+    def add(self, sessionid, sessionEntry):
+        self.getConnection().execute("INSERT OR REPLACE INTO Sessions VALUES (?,?,?,?,?,?,?,?)",
+            (sessionid, sessionEntry["TokenDigest"], sessionEntry["UserName"], json.dumps(sessionEntry["UserPrivileges"]),
+             sessionEntry["AccountId"], sessionEntry["LocationUri"], sessionEntry["LastAccessTime"],
+             sessionEntry["UserPrivilegeMask"]))
+        return(0)
+
+    def remove(self, sessionid):
+        self.getConnection().execute("DELETE FROM Sessions WHERE SessionId=?", (sessionid,))
+        return(0)
+
+    def get(self, sessionid):
+        row=self.getConnection().execute("SELECT * FROM Sessions WHERE SessionId=?", (sessionid,)).fetchone()
+        if row is None:
+            return(None)
+        return(self.rowToSessionEntry(row)[1])
+
+    def getByTokenDigest(self, tokenDigest):
+        row=self.getConnection().execute("SELECT * FROM Sessions WHERE TokenDigest=?", (tokenDigest,)).fetchone()
+        if row is None:
+            return(None, None)
+        return(self.rowToSessionEntry(row))
+
+    # write coalescing: only write LastAccessTime if the stored value is touchInterval secs old
+    def touch(self, sessionid, sessionEntry, curTime):
+        if (curTime - sessionEntry["LastAccessTime"]) >= self.touchInterval:
+            self.getConnection().execute("UPDATE Sessions SET LastAccessTime=? WHERE SessionId=?", (curTime, sessionid))
+            sessionEntry["LastAccessTime"]=curTime
+        return(0)
+
+    # the stored LastAccessTime may be up to touchInterval secs old, so allow for that
+    def isExpired(self, sessionEntry, curTime, sessionTimeout):
+        return( (curTime - sessionEntry["LastAccessTime"]) > (sessionTimeout + self.touchInterval) )
+
+    def reapExpired(self, curTime, sessionTimeout):
+        conn=self.getConnection()
+        conn.execute("DELETE FROM Sessions WHERE LastAccessTime < ?", (curTime - sessionTimeout - self.touchInterval,))
+        row=conn.execute("SELECT MIN(LastAccessTime) FROM Sessions").fetchone()
+        if row[0] is None:
+            return(None)
+        return(row[0] + sessionTimeout + self.touchInterval + 1)
+
+    def getLocationUris(self):
+        rows=self.getConnection().execute("SELECT LocationUri FROM Sessions ORDER BY LastAccessTime").fetchall()
+        return([row[0] for row in rows])
+
+    def count(self):
+        return(self.getConnection().execute("SELECT COUNT(*) FROM Sessions").fetchone()[0])
+
+    # each change is written to the database
+    def checkpoint(self, filePath):
+        return(0)
+
+    # the sessions kept in the database from the last run (if keepSessions is set)
+    def loadCheckpoint(self, filePath):
+        rows=self.getConnection().execute("SELECT * FROM Sessions ORDER BY LastAccessTime").fetchall()
+        return([list(self.rowToSessionEntry(row)) for row in rows])